@@ -30,11 +30,7 @@ def main(
     pass
 
 
-@app.command()
-def serve(
-    host: str = "0.0.0.0",
-    port: int = 8080,
-):
+def load_secret_key():
     os.environ["FROM_INIT_PY"] = "true"
     if os.getenv("WEBUI_SECRET_KEY") is None:
         typer.echo(
@@ -46,6 +42,14 @@ def serve(
         typer.echo(f"Loading WEBUI_SECRET_KEY from {KEY_FILE}")
         os.environ["WEBUI_SECRET_KEY"] = KEY_FILE.read_text()
 
+
+@app.command()
+def serve(
+    host: str = "0.0.0.0",
+    port: int = 8080,
+):
+    load_secret_key()
+
     if os.getenv("USE_CUDA_DOCKER", "false") == "true":
         typer.echo(
             "CUDA is enabled, appending LD_LIBRARY_PATH to include torch/cudnn & cublas libraries."
@@ -84,6 +88,17 @@ def serve(
     )
 
 
+@app.command()
+def ingestion_worker():
+    """Extract and embed uploaded files queued in Redis, without serving the web UI."""
+    load_secret_key()
+
+    import open_webui.main  # we need set environment variables before importing main
+    from open_webui.utils.ingestion import run_ingestion_worker
+
+    run_ingestion_worker(open_webui.main.app)
+
+
 @app.command()
 def dev(
     host: str = "0.0.0.0",
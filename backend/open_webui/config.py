@@ -3,6 +3,8 @@ import logging
 import os
 import shutil
 import base64
+import threading
+import time
 import redis
 
 from datetime import datetime
@@ -19,6 +21,7 @@ from authlib.integrations.starlette_client import OAuth
 from open_webui.env import (
     DATA_DIR,
     DATABASE_URL,
+    ENABLE_REDIS_CONFIG_CACHE,
     ENV,
     REDIS_URL,
     REDIS_KEY_PREFIX,
@@ -229,6 +232,12 @@ class AppConfig:
 
     _state: dict[str, PersistentConfig]
 
+    # Keys whose local value may be out of date and must be re-read from Redis
+    _stale_keys: set[str]
+    _version: int
+    _listener: Optional[threading.Thread] = None
+    _listener_ready: threading.Event
+
     def __init__(
         self,
         redis_url: Optional[str] = None,
@@ -236,6 +245,11 @@ class AppConfig:
         redis_cluster: Optional[bool] = False,
         redis_key_prefix: str = "open-webui",
     ):
+        super().__setattr__("_state", {})
+        super().__setattr__("_stale_keys", set())
+        super().__setattr__("_version", 0)
+        super().__setattr__("_listener_ready", threading.Event())
+
         if redis_url:
             super().__setattr__("_redis_key_prefix", redis_key_prefix)
             super().__setattr__(
@@ -248,11 +262,95 @@ class AppConfig:
                 ),
             )
 
-        super().__setattr__("_state", {})
+            if ENABLE_REDIS_CONFIG_CACHE:
+                self._start_listener()
+
+    @property
+    def _channel(self) -> str:
+        return f"{self._redis_key_prefix}:config:updates"
+
+    @property
+    def _version_key(self) -> str:
+        return f"{self._redis_key_prefix}:config:version"
+
+    def _start_listener(self):
+        listener = threading.Thread(
+            target=self._listen, name="config-pubsub", daemon=True
+        )
+        super().__setattr__("_listener", listener)
+        listener.start()
+
+    def _listen(self):
+        """
+        Subscribe to config change notifications and mark the changed keys as
+        stale. Whenever the subscription is (re)established, or a gap in the
+        version sequence shows that notifications were missed, every key is
+        marked stale so the next read goes back to Redis once.
+        """
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+
+                self._stale_keys.update(list(self._state))
+                self._sync_version()
+                self._listener_ready.set()
+
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    self._handle_message(message.get("data"))
+            except Exception as e:
+                log.warning(f"Config pub/sub listener disconnected: {e}")
+            finally:
+                self._listener_ready.clear()
+
+            time.sleep(1)
+
+    def _sync_version(self):
+        try:
+            version = self._redis.get(self._version_key)
+            super().__setattr__("_version", int(version) if version else 0)
+        except (ValueError, TypeError):
+            super().__setattr__("_version", 0)
+
+    def _handle_message(self, data):
+        try:
+            payload = json.loads(data)
+            key = payload["key"]
+            version = int(payload["version"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            log.error(f"Invalid config update notification: {data}")
+            return
+
+        if version > self._version + 1:
+            # Missed at least one notification, refresh everything lazily
+            self._stale_keys.update(list(self._state))
+        else:
+            self._stale_keys.add(key)
+
+        super().__setattr__("_version", max(version, self._version))
+
+    def _refresh_from_redis(self, key):
+        redis_key = f"{self._redis_key_prefix}:config:{key}"
+        redis_value = self._redis.get(redis_key)
+
+        if redis_value is not None:
+            try:
+                decoded_value = json.loads(redis_value)
+
+                # Update the in-memory value if different
+                if self._state[key].value != decoded_value:
+                    self._state[key].value = decoded_value
+                    log.info(f"Updated {key} from Redis: {decoded_value}")
+
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
 
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
             self._state[key] = value
+            self._stale_keys.add(key)
         else:
             self._state[key].value = value
             self._state[key].save()
@@ -261,26 +359,24 @@ class AppConfig:
                 redis_key = f"{self._redis_key_prefix}:config:{key}"
                 self._redis.set(redis_key, json.dumps(self._state[key].value))
 
+                if ENABLE_REDIS_CONFIG_CACHE:
+                    version = self._redis.incr(self._version_key)
+                    self._redis.publish(
+                        self._channel, json.dumps({"key": key, "version": version})
+                    )
+
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
+        # If Redis is available, check for an updated value. While the pub/sub
+        # listener is connected only keys flagged by a notification are re-read.
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:config:{key}"
-            redis_value = self._redis.get(redis_key)
-
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
-
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
-
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+            if not self._listener_ready.is_set():
+                self._refresh_from_redis(key)
+            elif key in self._stale_keys:
+                self._stale_keys.discard(key)
+                self._refresh_from_redis(key)
 
         return self._state[key].value
 
@@ -889,6 +985,14 @@ if CUSTOM_NAME:
 
 STORAGE_PROVIDER = os.environ.get("STORAGE_PROVIDER", "local")  # defaults to local, s3
 
+# Bytes of downloaded S3/GCS/Azure files kept in UPLOAD_DIR, least recently used go first
+try:
+    STORAGE_CACHE_MAX_SIZE = int(
+        os.environ.get("STORAGE_CACHE_MAX_SIZE", str(10 * 1024 * 1024 * 1024))
+    )
+except ValueError:
+    STORAGE_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
 S3_ACCESS_KEY_ID = os.environ.get("S3_ACCESS_KEY_ID", None)
 S3_SECRET_ACCESS_KEY = os.environ.get("S3_SECRET_ACCESS_KEY", None)
 S3_REGION_NAME = os.environ.get("S3_REGION_NAME", None)
@@ -2122,6 +2226,32 @@ else:
     except Exception:
         PGVECTOR_POOL_RECYCLE = 3600
 
+# Approximate nearest neighbour index of the chunks: ivfflat or hnsw
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "ivfflat").lower()
+if PGVECTOR_INDEX_METHOD not in ("ivfflat", "hnsw"):
+    PGVECTOR_INDEX_METHOD = "ivfflat"
+
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "100"))
+# Lists searched per query, 0 keeps the server setting
+PGVECTOR_IVFFLAT_PROBES = int(os.environ.get("PGVECTOR_IVFFLAT_PROBES", "0"))
+
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+# Candidates kept per query, 0 keeps the server setting
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "0"))
+# relaxed_order or strict_order keep scanning the index until enough chunks of
+# the collection are found (pgvector 0.8+), empty keeps the server setting
+PGVECTOR_HNSW_ITERATIVE_SCAN = os.environ.get("PGVECTOR_HNSW_ITERATIVE_SCAN", "")
+
+# Collections of at least this many chunks get a vector index of their own
+# from the vector maintenance endpoint, 0 disables. Only collections with an
+# index of their own are searched approximately, the others exactly.
+PGVECTOR_COLLECTION_INDEX_THRESHOLD = int(
+    os.environ.get("PGVECTOR_COLLECTION_INDEX_THRESHOLD", "0")
+)
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -2563,6 +2693,60 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Embedding batches sent at once to the embedding engine, across all requests
+try:
+    RAG_EMBEDDING_CONCURRENT_REQUESTS = max(
+        int(os.environ.get("RAG_EMBEDDING_CONCURRENT_REQUESTS", "4")), 1
+    )
+except ValueError:
+    RAG_EMBEDDING_CONCURRENT_REQUESTS = 4
+
+# Estimated tokens per embedding batch; batches are split further to stay below
+try:
+    RAG_EMBEDDING_BATCH_MAX_TOKENS = int(
+        os.environ.get("RAG_EMBEDDING_BATCH_MAX_TOKENS", "100000")
+    )
+except ValueError:
+    RAG_EMBEDDING_BATCH_MAX_TOKENS = 100000
+
+# Retries of rate limited (429) or failed (5xx, connection error) batches
+try:
+    RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "5"))
+except ValueError:
+    RAG_EMBEDDING_MAX_RETRIES = 5
+
+# Files processed at once by a knowledge base reindex
+try:
+    KNOWLEDGE_REINDEX_CONCURRENCY = max(
+        int(os.environ.get("KNOWLEDGE_REINDEX_CONCURRENCY", "4")), 1
+    )
+except ValueError:
+    KNOWLEDGE_REINDEX_CONCURRENCY = 4
+
+# Uploaded files extracted and embedded at once by each ingestion worker
+try:
+    INGESTION_WORKER_CONCURRENCY = max(
+        int(os.environ.get("INGESTION_WORKER_CONCURRENCY", "2")), 1
+    )
+except ValueError:
+    INGESTION_WORKER_CONCURRENCY = 2
+
+# With Redis, uploads can be left to `open-webui ingestion-worker` processes
+ENABLE_INGESTION_WORKER_IN_APP = (
+    os.environ.get("ENABLE_INGESTION_WORKER_IN_APP", "true").lower() == "true"
+)
+
+try:
+    INGESTION_MAX_ATTEMPTS = max(int(os.environ.get("INGESTION_MAX_ATTEMPTS", "3")), 1)
+except ValueError:
+    INGESTION_MAX_ATTEMPTS = 3
+
+# Seconds without a heartbeat after which a job of a lost worker is run again
+try:
+    INGESTION_JOB_TIMEOUT = max(int(os.environ.get("INGESTION_JOB_TIMEOUT", "300")), 30)
+except ValueError:
+    INGESTION_JOB_TIMEOUT = 300
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
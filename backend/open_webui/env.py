@@ -348,8 +348,12 @@ DATABASE_ENABLE_SQLITE_WAL = (
     os.environ.get("DATABASE_ENABLE_SQLITE_WAL", "False").lower() == "true"
 )
 
+# Async engine used by request handlers; derived from DATABASE_URL when unset
+# (postgresql -> postgresql+asyncpg, sqlite -> sqlite+aiosqlite)
+DATABASE_ASYNC_URL = os.environ.get("DATABASE_ASYNC_URL", "")
+
 DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = os.environ.get(
-    "DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL", None
+    "DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL", "60"
 )
 if DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL is not None:
     try:
@@ -359,14 +363,63 @@ if DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL is not None:
     except Exception:
         DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = 0.0
 
+# Seconds an authenticated user is cached in-process by get_current_user
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "10")
+try:
+    USER_CACHE_TTL = float(USER_CACHE_TTL)
+except Exception:
+    USER_CACHE_TTL = 10.0
+
+USER_CACHE_SIZE = os.environ.get("USER_CACHE_SIZE", "10000")
+try:
+    USER_CACHE_SIZE = int(USER_CACHE_SIZE)
+except Exception:
+    USER_CACHE_SIZE = 10000
+
+# Seconds a user's resolved group memberships are cached in-process
+GROUP_MEMBERSHIP_CACHE_TTL = os.environ.get("GROUP_MEMBERSHIP_CACHE_TTL", "5")
+try:
+    GROUP_MEMBERSHIP_CACHE_TTL = float(GROUP_MEMBERSHIP_CACHE_TTL)
+except Exception:
+    GROUP_MEMBERSHIP_CACHE_TTL = 5.0
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
 
+# Save the content of a streamed reply while it is generated. Otherwise it is only
+# saved once the reply completes or is cancelled
 ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Streamed message writes are coalesced and flushed to the database at most every
+# CHAT_SAVE_FLUSH_INTERVAL seconds, or once CHAT_SAVE_FLUSH_SIZE bytes are pending
+CHAT_SAVE_FLUSH_INTERVAL = os.environ.get("CHAT_SAVE_FLUSH_INTERVAL", "0.5")
+
+try:
+    CHAT_SAVE_FLUSH_INTERVAL = max(float(CHAT_SAVE_FLUSH_INTERVAL), 0.0)
+except ValueError:
+    CHAT_SAVE_FLUSH_INTERVAL = 0.5
+
+CHAT_SAVE_FLUSH_SIZE = os.environ.get("CHAT_SAVE_FLUSH_SIZE", "4096")
+
+try:
+    CHAT_SAVE_FLUSH_SIZE = max(int(CHAT_SAVE_FLUSH_SIZE), 0)
+except ValueError:
+    CHAT_SAVE_FLUSH_SIZE = 4096
+
+# Pending message writes of chats that have not been read again are folded into
+# the chat document once they are idle for CHAT_MESSAGE_COMPACTION_INTERVAL seconds
+CHAT_MESSAGE_COMPACTION_INTERVAL = os.environ.get(
+    "CHAT_MESSAGE_COMPACTION_INTERVAL", "300"
+)
+
+try:
+    CHAT_MESSAGE_COMPACTION_INTERVAL = max(int(CHAT_MESSAGE_COMPACTION_INTERVAL), 0)
+except ValueError:
+    CHAT_MESSAGE_COMPACTION_INTERVAL = 300
+
 ENABLE_QUERIES_CACHE = os.environ.get("ENABLE_QUERIES_CACHE", "False").lower() == "true"
 
 ####################################
@@ -390,6 +443,12 @@ try:
 except ValueError:
     REDIS_SENTINEL_MAX_RETRY_COUNT = 2
 
+# Keep a process-local snapshot of AppConfig and only refresh keys when a change
+# notification arrives over Redis pub/sub, instead of a GET on every attribute read
+ENABLE_REDIS_CONFIG_CACHE = (
+    os.environ.get("ENABLE_REDIS_CONFIG_CACHE", "True").lower() == "true"
+)
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -628,6 +687,31 @@ else:
     except Exception:
         MODELS_CACHE_TTL = 1
 
+# How requests for a model served by several connections pick one of them:
+# "random", "least_outstanding" or "ewma" (latency weighted by in-flight count)
+MODEL_ROUTING_STRATEGY = os.environ.get("MODEL_ROUTING_STRATEGY", "ewma").lower()
+
+# Consecutive failures after which a backend stops receiving requests, and for
+# how many seconds
+MODEL_ROUTING_EJECTION_FAILURES = os.environ.get("MODEL_ROUTING_EJECTION_FAILURES", "3")
+try:
+    MODEL_ROUTING_EJECTION_FAILURES = int(MODEL_ROUTING_EJECTION_FAILURES)
+except ValueError:
+    MODEL_ROUTING_EJECTION_FAILURES = 3
+
+MODEL_ROUTING_EJECTION_TIME = os.environ.get("MODEL_ROUTING_EJECTION_TIME", "30")
+try:
+    MODEL_ROUTING_EJECTION_TIME = float(MODEL_ROUTING_EJECTION_TIME)
+except ValueError:
+    MODEL_ROUTING_EJECTION_TIME = 30.0
+
+# Seconds between exchanges of in-flight counts with other instances over Redis
+MODEL_ROUTING_SYNC_INTERVAL = os.environ.get("MODEL_ROUTING_SYNC_INTERVAL", "1")
+try:
+    MODEL_ROUTING_SYNC_INTERVAL = float(MODEL_ROUTING_SYNC_INTERVAL)
+except ValueError:
+    MODEL_ROUTING_SYNC_INTERVAL = 1.0
+
 
 ####################################
 # CHAT
@@ -703,6 +787,35 @@ AIOHTTP_CLIENT_SESSION_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_SSL", "True").lower() == "true"
 )
 
+# Connection pool shared by all outbound HTTP requests (0 means no limit)
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "1000")
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(AIOHTTP_CLIENT_POOL_LIMIT)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT = 1000
+
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0"
+)
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 0
+
+AIOHTTP_CLIENT_DNS_CACHE_TTL = os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+try:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_DNS_CACHE_TTL)
+except Exception:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30"
+)
+try:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT)
+except Exception:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30.0
+
 AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = os.environ.get(
     "AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST",
     os.environ.get("AIOHTTP_CLIENT_TIMEOUT_OPENAI_MODEL_LIST", "10"),
@@ -736,6 +849,14 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Seconds before cached tool server specs are revalidated in the background
+TOOL_SERVER_SPEC_CACHE_TTL = os.environ.get("TOOL_SERVER_SPEC_CACHE_TTL", "300")
+
+try:
+    TOOL_SERVER_SPEC_CACHE_TTL = int(TOOL_SERVER_SPEC_CACHE_TTL)
+except Exception:
+    TOOL_SERVER_SPEC_CACHE_TTL = 300
+
 
 ####################################
 # SENTENCE TRANSFORMERS
@@ -781,6 +902,27 @@ else:
     except Exception:
         SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS = None
 
+# Number of embeddings kept in-process, and for how long (in seconds) they are
+# shared through Redis (0 disables the Redis tier)
+EMBEDDING_CACHE_SIZE = os.environ.get("EMBEDDING_CACHE_SIZE", "10000")
+try:
+    EMBEDDING_CACHE_SIZE = int(EMBEDDING_CACHE_SIZE)
+except Exception:
+    EMBEDDING_CACHE_SIZE = 10000
+
+EMBEDDING_CACHE_REDIS_TTL = os.environ.get("EMBEDDING_CACHE_REDIS_TTL", "0")
+try:
+    EMBEDDING_CACHE_REDIS_TTL = int(EMBEDDING_CACHE_REDIS_TTL)
+except Exception:
+    EMBEDDING_CACHE_REDIS_TTL = 0
+
+# Approximate memory budget, in MB, for the BM25 indexes kept for hybrid search
+BM25_INDEX_CACHE_SIZE_MB = os.environ.get("BM25_INDEX_CACHE_SIZE_MB", "256")
+try:
+    BM25_INDEX_CACHE_SIZE_MB = int(BM25_INDEX_CACHE_SIZE_MB)
+except Exception:
+    BM25_INDEX_CACHE_SIZE_MB = 256
+
 ####################################
 # OFFLINE_MODE
 ####################################
@@ -1,13 +1,14 @@
 import os
 import json
 import logging
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from typing import Any, Optional
 
 from open_webui.internal.wrappers import register_connection
 from open_webui.env import (
     OPEN_WEBUI_DIR,
     DATABASE_URL,
+    DATABASE_ASYNC_URL,
     DATABASE_SCHEMA,
     SRC_LOG_LEVELS,
     DATABASE_POOL_MAX_OVERFLOW,
@@ -18,6 +19,12 @@ from open_webui.env import (
 )
 from peewee_migrate import Router
 from sqlalchemy import Dialect, create_engine, MetaData, event, types
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
@@ -162,3 +169,83 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+####################################
+# Async engine
+####################################
+
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+    "mysql": "aiomysql",
+}
+
+
+def get_async_database_url(database_url: str) -> Optional[str]:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+
+    # SQLCipher and unknown backends have no async driver
+    if driver is None or url.drivername == "sqlite+sqlcipher":
+        return None
+
+    query = dict(url.query)
+    if driver == "asyncpg" and "sslmode" in query:
+        # asyncpg takes `ssl` instead of libpq's `sslmode`
+        query["ssl"] = query.pop("sslmode")
+
+    return url.set(drivername=f"{backend}+{driver}", query=query).render_as_string(
+        hide_password=False
+    )
+
+
+def create_async_database_engine():
+    async_database_url = DATABASE_ASYNC_URL or get_async_database_url(
+        SQLALCHEMY_DATABASE_URL
+    )
+    if not async_database_url:
+        log.info("No async database driver available for DATABASE_URL")
+        return None
+
+    try:
+        if "sqlite" in async_database_url:
+            return create_async_engine(async_database_url)
+
+        if isinstance(DATABASE_POOL_SIZE, int):
+            if DATABASE_POOL_SIZE > 0:
+                return create_async_engine(
+                    async_database_url,
+                    pool_size=DATABASE_POOL_SIZE,
+                    max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+                    pool_timeout=DATABASE_POOL_TIMEOUT,
+                    pool_recycle=DATABASE_POOL_RECYCLE,
+                    pool_pre_ping=True,
+                )
+            return create_async_engine(
+                async_database_url, pool_pre_ping=True, poolclass=NullPool
+            )
+        return create_async_engine(async_database_url, pool_pre_ping=True)
+    except Exception as e:
+        # The async driver (asyncpg, aiosqlite, ...) is an optional dependency
+        log.info(f"Async database engine disabled: {e}")
+        return None
+
+
+async_engine = create_async_database_engine()
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+
+@asynccontextmanager
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def has_async_db() -> bool:
+    return AsyncSessionLocal is not None
@@ -426,6 +426,7 @@ from open_webui.config import (
 )
 from open_webui.env import (
     LICENSE_KEY,
+    CHAT_MESSAGE_COMPACTION_INTERVAL,
     AUDIT_EXCLUDED_PATHS,
     AUDIT_LOG_LEVEL,
     CHANGELOG,
@@ -490,6 +491,10 @@ from open_webui.utils.auth import (
     get_admin_user,
     get_verified_user,
 )
+from open_webui.utils.http_client import close_http_session, get_http_session
+from open_webui.utils.knowledge import resume_knowledge_reindex
+from open_webui.utils.ingestion import start_ingestion_worker
+from open_webui.utils.tools import get_tool_servers
 from open_webui.utils.plugin import install_tool_and_function_dependencies
 from open_webui.utils.oauth import (
     OAuthManager,
@@ -555,6 +560,19 @@ https://github.com/open-webui/open-webui
 )
 
 
+async def periodic_chat_message_compaction():
+    while True:
+        await asyncio.sleep(CHAT_MESSAGE_COMPACTION_INTERVAL)
+        try:
+            count = await asyncio.to_thread(
+                Chats.compact_idle_pending_messages, CHAT_MESSAGE_COMPACTION_INTERVAL
+            )
+            if count:
+                log.debug(f"Compacted pending messages of {count} chats")
+        except Exception as e:
+            log.error(f"Failed to compact pending chat messages: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     app.state.instance_id = INSTANCE_ID
@@ -591,32 +609,62 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(periodic_usage_pool_cleanup())
 
-    if app.state.config.ENABLE_BASE_MODELS_CACHE:
-        await get_all_models(
-            Request(
-                # Creating a mock request object to pass to get_all_models
-                {
-                    "type": "http",
-                    "asgi.version": "3.0",
-                    "asgi.spec_version": "2.0",
-                    "method": "GET",
-                    "path": "/internal",
-                    "query_string": b"",
-                    "headers": Headers({}).raw,
-                    "client": ("127.0.0.1", 12345),
-                    "server": ("127.0.0.1", 80),
-                    "scheme": "http",
-                    "app": app,
-                }
-            ),
-            None,
+    if CHAT_MESSAGE_COMPACTION_INTERVAL > 0:
+        app.state.chat_message_compaction = asyncio.create_task(
+            periodic_chat_message_compaction()
         )
 
+    # Pooled session reused by all outbound HTTP calls
+    get_http_session()
+
+    # Creating a mock request object for startup work that expects one
+    internal_request = Request(
+        {
+            "type": "http",
+            "asgi.version": "3.0",
+            "asgi.spec_version": "2.0",
+            "method": "GET",
+            "path": "/internal",
+            "query_string": b"",
+            "headers": Headers({}).raw,
+            "client": ("127.0.0.1", 12345),
+            "server": ("127.0.0.1", 80),
+            "scheme": "http",
+            "app": app,
+        }
+    )
+
+    if app.state.config.ENABLE_BASE_MODELS_CACHE:
+        await get_all_models(internal_request, None)
+
+    # Fetch tool server specs ahead of the first chat, without delaying startup
+    app.state.tool_servers_prefetch = asyncio.create_task(
+        get_tool_servers(internal_request)
+    )
+
+    # Continue a knowledge base reindex interrupted by a restart
+    try:
+        await resume_knowledge_reindex(internal_request)
+    except Exception as e:
+        log.error(f"Failed to resume knowledge base reindexing: {e}")
+
+    app.state.ingestion_worker = start_ingestion_worker(app)
+
     yield
 
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "chat_message_compaction"):
+        app.state.chat_message_compaction.cancel()
+
+    app.state.tool_servers_prefetch.cancel()
+
+    if app.state.ingestion_worker:
+        app.state.ingestion_worker.stop()
+
+    await close_http_session()
+
 
 app = FastAPI(
     title="Open WebUI",
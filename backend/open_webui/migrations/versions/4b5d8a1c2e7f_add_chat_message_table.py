@@ -0,0 +1,34 @@
+"""Add chat_message table
+
+Revision ID: 4b5d8a1c2e7f
+Revises: e43c7a6a4a1e
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "4b5d8a1c2e7f"
+down_revision = "e43c7a6a4a1e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("message_id", sa.Text(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("current", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "message_id"),
+    )
+    op.create_index("chat_message_chat_id_idx", "chat_message", ["chat_id"])
+
+
+def downgrade():
+    op.drop_index("chat_message_chat_id_idx", table_name="chat_message")
+    op.drop_table("chat_message")
@@ -0,0 +1,67 @@
+"""Add group_member table
+
+Revision ID: 7c2e9f4a1b3d
+Revises: 4b5d8a1c2e7f
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+
+import json
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, select
+
+revision = "7c2e9f4a1b3d"
+down_revision = "4b5d8a1c2e7f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    group_member_table = op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    # Backfill the index from the existing group.user_ids arrays
+    group_table = table(
+        "group",
+        sa.Column("id", sa.Text()),
+        sa.Column("user_ids", sa.JSON()),
+    )
+
+    connection = op.get_bind()
+    results = connection.execute(select(group_table.c.id, group_table.c.user_ids))
+
+    now = int(time.time())
+    rows = []
+    for row in results:
+        user_ids = row.user_ids
+        if isinstance(user_ids, str):
+            try:
+                user_ids = json.loads(user_ids)
+            except json.JSONDecodeError:
+                user_ids = None
+
+        if not isinstance(user_ids, list):
+            continue
+
+        rows.extend(
+            {"group_id": row.id, "user_id": user_id, "created_at": now}
+            for user_id in set(user_ids)
+            if isinstance(user_id, str)
+        )
+
+    if rows:
+        op.bulk_insert(group_member_table, rows)
+
+
+def downgrade():
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
@@ -0,0 +1,37 @@
+"""Add knowledge collection_name and knowledge_reindex table
+
+Revision ID: 9d4b6e2f8a1c
+Revises: 7c2e9f4a1b3d
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "9d4b6e2f8a1c"
+down_revision = "7c2e9f4a1b3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("knowledge", sa.Column("collection_name", sa.Text(), nullable=True))
+
+    op.create_table(
+        "knowledge_reindex",
+        sa.Column("knowledge_id", sa.Text(), nullable=False),
+        sa.Column("job_id", sa.Text(), nullable=True),
+        sa.Column("user_id", sa.Text(), nullable=True),
+        sa.Column("collection_name", sa.Text(), nullable=True),
+        sa.Column("processed_file_ids", sa.JSON(), nullable=True),
+        sa.Column("failed_file_ids", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("knowledge_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("knowledge_reindex")
+    op.drop_column("knowledge", "collection_name")
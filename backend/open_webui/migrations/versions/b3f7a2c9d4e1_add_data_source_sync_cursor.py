@@ -0,0 +1,41 @@
+"""Add data_source sync_cursor and data_source_item table
+
+Revision ID: b3f7a2c9d4e1
+Revises: 9d4b6e2f8a1c
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b3f7a2c9d4e1"
+down_revision = "9d4b6e2f8a1c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("data_source", sa.Column("sync_cursor", sa.JSON(), nullable=True))
+
+    op.create_table(
+        "data_source_item",
+        sa.Column("data_source_id", sa.String(), nullable=False),
+        sa.Column("path", sa.Text(), nullable=False),
+        sa.Column("item_id", sa.String(), nullable=True),
+        sa.Column("mime_type", sa.String(), nullable=True),
+        sa.Column("modified_time", sa.String(), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("data_source_id", "path"),
+    )
+    op.create_index(
+        "data_source_item_item_id_idx",
+        "data_source_item",
+        ["data_source_id", "item_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("data_source_item_item_id_idx", table_name="data_source_item")
+    op.drop_table("data_source_item")
+    op.drop_column("data_source", "sync_cursor")
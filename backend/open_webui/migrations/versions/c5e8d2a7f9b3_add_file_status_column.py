@@ -0,0 +1,24 @@
+"""Add file status column
+
+Revision ID: c5e8d2a7f9b3
+Revises: b3f7a2c9d4e1
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c5e8d2a7f9b3"
+down_revision = "b3f7a2c9d4e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled in as files are processed, older files keep their status in data
+    op.add_column("file", sa.Column("status", sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("file", "status")
@@ -2,7 +2,7 @@ import logging
 import json
 import time
 import uuid
-from typing import Optional
+from typing import Callable, Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
@@ -12,6 +12,7 @@ from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
 from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
 
@@ -56,6 +57,30 @@ class Chat(Base):
     )
 
 
+class ChatMessage(Base):
+    """
+    Pending per-message writes that have not yet been folded into the chat
+    document. Each row holds the full, current version of one message so that
+    streaming updates only rewrite that message instead of the whole chat JSON.
+    Rows are compacted into `chat.chat["history"]` the next time the chat is read,
+    or by the periodic sweep once they are idle.
+    """
+
+    __tablename__ = "chat_message"
+
+    chat_id = Column(String, primary_key=True)
+    message_id = Column(String, primary_key=True)
+    data = Column(JSON)
+
+    # Whether this message was upserted and should become history.currentId
+    current = Column(Boolean, default=False)
+
+    created_at = Column(BigInteger)  # timestamp in nanoseconds
+    updated_at = Column(BigInteger)  # timestamp in nanoseconds
+
+    __table_args__ = (Index("chat_message_chat_id_idx", "chat_id"),)
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -184,11 +209,18 @@ class ChatTable:
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat_item = db.get(Chat, id)
+                # Lock the row against a concurrent compaction of pending messages
+                chat_item = db.query(Chat).filter_by(id=id).with_for_update().first()
                 chat_item.chat = chat
                 title = chat.get("title", "").strip()
                 chat_item.title = title if title else "New Chat"
                 chat_item.updated_at = int(time.time())
+
+                # A full write supersedes any message writes made before it
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id == id,
+                    ChatMessage.updated_at <= int(time.time_ns()),
+                ).delete()
                 db.commit()
                 db.refresh(chat_item)
 
@@ -242,61 +274,219 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
+        with get_db() as db:
+            pending = db.get(ChatMessage, (id, message_id))
+            if pending is not None:
+                return pending.data
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
 
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
+    def _write_pending_message(
+        self,
+        id: str,
+        message_id: str,
+        update: Callable[[dict], dict],
+        current: bool = False,
+        create: bool = True,
+    ) -> Optional[dict]:
+        """
+        Apply `update` to the pending copy of a message. The first write for a
+        message seeds the pending row from the chat document; every later write
+        only touches that row.
+        """
+        for _ in range(2):
+            try:
+                with get_db() as db:
+                    pending = db.get(ChatMessage, (id, message_id))
+                    if pending is None:
+                        chat_item = db.get(Chat, id)
+                        if chat_item is None:
+                            return None
+
+                        messages = (
+                            (chat_item.chat or {})
+                            .get("history", {})
+                            .get("messages", {})
+                        )
+                        if message_id not in messages and not create:
+                            return None
+
+                        pending = ChatMessage(
+                            chat_id=id,
+                            message_id=message_id,
+                            data=update(dict(messages.get(message_id, {}))),
+                            current=current,
+                            created_at=int(time.time_ns()),
+                            updated_at=int(time.time_ns()),
+                        )
+                        db.add(pending)
+
+                        # Only the first write of a message touches the chat row,
+                        # so that the chat list shows it as recently updated
+                        db.query(Chat).filter_by(id=id).update(
+                            {"updated_at": int(time.time())}
+                        )
+                    else:
+                        pending.data = update(dict(pending.data or {}))
+                        pending.current = pending.current or current
+                        pending.updated_at = int(time.time_ns())
+
+                    db.commit()
+                    return pending.data
+            except IntegrityError:
+                # Another writer created the pending row first, retry as an update
+                continue
+        return None
+
+    def _compact_pending_messages(self, db, chat_item: Optional[Chat]) -> None:
+        if chat_item is None:
+            return
+        if not db.query(exists().where(ChatMessage.chat_id == chat_item.id)).scalar():
+            return
+
+        # Read the chat again under a row lock, so that concurrent compactions
+        # and full writes of the chat do not lose each other's updates
+        chat_item = (
+            db.query(Chat)
+            .filter_by(id=chat_item.id)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+        if chat_item is None:
+            return
+
+        pending = (
+            db.query(ChatMessage)
+            .filter_by(chat_id=chat_item.id)
+            .order_by(ChatMessage.updated_at)
+            .all()
+        )
+        if not pending:
+            db.commit()
+            return
+
+        chat = dict(chat_item.chat or {})
+        history = dict(chat.get("history", {}))
+        messages = dict(history.get("messages", {}))
+
+        for entry in pending:
+            messages[entry.message_id] = entry.data
+            if entry.current:
+                history["currentId"] = entry.message_id
+
+        history["messages"] = messages
+        chat["history"] = history
+
+        chat_item.chat = chat
+        chat_item.updated_at = max(
+            chat_item.updated_at or 0, pending[-1].updated_at // 1_000_000_000
+        )
+
+        # Rows written again after we read them are kept for the next compaction
+        db.query(ChatMessage).filter(
+            ChatMessage.chat_id == chat_item.id,
+            or_(
+                *[
+                    and_(
+                        ChatMessage.message_id == entry.message_id,
+                        ChatMessage.updated_at == entry.updated_at,
+                    )
+                    for entry in pending
+                ]
+            ),
+        ).delete(synchronize_session=False)
+        db.commit()
+        db.refresh(chat_item)
+
+    def _compact_pending_messages_for_chats(self, db, chats: list[Chat]) -> None:
+        # The journal only holds recently streamed messages, so this stays small
+        pending_chat_ids = {
+            chat_id for (chat_id,) in db.query(ChatMessage.chat_id).distinct()
+        }
+        for chat in chats:
+            if chat.id in pending_chat_ids:
+                self._compact_pending_messages(db, chat)
+
+    def compact_idle_pending_messages(self, idle_seconds: int) -> int:
+        """
+        Fold the pending messages of chats with no message writes in the last
+        `idle_seconds` into their chat documents, for chats that are not read
+        again. Returns the number of chats compacted.
+        """
+        cutoff = int(time.time_ns()) - idle_seconds * 1_000_000_000
+        with get_db() as db:
+            chat_ids = [
+                chat_id
+                for (chat_id,) in db.query(ChatMessage.chat_id)
+                .group_by(ChatMessage.chat_id)
+                .having(func.max(ChatMessage.updated_at) < cutoff)
+                .all()
+            ]
+
+            for chat_id in chat_ids:
+                try:
+                    chat = db.get(Chat, chat_id)
+                    if chat is None:
+                        # Written while the chat was being deleted
+                        db.query(ChatMessage).filter_by(chat_id=chat_id).delete()
+                        db.commit()
+                        continue
+
+                    self._compact_pending_messages(db, chat)
+                except Exception as e:
+                    db.rollback()
+                    log.warning(f"Failed to compact messages of chat {chat_id}: {e}")
+            return len(chat_ids)
+
+    def update_message_by_id_and_message_id(
+        self,
+        id: str,
+        message_id: str,
+        update: Callable[[dict], dict],
+        upsert: bool = True,
+    ) -> Optional[dict]:
+        """
+        Apply `update` to the current version of a message in a single write.
+        Without `upsert` the message must already exist and does not become the
+        chat's current message.
+        """
+        return self._write_pending_message(
+            id, message_id, update, current=upsert, create=upsert
+        )
+
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
+    ) -> Optional[dict]:
         # Sanitize message content for null characters before upserting
         if isinstance(message.get("content"), str):
             message["content"] = message["content"].replace("\x00", "")
 
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
-
-        history["currentId"] = message_id
-
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self._write_pending_message(
+            id,
+            message_id,
+            lambda existing: {**existing, **message},
+            current=True,
+        )
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
+    ) -> Optional[dict]:
+        def append_status(existing: dict) -> dict:
+            existing["statusHistory"] = [*existing.get("statusHistory", []), status]
+            return existing
 
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
-
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self._write_pending_message(id, message_id, append_status, create=False)
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
             chat = db.get(Chat, chat_id)
+            self._compact_pending_messages(db, chat)
             # Check if the chat is already shared
             if chat.share_id:
                 return self.get_chat_by_id_and_user_id(chat.share_id, "shared")
@@ -332,6 +522,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.get(Chat, chat_id)
+                self._compact_pending_messages(db, chat)
                 shared_chat = (
                     db.query(Chat).filter_by(user_id=f"shared-{chat_id}").first()
                 )
@@ -553,6 +744,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
+                self._compact_pending_messages(db, chat)
                 return ChatModel.model_validate(chat)
         except Exception:
             return None
@@ -575,6 +767,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
+                self._compact_pending_messages(db, chat)
                 return ChatModel.model_validate(chat)
         except Exception:
             return None
@@ -584,8 +777,9 @@ class ChatTable:
             all_chats = (
                 db.query(Chat)
                 # .limit(limit).offset(skip)
-                .order_by(Chat.updated_at.desc())
+                .order_by(Chat.updated_at.desc()).all()
             )
+            self._compact_pending_messages_for_chats(db, all_chats)
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
@@ -594,7 +788,9 @@ class ChatTable:
                 db.query(Chat)
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
+                .all()
             )
+            self._compact_pending_messages_for_chats(db, all_chats)
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
@@ -707,6 +903,15 @@ class ChatTable:
 
             query = query.order_by(Chat.updated_at.desc())
 
+            # Messages whose writes are still pending in the chat_message journal
+            pending_content_clause = Chat.id.in_(
+                select(ChatMessage.chat_id).where(
+                    func.lower(ChatMessage.data["content"].as_string()).like(
+                        f"%{search_text}%"
+                    )
+                )
+            )
+
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
             if dialect_name == "sqlite":
@@ -721,7 +926,9 @@ class ChatTable:
                 sqlite_content_clause = text(sqlite_content_sql)
                 query = query.filter(
                     or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
+                        Chat.title.ilike(bindparam("title_key")),
+                        sqlite_content_clause,
+                        pending_content_clause,
                     ).params(title_key=f"%{search_text}%", content_key=search_text)
                 )
 
@@ -769,6 +976,7 @@ class ChatTable:
                     or_(
                         Chat.title.ilike(bindparam("title_key")),
                         postgres_content_clause,
+                        pending_content_clause,
                     ).params(title_key=f"%{search_text}%", content_key=search_text)
                 )
 
@@ -1005,6 +1213,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id).delete()
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1014,7 +1223,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                deleted = db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if deleted:
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1026,6 +1237,11 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == user_id)
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -1038,6 +1254,13 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
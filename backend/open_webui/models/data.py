@@ -6,7 +6,7 @@ from typing import Optional, List
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, Index, String, Text, JSON, func
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -80,11 +80,29 @@ class DataSource(Base):
     icon = Column(String)
     action = Column(String, nullable=True)
     layer = Column(String, nullable=True)
+    # Provider state for incremental syncs (e.g. a Drive changes page token)
+    sync_cursor = Column(JSON, nullable=True)
     
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
 
+class DataSourceItem(Base):
+    """A provider item synced to storage, used to apply incremental changes"""
+    __tablename__ = "data_source_item"
+
+    data_source_id = Column(String, primary_key=True)
+    path = Column(Text, primary_key=True)  # storage path, folders end with '/'
+    item_id = Column(String)  # provider id of the file or folder
+    mime_type = Column(String, nullable=True)
+    modified_time = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        Index("data_source_item_item_id_idx", "data_source_id", "item_id"),
+    )
+
+
 class DataSourceModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -110,6 +128,17 @@ class DataSourceModel(BaseModel):
     updated_at: Optional[int]  # timestamp in epoch
 
 
+class DataSourceItemModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    data_source_id: str
+    path: str
+    item_id: str
+    mime_type: Optional[str] = None
+    modified_time: Optional[str] = None
+    size: Optional[int] = None
+
+
 ####################
 # Forms
 ####################
@@ -468,6 +497,10 @@ class DataSourcesTable:
                         data_source.sync_results = sync_results
                     else:
                         data_source.last_sync = int(time.time()) # Set to current time if not provided
+                    if sync_status == 'deleted':
+                        # Synced files are gone, the next sync starts over
+                        data_source.sync_cursor = None
+                        db.query(DataSourceItem).filter_by(data_source_id=data_source.id).delete()
 
                     # Always update the `updated_at` timestamp
                     data_source.updated_at = int(time.time())
@@ -500,9 +533,28 @@ class DataSourcesTable:
                 log.exception(f"Error updating data source: {e}")
                 return None
 
+    def get_data_source_sync_cursor_by_id(self, id: str) -> Optional[dict]:
+        with get_db() as db:
+            try:
+                return db.query(DataSource.sync_cursor).filter_by(id=id).scalar()
+            except Exception as e:
+                log.exception(f"Error getting sync cursor of data source {id}: {e}")
+                return None
+
+    def update_data_source_sync_cursor_by_id(self, id: str, sync_cursor: Optional[dict]) -> bool:
+        with get_db() as db:
+            try:
+                db.query(DataSource).filter_by(id=id).update({"sync_cursor": sync_cursor})
+                db.commit()
+                return True
+            except Exception as e:
+                log.exception(f"Error updating sync cursor of data source {id}: {e}")
+                return False
+
     def delete_data_source_by_id(self, id: str) -> bool:
         with get_db() as db:
             try:
+                db.query(DataSourceItem).filter_by(data_source_id=id).delete()
                 db.query(DataSource).filter_by(id=id).delete()
                 db.commit()
                 return True
@@ -521,4 +573,88 @@ class DataSourcesTable:
                 return False
 
 
-DataSources = DataSourcesTable()
\ No newline at end of file
+DataSources = DataSourcesTable()
+
+
+class DataSourceItemsTable:
+    def get_items_by_mime_type(self, data_source_id: str, mime_type: str) -> List[DataSourceItemModel]:
+        with get_db() as db:
+            return [
+                DataSourceItemModel.model_validate(item)
+                for item in db.query(DataSourceItem)
+                .filter_by(data_source_id=data_source_id, mime_type=mime_type)
+                .all()
+            ]
+
+    def get_items_by_item_ids(self, data_source_id: str, item_ids: List[str]) -> List[DataSourceItemModel]:
+        items = []
+        with get_db() as db:
+            # Chunked to stay below the bound parameter limit of the database
+            for i in range(0, len(item_ids), 500):
+                items.extend(
+                    DataSourceItemModel.model_validate(item)
+                    for item in db.query(DataSourceItem)
+                    .filter(
+                        DataSourceItem.data_source_id == data_source_id,
+                        DataSourceItem.item_id.in_(item_ids[i : i + 500]),
+                    )
+                    .all()
+                )
+        return items
+
+    def get_items_summary(self, data_source_id: str, exclude_mime_type: Optional[str] = None) -> tuple[int, int]:
+        """Number and total size of the items of a data source"""
+        with get_db() as db:
+            query = db.query(func.count(DataSourceItem.path), func.sum(DataSourceItem.size)).filter(
+                DataSourceItem.data_source_id == data_source_id
+            )
+            if exclude_mime_type:
+                query = query.filter(DataSourceItem.mime_type != exclude_mime_type)
+            count, size = query.one()
+            return count or 0, size or 0
+
+    def upsert_items(self, data_source_id: str, items: List[dict]) -> bool:
+        with get_db() as db:
+            try:
+                for item in items:
+                    db.merge(DataSourceItem(**{**item, "data_source_id": data_source_id}))
+                db.commit()
+                return True
+            except Exception as e:
+                log.exception(f"Error upserting items of data source {data_source_id}: {e}")
+                db.rollback()
+                return False
+
+    def replace_items(self, data_source_id: str, items: List[dict]) -> bool:
+        """Replace every item of a data source, e.g. after a full sync"""
+        with get_db() as db:
+            try:
+                db.query(DataSourceItem).filter_by(data_source_id=data_source_id).delete()
+                db.bulk_insert_mappings(
+                    DataSourceItem,
+                    [{**item, "data_source_id": data_source_id} for item in items],
+                )
+                db.commit()
+                return True
+            except Exception as e:
+                log.exception(f"Error replacing items of data source {data_source_id}: {e}")
+                db.rollback()
+                return False
+
+    def delete_items_by_paths(self, data_source_id: str, paths: List[str]) -> bool:
+        with get_db() as db:
+            try:
+                for i in range(0, len(paths), 500):
+                    db.query(DataSourceItem).filter(
+                        DataSourceItem.data_source_id == data_source_id,
+                        DataSourceItem.path.in_(paths[i : i + 500]),
+                    ).delete(synchronize_session=False)
+                db.commit()
+                return True
+            except Exception as e:
+                log.exception(f"Error deleting items of data source {data_source_id}: {e}")
+                db.rollback()
+                return False
+
+
+DataSourceItems = DataSourceItemsTable()
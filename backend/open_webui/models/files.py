@@ -1,11 +1,13 @@
+import asyncio
 import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import Base, JSONField, get_async_db, get_db, has_async_db
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.file_status import FILE_STATUS_EVENTS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, select
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -26,6 +28,8 @@ class File(Base):
 
     data = Column(JSON, nullable=True)
     meta = Column(JSON, nullable=True)
+    # Copy of data["status"], read without loading the extracted content
+    status = Column(Text, nullable=True)
 
     access_control = Column(JSON, nullable=True)
 
@@ -80,6 +84,11 @@ class FileModelResponse(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
+class FileStatusResponse(BaseModel):
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+
 class FileMetadataResponse(BaseModel):
     id: str
     meta: dict
@@ -110,7 +119,7 @@ class FilesTable:
             )
 
             try:
-                result = File(**file.model_dump())
+                result = File(**file.model_dump(), status=file.data.get("status"))
                 db.add(result)
                 db.commit()
                 db.refresh(result)
@@ -154,6 +163,43 @@ class FilesTable:
             except Exception:
                 return None
 
+    def get_file_status_by_id(self, id: str) -> Optional[FileStatusResponse]:
+        with get_db() as db:
+            status = db.query(File.status).filter_by(id=id).first()
+            if status is None:
+                return None
+            if status.status and status.status != "failed":
+                return FileStatusResponse(status=status.status)
+
+            # The error of failed files, and the status of files from
+            # before the status column, are only in data
+            data = db.query(File.data).filter_by(id=id).scalar() or {}
+            return FileStatusResponse(
+                status=data.get("status"), error=data.get("error")
+            )
+
+    async def get_file_status_by_id_async(
+        self, id: str
+    ) -> Optional[FileStatusResponse]:
+        if not has_async_db():
+            return await asyncio.to_thread(self.get_file_status_by_id, id)
+
+        async with get_async_db() as db:
+            status = (
+                await db.execute(select(File.status).where(File.id == id))
+            ).first()
+            if status is None:
+                return None
+            if status.status and status.status != "failed":
+                return FileStatusResponse(status=status.status)
+
+            data = (
+                await db.execute(select(File.data).where(File.id == id))
+            ).scalar() or {}
+            return FileStatusResponse(
+                status=data.get("status"), error=data.get("error")
+            )
+
     def get_files(self) -> list[FileModel]:
         with get_db() as db:
             return [FileModel.model_validate(file) for file in db.query(File).all()]
@@ -194,6 +240,28 @@ class FilesTable:
                 .all()
             ]
 
+    async def get_file_metadatas_by_ids_async(
+        self, ids: list[str]
+    ) -> list[FileMetadataResponse]:
+        if not has_async_db():
+            return await asyncio.to_thread(self.get_file_metadatas_by_ids, ids)
+
+        async with get_async_db() as db:
+            result = await db.execute(
+                select(File.id, File.meta, File.created_at, File.updated_at)
+                .where(File.id.in_(ids))
+                .order_by(File.updated_at.desc())
+            )
+            return [
+                FileMetadataResponse(
+                    id=file.id,
+                    meta=file.meta,
+                    created_at=file.created_at,
+                    updated_at=file.updated_at,
+                )
+                for file in result.all()
+            ]
+
     def get_files_by_user_id(self, user_id: str) -> list[FileModel]:
         with get_db() as db:
             return [
@@ -217,12 +285,23 @@ class FilesTable:
             try:
                 file = db.query(File).filter_by(id=id).first()
                 file.data = {**(file.data if file.data else {}), **data}
+                if "status" in data:
+                    file.status = data["status"]
                 db.commit()
-                return FileModel.model_validate(file)
+                file = FileModel.model_validate(file)
             except Exception as e:
 
                 return None
 
+        # Status streams only hear about committed changes, and failing to
+        # notify them must not fail the update
+        if "status" in data:
+            try:
+                FILE_STATUS_EVENTS.publish(id, data["status"], data.get("error"))
+            except Exception as e:
+                log.warning(f"Failed to publish the status of file {id}: {e}")
+        return file
+
     def update_file_metadata_by_id(self, id: str, meta: dict) -> Optional[FileModel]:
         with get_db() as db:
             try:
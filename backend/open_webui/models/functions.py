@@ -187,6 +187,11 @@ class FunctionsTable:
         except Exception:
             return None
 
+    def get_function_updated_at_by_id(self, id: str) -> Optional[int]:
+        """Cheap version check for cached function modules."""
+        with get_db() as db:
+            return db.query(Function.updated_at).filter_by(id=id).scalar()
+
     def get_functions(
         self, active_only=False, include_valves=False
     ) -> list[FunctionModel | FunctionWithValvesModel]:
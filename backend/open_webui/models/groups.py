@@ -1,17 +1,20 @@
+import asyncio
+import copy
 import json
 import logging
 import time
-from typing import Optional
+from typing import Any, Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.internal.db import Base, get_async_db, get_db, has_async_db
+from open_webui.env import GROUP_MEMBERSHIP_CACHE_TTL, SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
+from open_webui.utils.misc import TTLCache
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, Index, Text, JSON, or_, select
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +44,22 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    """
+    Membership index mirroring `group.user_ids`, so that the groups of a user
+    are looked up by key instead of scanning the JSON of every group.
+    """
+
+    __tablename__ = "group_member"
+
+    group_id = Column(Text, primary_key=True)
+    user_id = Column(Text, primary_key=True)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (Index("group_member_user_id_idx", "user_id"),)
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -91,7 +110,44 @@ class GroupUpdateForm(GroupForm, UserIdsForm):
     pass
 
 
+def merge_permissions(
+    permissions: dict[str, Any], group_permissions: dict[str, Any]
+) -> dict[str, Any]:
+    """Combine permissions from multiple groups by taking the most permissive value."""
+    for key, value in group_permissions.items():
+        if isinstance(value, dict):
+            if key not in permissions:
+                permissions[key] = {}
+            permissions[key] = merge_permissions(permissions[key], value)
+        else:
+            if key not in permissions:
+                permissions[key] = value
+            else:
+                permissions[key] = (
+                    permissions[key] or value
+                )  # Use the most permissive value (True > False)
+    return permissions
+
+
 class GroupTable:
+    def __init__(self):
+        # Resolved groups and merged group permissions per member, cleared on
+        # every group change
+        self._member_cache = TTLCache(GROUP_MEMBERSHIP_CACHE_TTL)
+        self._permission_cache = TTLCache(GROUP_MEMBERSHIP_CACHE_TTL)
+
+    def _clear_member_cache(self):
+        self._member_cache.clear()
+        self._permission_cache.clear()
+
+    def _set_group_members(self, db, group_id: str, user_ids: Optional[list[str]]):
+        db.query(GroupMember).filter_by(group_id=group_id).delete()
+        db.add_all(
+            GroupMember(group_id=group_id, user_id=user_id, created_at=int(time.time()))
+            for user_id in set(user_ids or [])
+        )
+        self._clear_member_cache()
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -109,6 +165,7 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                self._set_group_members(db, group.id, group.user_ids)
                 db.commit()
                 db.refresh(result)
                 if result:
@@ -126,20 +183,61 @@ class GroupTable:
                 for group in db.query(Group).order_by(Group.updated_at.desc()).all()
             ]
 
+    def _get_groups_by_member_id(self, user_id: str) -> list[GroupModel]:
+        groups = self._member_cache.get(user_id)
+        if groups is None:
+            with get_db() as db:
+                groups = [
+                    GroupModel.model_validate(group)
+                    for group in db.query(Group)
+                    .join(GroupMember, GroupMember.group_id == Group.id)
+                    .filter(GroupMember.user_id == user_id)
+                    .order_by(Group.updated_at.desc())
+                    .all()
+                ]
+            self._member_cache.set(user_id, groups)
+        return groups
+
     def get_groups_by_member_id(self, user_id: str) -> list[GroupModel]:
-        with get_db() as db:
-            return [
+        # Callers are free to modify the returned models
+        return [
+            group.model_copy(deep=True)
+            for group in self._get_groups_by_member_id(user_id)
+        ]
+
+    def get_group_ids_by_member_id(self, user_id: str) -> set[str]:
+        return {group.id for group in self._get_groups_by_member_id(user_id)}
+
+    def get_group_permissions_by_member_id(self, user_id: str) -> dict:
+        """
+        Permissions of all groups the user is a member of, merged by taking the
+        most permissive value of every key.
+        """
+        permissions = self._permission_cache.get(user_id)
+        if permissions is None:
+            permissions = {}
+            for group in self._get_groups_by_member_id(user_id):
+                permissions = merge_permissions(permissions, group.permissions or {})
+            self._permission_cache.set(user_id, permissions)
+
+        return copy.deepcopy(permissions)
+
+    async def get_groups_by_member_id_async(self, user_id: str) -> list[GroupModel]:
+        if not has_async_db() or self._member_cache.get(user_id) is not None:
+            return await asyncio.to_thread(self.get_groups_by_member_id, user_id)
+
+        async with get_async_db() as db:
+            groups = [
                 GroupModel.model_validate(group)
-                for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
-                .order_by(Group.updated_at.desc())
-                .all()
+                for group in await db.scalars(
+                    select(Group)
+                    .join(GroupMember, GroupMember.group_id == Group.id)
+                    .where(GroupMember.user_id == user_id)
+                    .order_by(Group.updated_at.desc())
+                )
             ]
+        self._member_cache.set(user_id, groups)
+        return [group.model_copy(deep=True) for group in groups]
 
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
@@ -167,6 +265,11 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_group_members(db, id, form_data.user_ids)
+                else:
+                    # Permissions are cached along with the groups
+                    self._clear_member_cache()
                 db.commit()
                 return self.get_group_by_id(id=id)
         except Exception as e:
@@ -177,6 +280,7 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                self._set_group_members(db, id, [])
                 db.commit()
                 return True
         except Exception:
@@ -186,26 +290,49 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                self._clear_member_cache()
 
                 return True
             except Exception:
                 return False
 
+    def _get_groups_for_update(self, db, *criteria) -> list[Group]:
+        """
+        Read the groups matching `criteria` from the database and lock them
+        until commit, so that their members are not computed from a cached
+        copy and members added meanwhile on other instances are kept.
+        """
+        return (
+            db.query(Group)
+            .filter(or_(*criteria))
+            .order_by(Group.id)
+            .with_for_update()
+            .all()
+        )
+
     def remove_user_from_all_groups(self, user_id: str) -> bool:
         with get_db() as db:
             try:
-                groups = self.get_groups_by_member_id(user_id)
+                groups = self._get_groups_for_update(
+                    db,
+                    Group.id.in_(
+                        select(GroupMember.group_id).where(
+                            GroupMember.user_id == user_id
+                        )
+                    ),
+                )
 
                 for group in groups:
-                    group.user_ids.remove(user_id)
-                    db.query(Group).filter_by(id=group.id).update(
-                        {
-                            "user_ids": group.user_ids,
-                            "updated_at": int(time.time()),
-                        }
-                    )
-                    db.commit()
+                    group.user_ids = [
+                        id for id in (group.user_ids or []) if id != user_id
+                    ]
+                    group.updated_at = int(time.time())
+
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                self._clear_member_cache()
 
                 return True
             except Exception:
@@ -246,32 +373,31 @@ class GroupTable:
     def sync_groups_by_group_names(self, user_id: str, group_names: list[str]) -> bool:
         with get_db() as db:
             try:
-                groups = db.query(Group).filter(Group.name.in_(group_names)).all()
-                group_ids = [group.id for group in groups]
-
-                # Remove user from groups not in the new list
-                existing_groups = self.get_groups_by_member_id(user_id)
-
-                for group in existing_groups:
-                    if group.id not in group_ids:
-                        group.user_ids.remove(user_id)
-                        db.query(Group).filter_by(id=group.id).update(
-                            {
-                                "user_ids": group.user_ids,
-                                "updated_at": int(time.time()),
-                            }
+                groups = self._get_groups_for_update(
+                    db,
+                    Group.name.in_(group_names),
+                    Group.id.in_(
+                        select(GroupMember.group_id).where(
+                            GroupMember.user_id == user_id
                         )
+                    ),
+                )
 
-                # Add user to new groups
                 for group in groups:
-                    if user_id not in group.user_ids:
-                        group.user_ids.append(user_id)
-                        db.query(Group).filter_by(id=group.id).update(
-                            {
-                                "user_ids": group.user_ids,
-                                "updated_at": int(time.time()),
-                            }
-                        )
+                    group_user_ids = group.user_ids or []
+
+                    if group.name in group_names:
+                        # Add user to new groups
+                        if user_id in group_user_ids:
+                            continue
+                        group_user_ids = [*group_user_ids, user_id]
+                    else:
+                        # Remove user from groups not in the new list
+                        group_user_ids = [id for id in group_user_ids if id != user_id]
+
+                    group.user_ids = group_user_ids
+                    group.updated_at = int(time.time())
+                    self._set_group_members(db, group.id, group_user_ids)
 
                 db.commit()
                 return True
@@ -300,6 +426,7 @@ class GroupTable:
 
                 group.user_ids = group_user_ids
                 group.updated_at = int(time.time())
+                self._set_group_members(db, id, group_user_ids)
                 db.commit()
                 db.refresh(group)
                 return GroupModel.model_validate(group)
@@ -329,6 +456,7 @@ class GroupTable:
 
                 group.user_ids = group_user_ids
                 group.updated_at = int(time.time())
+                self._set_group_members(db, id, group_user_ids)
 
                 db.commit()
                 db.refresh(group)
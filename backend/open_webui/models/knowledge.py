@@ -1,10 +1,11 @@
+import asyncio
 import json
 import logging
 import time
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_async_db, get_db, has_async_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
@@ -13,7 +14,7 @@ from open_webui.models.users import Users, UserResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, select
 
 from open_webui.utils.access_control import has_access
 
@@ -37,6 +38,10 @@ class Knowledge(Base):
     data = Column(JSON, nullable=True)
     meta = Column(JSON, nullable=True)
 
+    # Vector DB collection serving the knowledge base, when it is not the id
+    # (set when a reindex swaps in a freshly built collection)
+    collection_name = Column(Text, nullable=True)
+
     access_control = Column(JSON, nullable=True)  # Controls data access levels.
     # Defines access control rules for this entry.
     # - `None`: Public access, available to all users with the "user" role.
@@ -70,12 +75,49 @@ class KnowledgeModel(BaseModel):
     data: Optional[dict] = None
     meta: Optional[dict] = None
 
+    collection_name: Optional[str] = None
+
     access_control: Optional[dict] = None
 
     created_at: int  # timestamp in epoch
     updated_at: int  # timestamp in epoch
 
 
+def get_knowledge_collection_name(knowledge: KnowledgeModel) -> str:
+    return knowledge.collection_name or knowledge.id
+
+
+class KnowledgeReindex(Base):
+    __tablename__ = "knowledge_reindex"
+
+    # Checkpoint of a knowledge base being rebuilt into `collection_name`
+    knowledge_id = Column(Text, primary_key=True)
+    job_id = Column(Text)
+    user_id = Column(Text)
+
+    collection_name = Column(Text)
+    processed_file_ids = Column(JSON, nullable=True)
+    failed_file_ids = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class KnowledgeReindexModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    knowledge_id: str
+    job_id: str
+    user_id: str
+
+    collection_name: str
+    processed_file_ids: Optional[list[str]] = None
+    failed_file_ids: Optional[list[str]] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
 ####################
 # Forms
 ####################
@@ -151,20 +193,65 @@ class KnowledgeTable:
                 )
             return knowledge_bases
 
+    async def get_knowledge_bases_async(self) -> list[KnowledgeUserModel]:
+        if not has_async_db():
+            return await asyncio.to_thread(self.get_knowledge_bases)
+
+        async with get_async_db() as db:
+            all_knowledge = (
+                await db.scalars(
+                    select(Knowledge).order_by(Knowledge.updated_at.desc())
+                )
+            ).all()
+
+        user_ids = list(set(knowledge.user_id for knowledge in all_knowledge))
+
+        users = await Users.get_users_by_user_ids_async(user_ids) if user_ids else []
+        users_dict = {user.id: user for user in users}
+
+        knowledge_bases = []
+        for knowledge in all_knowledge:
+            user = users_dict.get(knowledge.user_id)
+            knowledge_bases.append(
+                KnowledgeUserModel.model_validate(
+                    {
+                        **KnowledgeModel.model_validate(knowledge).model_dump(),
+                        "user": user.model_dump() if user else None,
+                    }
+                )
+            )
+        return knowledge_bases
+
     def check_access_by_user_id(self, id, user_id, permission="write") -> bool:
         knowledge = self.get_knowledge_by_id(id)
         if not knowledge:
             return False
         if knowledge.user_id == user_id:
             return True
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+        user_group_ids = Groups.get_group_ids_by_member_id(user_id)
         return has_access(user_id, permission, knowledge.access_control, user_group_ids)
 
     def get_knowledge_bases_by_user_id(
         self, user_id: str, permission: str = "write"
     ) -> list[KnowledgeUserModel]:
         knowledge_bases = self.get_knowledge_bases()
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+        user_group_ids = Groups.get_group_ids_by_member_id(user_id)
+        return [
+            knowledge_base
+            for knowledge_base in knowledge_bases
+            if knowledge_base.user_id == user_id
+            or has_access(
+                user_id, permission, knowledge_base.access_control, user_group_ids
+            )
+        ]
+
+    async def get_knowledge_bases_by_user_id_async(
+        self, user_id: str, permission: str = "write"
+    ) -> list[KnowledgeUserModel]:
+        knowledge_bases = await self.get_knowledge_bases_async()
+        user_group_ids = {
+            group.id for group in await Groups.get_groups_by_member_id_async(user_id)
+        }
         return [
             knowledge_base
             for knowledge_base in knowledge_bases
@@ -218,6 +305,35 @@ class KnowledgeTable:
             log.exception(e)
             return None
 
+    def get_collection_names_by_ids(self, ids: list[str]) -> dict[str, str]:
+        if not ids:
+            return {}
+        with get_db() as db:
+            rows = (
+                db.query(Knowledge.id, Knowledge.collection_name)
+                .filter(Knowledge.id.in_(ids))
+                .all()
+            )
+            collection_names = {id: collection_name for id, collection_name in rows}
+            return {id: collection_names.get(id) or id for id in ids}
+
+    def update_knowledge_collection_name_by_id(
+        self, id: str, collection_name: str
+    ) -> Optional[KnowledgeModel]:
+        try:
+            with get_db() as db:
+                db.query(Knowledge).filter_by(id=id).update(
+                    {
+                        "collection_name": collection_name,
+                        "updated_at": int(time.time()),
+                    }
+                )
+                db.commit()
+                return self.get_knowledge_by_id(id=id)
+        except Exception as e:
+            log.exception(e)
+            return None
+
     def delete_knowledge_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
@@ -239,3 +355,81 @@ class KnowledgeTable:
 
 
 Knowledges = KnowledgeTable()
+
+
+class KnowledgeReindexTable:
+    def insert_new_reindexes(
+        self, job_id: str, user_id: str, collection_names: dict[str, str]
+    ) -> list[KnowledgeReindexModel]:
+        """Checkpoint a new job rebuilding each knowledge id into its collection."""
+        with get_db() as db:
+            now = int(time.time())
+            reindexes = [
+                KnowledgeReindex(
+                    knowledge_id=knowledge_id,
+                    job_id=job_id,
+                    user_id=user_id,
+                    collection_name=collection_name,
+                    processed_file_ids=[],
+                    failed_file_ids=[],
+                    created_at=now,
+                    updated_at=now,
+                )
+                for knowledge_id, collection_name in collection_names.items()
+            ]
+            db.add_all(reindexes)
+            db.commit()
+            return [
+                KnowledgeReindexModel.model_validate(reindex) for reindex in reindexes
+            ]
+
+    def get_reindexes(self) -> list[KnowledgeReindexModel]:
+        with get_db() as db:
+            return [
+                KnowledgeReindexModel.model_validate(reindex)
+                for reindex in db.query(KnowledgeReindex)
+                .order_by(KnowledgeReindex.created_at)
+                .all()
+            ]
+
+    def update_reindex_progress_by_knowledge_id(
+        self,
+        knowledge_id: str,
+        processed_file_ids: list[str],
+        failed_file_ids: list[str],
+    ) -> bool:
+        try:
+            with get_db() as db:
+                db.query(KnowledgeReindex).filter_by(knowledge_id=knowledge_id).update(
+                    {
+                        "processed_file_ids": processed_file_ids,
+                        "failed_file_ids": failed_file_ids,
+                        "updated_at": int(time.time()),
+                    }
+                )
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(e)
+            return False
+
+    def delete_reindex_by_knowledge_id(self, knowledge_id: str) -> bool:
+        try:
+            with get_db() as db:
+                db.query(KnowledgeReindex).filter_by(knowledge_id=knowledge_id).delete()
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+    def delete_all_reindexes(self) -> bool:
+        try:
+            with get_db() as db:
+                db.query(KnowledgeReindex).delete()
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+
+KnowledgeReindexes = KnowledgeReindexTable()
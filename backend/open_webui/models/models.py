@@ -207,7 +207,7 @@ class ModelsTable:
         self, user_id: str, permission: str = "write"
     ) -> list[ModelUserResponse]:
         models = self.get_models()
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+        user_group_ids = Groups.get_group_ids_by_member_id(user_id)
         return [
             model
             for model in models
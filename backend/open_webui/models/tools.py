@@ -146,6 +146,11 @@ class ToolsTable:
         except Exception:
             return None
 
+    def get_tool_updated_at_by_id(self, id: str) -> Optional[int]:
+        """Cheap version check for cached tool modules."""
+        with get_db() as db:
+            return db.query(Tool.updated_at).filter_by(id=id).scalar()
+
     def get_tools(self) -> list[ToolUserModel]:
         with get_db() as db:
             all_tools = db.query(Tool).order_by(Tool.updated_at.desc()).all()
@@ -172,7 +177,7 @@ class ToolsTable:
         self, user_id: str, permission: str = "write"
     ) -> list[ToolUserModel]:
         tools = self.get_tools()
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+        user_group_ids = Groups.get_group_ids_by_member_id(user_id)
 
         return [
             tool
@@ -6,23 +6,39 @@ from typing import Optional, Dict, Any
 
 import jwt
 
+import asyncio
 import base64
+import threading
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import Base, JSONField, get_async_db, get_db, has_async_db
 
 
 from open_webui.models.datatokens import OAuthTokens
 
-from open_webui.env import DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL
+from open_webui.env import (
+    DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+)
 from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups, GroupModel, GroupUpdateForm, GroupForm
 from open_webui.utils.data.encryption import encrypt_data
-from open_webui.utils.misc import throttle
+from open_webui.utils.misc import TTLCache, throttle
+from open_webui.utils.redis import (
+    RedisInvalidationChannel,
+    get_redis_connection,
+    get_sentinels_from_env,
+)
 
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, Date
-from sqlalchemy import or_
+from sqlalchemy import or_, select, update
 
 import datetime
 
@@ -164,7 +180,122 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+# Seconds pending last-active timestamps are collected before being written
+LAST_ACTIVE_FLUSH_INTERVAL = 5
+
+
 class UsersTable:
+    def __init__(self):
+        self._user_cache = TTLCache(USER_CACHE_TTL, USER_CACHE_SIZE)
+        self._user_invalidations: Optional[RedisInvalidationChannel] = None
+        self._user_invalidations_lock = threading.Lock()
+
+        # Users whose last-active timestamp was recorded within the interval
+        self._recently_active = TTLCache(
+            DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL or 0, USER_CACHE_SIZE
+        )
+        self._pending_last_active: dict[str, int] = {}
+        self._pending_last_active_lock = threading.Lock()
+        self._last_active_timer: Optional[threading.Timer] = None
+
+    def _get_user_invalidations(self) -> Optional[RedisInvalidationChannel]:
+        if not REDIS_URL or USER_CACHE_TTL <= 0:
+            return None
+
+        with self._user_invalidations_lock:
+            if self._user_invalidations is None:
+                try:
+                    self._user_invalidations = RedisInvalidationChannel(
+                        get_redis_connection(
+                            REDIS_URL,
+                            get_sentinels_from_env(
+                                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                            ),
+                            REDIS_CLUSTER,
+                        ),
+                        f"{REDIS_KEY_PREFIX}:users:invalidate",
+                        self._invalidate_local_user,
+                    )
+                except Exception as e:
+                    log.warning(f"Failed to subscribe to user invalidations: {e}")
+            return self._user_invalidations
+
+    def _invalidate_local_user(self, id: Optional[str]):
+        if id is None:
+            self._user_cache.clear()
+        else:
+            self._user_cache.delete(id)
+
+    def invalidate_user_cache(self, id: str):
+        """Drop a user from the cache of this and, with Redis, every other instance."""
+        self._user_cache.delete(id)
+
+        user_invalidations = self._get_user_invalidations()
+        if user_invalidations:
+            user_invalidations.publish(id)
+
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        """
+        Like `get_user_by_id`, but served from a short-lived in-process cache.
+        Meant for authenticating requests; `last_active_at` may lag behind.
+        """
+        # Subscribe before the first read so that no invalidation is missed
+        self._get_user_invalidations()
+
+        user = self._user_cache.get(id)
+        if user is None:
+            user = self.get_user_by_id(id)
+            if user is None:
+                return None
+            self._user_cache.set(id, user)
+
+        return user.model_copy(deep=True)
+
+    def mark_user_active(self, id: str):
+        """
+        Record that a user is active. Timestamps are written at most once per
+        DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL seconds per user, batched
+        into a single update every LAST_ACTIVE_FLUSH_INTERVAL seconds.
+        """
+        if not DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL:
+            self.update_user_last_active_by_id(id)
+            return
+
+        if self._recently_active.get(id):
+            return
+        self._recently_active.set(id, True)
+
+        with self._pending_last_active_lock:
+            self._pending_last_active[id] = int(time.time())
+            if self._last_active_timer is None:
+                self._last_active_timer = threading.Timer(
+                    LAST_ACTIVE_FLUSH_INTERVAL, self.flush_user_last_active
+                )
+                self._last_active_timer.daemon = True
+                self._last_active_timer.start()
+
+    def flush_user_last_active(self):
+        with self._pending_last_active_lock:
+            pending = self._pending_last_active
+            self._pending_last_active = {}
+            self._last_active_timer = None
+
+        if not pending:
+            return
+
+        try:
+            with get_db() as db:
+                db.execute(
+                    update(User),
+                    [
+                        {"id": id, "last_active_at": last_active_at}
+                        for id, last_active_at in pending.items()
+                    ],
+                )
+                db.commit()
+        except Exception as e:
+            log.error(f"Failed to update last active of {len(pending)} users: {e}")
+
     def insert_new_user(
         self,
         id: str,
@@ -205,6 +336,17 @@ class UsersTable:
         except Exception:
             return None
 
+    async def get_user_by_id_async(self, id: str) -> Optional[UserModel]:
+        if not has_async_db():
+            return await asyncio.to_thread(self.get_user_by_id, id)
+
+        try:
+            async with get_async_db() as db:
+                user = await db.get(User, id)
+                return UserModel.model_validate(user)
+        except Exception:
+            return None
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -304,6 +446,16 @@ class UsersTable:
             users = db.query(User).filter(User.id.in_(user_ids)).all()
             return [UserModel.model_validate(user) for user in users]
 
+    async def get_users_by_user_ids_async(
+        self, user_ids: list[str]
+    ) -> list[UserModel]:
+        if not has_async_db():
+            return await asyncio.to_thread(self.get_users_by_user_ids, user_ids)
+
+        async with get_async_db() as db:
+            users = await db.scalars(select(User).where(User.id.in_(user_ids)))
+            return [UserModel.model_validate(user) for user in users]
+
     def get_num_users(self) -> Optional[int]:
         with get_db() as db:
             return db.query(User).count()
@@ -341,6 +493,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                self.invalidate_user_cache(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -355,6 +508,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -688,6 +842,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -699,6 +854,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -719,6 +875,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -737,6 +894,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                self.invalidate_user_cache(id)
 
                 return True
             else:
@@ -749,6 +907,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                self.invalidate_user_cache(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -0,0 +1,441 @@
+import collections
+import logging
+import math
+import sys
+import threading
+import uuid
+from typing import Any, Callable, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from open_webui.env import (
+    BM25_INDEX_CACHE_SIZE_MB,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.retrieval.vector.main import GetResult
+from open_webui.utils.redis import (
+    RedisInvalidationChannel,
+    get_redis_connection,
+    get_sentinels_from_env,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def tokenize(text: str) -> list[str]:
+    # Same tokenization as langchain's BM25Retriever
+    return text.split()
+
+
+# Bytes taken by an entry of the postings of a term, and by the slots of a chunk
+# in the per-chunk lists and position map, on 64-bit CPython
+POSTING_ENTRY_SIZE = 48
+CHUNK_ENTRY_SIZE = 120
+EMPTY_POSTINGS_SIZE = sys.getsizeof({})
+
+
+def get_chunk_size(
+    id: str, document: str, metadata: Any, term_freqs: collections.Counter
+) -> int:
+    """Memory taken by one chunk of an index, in bytes."""
+    size = sys.getsizeof(id) + sys.getsizeof(document) + CHUNK_ENTRY_SIZE
+    size += sys.getsizeof(term_freqs) + sum(sys.getsizeof(t) for t in term_freqs)
+    size += len(term_freqs) * POSTING_ENTRY_SIZE
+    if isinstance(metadata, dict):
+        size += sys.getsizeof(metadata) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value) for key, value in metadata.items()
+        )
+    return size
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over the chunks of one collection, scoring like
+    `rank_bm25.BM25Okapi` (as used by langchain's BM25Retriever) but kept as
+    an inverted index so that chunks can be added and removed without
+    re-tokenizing the rest of the collection.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[Any] = []
+
+        self._positions: dict[str, int] = {}
+        self._term_freqs: list[collections.Counter] = []
+        self._doc_lens: list[int] = []
+        self._chunk_sizes: list[int] = []
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_len = 0
+
+        self._idf: Optional[dict[str, float]] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_result(cls, result: Optional[GetResult]) -> "BM25Index":
+        index = cls()
+        if result and result.documents and result.documents[0]:
+            ids = result.ids[0] if result.ids else None
+            index.add(
+                ids or [str(uuid.uuid4()) for _ in result.documents[0]],
+                result.documents[0],
+                result.metadatas[0] if result.metadatas else None,
+            )
+        return index
+
+    @property
+    def size(self) -> int:
+        """Memory used by the index, in bytes, as measured by `sys.getsizeof`."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: Optional[list[Any]] = None,
+    ):
+        metadatas = metadatas or [{} for _ in documents]
+
+        with self._lock:
+            self._remove([id for id in ids if id in self._positions])
+
+            for id, document, metadata in zip(ids, documents, metadatas):
+                term_freqs = collections.Counter(tokenize(document))
+                for term, freq in term_freqs.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = {}
+                        self._size += EMPTY_POSTINGS_SIZE
+                    postings[id] = freq
+
+                self._positions[id] = len(self.ids)
+                self.ids.append(id)
+                self.documents.append(document)
+                self.metadatas.append(metadata)
+                self._term_freqs.append(term_freqs)
+                self._doc_lens.append(sum(term_freqs.values()))
+                self._chunk_sizes.append(
+                    get_chunk_size(id, document, metadata, term_freqs)
+                )
+
+                self._total_len += self._doc_lens[-1]
+                self._size += self._chunk_sizes[-1]
+
+            self._idf = None
+
+    def remove(self, ids: Optional[list[str]] = None, filter: Optional[dict] = None):
+        """Remove chunks by id, or those whose metadata matches all of `filter`."""
+        with self._lock:
+            if filter:
+                ids = [
+                    id
+                    for id, metadata in zip(self.ids, self.metadatas)
+                    if all((metadata or {}).get(k) == v for k, v in filter.items())
+                ]
+            self._remove(ids or [])
+
+    def _remove(self, ids: list[str]):
+        positions = {self._positions[id] for id in ids if id in self._positions}
+        if not positions:
+            return
+
+        for position in positions:
+            id = self.ids[position]
+            for term in self._term_freqs[position]:
+                postings = self._postings[term]
+                postings.pop(id, None)
+                if not postings:
+                    del self._postings[term]
+                    self._size -= EMPTY_POSTINGS_SIZE
+
+            self._total_len -= self._doc_lens[position]
+            self._size -= self._chunk_sizes[position]
+
+        def keep(values: list) -> list:
+            return [v for i, v in enumerate(values) if i not in positions]
+
+        self.ids = keep(self.ids)
+        self.documents = keep(self.documents)
+        self.metadatas = keep(self.metadatas)
+        self._term_freqs = keep(self._term_freqs)
+        self._doc_lens = keep(self._doc_lens)
+        self._chunk_sizes = keep(self._chunk_sizes)
+        self._positions = {id: i for i, id in enumerate(self.ids)}
+        self._idf = None
+
+    def _get_idf(self) -> dict[str, float]:
+        if self._idf is None:
+            corpus_size = len(self.ids)
+            idf = {
+                term: math.log(corpus_size - len(postings) + 0.5)
+                - math.log(len(postings) + 0.5)
+                for term, postings in self._postings.items()
+            }
+
+            # Floor negative idf values (terms in more than half of the
+            # documents) to a fraction of the average idf, as BM25Okapi does
+            average_idf = sum(idf.values()) / len(idf) if idf else 0
+            eps = self.epsilon * average_idf
+            self._idf = {
+                term: value if value >= 0 else eps for term, value in idf.items()
+            }
+        return self._idf
+
+    def _get_scores(self, query: str) -> np.ndarray:
+        idf = self._get_idf()
+        doc_lens = np.array(self._doc_lens, dtype=np.float64)
+        avgdl = self._total_len / len(self.ids) or 1
+        norms = self.k1 * (1 - self.b + self.b * doc_lens / avgdl)
+
+        scores = np.zeros(len(self.ids))
+        for term in tokenize(query):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            positions = np.fromiter(
+                (self._positions[id] for id in postings), dtype=np.int64
+            )
+            freqs = np.fromiter(postings.values(), dtype=np.float64)
+            scores[positions] += (
+                idf[term] * freqs * (self.k1 + 1) / (freqs + norms[positions])
+            )
+        return scores
+
+    def get_scores(self, query: str) -> np.ndarray:
+        """Score of every chunk for `query`, in the order of `ids`."""
+        with self._lock:
+            if not self.ids:
+                return np.zeros(0)
+            return self._get_scores(query)
+
+    def search(self, query: str, k: int) -> list[Document]:
+        with self._lock:
+            if not self.ids:
+                return []
+
+            scores = self._get_scores(query)
+            top = np.argsort(scores)[::-1][:k]
+            return [
+                Document(
+                    id=self.ids[i],
+                    page_content=self.documents[i],
+                    # Retrieved documents get their metadata annotated downstream
+                    metadata=dict(self.metadatas[i] or {}),
+                )
+                for i in top
+            ]
+
+
+class BM25IndexRetriever(BaseRetriever):
+    index: Any
+    k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return self.index.search(query, self.k)
+
+
+class BM25IndexCache:
+    """
+    LRU cache of BM25 indexes by collection name, bounded by the memory the
+    indexes take.
+
+    Indexes are built from the vector DB on first use and then kept up to
+    date by the ingestion paths calling `add`, `remove` or `drop`. With Redis
+    configured, changes made by one instance evict the index on the others.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+        self._indexes: collections.OrderedDict[str, BM25Index] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        # Collections being loaded, and whether they changed during the load
+        self._loading: dict[str, bool] = {}
+
+        self._instance_id = uuid.uuid4().hex
+        self._invalidations: Optional[RedisInvalidationChannel] = None
+
+    def _get_invalidations(self) -> Optional[RedisInvalidationChannel]:
+        if not REDIS_URL:
+            return None
+
+        with self._lock:
+            if self._invalidations is None:
+                try:
+                    self._invalidations = RedisInvalidationChannel(
+                        get_redis_connection(
+                            REDIS_URL,
+                            get_sentinels_from_env(
+                                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                            ),
+                            REDIS_CLUSTER,
+                        ),
+                        f"{REDIS_KEY_PREFIX}:bm25:invalidate",
+                        self._on_invalidate,
+                    )
+                except Exception as e:
+                    log.warning(f"Failed to subscribe to BM25 invalidations: {e}")
+            return self._invalidations
+
+    def _on_invalidate(self, key: Optional[str]):
+        if key is None:
+            with self._lock:
+                self._clear()
+            return
+
+        instance_id, _, collection_name = key.partition(" ")
+        if instance_id == self._instance_id:
+            return
+
+        with self._lock:
+            if collection_name:
+                self._drop(collection_name)
+            else:
+                self._clear()
+
+    def _mark_changed(self, collection_name: str):
+        # An index being loaded may have read the collection before the change
+        if collection_name in self._loading:
+            self._loading[collection_name] = True
+
+    def _drop(self, collection_name: str):
+        self._indexes.pop(collection_name, None)
+        self._mark_changed(collection_name)
+
+    def _clear(self):
+        self._indexes.clear()
+        for collection_name in self._loading:
+            self._loading[collection_name] = True
+
+    def _publish(self, collection_name: str):
+        invalidations = self._get_invalidations()
+        if invalidations:
+            invalidations.publish(f"{self._instance_id} {collection_name}")
+
+    def get(
+        self,
+        collection_name: str,
+        loader: Callable[[str], Optional[GetResult]],
+    ) -> Optional[BM25Index]:
+        """
+        Return the index of a collection, building it from `loader` (usually
+        `VECTOR_DB_CLIENT.get`) on a miss. Returns None if the collection does
+        not exist.
+        """
+        # Subscribe before the first load so that no invalidation is missed
+        self._get_invalidations()
+
+        with self._lock:
+            index = self._indexes.get(collection_name)
+            if index is not None:
+                self._indexes.move_to_end(collection_name)
+                return index
+            load_lock = self._load_locks.setdefault(collection_name, threading.Lock())
+
+        # Build each collection once even if several queries miss at once
+        with load_lock:
+            with self._lock:
+                index = self._indexes.get(collection_name)
+                if index is not None:
+                    return index
+                self._loading[collection_name] = False
+
+            try:
+                result = loader(collection_name)
+                index = BM25Index.from_result(result) if result is not None else None
+            finally:
+                with self._lock:
+                    changed = self._loading.pop(collection_name, False)
+                    self._load_locks.pop(collection_name, None)
+
+            if index is None:
+                return None
+            log.debug(f"Built BM25 index for {collection_name} ({len(index)} chunks)")
+
+            # Chunks added or removed while loading may be missing from the
+            # index, so it only serves this query and the next one loads again
+            if not changed:
+                with self._lock:
+                    self._indexes[collection_name] = index
+                    self._evict()
+            return index
+
+    def add(
+        self,
+        collection_name: str,
+        ids: list[str],
+        documents: list[str],
+        metadatas: Optional[list[Any]] = None,
+    ):
+        with self._lock:
+            index = self._indexes.get(collection_name)
+            self._mark_changed(collection_name)
+        if index is not None:
+            index.add(ids, documents, metadatas)
+            with self._lock:
+                self._evict()
+        self._publish(collection_name)
+
+    def remove(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        with self._lock:
+            index = self._indexes.get(collection_name)
+            self._mark_changed(collection_name)
+        if index is not None:
+            index.remove(ids, filter)
+        self._publish(collection_name)
+
+    def drop(self, collection_name: str):
+        """Forget a collection, e.g. after it was deleted or filtered."""
+        with self._lock:
+            self._drop(collection_name)
+        self._publish(collection_name)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+        invalidations = self._get_invalidations()
+        if invalidations:
+            # Empty collection name drops everything on the other instances
+            invalidations.publish(f"{self._instance_id} ")
+
+    def _evict(self):
+        size = sum(index.size for index in self._indexes.values())
+        # Always keep the most recently used index, however large
+        while size > self.max_size and len(self._indexes) > 1:
+            _, index = self._indexes.popitem(last=False)
+            size -= index.size
+
+
+BM25_INDEXES = BM25IndexCache(BM25_INDEX_CACHE_SIZE_MB * 1024 * 1024)
@@ -0,0 +1,161 @@
+import collections
+import hashlib
+import logging
+import threading
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from open_webui.env import (
+    EMBEDDING_CACHE_REDIS_TTL,
+    EMBEDDING_CACHE_SIZE,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings, keyed by engine, model, base URL,
+    prefix and a hash of the text. Vectors are kept as float32 in an in-process LRU and,
+    when `redis_ttl` is set, in Redis so that other instances can reuse them.
+    """
+
+    def __init__(self, max_size: int, redis_ttl: int = 0):
+        self.max_size = max_size
+        self.redis_ttl = redis_ttl
+
+        self._entries: collections.OrderedDict[str, np.ndarray] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._redis = None
+
+    def _get_redis(self):
+        if self._redis is None and REDIS_URL and self.redis_ttl > 0:
+            self._redis = get_redis_connection(
+                REDIS_URL,
+                get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+                REDIS_CLUSTER,
+                decode_responses=False,
+            )
+        return self._redis
+
+    @staticmethod
+    def get_key(
+        engine: str, model: str, url: Optional[str], prefix: Optional[str], text: str
+    ) -> str:
+        # Endpoints serving a model under the same name may not be the same model
+        url_digest = hashlib.sha256((url or "").encode()).hexdigest()[:16]
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        return f"{engine}:{model}:{url_digest}:{prefix or ''}:{digest}"
+
+    def get_many(self, keys: list[str]) -> list[Optional[np.ndarray]]:
+        with self._lock:
+            vectors = [self._entries.get(key) for key in keys]
+            for key, vector in zip(keys, vectors):
+                if vector is not None:
+                    self._entries.move_to_end(key)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        redis = self._get_redis()
+        if missing and redis:
+            try:
+                # Separate GETs rather than MGET, whose keys would have to share
+                # a hash slot with Redis Cluster
+                pipe = redis.pipeline(transaction=False)
+                for i in missing:
+                    pipe.get(f"{REDIS_KEY_PREFIX}:embedding:{keys[i]}")
+                values = pipe.execute()
+                found = {}
+                for i, value in zip(missing, values):
+                    if value is not None:
+                        vectors[i] = np.frombuffer(value, dtype=np.float32)
+                        found[keys[i]] = vectors[i]
+                self._set_local(found)
+            except Exception as e:
+                log.warning(f"Failed to read embeddings from Redis: {e}")
+
+        return vectors
+
+    def set_many(self, entries: dict[str, np.ndarray]):
+        self._set_local(entries)
+
+        redis = self._get_redis()
+        if entries and redis:
+            try:
+                pipe = redis.pipeline(transaction=False)
+                for key, vector in entries.items():
+                    pipe.set(
+                        f"{REDIS_KEY_PREFIX}:embedding:{key}",
+                        vector.tobytes(),
+                        ex=self.redis_ttl,
+                    )
+                pipe.execute()
+            except Exception as e:
+                log.warning(f"Failed to write embeddings to Redis: {e}")
+
+    def _set_local(self, entries: dict[str, np.ndarray]):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            for key, vector in entries.items():
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def wrap(
+        self,
+        embedding_function: Callable,
+        engine: str,
+        model: str,
+        url: Optional[str] = None,
+    ) -> Callable:
+        """
+        Wrap an embedding function taking `(query, prefix=None, user=None)`,
+        where `query` is a text or a list of texts, so that only texts missing
+        from the cache are embedded.
+        """
+
+        def cached_embedding_function(
+            query: Union[str, list[str]], prefix=None, user=None
+        ):
+            texts = query if isinstance(query, list) else [query]
+            keys = [self.get_key(engine, model, url, prefix, text) for text in texts]
+            vectors = self.get_many(keys)
+
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            if missing:
+                embeddings = embedding_function(
+                    [texts[i] for i in missing], prefix=prefix, user=user
+                )
+
+                if not isinstance(embeddings, list) or len(embeddings) != len(missing):
+                    # Partial failure, fall back to the uncached behaviour
+                    if len(missing) == len(texts):
+                        return embeddings if isinstance(query, list) else None
+                    return embedding_function(query, prefix=prefix, user=user)
+
+                computed = {}
+                for i, embedding in zip(missing, embeddings):
+                    vectors[i] = np.asarray(embedding, dtype=np.float32)
+                    computed[keys[i]] = vectors[i]
+                self.set_many(computed)
+
+            embeddings = [vector.tolist() for vector in vectors]
+            return embeddings if isinstance(query, list) else embeddings[0]
+
+        return cached_embedding_function
+
+
+EMBEDDING_CACHE = EmbeddingCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_REDIS_TTL)
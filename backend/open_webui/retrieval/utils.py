@@ -1,7 +1,11 @@
 import logging
 import os
+import random
+import threading
+from email.utils import parsedate_to_datetime
 from typing import Optional, Union
 
+import numpy as np
 import requests
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
@@ -11,10 +15,11 @@ import re
 from urllib.parse import quote
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
+from open_webui.retrieval.bm25 import BM25_INDEXES, BM25Index, BM25IndexRetriever
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 
@@ -27,6 +32,7 @@ from open_webui.models.notes import Notes
 
 from open_webui.retrieval.vector.main import GetResult
 from open_webui.utils.access_control import has_access
+from open_webui.utils.http_client import get_requests_session
 from open_webui.utils.misc import get_message_list
 
 from open_webui.retrieval.web.utils import get_web_loader
@@ -42,6 +48,9 @@ from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    RAG_EMBEDDING_BATCH_MAX_TOKENS,
+    RAG_EMBEDDING_MAX_RETRIES,
 )
 
 log = logging.getLogger(__name__)
@@ -106,6 +115,7 @@ class VectorSearchRetriever(BaseRetriever):
         for idx in range(len(ids)):
             results.append(
                 Document(
+                    id=ids[idx],
                     metadata=metadatas[idx],
                     page_content=documents[idx],
                 )
@@ -149,7 +159,7 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
+    collection_result: Optional[GetResult],
     query: str,
     embedding_function,
     k: int,
@@ -159,23 +169,19 @@ def query_doc_with_hybrid_search(
     hybrid_bm25_weight: float,
 ) -> dict:
     try:
-        if (
-            not collection_result
-            or not hasattr(collection_result, "documents")
-            or not collection_result.documents
-            or len(collection_result.documents) == 0
-            or not collection_result.documents[0]
-        ):
+        # Without an explicit result use the cached index of the collection
+        if collection_result is not None:
+            bm25_index = BM25Index.from_result(collection_result)
+        else:
+            bm25_index = BM25_INDEXES.get(collection_name, VECTOR_DB_CLIENT.get)
+
+        if not bm25_index:
             log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
             return {"documents": [], "metadatas": [], "distances": []}
 
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
 
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
+        bm25_retriever = BM25IndexRetriever(index=bm25_index, k=k)
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -210,28 +216,22 @@ def query_doc_with_hybrid_search(
 
         result = compression_retriever.invoke(query)
 
+        ids = [d.id for d in result]
         distances = [d.metadata.get("score") for d in result]
         documents = [d.page_content for d in result]
         metadatas = [d.metadata for d in result]
 
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
-            )
-            sorted_items = sorted_items[:k]
-
-            if sorted_items:
-                distances, documents, metadatas = map(list, zip(*sorted_items))
-            else:
-                distances, documents, metadatas = [], [], []
-
         result = {
+            "ids": [ids],
             "distances": [distances],
             "documents": [documents],
             "metadatas": [metadatas],
         }
 
+        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
+        if k < k_reranker:
+            result = merge_and_sort_query_results([result], k=k)
+
         log.info(
             "query_doc_with_hybrid_search:result "
             + f'{result["metadatas"]} {result["distances"]}'
@@ -263,45 +263,87 @@ def merge_get_results(get_results: list[dict]) -> dict:
     return result
 
 
+def top_k_query_results(
+    distances: np.ndarray,
+    keys: list,
+    ids: list,
+    documents: list[str],
+    metadatas: list,
+    k: int,
+) -> dict:
+    """
+    Deduplicate candidates by key, keeping the best scoring occurrence, and
+    return the `k` best by descending score. Among equally scored occurrences
+    of a key, one carrying an id is kept. Ties between keys are broken by the
+    order in which they were first seen.
+    """
+    if len(documents) == 0 or k <= 0:
+        return {"ids": [[]], "distances": [[]], "documents": [[]], "metadatas": [[]]}
+
+    # Map every distinct key to an integer to compare them as an array
+    key_numbers = {}
+    numbers = np.fromiter(
+        (key_numbers.setdefault(key, len(key_numbers)) for key in keys),
+        dtype=np.int64,
+        count=len(keys),
+    )
+    positions = np.arange(len(documents))
+    no_id = np.fromiter((id is None for id in ids), dtype=bool, count=len(ids))
+
+    # Best candidate per key: order by key, then score, then id, then position
+    order = np.lexsort((positions, no_id, -distances, numbers))
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = numbers[order][1:] != numbers[order][:-1]
+    candidates = order[is_first]
+
+    if len(candidates) > k:
+        # Only candidates scoring at least the k-th best can make the cut
+        kth = np.partition(distances[candidates], len(candidates) - k)[
+            len(candidates) - k
+        ]
+        candidates = candidates[distances[candidates] >= kth]
+
+    # Equal scores keep the order in which keys were first seen
+    top = candidates[np.lexsort((numbers[candidates], -distances[candidates]))][:k]
+    return {
+        "ids": [[ids[i] for i in top]],
+        "distances": [distances[top].tolist()],
+        "documents": [[documents[i] for i in top]],
+        "metadatas": [[metadatas[i] for i in top]],
+    }
+
+
 def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
-    # Initialize lists to store combined data
-    combined = dict()  # To store documents with unique document hashes
+    """
+    Merge the results of several queries and collections into the `k` best.
+    The same chunk returned more than once is kept once, identified by its
+    content: a file indexed in its own collection and in a knowledge base has
+    a different id in each.
+    """
+    distances = []
+    keys = []
+    ids = []
+    documents = []
+    metadatas = []
 
     for data in query_results:
-        distances = data["distances"][0]
-        documents = data["documents"][0]
-        metadatas = data["metadatas"][0]
-
-        for distance, document, metadata in zip(distances, documents, metadatas):
+        result_ids = (data.get("ids") or [[]])[0] or []
+        for idx, (distance, document, metadata) in enumerate(
+            zip(data["distances"][0], data["documents"][0], data["metadatas"][0])
+        ):
             if isinstance(document, str):
-                doc_hash = hashlib.sha256(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
-
-                if doc_hash not in combined.keys():
-                    combined[doc_hash] = (distance, document, metadata)
-                    continue  # if doc is new, no further comparison is needed
-
-                # if doc is alredy in, but new distance is better, update
-                if distance > combined[doc_hash][0]:
-                    combined[doc_hash] = (distance, document, metadata)
+                id = result_ids[idx] if idx < len(result_ids) else None
 
-    combined = list(combined.values())
-    # Sort the list based on distances
-    combined.sort(key=lambda x: x[0], reverse=True)
+                distances.append(distance if distance is not None else -np.inf)
+                keys.append(hashlib.sha256(document.encode()).hexdigest())
+                ids.append(id)
+                documents.append(document)
+                metadatas.append(metadata)
 
-    # Slice to keep only the top k elements
-    sorted_distances, sorted_documents, sorted_metadatas = (
-        zip(*combined[:k]) if combined else ([], [], [])
+    return top_k_query_results(
+        np.array(distances, dtype=np.float64), keys, ids, documents, metadatas, k
     )
 
-    # Create and return the output dictionary
-    return {
-        "distances": [list(sorted_distances)],
-        "documents": [list(sorted_documents)],
-        "metadatas": [list(sorted_metadatas)],
-    }
-
 
 def get_all_items_from_collections(collection_names: list[str]) -> dict:
     results = []
@@ -384,20 +426,19 @@ def query_collection_with_hybrid_search(
 ) -> dict:
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
+    # Load (or reuse) the BM25 index of each collection once, sequentially
+    bm25_indexes = {}
     for collection_name in collection_names:
         try:
             log.debug(
-                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
+                f"query_collection_with_hybrid_search:BM25_INDEXES.get:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
+            bm25_indexes[collection_name] = BM25_INDEXES.get(
+                collection_name, VECTOR_DB_CLIENT.get
             )
         except Exception as e:
             log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            bm25_indexes[collection_name] = None
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
@@ -407,7 +448,7 @@ def query_collection_with_hybrid_search(
         try:
             result = query_doc_with_hybrid_search(
                 collection_name=collection_name,
-                collection_result=collection_results[collection_name],
+                collection_result=None,
                 query=query,
                 embedding_function=embedding_function,
                 k=k,
@@ -426,7 +467,7 @@ def query_collection_with_hybrid_search(
     tasks = [
         (cn, q)
         for cn in collection_names
-        if collection_results[cn] is not None
+        if bm25_indexes[cn] is not None
         for q in queries
     ]
 
@@ -456,13 +497,14 @@ def get_embedding_function(
     key,
     embedding_batch_size,
     azure_api_version=None,
+    cache: bool = True,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        func = lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
         ).tolist()
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
-        func = lambda query, prefix=None, user=None: generate_embeddings(
+        generate = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
             model=embedding_model,
             text=query,
@@ -475,26 +517,148 @@ def get_embedding_function(
 
         def generate_multiple(query, prefix, user, func):
             if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    batch_embeddings = func(
-                        query[i : i + embedding_batch_size],
-                        prefix=prefix,
-                        user=user,
-                    )
+                batches = get_embedding_batches(
+                    query, embedding_batch_size, RAG_EMBEDDING_BATCH_MAX_TOKENS
+                )
+
+                def generate_batch(batch: list[str]) -> list:
+                    batch_embeddings = func(batch, prefix=prefix, user=user)
+                    # Never skip a batch, the vectors would no longer line up
+                    # with their texts
+                    if not isinstance(batch_embeddings, list) or len(
+                        batch_embeddings
+                    ) != len(batch):
+                        raise Exception(
+                            f"Failed to generate embeddings for a batch of {len(batch)} texts"
+                        )
+                    return batch_embeddings
 
-                    if isinstance(batch_embeddings, list):
-                        embeddings.extend(batch_embeddings)
+                if len(batches) == 1:
+                    return generate_batch(batches[0])
+
+                embeddings = []
+                # map keeps the batches in order whatever order they finish in
+                for batch_embeddings in get_embedding_executor(embedding_engine).map(
+                    generate_batch, batches
+                ):
+                    embeddings.extend(batch_embeddings)
                 return embeddings
             else:
                 return func(query, prefix, user)
 
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+        func = lambda query, prefix=None, user=None: generate_multiple(
+            query, prefix, user, generate
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    # Queries and retrieved documents repeat across turns, reuse their vectors
+    if cache:
+        return EMBEDDING_CACHE.wrap(func, embedding_engine, embedding_model, url)
+    return func
+
+
+_embedding_executors: dict[str, ThreadPoolExecutor] = {}
+_embedding_executors_lock = threading.Lock()
+
+
+def get_embedding_executor(engine: str) -> ThreadPoolExecutor:
+    """
+    Shared pool sending the embedding batches of one engine, so that at most
+    RAG_EMBEDDING_CONCURRENT_REQUESTS requests are in flight whatever the
+    number of files being processed.
+    """
+    with _embedding_executors_lock:
+        executor = _embedding_executors.get(engine)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=RAG_EMBEDDING_CONCURRENT_REQUESTS,
+                thread_name_prefix=f"embedding-{engine}",
+            )
+            _embedding_executors[engine] = executor
+        return executor
+
+
+def estimate_token_count(text: str) -> int:
+    # Upper estimate that holds for both English (~4 bytes per token) and
+    # CJK text (3 bytes per character, 1-2 characters per token)
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def get_embedding_batches(
+    texts: list[str], batch_size: int, max_tokens: int = 0
+) -> list[list[str]]:
+    """
+    Split texts into batches of at most `batch_size` texts and, if
+    `max_tokens` is set, about `max_tokens` tokens. A single text larger than
+    `max_tokens` still gets a batch of its own.
+    """
+    batch_size = max(batch_size or 1, 1)
+
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = estimate_token_count(text) if max_tokens > 0 else 0
+        if batch and (
+            len(batch) >= batch_size
+            or (max_tokens > 0 and batch_tokens + tokens > max_tokens)
+        ):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+
+        batch.append(text)
+        batch_tokens += tokens
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def get_retry_delay(response: Optional[requests.Response], attempt: int) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0), 60)
+            except ValueError:
+                pass
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                return min(max(delay, 0), 60)
+            except (TypeError, ValueError):
+                pass
+
+    # Exponential backoff with jitter so parallel batches don't retry in step
+    return min(0.5 * 2**attempt, 30) * random.uniform(0.5, 1)
+
+
+def post_embeddings_request(url: str, **kwargs) -> requests.Response:
+    """
+    POST to an embedding endpoint, retrying rate limited (429) and failed
+    (5xx, connection error) requests up to RAG_EMBEDDING_MAX_RETRIES times.
+    """
+    for attempt in range(RAG_EMBEDDING_MAX_RETRIES + 1):
+        r = None
+        try:
+            r = get_requests_session().post(url, **kwargs)
+            if r.status_code != 429 and r.status_code < 500:
+                return r
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= RAG_EMBEDDING_MAX_RETRIES:
+                raise e
+
+        if attempt >= RAG_EMBEDDING_MAX_RETRIES:
+            return r
+
+        delay = get_retry_delay(r, attempt)
+        log.warning(
+            f"Embedding request failed ({r.status_code if r is not None else 'connection error'}), "
+            f"retrying in {delay:.1f}s ({attempt + 1}/{RAG_EMBEDDING_MAX_RETRIES})"
+        )
+        time.sleep(delay)
+
 
 def get_reranking_function(reranking_engine, reranking_model, reranking_function):
     if reranking_function is None:
@@ -528,6 +692,17 @@ def get_sources_from_items(
     extracted_collections = []
     query_results = []
 
+    # Reindexing may have moved knowledge bases to new collections
+    knowledge_collection_names = Knowledges.get_collection_names_by_ids(
+        [
+            item["id"]
+            for item in items
+            if item.get("type") == "collection"
+            and item.get("id")
+            and not item.get("legacy")
+        ]
+    )
+
     for item in items:
         query_result = None
         collection_names = []
@@ -700,7 +875,9 @@ def get_sources_from_items(
                 if item.get("legacy"):
                     collection_names = item.get("collection_names", [])
                 else:
-                    collection_names.append(item["id"])
+                    collection_names.append(
+                        knowledge_collection_names.get(item["id"], item["id"])
+                    )
 
         elif item.get("docs"):
             # BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL
@@ -839,7 +1016,7 @@ def generate_openai_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = post_embeddings_request(
             f"{url}/embeddings",
             headers={
                 "Content-Type": "application/json",
@@ -862,7 +1039,7 @@ def generate_openai_batch_embeddings(
         if "data" in data:
             return [elem["embedding"] for elem in data["data"]]
         else:
-            raise "Something went wrong :/"
+            raise Exception("Something went wrong :/")
     except Exception as e:
         log.exception(f"Error generating openai batch embeddings: {e}")
         return None
@@ -887,36 +1064,30 @@ def generate_azure_openai_batch_embeddings(
 
         url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
 
-        for _ in range(5):
-            r = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": key,
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                json=json_data,
-            )
-            if r.status_code == 429:
-                retry = float(r.headers.get("Retry-After", "1"))
-                time.sleep(retry)
-                continue
-            r.raise_for_status()
-            data = r.json()
-            if "data" in data:
-                return [elem["embedding"] for elem in data["data"]]
-            else:
-                raise Exception("Something went wrong :/")
-        return None
+        r = post_embeddings_request(
+            url,
+            headers={
+                "Content-Type": "application/json",
+                "api-key": key,
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            json=json_data,
+        )
+        r.raise_for_status()
+        data = r.json()
+        if "data" in data:
+            return [elem["embedding"] for elem in data["data"]]
+        else:
+            raise Exception("Something went wrong :/")
     except Exception as e:
         log.exception(f"Error generating azure openai batch embeddings: {e}")
         return None
@@ -938,7 +1109,7 @@ def generate_ollama_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = post_embeddings_request(
             f"{url}/api/embed",
             headers={
                 "Content-Type": "application/json",
@@ -962,7 +1133,7 @@ def generate_ollama_batch_embeddings(
         if "embeddings" in data:
             return data["embeddings"]
         else:
-            raise "Something went wrong :/"
+            raise Exception("Something went wrong :/")
     except Exception as e:
         log.exception(f"Error generating ollama batch embeddings: {e}")
         return None
@@ -1073,6 +1244,7 @@ class RerankCompressor(BaseDocumentCompressor):
                 metadata = doc.metadata
                 metadata["score"] = doc_score
                 doc = Document(
+                    id=doc.id,
                     page_content=doc.page_content,
                     metadata=metadata,
                 )
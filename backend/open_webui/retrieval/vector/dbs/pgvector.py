@@ -1,27 +1,24 @@
 from typing import Optional, List, Dict, Any
+import hashlib
 import logging
 import json
+import time
 from sqlalchemy import (
     func,
     literal,
-    cast,
-    column,
     create_engine,
     Column,
-    Integer,
     MetaData,
     LargeBinary,
     select,
     text,
     Text,
     Table,
-    values,
 )
-from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool, QueuePool
 
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.dialects.postgresql import JSONB
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
@@ -44,6 +41,14 @@ from open_webui.config import (
     PGVECTOR_POOL_MAX_OVERFLOW,
     PGVECTOR_POOL_TIMEOUT,
     PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_INDEX_METHOD,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_HNSW_ITERATIVE_SCAN,
+    PGVECTOR_COLLECTION_INDEX_THRESHOLD,
 )
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -55,6 +60,13 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+VECTOR_INDEX_NAME = "idx_document_chunk_vector"
+
+# Seconds before the vector indexes are listed again, so that searches pick
+# up the collection indexes built or dropped by other instances
+COLLECTION_INDEXES_TTL = 300
+
+
 def pgcrypto_encrypt(val, key):
     return func.pgp_sym_encrypt(val, literal(key))
 
@@ -79,6 +91,8 @@ class DocumentChunk(Base):
 
 
 class PgvectorClient(VectorDBBase):
+    supports_maintenance = True
+
     def __init__(self) -> None:
 
         # if no pgvector uri, use the existing database connection
@@ -158,12 +172,7 @@ class PgvectorClient(VectorDBBase):
             Base.metadata.create_all(bind=connection)
 
             # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
-                )
-            )
+            self.session.execute(text(self._get_index_sql(VECTOR_INDEX_NAME)))
             self.session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
@@ -171,6 +180,19 @@ class PgvectorClient(VectorDBBase):
                 )
             )
             self.session.commit()
+
+            indexes = self._get_vector_indexes()
+            self._set_collection_indexes(indexes)
+            for name, index in indexes.items():
+                if (
+                    name == VECTOR_INDEX_NAME
+                    and f"USING {PGVECTOR_INDEX_METHOD} " not in index["definition"]
+                ):
+                    log.warning(
+                        f"The vector index does not use PGVECTOR_INDEX_METHOD={PGVECTOR_INDEX_METHOD}, "
+                        "rebuild it through the vector maintenance endpoint to switch"
+                    )
+            self.session.rollback()
             log.info("Initialization complete.")
         except Exception as e:
             self.session.rollback()
@@ -359,19 +381,11 @@ class PgvectorClient(VectorDBBase):
             vectors = [self.adjust_vector_length(vector) for vector in vectors]
             num_queries = len(vectors)
 
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
-
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
-                )
-                .alias("query_vectors")
-            )
+            # The shared index mostly returns chunks of other collections,
+            # which leaves too few once filtered on the collection
+            exact = not self._has_collection_index(collection_name)
+            if not exact:
+                self._set_search_params(limit)
 
             result_fields = [
                 DocumentChunk.id,
@@ -390,62 +404,35 @@ class PgvectorClient(VectorDBBase):
             else:
                 result_fields.append(DocumentChunk.text)
                 result_fields.append(DocumentChunk.vmetadata)
-            result_fields.append(
-                (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
-                    "distance"
-                )
-            )
-
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(*result_fields)
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
-                )
-            )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
-
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
-                )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
-            )
-
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
 
             ids = [[] for _ in range(num_queries)]
             distances = [[] for _ in range(num_queries)]
             documents = [[] for _ in range(num_queries)]
             metadatas = [[] for _ in range(num_queries)]
 
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
+            # One statement per query vector, bound as a constant so that
+            # the planner can use a vector index for the ordering
+            for qid, vector in enumerate(vectors):
+                distance = DocumentChunk.vector.cosine_distance(vector)
+                # An expression no vector index matches: the rows of the
+                # collection come from the collection_name index, otherwise
+                # from the partial index of the collection
+                order_by = distance + 0 if exact else distance
+                stmt = (
+                    select(*result_fields, distance.label("distance"))
+                    .where(DocumentChunk.collection_name == collection_name)
+                    .order_by(order_by)
                 )
+                if limit is not None:
+                    stmt = stmt.limit(limit)
 
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
-                # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
-                distances[qid].append((2.0 - row.distance) / 2.0)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
+                for row in self.session.execute(stmt).all():
+                    ids[qid].append(row.id)
+                    # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
+                    # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
+                    distances[qid].append((2.0 - row.distance) / 2.0)
+                    documents[qid].append(row.text)
+                    metadatas[qid].append(row.vmetadata)
 
             self.session.rollback()  # read-only transaction
             return SearchResult(
@@ -456,6 +443,39 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during search: {e}")
             return None
 
+    def _set_collection_indexes(self, indexes: Dict[str, Dict[str, Any]]) -> None:
+        self._collection_indexes = {
+            name
+            for name, index in indexes.items()
+            if name != VECTOR_INDEX_NAME and index["valid"]
+        }
+        self._collection_indexes_expire_at = time.time() + COLLECTION_INDEXES_TTL
+
+    def _has_collection_index(self, collection_name: str) -> bool:
+        """Whether the collection has a vector index of its own"""
+        if time.time() > self._collection_indexes_expire_at:
+            self._set_collection_indexes(self._get_vector_indexes())
+        index_name = self._get_collection_index_name(collection_name)
+        return index_name in self._collection_indexes
+
+    def _set_search_params(self, limit: Optional[int]) -> None:
+        # SET LOCAL lasts until the end of the read-only transaction
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            if PGVECTOR_HNSW_EF_SEARCH > 0:
+                # The index returns at most ef_search chunks
+                ef_search = max(PGVECTOR_HNSW_EF_SEARCH, limit or 0)
+                self.session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+            if PGVECTOR_HNSW_ITERATIVE_SCAN in ("off", "relaxed_order", "strict_order"):
+                self.session.execute(
+                    text(
+                        f"SET LOCAL hnsw.iterative_scan = {PGVECTOR_HNSW_ITERATIVE_SCAN}"
+                    )
+                )
+        elif PGVECTOR_IVFFLAT_PROBES > 0:
+            self.session.execute(
+                text(f"SET LOCAL ivfflat.probes = {PGVECTOR_IVFFLAT_PROBES}")
+            )
+
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -633,4 +653,209 @@ class PgvectorClient(VectorDBBase):
 
     def delete_collection(self, collection_name: str) -> None:
         self.delete(collection_name)
+
+        if self._has_collection_index(collection_name):
+            self._drop_index(self._get_collection_index_name(collection_name))
         log.info(f"Collection '{collection_name}' deleted.")
+
+    ####################
+    # Index maintenance
+    ####################
+
+    @staticmethod
+    def _get_collection_index_name(collection_name: str) -> str:
+        # Index names are limited to 63 characters
+        collection_hash = hashlib.md5(collection_name.encode()).hexdigest()[:16]
+        return f"{VECTOR_INDEX_NAME}_{collection_hash}"
+
+    @staticmethod
+    def _get_index_sql(
+        index_name: str,
+        collection_name: Optional[str] = None,
+        concurrently: bool = False,
+    ) -> str:
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            params = f"m = {int(PGVECTOR_HNSW_M)}, ef_construction = {int(PGVECTOR_HNSW_EF_CONSTRUCTION)}"
+        else:
+            params = f"lists = {int(PGVECTOR_IVFFLAT_LISTS)}"
+
+        sql = (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {index_name} "
+            f"ON document_chunk USING {PGVECTOR_INDEX_METHOD} (vector vector_cosine_ops) WITH ({params})"
+        )
+        if collection_name is not None:
+            # Partial index, used by searches filtering on this collection
+            escaped_collection_name = collection_name.replace("'", "''")
+            sql += f" WHERE collection_name = '{escaped_collection_name}'"
+        return sql
+
+    def _execute_outside_transaction(self, *statements: str) -> None:
+        """Run statements that cannot run in a transaction, one by one"""
+        with self.session.get_bind().connect() as connection:
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in statements:
+                connection.execute(text(statement))
+
+    def _get_vector_indexes(self) -> Dict[str, Dict[str, Any]]:
+        rows = self.session.execute(
+            text(
+                """
+                SELECT c.relname AS name, i.indisvalid AS valid,
+                       pg_relation_size(c.oid) AS size,
+                       pg_get_indexdef(c.oid) AS definition
+                FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = 'document_chunk'::regclass
+                  AND c.relname LIKE :prefix
+                """
+            ),
+            {"prefix": f"{VECTOR_INDEX_NAME}%"},
+        ).all()
+        return {
+            row.name: {
+                "valid": row.valid,
+                "size": row.size,
+                "definition": row.definition,
+            }
+            for row in rows
+        }
+
+    def _get_collection_counts(self) -> Dict[str, int]:
+        rows = self.session.execute(
+            select(DocumentChunk.collection_name, func.count()).group_by(
+                DocumentChunk.collection_name
+            )
+        ).all()
+        return {collection_name: count for collection_name, count in rows}
+
+    def _build_index(
+        self, index_name: str, collection_name: Optional[str] = None
+    ) -> None:
+        """
+        Build the index under a temporary name and swap it in, so that
+        searches keep using the previous index in the meantime.
+        """
+        tmp_index_name = f"{index_name}_new"
+        log.info(f"Building vector index {index_name}")
+        started_at = time.time()
+        self._execute_outside_transaction(
+            f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_index_name}",
+            self._get_index_sql(tmp_index_name, collection_name, concurrently=True),
+            f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}",
+            f"ALTER INDEX {tmp_index_name} RENAME TO {index_name}",
+        )
+        log.info(f"Built vector index {index_name} in {time.time() - started_at:.1f}s")
+
+        if collection_name is not None:
+            self._collection_indexes.add(index_name)
+
+    def _drop_index(self, index_name: str) -> None:
+        try:
+            self._execute_outside_transaction(
+                f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"
+            )
+            self._collection_indexes.discard(index_name)
+        except Exception as e:
+            log.warning(f"Failed to drop vector index {index_name}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        try:
+            indexes = self._get_vector_indexes()
+            collections = [
+                {
+                    "name": collection_name,
+                    "count": count,
+                    "index": self._get_collection_index_name(collection_name)
+                    in indexes,
+                }
+                for collection_name, count in sorted(
+                    self._get_collection_counts().items(),
+                    key=lambda item: item[1],
+                    reverse=True,
+                )
+            ]
+
+            table = self.session.execute(
+                text(
+                    """
+                    SELECT n_live_tup, n_dead_tup, last_vacuum, last_autovacuum,
+                           last_analyze, last_autoanalyze,
+                           pg_total_relation_size(relid) AS size
+                    FROM pg_stat_user_tables WHERE relname = 'document_chunk'
+                    """
+                )
+            ).first()
+            self.session.rollback()  # read-only transaction
+
+            return {
+                "index_method": PGVECTOR_INDEX_METHOD,
+                "table": dict(table._mapping) if table else None,
+                "indexes": [{"name": name, **index} for name, index in indexes.items()],
+                "collections": collections,
+            }
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error getting vector stats: {e}")
+            raise
+
+    def optimize(
+        self, reindex: bool = False, collection_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Give collections with at least PGVECTOR_COLLECTION_INDEX_THRESHOLD
+        chunks a vector index of their own and drop those of collections
+        that shrank well below it, then update the planner statistics. Indexes
+        built for `collection_name` are only dropped with their collection
+        while the threshold is 0. With `reindex`, the shared vector index (or
+        the index of `collection_name`) is rebuilt with the configured
+        parameters.
+        """
+        try:
+            indexes = self._get_vector_indexes()
+            self.session.rollback()  # read-only transaction
+
+            if collection_name is not None:
+                index_name = self._get_collection_index_name(collection_name)
+                if not reindex and indexes.get(index_name, {}).get("valid"):
+                    return {"built": [], "dropped": []}
+
+                self._build_index(index_name, collection_name)
+                return {"built": [index_name], "dropped": []}
+
+            built = []
+            dropped = []
+            if reindex or not indexes.get(VECTOR_INDEX_NAME, {}).get("valid"):
+                self._build_index(VECTOR_INDEX_NAME)
+                built.append(VECTOR_INDEX_NAME)
+
+            counts = self._get_collection_counts()
+            self.session.rollback()  # read-only transaction
+
+            threshold = PGVECTOR_COLLECTION_INDEX_THRESHOLD
+            kept = set()
+            for name, count in counts.items():
+                index_name = self._get_collection_index_name(name)
+                index = indexes.get(index_name)
+                if index is None:
+                    if not (threshold > 0 and count >= threshold):
+                        continue
+                elif threshold > 0 and count < threshold / 2:
+                    # Shrunk well below the threshold
+                    continue
+
+                kept.add(index_name)
+                if index is None or reindex or not index["valid"]:
+                    self._build_index(index_name, name)
+                    built.append(index_name)
+
+            # Indexes of deleted or shrunk collections, and leftover builds
+            for index_name in indexes:
+                if index_name != VECTOR_INDEX_NAME and index_name not in kept:
+                    self._drop_index(index_name)
+                    dropped.append(index_name)
+
+            self._execute_outside_transaction("ANALYZE document_chunk")
+            return {"built": built, "dropped": dropped}
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during vector index maintenance: {e}")
+            raise
@@ -84,3 +84,16 @@ class VectorDBBase(ABC):
     def reset(self) -> None:
         """Reset the vector database by removing all collections or those matching a condition."""
         pass
+
+    # Whether get_stats and optimize are implemented
+    supports_maintenance: bool = False
+
+    def get_stats(self) -> Dict:
+        """Row counts per collection and index details, if the backend supports it."""
+        raise NotImplementedError
+
+    def optimize(
+        self, reindex: bool = False, collection_name: Optional[str] = None
+    ) -> Dict:
+        """Rebuild or create the indexes of the vector DB, if the backend supports it."""
+        raise NotImplementedError
@@ -23,8 +23,8 @@ from open_webui.models.data import DataSources
 from open_webui.models.datatokens import OAuthTokens
 from open_webui.utils.data.google import initiate_google_file_sync
 from open_webui.utils.data.microsoft import initiate_microsoft_sync
+from open_webui.utils.data.sync_context import SYNC_SCHEDULER
 from open_webui.tasks import create_task
-import asyncio
 from open_webui.models.groups import Groups
 from open_webui.models.oauth_sessions import OAuthSessions
 
@@ -566,12 +566,9 @@ async def signin(request: Request, response: Response, form_data: SigninForm, ba
                 DataSources.create_default_data_sources_for_user(user_id)
                 # Add background tasks to sync user file data from the SSO provider
                 async def get_user_file_data():
-                    loop = asyncio.get_event_loop()
-                    return await loop.run_in_executor(
-                        None,  # Use default thread pool
-                        lambda: asyncio.run(get_user_file_data_from_sso_provider(
-                            user_id, sso_provider, auth_token, user_exists
-                        ))
+                    return await SYNC_SCHEDULER.run(
+                        sso_provider, get_user_file_data_from_sso_provider,
+                        user_id, sso_provider, auth_token, user_exists
                     )
 
                 # Extract Redis connection from request
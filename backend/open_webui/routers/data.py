@@ -27,12 +27,12 @@ from open_webui.models.data import (
 )
 
 from open_webui.tasks import create_task
-import asyncio
 from open_webui.utils.data.slack import initiate_slack_sync
 from open_webui.utils.data.google import initiate_google_file_sync
 from open_webui.utils.data.microsoft import initiate_microsoft_sync
 from open_webui.utils.data.atlassian import initiate_atlassian_sync
 from open_webui.utils.data.mineral import initiate_mineral_sync
+from open_webui.utils.data.sync_context import SYNC_SCHEDULER
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -529,12 +529,9 @@ async def create_background_sync_task(request: Request, provider: str, user_id:
         sync_gmail = layer == 'gmail'
         
         async def run_google_sync():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None,
-                lambda: asyncio.run(initiate_google_file_sync(
-                    user_id, access_token, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME, sync_drive, sync_gmail
-                ))
+            return await SYNC_SCHEDULER.run(
+                'google', initiate_google_file_sync,
+                user_id, access_token, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME, sync_drive, sync_gmail
             )
         
         await create_task(redis_connection, run_google_sync(), id=f"google_sync_{user_id}")
@@ -546,49 +543,37 @@ async def create_background_sync_task(request: Request, provider: str, user_id:
         sync_outlook = layer == 'outlook'
         
         async def run_microsoft_sync():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None,
-                lambda: asyncio.run(initiate_microsoft_sync(
-                    user_id, access_token, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME, 
-                    sync_onedrive, sync_sharepoint, sync_onenote, sync_outlook
-                ))
+            return await SYNC_SCHEDULER.run(
+                'microsoft', initiate_microsoft_sync,
+                user_id, access_token, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME, 
+                sync_onedrive, sync_sharepoint, sync_onenote, sync_outlook
             )
         
         await create_task(redis_connection, run_microsoft_sync(), id=f"microsoft_sync_{user_id}")
     
     elif provider == 'slack':
         async def run_slack_sync():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None,
-                lambda: asyncio.run(initiate_slack_sync(
-                    user_id, access_token, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME, layer
-                ))
+            return await SYNC_SCHEDULER.run(
+                'slack', initiate_slack_sync,
+                user_id, access_token, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME, layer
             )
         
         await create_task(redis_connection, run_slack_sync(), id=f"slack_sync_{user_id}")
     
     elif provider == 'atlassian':
         async def run_atlassian_sync():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None,
-                lambda: asyncio.run(initiate_atlassian_sync(
-                    user_id, access_token,  layer
-                ))
+            return await SYNC_SCHEDULER.run(
+                'atlassian', initiate_atlassian_sync,
+                user_id, access_token,  layer
             )
         
         await create_task(redis_connection, run_atlassian_sync(), id=f"atlassian_sync_{user_id}")
     
     elif provider == 'mineral':
         async def run_mineral_sync():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None,
-                lambda: asyncio.run(initiate_mineral_sync(
-                    user_id, access_token, MINERAL_BASE_URL, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME
-                ))
+            return await SYNC_SCHEDULER.run(
+                'mineral', initiate_mineral_sync,
+                user_id, access_token, MINERAL_BASE_URL, GCS_SERVICE_ACCOUNT_BASE64, GCS_BUCKET_NAME
             )
         
         await create_task(redis_connection, run_mineral_sync(), id=f"mineral_sync_{user_id}")
@@ -1371,16 +1356,13 @@ async def sync_selected_jira_projects(
             redis_connection = getattr(request.app.state, 'redis', None) if hasattr(request.app.state, 'redis') else None
             
             async def run_self_hosted_selected_sync():
-                loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(
-                    None,
-                    lambda: asyncio.run(initiate_atlassian_sync_selected_self_hosted(
-                        user.id, 
-                        credentials, 
-                        form_data.project_keys, 
-                        form_data.layer,
-                        base_url
-                    ))
+                return await SYNC_SCHEDULER.run(
+                    'atlassian', initiate_atlassian_sync_selected_self_hosted,
+                    user.id, 
+                    credentials, 
+                    form_data.project_keys, 
+                    form_data.layer,
+                    base_url
                 )
             
             await create_task(redis_connection, run_self_hosted_selected_sync(), id=f"atlassian_sync_{user.id}")
@@ -1405,12 +1387,9 @@ async def sync_selected_jira_projects(
             redis_connection = getattr(request.app.state, 'redis', None) if hasattr(request.app.state, 'redis') else None
             
             async def run_selected_sync():
-                loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(
-                    None,
-                    lambda: asyncio.run(initiate_atlassian_sync_selected(
-                        user.id, access_token, form_data.project_keys, form_data.layer
-                    ))
+                return await SYNC_SCHEDULER.run(
+                    'atlassian', initiate_atlassian_sync_selected,
+                    user.id, access_token, form_data.project_keys, form_data.layer
                 )
             
             await create_task(redis_connection, run_selected_sync(), id=f"atlassian_sync_{user.id}")
@@ -1896,16 +1875,13 @@ def create_universal_sync_endpoint(provider: str):
                     redis_connection = getattr(request.app.state, 'redis', None) if hasattr(request.app.state, 'redis') else None
                     
                     async def run_self_hosted_sync():
-                        loop = asyncio.get_event_loop()
-                        return await loop.run_in_executor(
-                            None,
-                            lambda: asyncio.run(initiate_atlassian_sync(
-                                user.id, 
-                                credentials,
-                                layer,
-                                deployment_type='self_hosted',
-                                base_url=base_url
-                            ))
+                        return await SYNC_SCHEDULER.run(
+                            'atlassian', initiate_atlassian_sync,
+                            user.id, 
+                            credentials,
+                            layer,
+                            deployment_type='self_hosted',
+                            base_url=base_url
                         )
                     
                     await create_task(redis_connection, run_self_hosted_sync(), id=f"atlassian_self_hosted_sync_{user.id}")
@@ -24,6 +24,7 @@ from fastapi import (
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.bm25 import BM25_INDEXES
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 from open_webui.models.users import Users
@@ -31,15 +32,23 @@ from open_webui.models.files import (
     FileForm,
     FileModel,
     FileModelResponse,
+    FileStatusResponse,
     Files,
 )
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
 from open_webui.routers.retrieval import ProcessFileForm, process_file
-from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.file_status import FILE_STATUS_EVENTS
+from open_webui.utils.ingestion import (
+    INGESTION_PRIORITIES,
+    INGESTION_QUEUE,
+    enqueue_file,
+    mark_file_failed,
+    process_uploaded_file as process_file_item,
+)
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -85,50 +94,12 @@ def has_access_to_file(
 ############################
 
 
-def process_uploaded_file(request, file, file_path, file_item, file_metadata, user):
+def process_uploaded_file(request, file_item, user):
     try:
-        if file.content_type:
-            stt_supported_content_types = getattr(
-                request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
-            )
-
-            if any(
-                fnmatch(file.content_type, content_type)
-                for content_type in (
-                    stt_supported_content_types
-                    if stt_supported_content_types
-                    and any(t.strip() for t in stt_supported_content_types)
-                    else ["audio/*", "video/webm"]
-                )
-            ):
-                file_path = Storage.get_file(file_path)
-                result = transcribe(request, file_path, file_metadata)
-
-                process_file(
-                    request,
-                    ProcessFileForm(
-                        file_id=file_item.id, content=result.get("text", "")
-                    ),
-                    user=user,
-                )
-            elif (not file.content_type.startswith(("image/", "video/"))) or (
-                request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
-            ):
-                process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
-        else:
-            log.info(
-                f"File type {file.content_type} is not provided, but trying to process anyway"
-            )
-            process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+        process_file_item(request, file_item, user)
     except Exception as e:
         log.error(f"Error processing file: {file_item.id}")
-        Files.update_file_data_by_id(
-            file_item.id,
-            {
-                "status": "failed",
-                "error": str(e.detail) if hasattr(e, "detail") else str(e),
-            },
-        )
+        mark_file_failed(file_item.id, e)
 
 
 @router.post("/", response_model=FileModelResponse)
@@ -139,6 +110,7 @@ def upload_file(
     metadata: Optional[dict | str] = Form(None),
     process: bool = Query(True),
     process_in_background: bool = Query(True),
+    priority: str = Query("normal"),
     user=Depends(get_verified_user),
 ):
     return upload_file_handler(
@@ -149,6 +121,7 @@ def upload_file(
         process_in_background=process_in_background,
         user=user,
         background_tasks=background_tasks,
+        priority=priority,
     )
 
 
@@ -160,9 +133,20 @@ def upload_file_handler(
     process_in_background: bool = Query(True),
     user=Depends(get_verified_user),
     background_tasks: Optional[BackgroundTasks] = None,
+    priority: str = "normal",
 ):
     log.info(f"file.content_type: {file.content_type}")
 
+    if priority not in INGESTION_PRIORITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(f"Unknown priority {priority}"),
+        )
+
+    # Only admins may jump ahead of everyone else's uploads
+    if priority == "high" and user.role != "admin":
+        priority = "normal"
+
     if isinstance(metadata, str):
         try:
             metadata = json.loads(metadata)
@@ -198,7 +182,7 @@ def upload_file_handler(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(
+        uploaded_file, file_path = Storage.upload_file(
             file.file,
             filename,
             {
@@ -222,7 +206,8 @@ def upload_file_handler(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": uploaded_file.size,
+                        "sha256": uploaded_file.sha256,
                         "data": file_metadata,
                     },
                 }
@@ -231,25 +216,18 @@ def upload_file_handler(
 
         if process:
             if background_tasks and process_in_background:
-                background_tasks.add_task(
-                    process_uploaded_file,
-                    request,
-                    file,
-                    file_path,
-                    file_item,
-                    file_metadata,
-                    user,
-                )
+                # Extraction and embedding run in the ingestion workers, not
+                # in the web worker serving this request
+                try:
+                    enqueue_file(file_item, user, priority)
+                except Exception as e:
+                    log.error(f"Failed to queue file {file_item.id}: {e}")
+                    background_tasks.add_task(
+                        process_uploaded_file, request, file_item, user
+                    )
                 return {"status": True, **file_item.model_dump()}
             else:
-                process_uploaded_file(
-                    request,
-                    file,
-                    file_path,
-                    file_item,
-                    file_metadata,
-                    user,
-                )
+                process_uploaded_file(request, file_item, user)
                 return {"status": True, **file_item.model_dump()}
         else:
             if file_item:
@@ -342,6 +320,7 @@ async def delete_all_files(user=Depends(get_admin_user)):
         try:
             Storage.delete_all_files()
             VECTOR_DB_CLIENT.reset()
+            BM25_INDEXES.clear()
         except Exception as e:
             log.exception(e)
             log.error("Error deleting files")
@@ -357,6 +336,24 @@ async def delete_all_files(user=Depends(get_admin_user)):
         )
 
 
+############################
+# Ingestion Queue
+############################
+
+
+@router.get("/ingestion/queue")
+def get_ingestion_queue_stats(user=Depends(get_admin_user)):
+    """Jobs waiting per priority and per user, retries and jobs in progress"""
+    try:
+        return INGESTION_QUEUE.stats()
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
 ############################
 # Get File By Id
 ############################
@@ -404,30 +401,43 @@ async def get_file_process_status(
     ):
         if stream:
             MAX_FILE_PROCESSING_DURATION = 3600 * 2
+            # Seconds without events after which the status is read again
+            STATUS_RESYNC_INTERVAL = 30
 
             async def event_stream(file_item):
-                if file_item:
-                    for _ in range(MAX_FILE_PROCESSING_DURATION):
-                        file_item = Files.get_file_by_id(file_item.id)
-                        if file_item:
-                            data = file_item.model_dump().get("data", {})
-                            status = data.get("status")
-
-                            if status:
-                                event = {"status": status}
-                                if status == "failed":
-                                    event["error"] = data.get("error")
-
-                                yield f"data: {json.dumps(event)}\n\n"
-                                if status in ("completed", "failed"):
-                                    break
-                            else:
-                                # Legacy
-                                break
-
-                        await asyncio.sleep(0.5)
-                else:
-                    yield f"data: {json.dumps({'status': 'not_found'})}\n\n"
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + MAX_FILE_PROCESSING_DURATION
+
+                # Subscribed before reading the status, so no change is missed
+                async with FILE_STATUS_EVENTS.subscribe(file_item.id) as events:
+                    file_status = await Files.get_file_status_by_id_async(file_item.id)
+                    while file_status and loop.time() < deadline:
+                        if not file_status.status:
+                            # Legacy
+                            break
+
+                        event = {"status": file_status.status}
+                        if file_status.status == "failed":
+                            event["error"] = file_status.error
+
+                        yield f"data: {json.dumps(event)}\n\n"
+                        if file_status.status in ("completed", "failed"):
+                            break
+
+                        try:
+                            message = await asyncio.wait_for(
+                                events.get(), STATUS_RESYNC_INTERVAL
+                            )
+                        except asyncio.TimeoutError:
+                            message = None
+
+                        if message:
+                            file_status = FileStatusResponse(**message)
+                        else:
+                            # Events may have been missed
+                            file_status = await Files.get_file_status_by_id_async(
+                                file_item.id
+                            )
 
             return StreamingResponse(
                 event_stream(file),
@@ -722,6 +732,7 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
             try:
                 Storage.delete_file(file.path)
                 VECTOR_DB_CLIENT.delete(collection_name=f"file-{id}")
+                BM25_INDEXES.drop(f"file-{id}")
             except Exception as e:
                 log.exception(e)
                 log.error("Error deleting files")
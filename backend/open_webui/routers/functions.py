@@ -18,6 +18,7 @@ from open_webui.utils.plugin import (
     load_function_module_by_id,
     replace_imports,
     get_function_module_from_cache,
+    invalidate_plugin_module,
 )
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
@@ -166,7 +167,18 @@ async def sync_functions(
                     )
                     raise e
 
-        return Functions.sync_functions(user.id, form_data.functions)
+        existing_ids = {function.id for function in Functions.get_functions()}
+        functions = Functions.sync_functions(user.id, form_data.functions)
+
+        # Reload the synced functions and drop the removed ones everywhere
+        synced_ids = {function.id for function in form_data.functions}
+        FUNCTIONS = request.app.state.FUNCTIONS
+        for id in existing_ids | synced_ids:
+            invalidate_plugin_module("function", id)
+            if id not in synced_ids and id in FUNCTIONS:
+                del FUNCTIONS[id]
+
+        return functions
     except Exception as e:
         log.exception(f"Failed to load a function: {e}")
         raise HTTPException(
@@ -328,6 +340,7 @@ async def update_function_by_id(
         log.debug(updated)
 
         function = Functions.update_function_by_id(id, updated)
+        invalidate_plugin_module("function", id)
 
         if function_type == "filter" and getattr(function_module, "toggle", None):
             Functions.update_function_metadata_by_id(id, {"toggle": True})
@@ -359,6 +372,7 @@ async def delete_function_by_id(
     result = Functions.delete_function_by_id(id)
 
     if result:
+        invalidate_plugin_module("function", id)
         FUNCTIONS = request.app.state.FUNCTIONS
         if id in FUNCTIONS:
             del FUNCTIONS[id]
@@ -8,12 +8,12 @@ from open_webui.models.knowledge import (
     KnowledgeForm,
     KnowledgeResponse,
     KnowledgeUserResponse,
+    get_knowledge_collection_name,
 )
 from open_webui.models.files import Files, FileModel, FileMetadataResponse
+from open_webui.retrieval.bm25 import BM25_INDEXES
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 from open_webui.routers.retrieval import (
-    process_file,
-    ProcessFileForm,
     process_files_batch,
     BatchProcessFilesForm,
 )
@@ -22,6 +22,7 @@ from open_webui.storage.provider import Storage
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.knowledge import process_knowledge_file, start_knowledge_reindex
 
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -44,16 +45,18 @@ async def get_knowledge(user=Depends(get_verified_user)):
     knowledge_bases = []
 
     if user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL:
-        knowledge_bases = Knowledges.get_knowledge_bases()
+        knowledge_bases = await Knowledges.get_knowledge_bases_async()
     else:
-        knowledge_bases = Knowledges.get_knowledge_bases_by_user_id(user.id, "read")
+        knowledge_bases = await Knowledges.get_knowledge_bases_by_user_id_async(
+            user.id, "read"
+        )
 
     # Get files for each knowledge base
     knowledge_with_files = []
     for knowledge_base in knowledge_bases:
         files = []
         if knowledge_base.data:
-            files = Files.get_file_metadatas_by_ids(
+            files = await Files.get_file_metadatas_by_ids_async(
                 knowledge_base.data.get("file_ids", [])
             )
 
@@ -75,7 +78,7 @@ async def get_knowledge(user=Depends(get_verified_user)):
                         id=knowledge_base.id, data=data
                     )
 
-                    files = Files.get_file_metadatas_by_ids(file_ids)
+                    files = await Files.get_file_metadatas_by_ids_async(file_ids)
 
         knowledge_with_files.append(
             KnowledgeUserResponse(
@@ -92,16 +95,18 @@ async def get_knowledge_list(user=Depends(get_verified_user)):
     knowledge_bases = []
 
     if user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL:
-        knowledge_bases = Knowledges.get_knowledge_bases()
+        knowledge_bases = await Knowledges.get_knowledge_bases_async()
     else:
-        knowledge_bases = Knowledges.get_knowledge_bases_by_user_id(user.id, "write")
+        knowledge_bases = await Knowledges.get_knowledge_bases_by_user_id_async(
+            user.id, "write"
+        )
 
     # Get files for each knowledge base
     knowledge_with_files = []
     for knowledge_base in knowledge_bases:
         files = []
         if knowledge_base.data:
-            files = Files.get_file_metadatas_by_ids(
+            files = await Files.get_file_metadatas_by_ids_async(
                 knowledge_base.data.get("file_ids", [])
             )
 
@@ -123,7 +128,7 @@ async def get_knowledge_list(user=Depends(get_verified_user)):
                         id=knowledge_base.id, data=data
                     )
 
-                    files = Files.get_file_metadatas_by_ids(file_ids)
+                    files = await Files.get_file_metadatas_by_ids_async(file_ids)
 
         knowledge_with_files.append(
             KnowledgeUserResponse(
@@ -187,71 +192,13 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
             detail=ERROR_MESSAGES.UNAUTHORIZED,
         )
 
-    knowledge_bases = Knowledges.get_knowledge_bases()
-
-    log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
-
-    deleted_knowledge_bases = []
-
-    for knowledge_base in knowledge_bases:
-        # -- Robust error handling for missing or invalid data
-        if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
-            log.warning(
-                f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
-            )
-            try:
-                Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
-                deleted_knowledge_bases.append(knowledge_base.id)
-            except Exception as e:
-                log.error(
-                    f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
-                )
-            continue
-
-        try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
-            try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
-
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
-
-        except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
-
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
-
-    log.info(
-        f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
-    )
+    # Runs in the background, progress is sent as knowledge_reindex_progress
+    # events over the socket
+    if not await start_knowledge_reindex(request, user):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A knowledge base reindex is already running",
+        )
     return True
 
 
@@ -387,7 +334,8 @@ def add_file_to_knowledge_by_id(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ERROR_MESSAGES.NOT_FOUND,
         )
-    if not file.data:
+    # Queued files have no content until an ingestion worker processed them
+    if not file.data or file.data.get("status") == "pending":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ERROR_MESSAGES.FILE_NOT_PROCESSED,
@@ -395,11 +343,7 @@ def add_file_to_knowledge_by_id(
 
     # Add content to the vector database
     try:
-        process_file(
-            request,
-            ProcessFileForm(file_id=form_data.file_id, collection_name=id),
-            user=user,
-        )
+        process_knowledge_file(request, knowledge, form_data.file_id, user)
     except Exception as e:
         log.debug(e)
         raise HTTPException(
@@ -474,17 +418,15 @@ def update_file_from_knowledge_by_id(
         )
 
     # Remove content from the vector database
+    collection_name = get_knowledge_collection_name(knowledge)
     VECTOR_DB_CLIENT.delete(
-        collection_name=knowledge.id, filter={"file_id": form_data.file_id}
+        collection_name=collection_name, filter={"file_id": form_data.file_id}
     )
+    BM25_INDEXES.remove(collection_name, filter={"file_id": form_data.file_id})
 
     # Add content to the vector database
     try:
-        process_file(
-            request,
-            ProcessFileForm(file_id=form_data.file_id, collection_name=id),
-            user=user,
-        )
+        process_knowledge_file(request, knowledge, form_data.file_id, user)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -546,9 +488,11 @@ def remove_file_from_knowledge_by_id(
 
     # Remove content from the vector database
     try:
+        collection_name = get_knowledge_collection_name(knowledge)
         VECTOR_DB_CLIENT.delete(
-            collection_name=knowledge.id, filter={"file_id": form_data.file_id}
+            collection_name=collection_name, filter={"file_id": form_data.file_id}
         )
+        BM25_INDEXES.remove(collection_name, filter={"file_id": form_data.file_id})
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -560,6 +504,7 @@ def remove_file_from_knowledge_by_id(
             file_collection = f"file-{form_data.file_id}"
             if VECTOR_DB_CLIENT.has_collection(collection_name=file_collection):
                 VECTOR_DB_CLIENT.delete_collection(collection_name=file_collection)
+                BM25_INDEXES.drop(file_collection)
         except Exception as e:
             log.debug("This was most likely caused by bypassing embedding processing")
             log.debug(e)
@@ -657,7 +602,9 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
     # Clean up vector DB
     try:
-        VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        collection_name = get_knowledge_collection_name(knowledge)
+        VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+        BM25_INDEXES.drop(collection_name)
     except Exception as e:
         log.debug(e)
         pass
@@ -690,7 +637,9 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
         )
 
     try:
-        VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        collection_name = get_knowledge_collection_name(knowledge)
+        VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+        BM25_INDEXES.drop(collection_name)
     except Exception as e:
         log.debug(e)
         pass
@@ -746,9 +695,12 @@ def add_files_to_knowledge_batch(
 
     # Process files
     try:
+        collection_name = get_knowledge_collection_name(knowledge)
         result = process_files_batch(
             request=request,
-            form_data=BatchProcessFilesForm(files=files, collection_name=id),
+            form_data=BatchProcessFilesForm(
+                files=files, collection_name=collection_name
+            ),
             user=user,
         )
     except Exception as e:
@@ -766,6 +718,9 @@ def add_files_to_knowledge_batch(
     for file_id in successful_file_ids:
         if file_id not in existing_file_ids:
             existing_file_ids.append(file_id)
+        if collection_name != id:
+            # File metadata points at the knowledge base, not at its collection
+            Files.update_file_metadata_by_id(file_id, {"collection_name": id})
 
     data["file_ids"] = existing_file_ids
     knowledge = Knowledges.update_knowledge_data_by_id(id=id, data=data)
@@ -1,12 +1,7 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from datetime import datetime
@@ -37,7 +32,6 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict, validator
-from starlette.background import BackgroundTask
 
 
 from open_webui.models.models import Models
@@ -51,6 +45,8 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.http_client import get_http_session
+from open_webui.utils.load_balancer import LOAD_BALANCER, BackendLease
 
 
 from open_webui.config import (
@@ -81,26 +77,26 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        async with get_http_session().get(
+            url,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
@@ -109,7 +105,7 @@ async def send_get_request(url, key=None, user: UserModel = None):
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    session: Optional[aiohttp.ClientSession] = None,
 ):
     if response:
         response.close()
@@ -117,6 +113,23 @@ async def cleanup_response(
         await session.close()
 
 
+async def stream_response(
+    response: aiohttp.ClientResponse, lease: Optional[BackendLease] = None
+):
+    """
+    Relay a streamed upstream response, then close it and release its load
+    balancer lease. Unlike a background task of the StreamingResponse, this
+    also runs when the client disconnects in the middle of the stream.
+    """
+    try:
+        async for chunk in response.content:
+            yield chunk
+    finally:
+        if lease is not None:
+            lease.release()
+        await cleanup_response(response)
+
+
 async def send_post_request(
     url: str,
     payload: Union[str, bytes],
@@ -125,17 +138,18 @@ async def send_post_request(
     content_type: Optional[str] = None,
     user: UserModel = None,
     metadata: Optional[dict] = None,
+    backend: Optional[str] = None,
 ):
 
     r = None
+    # Count the request against the backend for load-aware routing
+    lease = LOAD_BALANCER.acquire(backend) if backend else None
+    streaming = False
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
-        r = await session.post(
+        r = await get_http_session().post(
             url,
             data=payload,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             headers={
                 "Content-Type": "application/json",
                 **({"Authorization": f"Bearer {key}"} if key else {}),
@@ -157,11 +171,13 @@ async def send_post_request(
             },
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        if lease:
+            lease.observe(r.status < 500)
 
         if r.ok is False:
             try:
                 res = await r.json()
-                await cleanup_response(r, session)
+                await cleanup_response(r)
                 if "error" in res:
                     raise HTTPException(status_code=r.status, detail=res["error"])
             except HTTPException as e:
@@ -180,13 +196,11 @@ async def send_post_request(
             if content_type:
                 response_headers["Content-Type"] = content_type
 
+            streaming = True
             return StreamingResponse(
-                r.content,
+                stream_response(r, lease),
                 status_code=r.status,
                 headers=response_headers,
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
             )
         else:
             res = await r.json()
@@ -195,6 +209,8 @@ async def send_post_request(
     except HTTPException as e:
         raise e  # Re-raise HTTPException to be handled by FastAPI
     except Exception as e:
+        if lease:
+            lease.observe(False)
         detail = f"Ollama: {e}"
 
         raise HTTPException(
@@ -202,8 +218,15 @@ async def send_post_request(
             detail=detail if e else "Open WebUI: Server Connection Error",
         )
     finally:
+        if lease and not streaming:
+            lease.release()
         if not stream:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
+
+
+def select_url_idx(request: Request, url_idxs: list[int]) -> int:
+    urls = request.app.state.config.OLLAMA_BASE_URLS
+    return url_idxs[LOAD_BALANCER.select([urls[idx] for idx in url_idxs])]
 
 
 def get_api_key(idx, url, configs):
@@ -967,7 +990,7 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
         )
 
-    url_idx = random.choice(models[model]["urls"])
+    url_idx = select_url_idx(request, models[model]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -1045,7 +1068,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1132,7 +1155,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1225,7 +1248,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1247,6 +1270,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        backend=url,
     )
 
 
@@ -1292,7 +1316,7 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(request, models[model].get("urls", []))
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1380,6 +1404,7 @@ async def generate_chat_completion(
         content_type="application/x-ndjson",
         user=user,
         metadata=metadata,
+        backend=url,
     )
 
 
@@ -1486,6 +1511,7 @@ async def generate_openai_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        backend=url,
     )
 
 
@@ -1568,6 +1594,7 @@ async def generate_openai_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        backend=url,
     )
 
 
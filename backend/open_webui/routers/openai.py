@@ -19,7 +19,6 @@ from fastapi.responses import (
     PlainTextResponse,
 )
 from pydantic import BaseModel
-from starlette.background import BackgroundTask
 
 from open_webui.models.models import Models
 from open_webui.config import (
@@ -49,6 +48,8 @@ from open_webui.utils.misc import (
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.http_client import get_http_session
+from open_webui.utils.load_balancer import LOAD_BALANCER, BackendLease
 
 
 log = logging.getLogger(__name__)
@@ -65,25 +66,25 @@ log.setLevel(SRC_LOG_LEVELS["OPENAI"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        async with get_http_session().get(
+            url,
+            timeout=timeout,
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
@@ -92,7 +93,7 @@ async def send_get_request(url, key=None, user: UserModel = None):
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    session: Optional[aiohttp.ClientSession] = None,
 ):
     if response:
         response.close()
@@ -100,6 +101,23 @@ async def cleanup_response(
         await session.close()
 
 
+async def stream_response(
+    response: aiohttp.ClientResponse, lease: Optional[BackendLease] = None
+):
+    """
+    Relay a streamed upstream response, then close it and release its load
+    balancer lease. Unlike a background task of the StreamingResponse, this
+    also runs when the client disconnects in the middle of the stream.
+    """
+    try:
+        async for chunk in response.content:
+            yield chunk
+    finally:
+        if lease is not None:
+            lease.release()
+        await cleanup_response(response)
+
+
 def openai_reasoning_model_handler(payload):
     """
     Handle reasoning model specific parameters
@@ -196,6 +214,12 @@ async def get_headers_and_cookies(
     return headers, cookies
 
 
+def select_url_idx(request: Request, model: dict) -> int:
+    url_idxs = model.get("urlIdxs") or [model["urlIdx"]]
+    urls = request.app.state.config.OPENAI_API_BASE_URLS
+    return url_idxs[LOAD_BALANCER.select([urls[idx] for idx in url_idxs])]
+
+
 def get_microsoft_entra_id_access_token():
     """
     Get Microsoft Entra ID access token using DefaultAzureCredential for Azure OpenAI.
@@ -543,7 +567,20 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
     models = {"data": merge_models_lists(map(extract_data, responses))}
     log.debug(f"models: {models}")
 
-    request.app.state.OPENAI_MODELS = {model["id"]: model for model in models["data"]}
+    openai_models = {}
+    for model in models["data"]:
+        # Keep every connection serving a model id so requests can be balanced
+        existing = openai_models.get(model["id"])
+        openai_models[model["id"]] = {
+            **model,
+            "urlIdxs": (
+                [*existing["urlIdxs"], model["urlIdx"]]
+                if existing
+                else [model["urlIdx"]]
+            ),
+        }
+
+    request.app.state.OPENAI_MODELS = openai_models
     return models
 
 
@@ -855,7 +892,7 @@ async def generate_chat_completion(
     await get_all_models(request, user=user)
     model = request.app.state.OPENAI_MODELS.get(model_id)
     if model:
-        idx = model["urlIdx"]
+        idx = select_url_idx(request, model)
     else:
         raise HTTPException(
             status_code=404,
@@ -925,34 +962,30 @@ async def generate_chat_completion(
     payload = json.dumps(payload)
 
     r = None
-    session = None
     streaming = False
     response = None
 
+    # Count the request against the backend for load-aware routing
+    lease = LOAD_BALANCER.acquire(url)
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
-        r = await session.request(
+        r = await get_http_session().request(
             method="POST",
             url=request_url,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             data=payload,
             headers=headers,
             cookies=cookies,
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        lease.observe(r.status < 500)
 
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                r.content,
+                stream_response(r, lease),
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
             )
         else:
             try:
@@ -970,6 +1003,7 @@ async def generate_chat_completion(
             return response
     except Exception as e:
         log.exception(e)
+        lease.observe(False)
 
         raise HTTPException(
             status_code=r.status if r else 500,
@@ -977,7 +1011,8 @@ async def generate_chat_completion(
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            lease.release()
+            await cleanup_response(r)
 
 
 async def embeddings(request: Request, form_data: dict, user):
@@ -1000,7 +1035,7 @@ async def embeddings(request: Request, form_data: dict, user):
     model_id = form_data.get("model")
     models = request.app.state.OPENAI_MODELS
     if model_id in models:
-        idx = models[model_id]["urlIdx"]
+        idx = select_url_idx(request, models[model_id])
 
     url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
     key = request.app.state.config.OPENAI_API_KEYS[idx]
@@ -1010,15 +1045,13 @@ async def embeddings(request: Request, form_data: dict, user):
     )
 
     r = None
-    session = None
     streaming = False
 
     headers, cookies = await get_headers_and_cookies(
         request, url, key, api_config, user=user
     )
     try:
-        session = aiohttp.ClientSession(trust_env=True)
-        r = await session.request(
+        r = await get_http_session().request(
             method="POST",
             url=f"{url}/embeddings",
             data=body,
@@ -1029,12 +1062,9 @@ async def embeddings(request: Request, form_data: dict, user):
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                r.content,
+                stream_response(r),
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
             )
         else:
             try:
@@ -1059,7 +1089,7 @@ async def embeddings(request: Request, form_data: dict, user):
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
 
 
 @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -1081,7 +1111,6 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
     )
 
     r = None
-    session = None
     streaming = False
 
     try:
@@ -1107,8 +1136,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         else:
             request_url = f"{url}/{path}"
 
-        session = aiohttp.ClientSession(trust_env=True)
-        r = await session.request(
+        r = await get_http_session().request(
             method=request.method,
             url=request_url,
             data=body,
@@ -1121,12 +1149,9 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                r.content,
+                stream_response(r),
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
             )
         else:
             try:
@@ -1152,4 +1177,4 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
@@ -12,6 +12,7 @@ from pathlib import Path
 from typing import Iterator, List, Optional, Sequence, Union
 
 from fastapi import (
+    BackgroundTasks,
     Depends,
     FastAPI,
     File,
@@ -37,6 +38,7 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.storage.provider import Storage
 
 
+from open_webui.retrieval.bm25 import BM25_INDEXES
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 # Document loaders
@@ -1368,6 +1370,7 @@ def save_docs_to_vector_db(
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                BM25_INDEXES.drop(collection_name)
                 log.info(f"deleting existing collection {collection_name}")
             elif add is False:
                 log.info(
@@ -1404,6 +1407,8 @@ def save_docs_to_vector_db(
                 if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
                 else None
             ),
+            # Document chunks are embedded once, keep them out of the cache
+            cache=False,
         )
 
         embeddings = embedding_function(
@@ -1428,6 +1433,12 @@ def save_docs_to_vector_db(
             collection_name=collection_name,
             items=items,
         )
+        BM25_INDEXES.add(
+            collection_name,
+            [item["id"] for item in items],
+            [item["text"] for item in items],
+            [item["metadata"] for item in items],
+        )
 
         log.info(f"added {len(items)} items to collection {collection_name}")
         return True
@@ -1470,6 +1481,7 @@ def process_file(
                     VECTOR_DB_CLIENT.delete_collection(
                         collection_name=f"file-{file.id}"
                     )
+                    BM25_INDEXES.drop(f"file-{file.id}")
                 except:
                     # Audio file upload pipeline
                     pass
@@ -2178,13 +2190,9 @@ def query_doc_handler(
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH and (
             form_data.hybrid is None or form_data.hybrid
         ):
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
             return query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
+                collection_result=None,
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
@@ -2320,6 +2328,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
                 collection_name=form_data.collection_name,
                 metadata={"hash": hash},
             )
+            BM25_INDEXES.remove(form_data.collection_name, filter={"hash": hash})
             return {"status": True}
         else:
             return {"status": False}
@@ -2331,9 +2340,69 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    BM25_INDEXES.clear()
     Knowledges.delete_all_knowledge()
 
 
+@router.get("/vector/stats")
+def get_vector_db_stats(user=Depends(get_admin_user)):
+    """Chunks per collection, table and index statistics of the vector DB"""
+    if not VECTOR_DB_CLIENT.supports_maintenance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                "Not supported by the configured vector database"
+            ),
+        )
+
+    try:
+        return VECTOR_DB_CLIENT.get_stats()
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
+class VectorMaintenanceForm(BaseModel):
+    reindex: bool = False
+    collection_name: Optional[str] = None
+
+
+def run_vector_maintenance(form_data: VectorMaintenanceForm):
+    try:
+        result = VECTOR_DB_CLIENT.optimize(
+            reindex=form_data.reindex, collection_name=form_data.collection_name
+        )
+        log.info(f"Vector index maintenance completed: {result}")
+    except Exception as e:
+        log.exception(f"Vector index maintenance failed: {e}")
+
+
+@router.post("/vector/maintenance")
+def start_vector_maintenance(
+    form_data: VectorMaintenanceForm,
+    background_tasks: BackgroundTasks,
+    user=Depends(get_admin_user),
+):
+    """
+    Create and drop per collection indexes, rebuild indexes with `reindex`
+    and refresh planner statistics. Index builds can take long, so this runs
+    in the background.
+    """
+    if not VECTOR_DB_CLIENT.supports_maintenance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                "Not supported by the configured vector database"
+            ),
+        )
+
+    background_tasks.add_task(run_vector_maintenance, form_data)
+    return {"status": True}
+
+
 @router.post("/reset/uploads")
 def reset_upload_dir(user=Depends(get_admin_user)) -> bool:
     folder = f"{UPLOAD_DIR}"
@@ -21,6 +21,7 @@ from open_webui.utils.plugin import (
     load_tool_module_by_id,
     replace_imports,
     get_tool_module_from_cache,
+    invalidate_plugin_module,
 )
 from open_webui.utils.tools import get_tool_specs
 from open_webui.utils.auth import get_admin_user, get_verified_user
@@ -142,7 +143,7 @@ async def get_tools(request: Request, user=Depends(get_verified_user)):
         # Admin can see all tools
         return tools
     else:
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user.id)}
+        user_group_ids = Groups.get_group_ids_by_member_id(user.id)
         tools = [
             tool
             for tool in tools
@@ -387,6 +388,7 @@ async def update_tools_by_id(
 
         log.debug(updated)
         tools = Tools.update_tool_by_id(id, updated)
+        invalidate_plugin_module("tool", id)
 
         if tools:
             return tools
@@ -431,6 +433,7 @@ async def delete_tools_by_id(
 
     result = Tools.delete_tool_by_id(id)
     if result:
+        invalidate_plugin_module("tool", id)
         TOOLS = request.app.state.TOOLS
         if id in TOOLS:
             del TOOLS[id]
@@ -1,12 +1,18 @@
 import os
 import shutil
 import json
+import hashlib
 import logging
 import re
+import threading
+import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Tuple, Dict, NamedTuple, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -25,6 +31,7 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_CACHE_MAX_SIZE,
     UPLOAD_DIR,
 )
 from google.cloud import storage
@@ -32,6 +39,7 @@ from google.cloud.exceptions import GoogleCloudError, NotFound
 from open_webui.constants import ERROR_MESSAGES
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient
+from azure.core import MatchConditions
 from azure.core.exceptions import ResourceNotFoundError
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -40,6 +48,161 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
+# Uploads are copied and sent in parts of this size, so that memory use does
+# not grow with the file size. A multiple of 256 KiB, as GCS requires.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class UploadedFile(NamedTuple):
+    size: int
+    sha256: str
+
+
+def copy_file(file: BinaryIO, file_path: str) -> UploadedFile:
+    """
+    Copy `file` to `file_path` chunk by chunk, computing its size and SHA-256
+    on the way. Raises a ValueError if the file is empty.
+    """
+    size = 0
+    sha256 = hashlib.sha256()
+    with open(file_path, "wb") as f:
+        while chunk := file.read(UPLOAD_CHUNK_SIZE):
+            f.write(chunk)
+            sha256.update(chunk)
+            size += len(chunk)
+
+    if not size:
+        os.remove(file_path)
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    return UploadedFile(size, sha256.hexdigest())
+
+
+class CachedFile(NamedTuple):
+    size: int
+    # Version of the remote object the local copy was fetched at
+    etag: Optional[str]
+
+
+class StorageCache:
+    """
+    Size-bounded LRU index of the local copies that the remote storage
+    providers keep in UPLOAD_DIR. A copy is only downloaded again when the
+    ETag of the remote object changed, and concurrent fetches of the same
+    file wait for a single download.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, list] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        # Copies left by a previous run count towards the bound, oldest first
+        self._loaded = True
+        files = []
+        for filename in os.listdir(UPLOAD_DIR):
+            file_path = f"{UPLOAD_DIR}/{filename}"
+            if os.path.isfile(file_path) and file_path not in self._entries:
+                stat = os.stat(file_path)
+                files.append((stat.st_atime, file_path, stat.st_size))
+
+        for _, file_path, size in sorted(files):
+            self._entries[file_path] = CachedFile(size, None)
+            self._entries.move_to_end(file_path, last=False)
+            self.size += size
+
+    @contextmanager
+    def _fetch_lock(self, file_path: str):
+        with self._lock:
+            lock = self._fetch_locks.setdefault(file_path, [threading.Lock(), 0])
+            lock[1] += 1
+        try:
+            with lock[0]:
+                yield
+        finally:
+            with self._lock:
+                lock[1] -= 1
+                if not lock[1]:
+                    del self._fetch_locks[file_path]
+
+    def get(
+        self,
+        file_path: str,
+        fetch: Callable[[Optional[str], str], Optional[str]],
+    ) -> str:
+        """
+        Return `file_path` once it holds the current version of the remote
+        object. `fetch(etag, tmp_path)` downloads the object to `tmp_path`
+        and returns its ETag, or returns None without downloading when the
+        object still has the ETag of the local copy.
+        """
+        with self._fetch_lock(file_path):
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                entry = self._entries.get(file_path)
+
+            etag = entry.etag if entry and os.path.isfile(file_path) else None
+            tmp_file_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                new_etag = fetch(etag, tmp_file_path)
+                if new_etag is not None:
+                    os.replace(tmp_file_path, file_path)
+            finally:
+                if os.path.exists(tmp_file_path):
+                    os.remove(tmp_file_path)
+
+            self.put(file_path, etag if new_etag is None else new_etag)
+        return file_path
+
+    def put(self, file_path: str, etag: Optional[str]) -> None:
+        """Record `file_path` as the most recently used copy of the object at `etag`"""
+        size = os.path.getsize(file_path)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.pop(file_path, None)
+            if entry:
+                self.size -= entry.size
+            self._entries[file_path] = CachedFile(size, etag)
+            self.size += size
+            self._evict()
+
+    def remove(self, file_path: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(file_path, None)
+            if entry:
+                self.size -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _evict(self) -> None:
+        # The most recently used copy stays, even if it alone exceeds the bound
+        for file_path in list(self._entries)[:-1]:
+            if self.size <= self.max_size:
+                break
+            if file_path in self._fetch_locks:
+                continue
+
+            entry = self._entries.pop(file_path)
+            self.size -= entry.size
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"Failed to evict {file_path} from the storage cache: {e}")
+
+
+STORAGE_CACHE = StorageCache(STORAGE_CACHE_MAX_SIZE)
+
+
 class StorageProvider(ABC):
     @abstractmethod
     def get_file(self, file_path: str) -> str:
@@ -48,7 +211,11 @@ class StorageProvider(ABC):
     @abstractmethod
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[UploadedFile, str]:
+        """
+        Store `file` without reading it into memory at once. Returns the size
+        and SHA-256 of the file, and the path it is stored at.
+        """
         pass
 
     @abstractmethod
@@ -64,14 +231,9 @@ class LocalStorageProvider(StorageProvider):
     @staticmethod
     def upload_file(
         file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    ) -> Tuple[UploadedFile, str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+        return copy_file(file, file_path), file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
@@ -83,6 +245,7 @@ class LocalStorageProvider(StorageProvider):
         """Handles deletion of the file from local storage."""
         filename = file_path.split("/")[-1]
         file_path = f"{UPLOAD_DIR}/{filename}"
+        STORAGE_CACHE.remove(file_path)
         if os.path.isfile(file_path):
             os.remove(file_path)
         else:
@@ -91,6 +254,7 @@ class LocalStorageProvider(StorageProvider):
     @staticmethod
     def delete_all_files() -> None:
         """Handles deletion of all files from local storage."""
+        STORAGE_CACHE.clear()
         if os.path.exists(UPLOAD_DIR):
             for filename in os.listdir(UPLOAD_DIR):
                 file_path = os.path.join(UPLOAD_DIR, filename)
@@ -139,6 +303,11 @@ class S3StorageProvider(StorageProvider):
 
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
+        # Files above one chunk are sent as multipart uploads
+        self.transfer_config = TransferConfig(
+            multipart_threshold=UPLOAD_CHUNK_SIZE,
+            multipart_chunksize=UPLOAD_CHUNK_SIZE,
+        )
 
     @staticmethod
     def sanitize_tag_value(s: str) -> str:
@@ -147,12 +316,16 @@ class S3StorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[UploadedFile, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        uploaded_file, file_path = LocalStorageProvider.upload_file(
+            file, filename, tags
+        )
         s3_key = os.path.join(self.key_prefix, filename)
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            self.s3_client.upload_file(
+                file_path, self.bucket_name, s3_key, Config=self.transfer_config
+            )
             if S3_ENABLE_TAGGING and tags:
                 sanitized_tags = {
                     self.sanitize_tag_value(k): self.sanitize_tag_value(v)
@@ -168,10 +341,10 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
-            return (
-                open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
-            )
+            # The local copy is current until the object changes
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            STORAGE_CACHE.put(file_path, response["ETag"])
+            return uploaded_file, f"s3://{self.bucket_name}/{s3_key}"
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -180,11 +353,28 @@ class S3StorageProvider(StorageProvider):
         try:
             s3_key = self._extract_s3_key(file_path)
             local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            return STORAGE_CACHE.get(
+                local_file_path,
+                lambda etag, tmp_file_path: self._download_file(
+                    s3_key, etag, tmp_file_path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def _download_file(
+        self, s3_key: str, etag: Optional[str], file_path: str
+    ) -> Optional[str]:
+        response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        if etag == response["ETag"]:
+            return None
+
+        # Parts of multipart downloads are pinned to one version by boto3
+        self.s3_client.download_file(
+            self.bucket_name, s3_key, file_path, Config=self.transfer_config
+        )
+        return response["ETag"]
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
         try:
@@ -240,13 +430,17 @@ class GCSStorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[UploadedFile, str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        uploaded_file, file_path = LocalStorageProvider.upload_file(
+            file, filename, tags
+        )
         try:
-            blob = self.bucket.blob(filename)
+            # Setting a chunk size makes this a resumable upload sent in parts
+            blob = self.bucket.blob(filename, chunk_size=UPLOAD_CHUNK_SIZE)
             blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            STORAGE_CACHE.put(file_path, blob.etag)
+            return uploaded_file, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -255,13 +449,28 @@ class GCSStorageProvider(StorageProvider):
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
-
-            return local_file_path
+            return STORAGE_CACHE.get(
+                local_file_path,
+                lambda etag, tmp_file_path: self._download_file(
+                    filename, etag, tmp_file_path
+                ),
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def _download_file(
+        self, filename: str, etag: Optional[str], file_path: str
+    ) -> Optional[str]:
+        blob = self.bucket.get_blob(filename)
+        if blob is None:
+            raise NotFound(f"{filename} not found in bucket {self.bucket_name}")
+        if etag == blob.etag:
+            return None
+
+        # Pinned to the generation checked above
+        blob.download_to_filename(file_path, if_generation_match=blob.generation)
+        return blob.etag
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -298,13 +507,19 @@ class AzureStorageProvider(StorageProvider):
         if storage_key:
             # Configure using the Azure Storage Account Endpoint and Key
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=storage_key
+                account_url=self.endpoint,
+                credential=storage_key,
+                max_single_put_size=UPLOAD_CHUNK_SIZE,
+                max_block_size=UPLOAD_CHUNK_SIZE,
             )
         else:
             # Configure using the Azure Storage Account Endpoint and DefaultAzureCredential
             # If the key is not configured, then the DefaultAzureCredential will be used to support Managed Identity authentication
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=DefaultAzureCredential()
+                account_url=self.endpoint,
+                credential=DefaultAzureCredential(),
+                max_single_put_size=UPLOAD_CHUNK_SIZE,
+                max_block_size=UPLOAD_CHUNK_SIZE,
             )
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
@@ -312,13 +527,20 @@ class AzureStorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[UploadedFile, str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        uploaded_file, file_path = LocalStorageProvider.upload_file(
+            file, filename, tags
+        )
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            # Files above one block are staged block by block
+            with open(file_path, "rb") as f:
+                response = blob_client.upload_blob(
+                    f, length=uploaded_file.size, overwrite=True
+                )
+            STORAGE_CACHE.put(file_path, response["etag"])
+            return uploaded_file, f"{self.endpoint}/{self.container_name}/{filename}"
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
@@ -328,12 +550,31 @@ class AzureStorageProvider(StorageProvider):
             filename = file_path.split("/")[-1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+            return STORAGE_CACHE.get(
+                local_file_path,
+                lambda etag, tmp_file_path: self._download_file(
+                    blob_client, etag, tmp_file_path
+                ),
+            )
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    @staticmethod
+    def _download_file(
+        blob_client, etag: Optional[str], file_path: str
+    ) -> Optional[str]:
+        properties = blob_client.get_blob_properties()
+        if etag == properties.etag:
+            return None
+
+        # Streamed to disk in chunks, pinned to the version checked above
+        downloader = blob_client.download_blob(
+            etag=properties.etag, match_condition=MatchConditions.IfNotModified
+        )
+        with open(file_path, "wb") as f:
+            downloader.readinto(f)
+        return properties.etag
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
         try:
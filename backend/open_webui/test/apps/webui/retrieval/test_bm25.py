@@ -0,0 +1,122 @@
+import pytest
+from rank_bm25 import BM25Okapi
+
+from open_webui.retrieval import bm25
+from open_webui.retrieval.bm25 import BM25Index, BM25IndexCache, tokenize
+from open_webui.retrieval.vector.main import GetResult
+
+CORPUS = [
+    "the quick brown fox jumps over the lazy dog",
+    "a fast brown fox leaps over lazy hounds",
+    "the dog sleeps in the sun all day",
+    "foxes are wild animals related to dogs",
+    "the sun is a star at the centre of the solar system",
+    "lazy afternoons in the sun with a good book",
+    "brown bears and brown foxes live in the forest",
+]
+
+QUERIES = ["brown fox", "lazy dog", "the sun", "forest animals", "unknown words"]
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(bm25, "REDIS_URL", None)
+
+
+def get_index(documents: list[str]) -> BM25Index:
+    index = BM25Index()
+    index.add(
+        [str(i) for i in range(len(documents))],
+        documents,
+        [{"file_id": f"file-{i % 2}"} for i in range(len(documents))],
+    )
+    return index
+
+
+def test_search_ranks_like_bm25_okapi():
+    index = get_index(CORPUS)
+    okapi = BM25Okapi([tokenize(document) for document in CORPUS])
+
+    for query in QUERIES:
+        scores = okapi.get_scores(tokenize(query))
+        ranked = [
+            CORPUS[i]
+            for i in sorted(range(len(CORPUS)), key=lambda i: -scores[i])
+            if scores[i] > 0
+        ]
+        results = [doc.page_content for doc in index.search(query, len(ranked))]
+        assert results == ranked, query
+
+
+def test_scores_match_bm25_okapi():
+    index = get_index(CORPUS)
+    okapi = BM25Okapi([tokenize(document) for document in CORPUS])
+
+    for query in QUERIES:
+        expected = okapi.get_scores(tokenize(query))
+        assert list(index.get_scores(query)) == pytest.approx(list(expected)), query
+
+
+def test_scores_match_bm25_okapi_after_add_and_remove():
+    index = get_index(CORPUS[:4])
+    index.add(["4", "5", "6"], CORPUS[4:], [{"file_id": "file-0"}] * 3)
+    index.remove(ids=["2"])
+    index.remove(filter={"file_id": "file-1"})
+
+    remaining = [CORPUS[int(id)] for id in index.ids]
+    assert remaining == [CORPUS[0], CORPUS[4], CORPUS[5], CORPUS[6]]
+    okapi = BM25Okapi([tokenize(document) for document in remaining])
+
+    for query in QUERIES:
+        expected = okapi.get_scores(tokenize(query))
+        assert list(index.get_scores(query)) == pytest.approx(list(expected)), query
+
+
+def test_size_follows_added_and_removed_chunks():
+    index = get_index(CORPUS)
+    assert index.size > sum(len(document) for document in CORPUS)
+
+    index.remove(ids=[str(i) for i in range(len(CORPUS))])
+    assert len(index) == 0
+    assert index.size == 0
+
+
+def test_cache_evicts_least_recently_used():
+    results = GetResult(
+        ids=[[str(i) for i in range(len(CORPUS))]],
+        documents=[CORPUS],
+        metadatas=[[{}] * len(CORPUS)],
+    )
+    # Room for two of the indexes
+    cache = BM25IndexCache(max_size=BM25Index.from_result(results).size * 2 + 1)
+
+    cache.get("a", lambda _: results)
+    cache.get("b", lambda _: results)
+    cache.get("a", lambda _: results)
+    cache.get("c", lambda _: results)
+
+    assert list(cache._indexes) == ["a", "c"]
+
+
+def test_cache_drops_index_changed_while_loading():
+    cache = BM25IndexCache(max_size=1 << 30)
+
+    def loader(collection_name):
+        # Chunks written after the loader read the collection
+        cache.add(collection_name, ["new"], ["freshly added chunk"])
+        return GetResult(ids=[["old"]], documents=[["old chunk"]], metadatas=[[{}]])
+
+    index = cache.get("collection", loader)
+    assert index.ids == ["old"]
+    assert "collection" not in cache._indexes
+
+    reloaded = cache.get(
+        "collection",
+        lambda _: GetResult(
+            ids=[["old", "new"]],
+            documents=[["old chunk", "freshly added chunk"]],
+            metadatas=[[{}, {}]],
+        ),
+    )
+    assert sorted(reloaded.ids) == ["new", "old"]
+    assert cache._indexes["collection"] is reloaded
@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import VECTOR_INDEX_NAME, PgvectorClient
+
+
+class FakeResult:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Records the statements a client runs instead of sending them to Postgres"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(
+            str(statement.compile(dialect=postgresql.dialect()))
+            if hasattr(statement, "compile")
+            else str(statement)
+        )
+        return FakeResult()
+
+    def rollback(self):
+        pass
+
+
+def get_client(indexes: dict) -> PgvectorClient:
+    client = PgvectorClient.__new__(PgvectorClient)
+    client.session = FakeSession()
+    client._set_collection_indexes(indexes)
+    return client
+
+
+def get_index(valid=True) -> dict:
+    return {"valid": valid, "size": 0, "definition": ""}
+
+
+def search_sql(client: PgvectorClient, collection_name: str) -> list[str]:
+    client.session.statements = []
+    client.search(collection_name, [[0.1] * pgvector.VECTOR_LENGTH], limit=5)
+    return client.session.statements
+
+
+@pytest.fixture(autouse=True)
+def hnsw(monkeypatch):
+    monkeypatch.setattr(pgvector, "PGVECTOR_INDEX_METHOD", "hnsw")
+    monkeypatch.setattr(pgvector, "PGVECTOR_HNSW_EF_SEARCH", 40)
+    monkeypatch.setattr(pgvector, "PGVECTOR_HNSW_ITERATIVE_SCAN", "relaxed_order")
+
+
+def test_collection_without_index_is_searched_exactly():
+    client = get_client({VECTOR_INDEX_NAME: get_index()})
+
+    statements = search_sql(client, "small")
+
+    assert len(statements) == 1
+    assert "SET LOCAL" not in statements[0]
+    assert "document_chunk.collection_name = %(collection_name_1)s" in statements[0]
+    # Adding 0 keeps the shared vector index from serving the ordering
+    assert (
+        "ORDER BY (document_chunk.vector <=> %(vector_1)s) + %(param_1)s"
+        in statements[0]
+    )
+
+
+def test_collection_with_own_index_is_searched_approximately():
+    index_name = PgvectorClient._get_collection_index_name("large")
+    client = get_client({VECTOR_INDEX_NAME: get_index(), index_name: get_index()})
+
+    statements = search_sql(client, "large")
+
+    assert statements[:2] == [
+        "SET LOCAL hnsw.ef_search = 40",
+        "SET LOCAL hnsw.iterative_scan = relaxed_order",
+    ]
+    assert "ORDER BY document_chunk.vector <=> %(vector_1)s" in statements[2]
+    assert "+ %(param_1)s" not in statements[2]
+
+
+def test_invalid_collection_index_is_not_used():
+    index_name = PgvectorClient._get_collection_index_name("large")
+    client = get_client({index_name: get_index(valid=False)})
+
+    statements = search_sql(client, "large")
+
+    assert "SET LOCAL" not in statements[0]
+    assert "+ %(param_1)s" in statements[0]
+
+
+def test_partial_index_sql():
+    sql = PgvectorClient._get_index_sql("idx", "it's", concurrently=True)
+    assert sql == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx ON document_chunk USING hnsw "
+        "(vector vector_cosine_ops) WITH (m = 16, ef_construction = 64) "
+        "WHERE collection_name = 'it''s'"
+    )
+
+
+def run_optimize(monkeypatch, threshold: int, indexes: dict, counts: dict) -> dict:
+    monkeypatch.setattr(pgvector, "PGVECTOR_COLLECTION_INDEX_THRESHOLD", threshold)
+    client = get_client(indexes)
+    client._get_vector_indexes = lambda: indexes
+    client._get_collection_counts = lambda: counts
+    client._execute_outside_transaction = lambda *statements: None
+    return client.optimize()
+
+
+def test_optimize_keeps_collection_indexes_without_threshold(monkeypatch):
+    kept = PgvectorClient._get_collection_index_name("kept")
+    deleted = PgvectorClient._get_collection_index_name("deleted")
+
+    result = run_optimize(
+        monkeypatch,
+        0,
+        {VECTOR_INDEX_NAME: get_index(), kept: get_index(), deleted: get_index()},
+        {"kept": 10, "other": 100_000},
+    )
+
+    assert result == {"built": [], "dropped": [deleted]}
+
+
+def test_optimize_follows_threshold(monkeypatch):
+    large = PgvectorClient._get_collection_index_name("large")
+    shrunk = PgvectorClient._get_collection_index_name("shrunk")
+    steady = PgvectorClient._get_collection_index_name("steady")
+
+    result = run_optimize(
+        monkeypatch,
+        1000,
+        {VECTOR_INDEX_NAME: get_index(), shrunk: get_index(), steady: get_index()},
+        {"large": 1000, "shrunk": 100, "steady": 600, "small": 999},
+    )
+
+    assert result == {"built": [large], "dropped": [shrunk]}
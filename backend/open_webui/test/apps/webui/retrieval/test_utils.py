@@ -0,0 +1,45 @@
+from open_webui.retrieval.utils import merge_and_sort_query_results
+
+
+def get_result(ids, distances, documents) -> dict:
+    return {
+        "ids": [ids],
+        "distances": [distances],
+        "documents": [documents],
+        "metadatas": [[{"source": document} for document in documents]],
+    }
+
+
+def test_same_document_under_different_ids_is_kept_once():
+    # The chunk of a file is stored in its own collection and in a knowledge base
+    file_result = get_result(["id-1", "id-2"], [0.9, 0.5], ["shared", "file only"])
+    knowledge_result = get_result(["id-3", "id-4"], [0.8, 0.7], ["shared", "other"])
+
+    result = merge_and_sort_query_results([file_result, knowledge_result], k=3)
+
+    assert result["documents"] == [["shared", "other", "file only"]]
+    assert result["ids"] == [["id-1", "id-4", "id-2"]]
+    assert result["distances"] == [[0.9, 0.7, 0.5]]
+
+
+def test_same_document_with_and_without_ids_is_kept_once():
+    with_ids = get_result(["id-1"], [0.6], ["shared"])
+    without_ids = {**get_result([], [0.6], ["shared"]), "ids": None}
+
+    result = merge_and_sort_query_results([without_ids, with_ids], k=3)
+
+    assert result["documents"] == [["shared"]]
+    assert result["ids"] == [["id-1"]]
+
+
+def test_best_scores_are_kept():
+    result = merge_and_sort_query_results(
+        [
+            get_result(["a", "b", "c"], [0.1, 0.4, 0.3], ["a", "b", "c"]),
+            get_result(["d", "e"], [0.5, 0.4], ["a", "e"]),
+        ],
+        k=2,
+    )
+
+    assert result["documents"] == [["a", "b"]]
+    assert result["distances"] == [[0.5, 0.4]]
@@ -0,0 +1,108 @@
+import time
+
+import fakeredis
+import pytest
+
+from open_webui.utils import ingestion
+from open_webui.utils.ingestion import (
+    IngestionJob,
+    LocalIngestionQueue,
+    RedisIngestionQueue,
+)
+
+
+@pytest.fixture(params=["redis", "local"])
+def queue(request):
+    if request.param == "redis":
+        return RedisIngestionQueue(fakeredis.FakeRedis(decode_responses=True))
+    return LocalIngestionQueue()
+
+
+def get_job(id: str, user_id: str, priority: str = "normal") -> IngestionJob:
+    return IngestionJob(
+        id=id,
+        file_id=f"file-{id}",
+        user_id=user_id,
+        priority=priority,
+        created_at=int(time.time()),
+    )
+
+
+def drain(queue) -> list[str]:
+    ids = []
+    while job := queue.dequeue(0):
+        ids.append(job.id)
+        queue.complete(job)
+    return ids
+
+
+def test_higher_priority_goes_first(queue):
+    queue.enqueue(get_job("low", "u1", "low"))
+    queue.enqueue(get_job("normal", "u2", "normal"))
+    queue.enqueue(get_job("high", "u3", "high"))
+    queue.enqueue(get_job("normal-2", "u1", "normal"))
+
+    assert drain(queue) == ["high", "normal", "normal-2", "low"]
+
+
+def test_users_take_turns_within_a_priority(queue):
+    for i in range(3):
+        queue.enqueue(get_job(f"bulk-{i}", "bulk"))
+    queue.enqueue(get_job("chat-0", "chat"))
+    queue.enqueue(get_job("chat-1", "chat"))
+
+    assert drain(queue) == ["bulk-0", "chat-0", "bulk-1", "chat-1", "bulk-2"]
+
+
+def test_user_rejoins_turns_after_emptying_their_queue(queue):
+    queue.enqueue(get_job("a-0", "a"))
+    queue.enqueue(get_job("b-0", "b"))
+    queue.enqueue(get_job("b-1", "b"))
+
+    assert queue.dequeue(0).id == "a-0"
+    queue.enqueue(get_job("a-1", "a"))
+
+    assert drain(queue) == ["b-0", "a-1", "b-1"]
+
+
+def test_stats(queue):
+    queue.enqueue(get_job("1", "u1", "high"))
+    queue.enqueue(get_job("2", "u1", "low"))
+    queue.enqueue(get_job("3", "u2", "low"))
+    queue.dequeue(0)
+
+    assert queue.stats() == {
+        "pending": {"high": 0, "normal": 0, "low": 2},
+        "users": {"u1": 1, "u2": 1},
+        "delayed": 0,
+        "processing": 1,
+    }
+
+
+def test_retried_job_is_requeued_once_due(queue):
+    queue.enqueue(get_job("1", "u1"))
+    job = queue.dequeue(0)
+    assert job.attempts == 1
+
+    queue.retry(job, 60)
+    assert queue.dequeue(0) is None
+
+    queue.retry(job, -1)
+    job = queue.dequeue(0)
+    assert job.id == "1"
+    assert job.attempts == 2
+
+
+def test_job_of_lost_worker_is_run_again(monkeypatch):
+    queue = RedisIngestionQueue(fakeredis.FakeRedis(decode_responses=True))
+    queue.enqueue(get_job("1", "u1"))
+
+    # The worker stops sending heartbeats right away
+    monkeypatch.setattr(ingestion, "INGESTION_JOB_TIMEOUT", -1)
+    assert queue.dequeue(0).attempts == 1
+
+    monkeypatch.setattr(ingestion, "INGESTION_JOB_TIMEOUT", 60)
+    job = queue.dequeue(0)
+    assert job.id == "1"
+    assert job.attempts == 2
+    assert queue.dequeue(0) is None
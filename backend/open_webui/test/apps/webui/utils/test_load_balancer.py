@@ -0,0 +1,137 @@
+import asyncio
+import gc
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from starlette.responses import StreamingResponse
+
+from open_webui.routers import ollama
+from open_webui.routers.openai import stream_response
+from open_webui.utils import load_balancer
+from open_webui.utils.http_client import get_http_session
+from open_webui.utils.load_balancer import LoadBalancer
+
+BACKEND = "http://backend"
+
+
+async def stream_events(request: web.Request) -> web.StreamResponse:
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    for i in range(int(request.query.get("events", "3"))):
+        await response.write(f"data: {i}\n\n".encode())
+        await asyncio.sleep(0.01)
+    return response
+
+
+async def start_upstream() -> TestServer:
+    app = web.Application()
+    app.router.add_get("/stream", stream_events)
+    app.router.add_post("/api/chat", stream_events)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def serve(response: StreamingResponse, disconnect_after: int = 0) -> list:
+    """Send `response` to a client that disconnects after some body chunks."""
+    sent = []
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        chunks = [m for m in sent if m["type"] == "http.response.body"]
+        if disconnect_after and len(chunks) >= disconnect_after:
+            disconnected.set()
+            await asyncio.sleep(1)
+
+    scope = {"type": "http", "asgi": {"spec_version": "2.3"}, "method": "GET"}
+    await response(scope, receive, send)
+    return sent
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(load_balancer, "REDIS_URL", None)
+
+
+@pytest.mark.asyncio
+async def test_lease_released_after_stream():
+    balancer = LoadBalancer()
+    server = await start_upstream()
+    try:
+        lease = balancer.acquire(BACKEND)
+        r = await get_http_session().get(server.make_url("/stream"))
+        lease.observe(r.status < 500)
+        assert balancer.get_stats(BACKEND).in_flight == 1
+
+        sent = await serve(StreamingResponse(stream_response(r, lease)))
+
+        body = b"".join(m.get("body", b"") for m in sent)
+        assert body == b"data: 0\n\ndata: 1\n\ndata: 2\n\n"
+        assert lease.released
+        assert balancer.get_stats(BACKEND).in_flight == 0
+        assert r.closed
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_lease_released_when_client_disconnects():
+    balancer = LoadBalancer()
+    server = await start_upstream()
+    try:
+        lease = balancer.acquire(BACKEND)
+        r = await get_http_session().get(server.make_url("/stream?events=1000"))
+
+        await serve(StreamingResponse(stream_response(r, lease)), disconnect_after=2)
+        # The abandoned stream generator is closed once it is collected
+        gc.collect()
+        await asyncio.sleep(0.05)
+
+        assert lease.released
+        assert balancer.get_stats(BACKEND).in_flight == 0
+        assert r.closed
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_lease_released_once():
+    balancer = LoadBalancer()
+    first = balancer.acquire(BACKEND)
+    second = balancer.acquire(BACKEND)
+
+    first.release()
+    first.release()
+
+    assert balancer.get_stats(BACKEND).in_flight == 1
+    second.release()
+    assert balancer.get_stats(BACKEND).in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_ollama_lease_released_when_stream_is_cancelled(monkeypatch):
+    balancer = LoadBalancer()
+    monkeypatch.setattr(ollama, "LOAD_BALANCER", balancer)
+    server = await start_upstream()
+    try:
+        url = str(server.make_url("/api/chat?events=1000"))
+        response = await ollama.send_post_request(
+            url, "{}", stream=True, backend=BACKEND
+        )
+        assert balancer.get_stats(BACKEND).in_flight == 1
+
+        serving = asyncio.create_task(serve(response))
+        await asyncio.sleep(0.05)
+        serving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await serving
+
+        assert balancer.get_stats(BACKEND).in_flight == 0
+    finally:
+        await server.close()
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from open_webui.utils import tools
+from open_webui.utils.tools import ToolServerSpecCache
+
+SPEC = json.dumps(
+    {
+        "openapi": "3.0.0",
+        "info": {"title": "Test", "version": "1.0"},
+        "paths": {
+            "/echo": {
+                "get": {"operationId": "echo", "summary": "Echo", "parameters": []}
+            }
+        },
+    }
+)
+
+
+def get_server(**kwargs) -> dict:
+    return {"url": "http://tools", "config": {"enable": True}, **kwargs}
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    fetches = []
+
+    async def fetch_tool_server_spec(token, url, etag=None, last_modified=None):
+        fetches.append(url)
+        return SPEC, None, None
+
+    monkeypatch.setattr(tools, "fetch_tool_server_spec", fetch_tool_server_spec)
+    return fetches
+
+
+@pytest.mark.asyncio
+async def test_spec_is_served_from_cache(fetches):
+    cache = ToolServerSpecCache(ttl=300)
+    servers = [get_server()]
+
+    assert cache.get(servers) is None
+    assert [server["url"] for server in await cache.refresh(servers)] == [
+        "http://tools"
+    ]
+    assert len(fetches) == 1
+
+    results = cache.get(servers)
+    assert [spec["name"] for spec in results[0]["specs"]] == ["echo"]
+    assert len(fetches) == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_without_spec_is_cached(fetches):
+    cache = ToolServerSpecCache(ttl=300)
+    servers = [
+        get_server(spec_type="json", spec=""),
+        get_server(spec_type="unknown"),
+        get_server(spec_type="json", spec=SPEC),
+    ]
+
+    assert len(await cache.refresh(servers)) == 1
+
+    # Looked up without waiting for another refresh
+    assert len(cache.get(servers)) == 1
+    assert len(await cache.refresh(servers, expired_only=True)) == 1
+    assert fetches == []
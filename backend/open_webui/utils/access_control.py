@@ -1,6 +1,6 @@
 from typing import Optional, Set, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
-from open_webui.models.groups import Groups
+from open_webui.models.groups import Groups, merge_permissions
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
@@ -35,32 +35,13 @@ def get_permissions(
     Permissions are nested in a dict with the permission key as the key and a boolean as the value.
     """
 
-    def combine_permissions(
-        permissions: Dict[str, Any], group_permissions: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Combine permissions from multiple groups by taking the most permissive value."""
-        for key, value in group_permissions.items():
-            if isinstance(value, dict):
-                if key not in permissions:
-                    permissions[key] = {}
-                permissions[key] = combine_permissions(permissions[key], value)
-            else:
-                if key not in permissions:
-                    permissions[key] = value
-                else:
-                    permissions[key] = (
-                        permissions[key] or value
-                    )  # Use the most permissive value (True > False)
-        return permissions
-
-    user_groups = Groups.get_groups_by_member_id(user_id)
-
     # Deep copy default permissions to avoid modifying the original dict
     permissions = json.loads(json.dumps(default_permissions))
 
     # Combine permissions from all user groups
-    for group in user_groups:
-        permissions = combine_permissions(permissions, group.permissions or {})
+    permissions = merge_permissions(
+        permissions, Groups.get_group_permissions_by_member_id(user_id)
+    )
 
     # Ensure all fields from default_permissions are present and filled in
     permissions = fill_missing_permissions(permissions, default_permissions)
@@ -92,11 +73,10 @@ def has_permission(
     permission_hierarchy = permission_key.split(".")
 
     # Retrieve user group permissions
-    user_groups = Groups.get_groups_by_member_id(user_id)
-
-    for group in user_groups:
-        if get_permission(group.permissions or {}, permission_hierarchy):
-            return True
+    if get_permission(
+        Groups.get_group_permissions_by_member_id(user_id), permission_hierarchy
+    ):
+        return True
 
     # Check default permissions afterward if the group permissions don't allow it
     default_permissions = fill_missing_permissions(
@@ -119,8 +99,7 @@ def has_access(
             return True
 
     if user_group_ids is None:
-        user_groups = Groups.get_groups_by_member_id(user_id)
-        user_group_ids = {group.id for group in user_groups}
+        user_group_ids = Groups.get_group_ids_by_member_id(user_id)
 
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
@@ -275,7 +275,7 @@ def get_current_user(
             )
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = Users.get_cached_user_by_id(data["id"])
             if user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -300,12 +300,9 @@ def get_current_user(
                     current_span.set_attribute("client.user.role", user.role)
                     current_span.set_attribute("client.auth.type", "jwt")
 
-                # Refresh the user's last active timestamp asynchronously
-                # to prevent blocking the request
-                if background_tasks:
-                    background_tasks.add_task(
-                        Users.update_user_last_active_by_id, user.id
-                    )
+                # Refresh the user's last active timestamp, writes are
+                # throttled and batched in the background
+                Users.mark_user_active(user.id)
             return user
         else:
             raise HTTPException(
@@ -344,7 +341,7 @@ def get_current_user_by_api_key(api_key: str):
             current_span.set_attribute("client.user.role", user.role)
             current_span.set_attribute("client.auth.type", "api_key")
 
-        Users.update_user_last_active_by_id(user.id)
+        Users.mark_user_active(user.id)
 
     return user
 
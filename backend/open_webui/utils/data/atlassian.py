@@ -14,6 +14,8 @@ from urllib.parse import quote
 from open_webui.models.users import Users
 from open_webui.utils.data.data_ingestion import (
     upload_file_unified,
+    upload_stream_unified,
+    iter_response_chunks,
     list_files_unified,
     delete_file_unified,
     delete_folder_unified,
@@ -23,15 +25,16 @@ from open_webui.utils.data.data_ingestion import (
     update_data_source_sync_status
 )
 from open_webui.models.datatokens import OAuthTokens
+from open_webui.utils.data.sync_context import (
+    SyncContext,
+    SyncContextExecutor,
+    current_sync,
+    set_sync_context,
+)
 
-# Global variables
-USER_ID = None
-USER = None
 MAX_WORKERS = int(os.getenv("MAX_SYNC_WORKERS", "5"))
 EXCLUDED_FILES = [f.strip() for f in os.getenv("ATLASSIAN_EXCLUDED_FILES", "").split(',') if f.strip()]
 ALLOWED_EXTENSIONS = [ext.strip().lower() for ext in os.getenv("ATLASSIAN_ALLOWED_EXTENSIONS", "").split(',') if ext.strip()]
-script_start_time = None
-total_api_calls = 0
 
 log = logging.getLogger(__name__)
 from open_webui.env import SRC_LOG_LEVELS
@@ -161,6 +164,24 @@ def detect_atlassian_deployment(bearer_token: str = None, base_url: str = None)
 #         raise Exception(f"Failed to make Atlassian API request after retries for URL: {url}")
 
 
+def init_sync_context(user_id: str, token: Optional[str] = None) -> SyncContext:
+    """
+    Start the sync context of the current sync. With an OAuth token, the user
+    authenticates with their email as username.
+    """
+    user = Users.get_user_by_id(user_id)
+    if not user:
+        raise ValueError(f"User with ID {user_id} not found")
+
+    return set_sync_context(SyncContext(
+        user_id=user_id,
+        provider='atlassian',
+        user=user,
+        user_auth=HTTPBasicAuth(user.email, token) if token else None,
+        token_refresher=lambda auth_token: get_valid_atlassian_token(user_id, auth_token),
+    ))
+
+
 def make_atlassian_request(url: str, method: str = 'GET', headers: Optional[Dict[str, str]] = None,
                            params: Optional[Dict[str, Any]] = None, data: Optional[Any] = None,
                            stream: bool = False, bearer_token: Optional[str] = None, 
@@ -168,8 +189,7 @@ def make_atlassian_request(url: str, method: str = 'GET', headers: Optional[Dict
     """
     Unified request handler - supports Bearer token (cloud OAuth or self-hosted PAT) with token auto-refresh for cloud.
     """
-    global total_api_calls, USER_ID
-    total_api_calls += 1
+    current_sync.count_api_call()
 
     if headers is None:
         headers = {}
@@ -180,8 +200,8 @@ def make_atlassian_request(url: str, method: str = 'GET', headers: Optional[Dict
     # Use Bearer token for both cloud OAuth and self-hosted PAT
     if bearer_token:
         # Attempt to refresh only for cloud scenarios where token exists in DB
-        if USER_ID:
-            bearer_token = get_valid_atlassian_token(USER_ID, bearer_token)
+        if current_sync.user_id:
+            bearer_token = current_sync.refresh_token(bearer_token)
         headers['Authorization'] = f'Bearer {bearer_token}'
         log.debug(f"Using Bearer token for {url}")
     elif auth:
@@ -294,7 +314,7 @@ def list_jira_projects_and_issues(site_url, cloud_id, bearer_token: str, all_ite
                     issue_key = issue.get('key')
                     issue_summary = issue.get('fields', {}).get('summary', 'no_summary').replace('/', '_')
                     
-                    full_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}-{issue_summary}.json"
+                    full_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}-{issue_summary}.json"
                     
                     issue_info = {
                         'id': issue.get('id'),
@@ -318,7 +338,7 @@ def list_jira_projects_and_issues(site_url, cloud_id, bearer_token: str, all_ite
                         attachment_mime_type = attachment.get('mimeType')
                         attachment_size = attachment.get('size')
                         
-                        attachment_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}/attachments/{attachment_filename}"
+                        attachment_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}/attachments/{attachment_filename}"
                         
                         attachment_info = {
                             'id': attachment_id,
@@ -497,7 +517,7 @@ def list_jira_projects_and_issues_self_hosted(base_url: str, bearer_token: str =
                     
                     # Use instance hostname in path
                     instance_name = base_url.replace('https://', '').replace('http://', '').replace('/', '_')
-                    full_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}-{issue_summary}.json"
+                    full_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}-{issue_summary}.json"
                     
                     issue_info = {
                         'id': issue.get('id'),
@@ -522,7 +542,7 @@ def list_jira_projects_and_issues_self_hosted(base_url: str, bearer_token: str =
                         attachment_mime_type = attachment.get('mimeType')
                         attachment_size = attachment.get('size')
                         
-                        attachment_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}/attachments/{attachment_filename}"
+                        attachment_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}/attachments/{attachment_filename}"
                         
                         attachment_info = {
                             'id': attachment_id,
@@ -597,7 +617,7 @@ def list_jira_selected_projects_and_issues_self_hosted(base_url: str, bearer_tok
                     issue_key = issue.get('key')
                     issue_summary = issue.get('fields', {}).get('summary', 'no_summary').replace('/', '_')
                     
-                    full_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}/{issue_key}-{issue_summary}.json"
+                    full_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}/{issue_key}-{issue_summary}.json"
                     
                     issue_info = {
                         'id': issue.get('id'),
@@ -622,7 +642,7 @@ def list_jira_selected_projects_and_issues_self_hosted(base_url: str, bearer_tok
                         attachment_mime_type = attachment.get('mimeType')
                         attachment_size = attachment.get('size')
                         
-                        attachment_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}/attachments/{attachment_filename}"
+                        attachment_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{instance_name}/{project_key}/{issue_key}/attachments/{attachment_filename}"
                         
                         attachment_info = {
                             'id': attachment_id,
@@ -697,7 +717,7 @@ def list_jira_selected_projects_and_issues(site_url, cloud_id, bearer_token: str
                 issue_key = issue.get('key')
                 issue_summary = issue.get('fields', {}).get('summary', 'no_summary').replace('/', '_')
                 
-                full_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}/{issue_key}-{issue_summary}.json"
+                full_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}/{issue_key}-{issue_summary}.json"
                 
                 issue_info = {
                     'id': issue.get('id'),
@@ -721,7 +741,7 @@ def list_jira_selected_projects_and_issues(site_url, cloud_id, bearer_token: str
                     attachment_mime_type = attachment.get('mimeType')
                     attachment_size = attachment.get('size')
                     
-                    attachment_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}/attachments/{attachment_filename}"
+                    attachment_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{project_key}/{issue_key}/attachments/{attachment_filename}"
                     
                     attachment_info = {
                         'id': attachment_id,
@@ -749,7 +769,6 @@ def list_jira_selected_projects_and_issues(site_url, cloud_id, bearer_token: str
 
 async def sync_atlassian_selected_projects(username: str, token: str, project_keys: List[str], layer=None):
     """Sync only selected Jira projects"""
-    global total_api_calls
     
     log.info(f'Starting sync for {len(project_keys)} selected Jira projects...')
     log.info(f'Selected projects: {project_keys}')
@@ -764,7 +783,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+    await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -791,7 +810,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
         all_atlassian_items = []
 
         # Process each accessible Atlassian site
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures_to_site = {}
             
             for site in accessible_sites:
@@ -832,7 +851,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
         files_total = len(all_atlassian_items)
         mb_total = sum(int(item.get('size') or 0) for item in all_atlassian_items)
         await update_data_source_sync_status(
-            USER_ID, 'atlassian', layer or 'jira', 'syncing',
+            current_sync.user_id, 'atlassian', layer or 'jira', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
@@ -841,7 +860,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
         print("----------------------------------------------------------------------")
         print("🔎 Phase 2: Discovery - analyzing existing items and determining sync plan...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing existing items and determining sync plan',
@@ -855,12 +874,12 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
         # Delete orphaned files for selected projects only
         if layer and layer in LAYER_CONFIG:
             layer_folder = LAYER_CONFIG[layer]['folder']
-            user_prefix = f"userResources/{USER_ID}/Atlassian/{layer_folder}/"
+            user_prefix = f"userResources/{current_sync.user_id}/Atlassian/{layer_folder}/"
         else:
-            user_prefix = f"userResources/{USER_ID}/Atlassian/"
+            user_prefix = f"userResources/{current_sync.user_id}/Atlassian/"
 
         # List all files using unified storage interface
-        storage_files = list_files_unified(prefix=user_prefix, user_id=USER_ID)
+        storage_files = list_files_unified(prefix=user_prefix, user_id=current_sync.user_id)
         storage_file_map = {file_info['name']: file_info for file_info in storage_files}
         atlassian_item_paths = {item['fullPath'] for item in all_atlassian_items}
         
@@ -873,7 +892,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
             )
             
             if file_name.startswith(user_prefix) and is_selected_project and file_name not in atlassian_item_paths:
-                delete_file_unified(file_name, user_id=USER_ID)
+                delete_file_unified(file_name, user_id=current_sync.user_id)
                 deleted_items.append({
                     'name': file_name,
                     'size': file_info.get('size'),
@@ -882,7 +901,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
                 log.info(f"[{datetime.now().isoformat()}] Deleted orphan: {file_name}")
         
         # Process items in parallel for upload
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for item in all_atlassian_items:
@@ -948,7 +967,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
                             mb_processed += int(result.get('size', 0))
                         except Exception:
                             pass
-                        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+                        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing items to storage',
@@ -961,7 +980,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
                 except Exception as e:
                     log.error(f"Error processing future for {item_for_log.get('fullPath')}: {str(e)}", exc_info=True)
         
-        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -983,14 +1002,14 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
         for item in deleted_items:
             log.info(f" - {item['name']} | {format_bytes(item['size'])} | Created: {item['timeCreated']}")
         
-        total_runtime_ms = int((time.time() - script_start_time) * 1000)
+        total_runtime_ms = int((time.time() - current_sync.script_start_time) * 1000)
         total_seconds = total_runtime_ms // 1000
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
         seconds = total_seconds % 60
         log.info("\nAccounting Metrics:")
         log.info(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        log.info(f"📊 Billable API Calls: {total_api_calls}")
+        log.info(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         log.info(f"📦 Items Processed: {len(all_atlassian_items)}")
         log.info(f"🗑️  Orphans Removed: {len(deleted_items)}")
         log.info(f"📂 Selected Projects: {', '.join(project_keys)}")
@@ -1006,7 +1025,7 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
                 "removed": len(deleted_items),
                 "skipped": skipped_items,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -1023,10 +1042,10 @@ async def sync_atlassian_selected_projects(username: str, token: str, project_ke
         print("🧠 Phase 5: Embedding - vectorizing data for AI processing...")
         print("----------------------------------------------------------------------")
         # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer or 'jira', 'synced', sync_results=sync_results)
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer or 'jira', 'synced', sync_results=sync_results)
     
     except Exception as error:
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'error')
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'error')
         log.error(f"[{datetime.now().isoformat()}] Atlassian Selected Projects Sync failed: {str(error)}", exc_info=True)
         raise error
 
@@ -1048,26 +1067,11 @@ async def initiate_atlassian_sync_selected(user_id: str, token: str, project_key
     # Refresh token once at entry (cloud OAuth)
     token = get_valid_atlassian_token(user_id, token)
 
-    global USER_ID
-    global USER
-    global USER_AUTH
-    global script_start_time
-    global total_api_calls
-
-    USER_ID = user_id
-    USER = Users.get_user_by_id(user_id)
-    
-    if not USER:
-        raise ValueError(f"User with ID {user_id} not found")
-    
-    username = USER.email
-    USER_AUTH = HTTPBasicAuth(username, token) 
+    # Each sync gets its own context, so concurrent syncs do not share state
+    username = init_sync_context(user_id, token).user.email
     log.info(f'Using email as username: {username}')
-    
-    total_api_calls = 0
-    script_start_time = time.time()
 
-    await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'syncing')
+    await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'syncing')
 
     try:
         await sync_atlassian_selected_projects(username, token, project_keys, layer)
@@ -1080,7 +1084,7 @@ async def initiate_atlassian_sync_selected(user_id: str, token: str, project_key
         }
     except Exception as e:
         log.error(f"Atlassian selected projects sync failed: {e}", exc_info=True)
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'error')
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'error')
         raise
 
 def list_confluence_spaces_and_pages(site_url, cloud_id, bearer_token: str, all_items=None, layer=None):
@@ -1145,7 +1149,7 @@ def list_confluence_spaces_and_pages(site_url, cloud_id, bearer_token: str, all_
                     page_id = page.get('id')
                     page_title = page.get('title', 'no_title').replace('/', '_')
 
-                    full_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{space_key}/{page_title}-{page_id}.html"
+                    full_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{space_key}/{page_title}-{page_id}.html"
                     
                     page_info = {
                         'id': page_id,
@@ -1171,7 +1175,7 @@ def list_confluence_spaces_and_pages(site_url, cloud_id, bearer_token: str, all_
                         if attachment_download_url and attachment_download_url.startswith('/'):
                             attachment_download_url = f"{site_url}{attachment_download_url}"
 
-                        attachment_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{space_key}/{page_title}-{page_id}/attachments/{attachment_filename}"
+                        attachment_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{site_url.replace('https://', '').replace('/', '_')}/{space_key}/{page_title}-{page_id}/attachments/{attachment_filename}"
 
                         attachment_info = {
                             'id': attachment_id,
@@ -1271,7 +1275,7 @@ def list_confluence_spaces_and_pages_self_hosted(base_url: str, bearer_token: st
                     page_title = page.get('title', 'no_title').replace('/', '_')
 
                     instance_name = base_url.replace('https://', '').replace('http://', '').replace('/', '_')
-                    full_path = f"userResources/{USER_ID}/Atlassian/{folder_name}/{instance_name}/{space_key}/{page_title}-{page_id}.html"
+                    full_path = f"userResources/{current_sync.user_id}/Atlassian/{folder_name}/{instance_name}/{space_key}/{page_title}-{page_id}.html"
                     
                     page_info = {
                         'id': page_id,
@@ -1398,27 +1402,44 @@ def download_and_upload_atlassian_item(item, bearer_token: str, exists, reason,
     start_time = time.time()
     
     try:
-        # Download item content (with auth support)
-        file_content_buffer = download_atlassian_content(item, bearer_token, auth)
-        
-        # Get content as bytes for unified upload
-        content_bytes = file_content_buffer.getvalue()
-        content_size = len(content_bytes)
-        
-        # Override item size for non-attachments
-        if item.get('type') in ['issue', 'page'] and content_size > 0:
-            item['size'] = content_size
-        
-        if not content_bytes:
-            raise Exception("Failed to get content bytes for item.")
-
-        # Upload using unified storage interface
-        result = upload_file_unified(
-            file_content=content_bytes,
-            destination_path=item['fullPath'],
-            content_type=item.get('mimeType'),
-            user_id=USER_ID
-        )
+        if item.get('type') == 'attachment' and item.get('downloadUrl'):
+            # Stream attachments into storage, without holding them in memory
+            content_size = 0
+            
+            def counted_chunks():
+                nonlocal content_size
+                for chunk in iter_atlassian_attachment_chunks(item, bearer_token, auth):
+                    content_size += len(chunk)
+                    yield chunk
+            
+            result = upload_stream_unified(
+                counted_chunks(),
+                item['fullPath'],
+                item.get('mimeType'),
+                current_sync.user_id
+            )
+        else:
+            # Download item content (with auth support)
+            file_content_buffer = download_atlassian_content(item, bearer_token, auth)
+            
+            # Get content as bytes for unified upload
+            content_bytes = file_content_buffer.getvalue()
+            content_size = len(content_bytes)
+            
+            # Override item size for non-attachments
+            if item.get('type') in ['issue', 'page'] and content_size > 0:
+                item['size'] = content_size
+            
+            if not content_bytes:
+                raise Exception("Failed to get content bytes for item.")
+
+            # Upload using unified storage interface
+            result = upload_file_unified(
+                file_content=content_bytes,
+                destination_path=item['fullPath'],
+                content_type=item.get('mimeType'),
+                user_id=current_sync.user_id
+            )
         
         if not result:
             raise Exception("Upload failed")
@@ -1440,6 +1461,26 @@ def download_and_upload_atlassian_item(item, bearer_token: str, exists, reason,
         return None
 
 
+def iter_atlassian_attachment_chunks(item_info, bearer_token: str = None, auth=None):
+    """Stream the content of an Atlassian attachment"""
+    download_url = item_info['downloadUrl']
+    log.info(f"Downloading attachment from: {download_url}")
+    
+    response = make_atlassian_request(
+        download_url,
+        bearer_token=bearer_token,
+        auth=auth,
+        stream=True
+    )
+    
+    # Check if request was successful
+    if response.status_code != 200:
+        response.close()
+        raise Exception(f"Failed to download attachment {item_info.get('fullPath')}: {response.text}")
+    
+    # 1MB chunks
+    return iter_response_chunks(response)
+
 def download_atlassian_content(item_info, bearer_token: str = None, auth=None):
     """
     Downloads content for Atlassian item - supports both Bearer token and Basic Auth
@@ -1465,25 +1506,9 @@ def download_atlassian_content(item_info, bearer_token: str = None, auth=None):
         return file_content
 
     elif item_type == 'attachment' and item_info.get('downloadUrl'):
-        download_url = item_info['downloadUrl']
-        log.info(f"Downloading attachment from: {download_url}")
-        
-        # Use appropriate authentication
-        response = make_atlassian_request(
-            download_url,
-            bearer_token=bearer_token,
-            auth=auth,
-            stream=True
-        )
-        
-        # Check if request was successful
-        if response.status_code != 200:
-            raise Exception(f"Failed to download attachment {item_info.get('fullPath')}: {response.text}")
-        
         # Read content into memory
-        for chunk in response.iter_content(chunk_size=1024 * 1024):  # 1MB chunks
-            if chunk:
-                file_content.write(chunk)
+        for chunk in iter_atlassian_attachment_chunks(item_info, bearer_token, auth):
+            file_content.write(chunk)
         
         file_content.seek(0)
         return file_content
@@ -1681,7 +1706,6 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
                                    deployment_type: str = 'cloud',
                                    base_url: str = None):
     """Main function to sync Atlassian (Jira & Confluence) supporting both cloud and self-hosted"""
-    global total_api_calls
     
     layer_display = f" ({layer})" if layer else ""
     log.info(f'Starting recursive sync process for Atlassian{layer_display} - Deployment: {deployment_type}')
@@ -1696,7 +1720,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+    await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -1743,7 +1767,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
                 raise ValueError("Could not retrieve user's accessible Atlassian sites.")
             
             # Process each accessible Atlassian site with threading
-            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
                 futures_to_site = {}
                 for site in accessible_sites:
                     site_url = site.get('url')
@@ -1847,7 +1871,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         files_total = len(all_atlassian_items)
         mb_total = sum(int(item.get('size') or 0) for item in all_atlassian_items)
         await update_data_source_sync_status(
-            USER_ID, 'atlassian', layer or 'jira', 'syncing',
+            current_sync.user_id, 'atlassian', layer or 'jira', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
@@ -1856,7 +1880,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         print("----------------------------------------------------------------------")
         print("🔎 Phase 2: Discovery - analyzing existing items and determining sync plan...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing existing items and determining sync plan',
@@ -1870,12 +1894,12 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         # ============ DELETE ORPHANED FILES - LAYER-SPECIFIC CLEANUP ============
         if layer and layer in LAYER_CONFIG:
             layer_folder = LAYER_CONFIG[layer]['folder']
-            user_prefix = f"userResources/{USER_ID}/Atlassian/{layer_folder}/"
+            user_prefix = f"userResources/{current_sync.user_id}/Atlassian/{layer_folder}/"
         else:
-            user_prefix = f"userResources/{USER_ID}/Atlassian/"
+            user_prefix = f"userResources/{current_sync.user_id}/Atlassian/"
 
         # List all files using unified storage interface
-        storage_files = list_files_unified(prefix=user_prefix, user_id=USER_ID)
+        storage_files = list_files_unified(prefix=user_prefix, user_id=current_sync.user_id)
         storage_file_map = {file_info['name']: file_info for file_info in storage_files}
         atlassian_item_paths = {item['fullPath'] for item in all_atlassian_items}
         
@@ -1883,7 +1907,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         for file_name, file_info in storage_file_map.items():
             if file_name.startswith(user_prefix) and file_name not in atlassian_item_paths:
                 try:
-                    delete_file_unified(file_name, user_id=USER_ID)
+                    delete_file_unified(file_name, user_id=current_sync.user_id)
                     deleted_items.append({
                         'name': file_name,
                         'size': file_info.get('size'),
@@ -1894,7 +1918,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
                     log.error(f"Error deleting orphan file {file_name}: {str(e)}")
         
         # ============ PROCESS ITEMS IN PARALLEL FOR UPLOAD ============
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for item in all_atlassian_items:
@@ -1966,7 +1990,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
                             mb_processed += int(result.get('size', 0))
                         except Exception:
                             pass
-                        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+                        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing items to storage',
@@ -1984,7 +2008,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         print("----------------------------------------------------------------------")
         print("📊 Phase 4: Summarizing - finalizing Atlassian sync results...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -2006,14 +2030,14 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         for item in deleted_items:
             log.info(f" - {item['name']} | {format_bytes(item['size'])} | Created: {item['timeCreated']}")
         
-        total_runtime_ms = int((time.time() - script_start_time) * 1000)
+        total_runtime_ms = int((time.time() - current_sync.script_start_time) * 1000)
         total_seconds = total_runtime_ms // 1000
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
         seconds = total_seconds % 60
         log.info("\nAccounting Metrics:")
         log.info(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        log.info(f"📊 Billable API Calls: {total_api_calls}")
+        log.info(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         log.info(f"📦 Items Processed: {len(all_atlassian_items)}")
         log.info(f"🗑️  Orphans Removed: {len(deleted_items)}")
         log.info(f"📂 Layer: {layer if layer else 'All layers'}")
@@ -2031,7 +2055,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
                 "removed": len(deleted_items),
                 "skipped": skipped_items,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -2045,7 +2069,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         
         # Final state: Embedding (to match Google)
         # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer or 'jira', 'synced', sync_results=sync_results)
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer or 'jira', 'synced', sync_results=sync_results)
     
     except Exception as error:
         log.error(f"[{datetime.now().isoformat()}] Atlassian Sync failed critically: {str(error)}", exc_info=True)
@@ -2054,7 +2078,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
         files_processed = len(uploaded_items) + len(deleted_items)
         if files_processed == 0:
             # Zero files processed → ERROR state
-            await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'error')
+            await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'error')
         else:
             # Files were processed → log error and continue to embedding
             sync_results = {
@@ -2064,7 +2088,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
                     "removed": len(deleted_items),
                     "skipped": skipped_items,
                     "runtime_ms": total_runtime_ms,
-                    "api_calls": total_api_calls,
+                    "api_calls": current_sync.total_api_calls,
                     "skip_reasons": {},
                     "sync_timestamp": int(time.time())
                 },
@@ -2080,7 +2104,7 @@ async def sync_atlassian_to_storage(username: str, token: str, layer=None,
                 }
             }
             # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer or 'jira', 'synced', sync_results=sync_results)
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer or 'jira', 'synced', sync_results=sync_results)
         
         raise error
 
@@ -2093,16 +2117,8 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
     log.info(f'Initiating self-hosted Atlassian sync for selected projects')
     log.info(f'User ID: {user_id}, Projects: {project_keys}')
 
-    global USER_ID, USER, script_start_time, total_api_calls
-
-    USER_ID = user_id
-    USER = Users.get_user_by_id(user_id)
-    
-    if not USER:
-        raise ValueError(f"User with ID {user_id} not found")
-    
-    total_api_calls = 0
-    script_start_time = time.time()
+    # Each sync gets its own context, so concurrent syncs do not share state
+    init_sync_context(user_id)
 
     # Initialize progress tracking
     sync_start_time = int(time.time())
@@ -2110,7 +2126,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+    await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -2124,7 +2140,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
         'total_size': 0
     })
 
-    await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'syncing')
+    await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'syncing')
 
     try:
         # Credentials is now always a PAT
@@ -2147,12 +2163,12 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
         files_total = len(all_items)
         mb_total = sum(int(item.get('size') or 0) for item in all_items)
         await update_data_source_sync_status(
-            USER_ID, 'atlassian', layer or 'jira', 'syncing',
+            current_sync.user_id, 'atlassian', layer or 'jira', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
         )
-        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing existing items and determining sync plan',
@@ -2170,12 +2186,12 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
         # Determine folder prefix
         if layer and layer in LAYER_CONFIG:
             layer_folder = LAYER_CONFIG[layer]['folder']
-            user_prefix = f"userResources/{USER_ID}/Atlassian/{layer_folder}/"
+            user_prefix = f"userResources/{current_sync.user_id}/Atlassian/{layer_folder}/"
         else:
-            user_prefix = f"userResources/{USER_ID}/Atlassian/"
+            user_prefix = f"userResources/{current_sync.user_id}/Atlassian/"
         
         # Get existing storage files
-        storage_files = list_files_unified(prefix=user_prefix, user_id=USER_ID)
+        storage_files = list_files_unified(prefix=user_prefix, user_id=current_sync.user_id)
         storage_file_map = {file_info['name']: file_info for file_info in storage_files}
         atlassian_item_paths = {item['fullPath'] for item in all_items}
         
@@ -2184,7 +2200,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
             is_selected_project = any(f"/{project_key}/" in file_name for project_key in project_keys)
             if file_name.startswith(user_prefix) and is_selected_project and file_name not in atlassian_item_paths:
                 try:
-                    delete_file_unified(file_name, user_id=USER_ID)
+                    delete_file_unified(file_name, user_id=current_sync.user_id)
                     deleted_items.append({
                         'name': file_name,
                         'size': file_info.get('size'),
@@ -2195,7 +2211,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
                     log.error(f"Error deleting orphan file {file_name}: {str(e)}")
         
         # Upload items in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for item in all_items:
@@ -2262,7 +2278,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
                             mb_processed += int(result.get('size', 0))
                         except Exception:
                             pass
-                        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+                        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing items to storage',
@@ -2275,7 +2291,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
                 except Exception as e:
                     log.error(f"Error processing future for {item_for_log.get('fullPath')}: {str(e)}", exc_info=True)
         
-        await emit_sync_progress(USER_ID, 'atlassian', layer or 'jira', {
+        await emit_sync_progress(current_sync.user_id, 'atlassian', layer or 'jira', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -2297,10 +2313,10 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
         for item in deleted_items:
             log.info(f" - {item['name']} | {format_bytes(item['size'])} | Created: {item['timeCreated']}")
         
-        total_runtime = int((time.time() - script_start_time) * 1000)
+        total_runtime = int((time.time() - current_sync.script_start_time) * 1000)
         log.info("\nAccounting Metrics:")
         log.info(f"⏱️  Total Runtime: {(total_runtime/1000):.2f} seconds")
-        log.info(f"📊 Billable API Calls: {total_api_calls}")
+        log.info(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         log.info(f"📦 Items Processed: {len(all_items)}")
         log.info(f"🗑️  Orphans Removed: {len(deleted_items)}")
         log.info(f"📂 Selected Projects: {', '.join(project_keys)}")
@@ -2309,7 +2325,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
               f"^{len([f for f in uploaded_items if f['type'] == 'updated'])} updated, " +
               f"-{len(deleted_items)} removed, {skipped_items} skipped")
         
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'synced')
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'synced')
         
         return {
             "status": "completed",
@@ -2320,7 +2336,7 @@ async def initiate_atlassian_sync_selected_self_hosted(user_id: str, credentials
         }
     except Exception as e:
         log.error(f"Self-hosted selected projects sync failed: {e}", exc_info=True)
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'error')
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'error')
         raise
 
 async def initiate_atlassian_sync(user_id: str, token: str, layer: str = None,
@@ -2341,30 +2357,16 @@ async def initiate_atlassian_sync(user_id: str, token: str, layer: str = None,
     # Refresh token once at entry (cloud OAuth)
     token = get_valid_atlassian_token(user_id, token)
 
-    global USER_ID
-    global USER
-    global USER_AUTH
-    global script_start_time
-    global total_api_calls
-
-    USER_ID = user_id
-    USER = Users.get_user_by_id(user_id)
-    
-    if not USER:
-        raise ValueError(f"User with ID {user_id} not found")
-    
-    username = USER.email
-    USER_AUTH = HTTPBasicAuth(username, token) 
-    log.info(f'Using email as username: {username} {token} {USER_AUTH}')
-    
-    total_api_calls = 0
-    script_start_time = time.time()
+    # Each sync gets its own context, so concurrent syncs do not share state
+    sync = init_sync_context(user_id, token)
+    username = sync.user.email
+    log.info(f'Using email as username: {username} {token} {sync.user_auth}')
 
     # Validate layer parameter
     if layer and layer not in LAYER_CONFIG:
         raise ValueError(f"Invalid layer '{layer}'. Valid layers are: {', '.join(LAYER_CONFIG.keys())}")
 
-    await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'syncing')
+    await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'syncing')
 
     try:
         await sync_atlassian_to_storage(
@@ -2382,7 +2384,7 @@ async def initiate_atlassian_sync(user_id: str, token: str, layer: str = None,
         }
     except Exception as e:
         log.error(f"Atlassian sync initiation failed: {e}", exc_info=True)
-        await update_data_source_sync_status(USER_ID, 'atlassian', layer, 'error')
+        await update_data_source_sync_status(current_sync.user_id, 'atlassian', layer, 'error')
         raise
 
 def debug_jwt_token(token: str):
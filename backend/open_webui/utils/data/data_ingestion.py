@@ -1,6 +1,9 @@
+import asyncio
 import base64
 import json
 import time
+import uuid
+import weakref
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -10,7 +13,7 @@ import os
 import logging
 from datetime import datetime
 from urllib.parse import urlencode, quote
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator
 from enum import Enum
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -25,6 +28,12 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 GCS_UPLOAD_URL = "https://storage.googleapis.com/upload/storage/v1/b/{bucket}/o"
 
+# Size of the chunks streamed uploads are sent in, which bounds the memory
+# used per file. GCS requires a multiple of 256 KiB.
+STREAM_CHUNK_SIZE = max(
+    int(os.environ.get('STREAM_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)) // (256 * 1024), 1
+) * 256 * 1024
+
 # ============================================================================
 # STORAGE BACKEND CONFIGURATION
 # ============================================================================
@@ -201,6 +210,98 @@ def make_api_request(url, method='GET', headers=None, params=None, data=None, st
     finally:
         pass
 
+# Retry policy of make_api_request_async, same as the one of make_api_request
+API_REQUEST_RETRIES = 5
+API_REQUEST_RETRY_STATUSES = {429, 500, 502, 503, 504}
+API_REQUEST_MAX_RETRY_DELAY = 300
+API_REQUEST_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# One pooled client per event loop, connector syncs each run their own loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled httpx client of the running event loop, must not be closed by callers"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=API_REQUEST_TIMEOUT, follow_redirects=True)
+        _async_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """Close the pooled httpx client of the running event loop, if it has one"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def get_retry_after(response: httpx.Response) -> Optional[float]:
+    """Delay asked for by a Retry-After header in seconds, if any"""
+    retry_after = response.headers.get('Retry-After')
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        return None
+
+async def make_api_request_async(url, method='GET', headers=None, params=None, data=None, json_data=None,
+                                 auth_token=None, auth=None, retries=API_REQUEST_RETRIES):
+    """
+    Async version of make_api_request, which waits between retries without
+    blocking the event loop. Returns the JSON body of the response.
+    """
+    if headers is None:
+        headers = {}
+
+    if auth_token:
+        headers['Authorization'] = f'Bearer {auth_token}'
+
+    client = get_async_client()
+    attempt = 0
+    while True:
+        try:
+            response = await client.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                data=data,
+                json=json_data,
+                auth=auth,
+            )
+
+            if response.status_code in API_REQUEST_RETRY_STATUSES and attempt < retries:
+                # Honor Retry-After, otherwise back off exponentially like urllib3 does
+                delay = get_retry_after(response)
+                if delay is None:
+                    delay = 2 ** attempt
+                delay = min(delay, API_REQUEST_MAX_RETRY_DELAY)
+                log.warning(f"Status {response.status_code} for URL: {url}, retrying in {delay:.2f}s ({attempt + 1}/{retries})")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+        except (httpx.ConnectError, httpx.TimeoutException) as e:
+            if attempt < retries:
+                delay = min(2 ** attempt, API_REQUEST_MAX_RETRY_DELAY)
+                log.warning(f"Request to URL: {url} failed ({e}), retrying in {delay}s ({attempt + 1}/{retries})")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            log.error(f"Network error for URL: {url} - {e}", exc_info=True)
+            raise
+        except httpx.HTTPStatusError as e:
+            log.error(f"HTTP error for URL: {url} - Status: {e.response.status_code}, Response: {e.response.text} - {e}", exc_info=True)
+            raise
+        except httpx.RequestError as e:
+            log.error(f"An unexpected API Request Error occurred for URL: {url} - {e}", exc_info=True)
+            raise
+
 # ============================================================================
 # GCS BACKEND FUNCTIONS (Phase 1-3)
 # ============================================================================
@@ -246,6 +347,69 @@ def upload_to_gcs(file_content, destination_name, content_type, service_account_
         print(f"GCS upload failed for {destination_name}: {str(error)}")
         raise
 
+def stream_to_gcs(chunks: Iterable[bytes], destination_name, content_type, service_account_base64, GCS_BUCKET_NAME):
+    """
+    Upload file content to GCS from an iterable of chunks using a resumable
+    upload, holding at most about two chunks in memory
+    """
+    try:
+        credentials_json = json.loads(
+            base64.b64decode(service_account_base64).decode('utf-8')
+        )
+        
+        token_url = "https://oauth2.googleapis.com/token"
+        token_data = {
+            "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+            "assertion": create_jwt(credentials_json)
+        }
+        
+        token_response = requests.post(token_url, data=token_data)
+        token_response.raise_for_status()
+        gcs_token = token_response.json()['access_token']
+        
+        # Start a resumable upload session
+        encoded_params = urlencode({'uploadType': 'resumable', 'name': destination_name})
+        session_response = requests.post(
+            f"{GCS_UPLOAD_URL.format(bucket=GCS_BUCKET_NAME)}?{encoded_params}",
+            headers={
+                'Authorization': f'Bearer {gcs_token}',
+                'X-Upload-Content-Type': content_type or 'application/octet-stream'
+            }
+        )
+        session_response.raise_for_status()
+        session_url = session_response.headers['Location']
+        
+        def put_chunk(data, offset, total=None):
+            if data:
+                content_range = f"bytes {offset}-{offset + len(data) - 1}/{'*' if total is None else total}"
+            else:
+                content_range = f"bytes */{total}"
+            response = requests.put(
+                session_url,
+                headers={'Content-Range': content_range},
+                data=bytes(data)
+            )
+            # 308 means GCS expects more chunks
+            if response.status_code != 308:
+                response.raise_for_status()
+            return response
+        
+        buffer = bytearray()
+        offset = 0
+        for chunk in chunks:
+            buffer.extend(chunk)
+            while len(buffer) >= STREAM_CHUNK_SIZE:
+                put_chunk(buffer[:STREAM_CHUNK_SIZE], offset)
+                offset += STREAM_CHUNK_SIZE
+                del buffer[:STREAM_CHUNK_SIZE]
+        
+        upload_response = put_chunk(buffer, offset, total=offset + len(buffer))
+        return upload_response.json()
+        
+    except Exception as error:
+        print(f"GCS streaming upload failed for {destination_name}: {str(error)}")
+        raise
+
 def download_from_gcs(file_path, service_account_base64, GCS_BUCKET_NAME):
     """Download a file from GCS bucket using REST API with retry functionality"""
     try:
@@ -606,6 +770,47 @@ def upload_to_pai_service(file_content: bytes, destination_path: str,
         log.warning(f"PAI Data Service upload failed for {destination_path}: {str(error)}")
         return False
 
+def stream_to_pai_service(chunks: Iterable[bytes], destination_path: str,
+                          content_type: str = None, auth_token: str = None) -> bool:
+    """Upload file content to pai-data-service from an iterable of chunks, without buffering it"""
+    try:
+        url = f"{storage_config.pai_base_url}/files/{destination_path}"
+        boundary = uuid.uuid4().hex
+        file_name = destination_path.split('/')[-1].replace('"', '\\"')
+        
+        def multipart_body() -> Iterator[bytes]:
+            yield (
+                f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+                f'Content-Type: {content_type or "application/octet-stream"}\r\n\r\n'
+            ).encode('utf-8')
+            for chunk in chunks:
+                if chunk:
+                    yield chunk
+            yield f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        
+        headers = get_api_headers(auth_token)
+        headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        
+        # A generator body is sent with chunked transfer encoding
+        response = requests.post(url, headers=headers, data=multipart_body())
+        response.raise_for_status()
+        
+        return True
+        
+    except requests.exceptions.ConnectionError as e:
+        log.warning(f"PAI Data Service unavailable for upload {destination_path}: {e}")
+        return False
+    except requests.exceptions.Timeout as e:
+        log.warning(f"PAI Data Service timeout for upload {destination_path}: {e}")
+        return False
+    except requests.exceptions.HTTPError as e:
+        log.warning(f"PAI Data Service HTTP error for upload {destination_path}: {e}")
+        return False
+    except Exception as error:
+        log.warning(f"PAI Data Service upload failed for {destination_path}: {str(error)}")
+        return False
+
 def download_from_pai_service(file_path: str, auth_token: str = None) -> Optional[bytes]:
     """Download file using pai-data-service API"""
     try:
@@ -717,6 +922,22 @@ def upload_file_unified(file_content: bytes, destination_path: str, content_type
     else:
         raise ValueError(f"Unsupported storage backend: {storage_config.backend}")
 
+def upload_stream_unified(chunks: Iterable[bytes], destination_path: str, content_type: str = None, user_id: str = None) -> bool:
+    """Upload file content given as an iterable of chunks using configured storage backend"""
+    if storage_config.backend == StorageBackend.GCS:
+        return stream_to_gcs(
+            chunks,
+            destination_path,
+            content_type,
+            storage_config.service_account_base64,
+            storage_config.gcs_bucket_name
+        )
+    elif storage_config.backend == StorageBackend.PAI_DATA_SERVICE:
+        auth_token = generate_pai_service_token(user_id) if user_id else None
+        return stream_to_pai_service(chunks, destination_path, content_type, auth_token)
+    else:
+        raise ValueError(f"Unsupported storage backend: {storage_config.backend}")
+
 def download_file_unified(file_path: str, user_id: str = None) -> Optional[bytes]:
     """Download file using configured storage backend"""
     if storage_config.backend == StorageBackend.GCS:
@@ -763,6 +984,15 @@ async def delete_folder_unified(folder_path: str, user_id: str = None) -> bool:
 # UTILITY FUNCTIONS
 # ============================================================================
 
+def iter_response_chunks(response, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Yield the body of a streamed `requests` response, closing it when done"""
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+    finally:
+        response.close()
+
 def create_jwt(service_account_info):
     """Create a JWT token for GCS authentication"""
     now = int(time.time())
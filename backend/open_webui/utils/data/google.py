@@ -14,7 +14,8 @@ from open_webui.env import SRC_LOG_LEVELS
 from open_webui.utils.data.data_ingestion import (
     make_api_request, format_bytes, parse_date, update_data_source_sync_status,
     # Use unified storage interface
-    list_files_unified, upload_file_unified, download_file_unified, 
+    list_files_unified, upload_file_unified, upload_stream_unified, download_file_unified, 
+    iter_response_chunks,
     delete_file_unified, delete_folder_unified,
     # Keep specific backend functions for backward compatibility
     upload_to_gcs, list_gcs_files, delete_gcs_file,
@@ -22,7 +23,13 @@ from open_webui.utils.data.data_ingestion import (
     # Backend configuration
     configure_storage_backend, get_current_backend
 )
-from open_webui.models.data import DataSources
+from open_webui.models.data import DataSources, DataSourceItems
+from open_webui.utils.data.sync_context import (
+    SyncContext,
+    SyncContextExecutor,
+    current_sync,
+    set_sync_context,
+)
 from open_webui.models.datatokens import OAuthTokens
 
 log = logging.getLogger(__name__)
@@ -93,13 +100,7 @@ async def emit_sync_progress(user_id: str, provider: str, layer: str, progress_d
     else:
         log.warning("Socket.IO instance not available for progress updates")
 
-# Metrics tracking
-total_api_calls = 0
-script_start_time = 0
-
 # Load environment variables
-USER_ID = ""
-GCS_BUCKET_NAME = ""  # Kept for backward compatibility
 ALLOWED_EXTENSIONS = os.environ.get('ALLOWED_EXTENSIONS')
 MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '4'))
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB in bytes
@@ -132,12 +133,11 @@ GMAIL_API_BASE = 'https://gmail.googleapis.com/gmail/v1/users/me/messages'
 
 def make_request(url, method='GET', headers=None, params=None, data=None, stream=False, auth_token=None):
     """Helper function to make API requests with error handling and token refresh"""
-    global total_api_calls
-    total_api_calls += 1
+    current_sync.count_api_call()
     
     # Get valid token with automatic refresh if needed
-    if auth_token and USER_ID:
-        auth_token = get_valid_google_token(USER_ID, auth_token)
+    if auth_token and current_sync.user_id:
+        auth_token = current_sync.refresh_token(auth_token)
         if headers and 'Authorization' in headers:
             headers['Authorization'] = f"Bearer {auth_token}"
     
@@ -288,7 +288,6 @@ def convert_email_to_text(email_data):
 
 async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=None):
     """Sync Gmail messages to configured storage backend"""
-    global USER_ID, total_api_calls
     
     current_backend = get_current_backend()
     script_start_time = time.time()
@@ -297,7 +296,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
     files_added = 0
     files_updated = 0
     total_skipped = 0
-    total_api_calls = 0
+    current_sync.total_api_calls = 0
     skipped_reasons = {}
     
     try:
@@ -306,7 +305,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         print("📋 Phase 1: Starting - Initializing Gmail sync process...")
         print("----------------------------------------------------------------------")
         
-        await emit_sync_progress(USER_ID, 'google', 'gmail', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'gmail', {
             'phase': 'starting',
             'phase_name': PHASE_1_STARTING,
             'phase_description': 'preparing Gmail sync process',
@@ -325,7 +324,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         print(f"Fetching Gmail messages with query: '{query}' (max: {max_display})")
         messages = list_gmail_messages(auth_token, query, max_emails or gmail_limit)
         print(f"Found {len(messages)} Gmail messages")
-        total_api_calls += 1
+        current_sync.count_api_call()
         
         # Calculate metadata for newest and oldest emails
         if messages:
@@ -363,16 +362,16 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         
         # Get existing Gmail files using unified interface
         print("Checking existing Gmail files in storage...")
-        gmail_prefix = f"userResources/{USER_ID}/Google/Gmail/"
-        existing_files = list_files_unified(prefix=gmail_prefix, user_id=USER_ID)
-        total_api_calls += 1
+        gmail_prefix = f"userResources/{current_sync.user_id}/Google/Gmail/"
+        existing_files = list_files_unified(prefix=gmail_prefix, user_id=current_sync.user_id)
+        current_sync.count_api_call()
         
         # Get accurate file summary for progress tracking
         print("Getting Gmail file summary from storage...")
         from .data_ingestion import get_files_summary, generate_pai_service_token
-        auth_token = generate_pai_service_token(USER_ID)
+        auth_token = generate_pai_service_token(current_sync.user_id)
         summary = get_files_summary(prefix=gmail_prefix, auth_token=auth_token)
-        total_api_calls += 1
+        current_sync.count_api_call()
         
         # Use summary data for accurate totals
         existing_file_count = summary.get('totalFiles', 0)
@@ -389,7 +388,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         print("🔍 Phase 2: Discovery - Analyzing existing emails and determining sync plan...")
         print("----------------------------------------------------------------------")
         
-        await emit_sync_progress(USER_ID, 'google', 'gmail', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'gmail', {
             'phase': 'discovery',
             'phase_name': PHASE_2_DISCOVERY,
             'phase_description': 'analyzing existing emails and determining sync plan',
@@ -419,7 +418,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         print("⚡ Phase 3: Processing - Uploading new emails and processing changes...")
         print("----------------------------------------------------------------------")
         
-        await emit_sync_progress(USER_ID, 'google', 'gmail', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'gmail', {
             'phase': 'processing',
             'phase_name': PHASE_3_PROCESSING,
             'phase_description': 'uploading new emails and processing changes',
@@ -437,7 +436,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         PROGRESS_UPDATE_INTERVAL = 2  # Update every 2 seconds
         
         # Process messages in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for i, message in enumerate(messages):
@@ -446,7 +445,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
                     continue
                 
                 # Create file path for email
-                email_path = f"userResources/{USER_ID}/Google/Gmail/email_{message_id}.txt"
+                email_path = f"userResources/{current_sync.user_id}/Google/Gmail/email_{message_id}.txt"
                 
                 # Check if email needs upload (like Google Drive logic)
                 existing_file = existing_email_map.get(email_path)
@@ -505,7 +504,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
                         # Emit progress update (throttled to every 2 seconds)
                         current_time = time.time()
                         if current_time - last_progress_update >= PROGRESS_UPDATE_INTERVAL:
-                            await emit_sync_progress(USER_ID, 'google', 'gmail', {
+                            await emit_sync_progress(current_sync.user_id, 'google', 'gmail', {
                                 'phase': 'processing',
                                 'phase_name': PHASE_3_PROCESSING,
                                 'phase_description': 'uploading new emails and processing changes',
@@ -532,7 +531,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
                     skipped_reasons[reason] += 1
         
         # Emit final progress update to show 100% completion
-        await emit_sync_progress(USER_ID, 'google', 'gmail', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'gmail', {
             'phase': 'processing',
             'phase_name': PHASE_3_PROCESSING,
             'phase_description': 'uploading new emails and processing changes',
@@ -548,7 +547,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         print("📊 Phase 4: Summarizing - Finalizing Gmail sync results...")
         print("----------------------------------------------------------------------")
         
-        await emit_sync_progress(USER_ID, 'google', 'gmail', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'gmail', {
             'phase': 'summarizing',
             'phase_name': PHASE_4_SUMMARIZING,
             'phase_description': 'finalizing Gmail sync results',
@@ -567,7 +566,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
                 "removed": 0,  # Gmail doesn't support deletion in this context
                 "skipped": total_skipped,
                 "runtime_ms": int((time.time() - script_start_time) * 1000),
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": skipped_reasons,
                 "sync_timestamp": int(time.time())
             },
@@ -592,7 +591,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         print(f"📧 Emails processed: {len(messages)}")
         print(f"📤 Emails uploaded: {len(uploaded_files)}")
         print(f"⏭️  Emails skipped: {total_skipped}")
-        print(f"🔄 API calls made: {total_api_calls}")
+        print(f"🔄 API calls made: {current_sync.total_api_calls}")
         print(f"⏱️  Total runtime: {int((time.time() - script_start_time) * 1000)}ms")
 
         # Phase 5: Embedding
@@ -623,7 +622,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
         files_processed = len(uploaded_files)
         if files_processed == 0:
             # Zero files processed → ERROR state
-            await update_data_source_sync_status(USER_ID, 'google', 'gmail', 'error')
+            await update_data_source_sync_status(current_sync.user_id, 'google', 'gmail', 'error')
         else:
             # Files were processed → log error and continue to embedding
             sync_results = {
@@ -633,7 +632,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
                     "removed": 0,
                     "skipped": total_skipped,
                     "runtime_ms": int((time.time() - script_start_time) * 1000),
-                    "api_calls": total_api_calls,
+                    "api_calls": current_sync.total_api_calls,
                     "skip_reasons": {},
                     "sync_timestamp": int(time.time())
                 },
@@ -648,7 +647,7 @@ async def sync_gmail_to_storage(auth_token, query='', max_emails=None, user_id=N
                     "message": f"Gmail sync error: {str(error)}"
                 }
             }
-            await update_data_source_sync_status(USER_ID, 'google', 'gmail', 'synced', sync_results=sync_results)
+            await update_data_source_sync_status(current_sync.user_id, 'google', 'gmail', 'synced', sync_results=sync_results)
         
         raise error
 
@@ -684,7 +683,7 @@ def download_and_upload_email(message_id, email_path, auth_token):
             email_text.encode('utf-8'),
             email_path,
             'text/plain',
-            USER_ID
+            current_sync.user_id
         )
         
         if not success:
@@ -711,9 +710,36 @@ def download_and_upload_email(message_id, email_path, auth_token):
 # GOOGLE DRIVE SYNC FUNCTIONS
 # ============================================================================
 
-def list_files_recursively(folder_id, auth_token, current_path='', all_files=None, drive_name=None, skipped_reasons=None):
-    """Recursive file listing with path construction using REST API"""
-    global USER_ID
+def is_drive_file_syncable(file, display_path, skipped_reasons):
+    """Apply the exclusion, size and extension filters to a Drive file"""
+    # Case-insensitive exclusion check
+    if any(file['name'].lower() == pattern.lower() for pattern in EXCLUDED_FILES):
+        print(f"🚫 Excluded: {display_path}")
+        skipped_reasons['other'] += 1
+        return False
+    
+    # Check file size before processing
+    file_size = int(file.get('size', 0)) if file.get('size') else 0
+    if not is_file_size_valid(file_size):
+        print(f"Skipped (size limit): {display_path} - {format_bytes(file_size)}")
+        skipped_reasons['size'] += 1
+        return False
+    
+    # Check for allowed extensions if specified
+    if ALLOWED_EXTENSIONS:
+        file_ext = file['name'].split('.')[-1].lower() if '.' in file['name'] else ''
+        if file_ext not in ALLOWED_EXTENSIONS:
+            print(f"🔍 Skipped (extension): {file_ext} in {file['name']}")
+            skipped_reasons['extension'] += 1
+            return False
+    
+    return True
+
+def list_files_recursively(folder_id, auth_token, current_path='', all_files=None, drive_name=None, skipped_reasons=None, folders=None):
+    """
+    Recursive file listing with path construction using REST API.
+    Folders found on the way are appended to `folders` when given.
+    """
     if all_files is None:
         all_files = []
     
@@ -748,9 +774,11 @@ def list_files_recursively(folder_id, auth_token, current_path='', all_files=Non
         for file in all_folder_files:
             # Handle folder
             if file['mimeType'] == 'application/vnd.google-apps.folder':
+                if folders is not None:
+                    folders.append(get_drive_folder_item(file['id'], f"{current_path}{file['name']}/", file))
                 list_files_recursively(
                     file['id'], auth_token, f"{current_path}{file['name']}/", 
-                    all_files, drive_name, skipped_reasons
+                    all_files, drive_name, skipped_reasons, folders
                 )
             # Resolve folder shortcuts: follow targetId if the shortcut points to a folder
             elif file['mimeType'] == 'application/vnd.google-apps.shortcut':
@@ -758,41 +786,25 @@ def list_files_recursively(folder_id, auth_token, current_path='', all_files=Non
                 target_mime = shortcut.get('targetMimeType')
                 target_id = shortcut.get('targetId')
                 if target_mime == 'application/vnd.google-apps.folder' and target_id:
+                    if folders is not None:
+                        folders.append(get_drive_folder_item(target_id, f"{current_path}{file['name']}/", file))
                     # Recurse into the shortcut target, keeping the shortcut's visible name in path
                     list_files_recursively(
-                        target_id, auth_token, f"{current_path}{file['name']}/", all_files, drive_name, skipped_reasons
+                        target_id, auth_token, f"{current_path}{file['name']}/", all_files, drive_name, skipped_reasons, folders
                     )
                 else:
                     # Skip file shortcuts for now to avoid permission/403 issues
                     print(f"🔗 Skipping Drive file shortcut: {current_path}{file['name']}")
                     skipped_reasons['shortcut'] += 1
             else:
-                # Case-insensitive exclusion check
-                if any(file['name'].lower() == pattern.lower() for pattern in EXCLUDED_FILES):
-                    print(f"🚫 Excluded: {current_path}{file['name']}")
-                    skipped_reasons['other'] += 1
-                    continue
-                
-                # Check file size before processing
-                file_size = int(file.get('size', 0)) if file.get('size') else 0
-                if not is_file_size_valid(file_size):
-                    print(f"Skipped (size limit): {current_path}{file['name']} - {format_bytes(file_size)}")
-                    skipped_reasons['size'] += 1
+                if not is_drive_file_syncable(file, f"{current_path}{file['name']}", skipped_reasons):
                     continue
                 
-                # Check for allowed extensions if specified
-                if ALLOWED_EXTENSIONS:
-                    file_ext = file['name'].split('.')[-1].lower() if '.' in file['name'] else ''
-                    if file_ext not in ALLOWED_EXTENSIONS:
-                        print(f"🔍 Skipped (extension): {file_ext} in {file['name']}")
-                        skipped_reasons['extension'] += 1
-                        continue
-                
                 # Add file to list with full path
                 file_info = file.copy()
                 
                 # Build path relative to the "Google Drive" root; process_folder supplies top-level segments
-                file_info['fullPath'] = f"userResources/{USER_ID}/Google/Google Drive/{current_path}{file['name']}"
+                file_info['fullPath'] = f"userResources/{current_sync.user_id}/Google/Google Drive/{current_path}{file['name']}"
                 
                 all_files.append(file_info)
     
@@ -1016,25 +1028,20 @@ def get_my_drive_top_level_folders(auth_token):
         print(f"Error getting My Drive top-level folders: {str(error)}")
         return []
 
-def download_file(file_id, auth_token, mime_type=None):
-    """Download file content from Google Drive, handling Google's proprietary formats"""
+def iter_drive_file_chunks(file_id, auth_token, mime_type=None):
+    """Stream file content from Google Drive, handling Google's proprietary formats"""
     
     # Get valid token with automatic refresh if needed
-    if USER_ID:
-        auth_token = get_valid_google_token(USER_ID, auth_token)
+    if current_sync.user_id:
+        auth_token = current_sync.refresh_token(auth_token)
     
     # If mime_type not provided, fetch metadata
     if mime_type is None:
         metadata_url = f"{DRIVE_API_BASE}/files/{file_id}?fields=mimeType,name"
-        metadata_response = make_request(
+        file_metadata = make_request(
             metadata_url,
             headers={"Authorization": f"Bearer {auth_token}"}
         )
-        
-        if metadata_response.status_code != 200:
-            raise Exception(f"Failed to get file metadata: {metadata_response.text}")
-        
-        file_metadata = metadata_response.json()
         mime_type = file_metadata.get("mimeType", "")
     
     # Define Google's proprietary formats and their export MIME types
@@ -1051,9 +1058,6 @@ def download_file(file_id, auth_token, mime_type=None):
         "application/vnd.google-apps.folder": None,# Folders can't be downloaded
     }
     
-    # Handle based on file type
-    file_content = io.BytesIO()
-    
     # For Google's proprietary formats
     if mime_type in google_formats:
         export_mime_type = google_formats[mime_type]
@@ -1079,17 +1083,22 @@ def download_file(file_id, auth_token, mime_type=None):
     
     # Check if request was successful
     if response.status_code != 200:
+        response.close()
         raise Exception(f"Failed to download file: {response.text}")
     
-    # Read content into memory
-    for chunk in response.iter_content(chunk_size=1024 * 1024):  # 1MB chunks
-        if chunk:
-            file_content.write(chunk)
+    # 1MB chunks
+    return iter_response_chunks(response)
+
+def download_file(file_id, auth_token, mime_type=None):
+    """Download file content from Google Drive into memory"""
+    file_content = io.BytesIO()
+    for chunk in iter_drive_file_chunks(file_id, auth_token, mime_type):
+        file_content.write(chunk)
     
     file_content.seek(0)
     return file_content
 
-def process_folder(folder_id, folder_name, auth_token, all_files, drive_name=None, folder_type=None, skipped_reasons=None):
+def process_folder(folder_id, folder_name, auth_token, all_files, drive_name=None, folder_type=None, skipped_reasons=None, folders=None):
     """Process a single folder and its contents"""
     try:
         folder_display_name = folder_name
@@ -1109,16 +1118,376 @@ def process_folder(folder_id, folder_name, auth_token, all_files, drive_name=Non
             top_level = "My Drive"  # Default fallback
         
         if drive_name:
-            return list_files_recursively(folder_id, auth_token, f"{top_level}/{drive_name}/{folder_name}/", all_files, drive_name, skipped_reasons)
+            current_path = f"{top_level}/{drive_name}/{folder_name}/"
         else:
-            return list_files_recursively(folder_id, auth_token, f"{top_level}/{folder_name}/", all_files, None, skipped_reasons)
+            current_path = f"{top_level}/{folder_name}/"
+        
+        if folders is not None:
+            folders.append(get_drive_folder_item(folder_id, current_path))
+        return list_files_recursively(folder_id, auth_token, current_path, all_files, drive_name, skipped_reasons, folders)
     except Exception as error:
         print(f'Listing failed for folder {folder_id}: {str(error)}')
         log.error(f"Error in process_folder for {folder_id}:", exc_info=True)
 
+# ============================================================================
+# GOOGLE DRIVE INCREMENTAL SYNC FUNCTIONS
+# ============================================================================
+
+DRIVE_FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+DRIVE_CHANGE_FIELDS = (
+    "nextPageToken, newStartPageToken, changes(changeType, removed, fileId, "
+    "file(id, name, mimeType, size, modifiedTime, parents, trashed, sharedWithMeTime, shortcutDetails))"
+)
+
+class DriveFullSyncRequired(Exception):
+    """The Drive changes since the last sync can't be applied incrementally"""
+
+def get_drive_root_path():
+    return f"userResources/{current_sync.user_id}/Google/Google Drive/"
+
+def get_drive_folder_item(folder_id, current_path, folder=None):
+    """Data source item of a synced folder, `current_path` being relative to the Drive root"""
+    return {
+        'item_id': folder_id,
+        'path': f"{get_drive_root_path()}{current_path}",
+        'mime_type': DRIVE_FOLDER_MIME_TYPE,
+        'modified_time': (folder or {}).get('modifiedTime'),
+        'size': None,
+    }
+
+def get_drive_file_item(file):
+    return {
+        'item_id': file['id'],
+        'path': file['fullPath'],
+        'mime_type': file.get('mimeType'),
+        'modified_time': file.get('modifiedTime'),
+        'size': int(file.get('size', 0) or 0),
+    }
+
+def get_drive_data_source(user_id):
+    for data_source in DataSources.get_data_sources_by_user_id(user_id):
+        if data_source.action == 'google' and data_source.layer == 'google_drive':
+            return data_source
+    return None
+
+def get_drive_start_page_token(auth_token):
+    """Token of the current position in the Drive changes feed"""
+    response = make_request(
+        f"{DRIVE_API_BASE}/changes/startPageToken",
+        params={'supportsAllDrives': 'true'},
+        auth_token=auth_token
+    )
+    return response.get('startPageToken')
+
+def list_drive_changes(page_token, auth_token):
+    """List every Drive change since `page_token`, with the token to resume from next time"""
+    changes = []
+    
+    while True:
+        params = {
+            'pageToken': page_token,
+            'fields': DRIVE_CHANGE_FIELDS,
+            'pageSize': 1000,
+            'includeRemoved': 'true',
+            'supportsAllDrives': 'true',
+            'includeItemsFromAllDrives': 'true',
+            'spaces': 'drive'
+        }
+        
+        try:
+            results = make_request(f"{DRIVE_API_BASE}/changes", params=params, auth_token=auth_token)
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else None
+            if status_code in (400, 404, 410):
+                # The page token expired or is no longer valid
+                raise DriveFullSyncRequired(f"Drive rejected the changes page token ({status_code})")
+            raise
+        
+        changes.extend(results.get('changes', []))
+        
+        if results.get('newStartPageToken'):
+            return changes, results['newStartPageToken']
+        
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            raise DriveFullSyncRequired("Drive changes listing ended without a new start page token")
+
+def get_drive_file_change(file_id, auth_token):
+    """Change-like entry for a file whose last sync failed, to retry it"""
+    try:
+        file = make_request(
+            f"{DRIVE_API_BASE}/files/{file_id}",
+            params={
+                'fields': "id, name, mimeType, size, modifiedTime, parents, trashed, sharedWithMeTime, shortcutDetails",
+                'supportsAllDrives': 'true'
+            },
+            auth_token=auth_token
+        )
+        return {'changeType': 'file', 'fileId': file_id, 'removed': False, 'file': file}
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return {'changeType': 'file', 'fileId': file_id, 'removed': True}
+        raise
+
+def get_drive_item_paths(file, folder_paths, roots, include_shared_with_me):
+    """Storage paths of a Drive item, from the paths of its parents already synced"""
+    is_folder = file.get('mimeType') == DRIVE_FOLDER_MIME_TYPE
+    # Items directly under a drive or "Shared with me" have '/' replaced in their name
+    suffix = '/' if is_folder else ''
+    safe_name = file['name'] if is_folder else file['name'].replace('/', '-')
+    
+    paths = []
+    for parent_id in file.get('parents') or []:
+        if parent_id in roots:
+            paths.append(f"{roots[parent_id]}{safe_name}{suffix}")
+        for folder_path in folder_paths.get(parent_id, []):
+            paths.append(f"{folder_path}{file['name']}{suffix}")
+    
+    if not paths and include_shared_with_me and file.get('sharedWithMeTime'):
+        paths.append(f"{get_drive_root_path()}Shared with me/{safe_name}{suffix}")
+    
+    return list(dict.fromkeys(paths))
+
+async def sync_drive_changes(auth_token, user_id, data_source, sync_cursor, sync_start_time, skipped_reasons):
+    """
+    Apply the Drive changes since the last sync to storage, using the items
+    recorded by previous syncs to resolve paths. Raises DriveFullSyncRequired
+    when that isn't possible, e.g. when a synced folder was moved or renamed.
+    """
+    print(f'🔁 Applying Google Drive changes since the last sync...')
+    
+    changes, new_page_token = list_drive_changes(sync_cursor['page_token'], auth_token)
+    
+    # Retry files that failed to sync last time
+    changed_ids = {change.get('fileId') for change in changes}
+    for file_id in sync_cursor.get('pending_file_ids', []):
+        if file_id not in changed_ids:
+            changes.append(get_drive_file_change(file_id, auth_token))
+    
+    roots = sync_cursor.get('roots', {})
+    include_shared_with_me = sync_cursor.get('scope') in ('all', 'shared_with_me')
+    
+    # Only the latest change of each item matters
+    latest_changes = {}
+    for change in changes:
+        if change.get('changeType', 'file') != 'file':
+            raise DriveFullSyncRequired("A shared drive was added, renamed or removed")
+        latest_changes.pop(change['fileId'], None)
+        latest_changes[change['fileId']] = change
+    
+    known_items = {}
+    for item in DataSourceItems.get_items_by_item_ids(data_source.id, list(latest_changes)):
+        known_items.setdefault(item.item_id, []).append(item)
+    
+    folder_paths = {}
+    for item in DataSourceItems.get_items_by_mime_type(data_source.id, DRIVE_FOLDER_MIME_TYPE):
+        folder_paths.setdefault(item.item_id, []).append(item.path)
+    
+    def is_folder_change(change):
+        file = change.get('file')
+        if file:
+            return file.get('mimeType') == DRIVE_FOLDER_MIME_TYPE
+        items = known_items.get(change['fileId'], [])
+        return bool(items) and items[0].mime_type == DRIVE_FOLDER_MIME_TYPE
+    
+    new_items = []
+    deleted_paths = []
+    uploads = {}
+    
+    # Folders first, so that files can be placed in folders created meanwhile
+    for change in [c for c in latest_changes.values() if is_folder_change(c)]:
+        file = change.get('file') or {}
+        items = known_items.get(change['fileId'], [])
+        
+        if change.get('removed') or file.get('trashed'):
+            if items:
+                raise DriveFullSyncRequired(f"Synced folder {change['fileId']} was removed")
+            continue
+        
+        paths = get_drive_item_paths(file, folder_paths, roots, include_shared_with_me)
+        if items:
+            if sorted(paths) != sorted(item.path for item in items):
+                raise DriveFullSyncRequired(f"Synced folder {file.get('name')} was moved or renamed")
+            continue
+        
+        # A folder created in, or moved into, the synced folders
+        for path in paths:
+            current_path = path[len(get_drive_root_path()):]
+            folder_item = get_drive_folder_item(file['id'], current_path, file)
+            sub_folders = []
+            folder_files = list_files_recursively(
+                file['id'], auth_token, current_path, [], None, skipped_reasons, sub_folders
+            )
+            for item in [folder_item, *sub_folders]:
+                new_items.append(item)
+                folder_paths.setdefault(item['item_id'], []).append(item['path'])
+            for folder_file in folder_files:
+                uploads[folder_file['fullPath']] = (folder_file, False, 'New file')
+    
+    for change in [c for c in latest_changes.values() if not is_folder_change(c)]:
+        file = change.get('file') or {}
+        old_items = {item.path: item for item in known_items.get(change['fileId'], [])}
+        
+        paths = []
+        if not (change.get('removed') or file.get('trashed')):
+            paths = get_drive_item_paths(file, folder_paths, roots, include_shared_with_me)
+            
+            if paths and file.get('mimeType') == 'application/vnd.google-apps.shortcut':
+                shortcut = file.get('shortcutDetails') or {}
+                if shortcut.get('targetMimeType') == DRIVE_FOLDER_MIME_TYPE:
+                    raise DriveFullSyncRequired(f"Folder shortcut {file.get('name')} was added")
+                print(f"🔗 Skipping Drive file shortcut: {paths[0]}")
+                skipped_reasons['shortcut'] += 1
+                paths = []
+            elif paths and not is_drive_file_syncable(file, paths[0], skipped_reasons):
+                paths = []
+        
+        deleted_paths.extend(path for path in old_items if path not in paths)
+        
+        for path in paths:
+            existing = old_items.get(path)
+            if existing and existing.modified_time == file.get('modifiedTime'):
+                # Only metadata changed, e.g. sharing settings
+                continue
+            
+            reason = f"Drive version newer ({file.get('modifiedTime')})" if existing else 'New file'
+            uploads[path] = ({**file, 'fullPath': path}, bool(existing), reason)
+    
+    files_total = len(uploads) + len(deleted_paths)
+    mb_total = sum(int(file.get('size', 0) or 0) for file, _, _ in uploads.values())
+    print(f"Found {len(latest_changes)} changed items: {len(uploads)} to upload, {len(deleted_paths)} to delete")
+    
+    await update_data_source_sync_status(
+        current_sync.user_id, 'google', 'google_drive', 'syncing',
+        files_total=files_total,
+        mb_total=mb_total,
+        sync_start_time=sync_start_time
+    )
+    
+    await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
+        'phase': 'processing',
+        'phase_name': PHASE_3_PROCESSING,
+        'phase_description': 'uploading changed files and deleting removed ones',
+        'files_processed': 0,
+        'files_total': files_total,
+        'mb_processed': 0,
+        'mb_total': mb_total,
+        'sync_start_time': sync_start_time
+    })
+    
+    if new_items:
+        DataSourceItems.upsert_items(data_source.id, new_items)
+    
+    deleted_files = []
+    for path in deleted_paths:
+        if delete_file_unified(path, current_sync.user_id):
+            deleted_files.append(path)
+            print(f"[{datetime.now().isoformat()}] Deleted: {path}")
+    if deleted_paths:
+        DataSourceItems.delete_items_by_paths(data_source.id, deleted_paths)
+    
+    uploaded_files = []
+    synced_items = []
+    pending_file_ids = set()
+    files_processed = len(deleted_paths)
+    mb_processed = 0
+    
+    with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            (executor.submit(download_and_upload_file, file, auth_token, exists, reason, skipped_reasons), file)
+            for file, exists, reason in uploads.values()
+        ]
+        
+        for future, file in futures:
+            files_processed += 1
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error uploading {file['fullPath']}: {str(e)}")
+                pending_file_ids.add(file['id'])
+                continue
+            
+            # Skipped files are recorded too, they are retried once they change
+            synced_items.append(get_drive_file_item(file))
+            if result:
+                uploaded_files.append(result)
+                mb_processed += int(file.get('size', 0) or 0)
+            
+            if files_processed % 10 == 0:
+                await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
+                    'phase': 'processing',
+                    'phase_name': PHASE_3_PROCESSING,
+                    'phase_description': 'uploading changed files and deleting removed ones',
+                    'files_processed': files_processed,
+                    'files_total': files_total,
+                    'mb_processed': mb_processed,
+                    'mb_total': mb_total,
+                    'sync_start_time': sync_start_time
+                })
+    
+    if synced_items:
+        DataSourceItems.upsert_items(data_source.id, synced_items)
+    
+    # Items are recorded first, so an interrupted sync just replays the same changes
+    DataSources.update_data_source_sync_cursor_by_id(data_source.id, {
+        **sync_cursor,
+        'page_token': new_page_token,
+        'pending_file_ids': sorted(pending_file_ids)
+    })
+    
+    files_added = len([f for f in uploaded_files if f['type'] == 'new'])
+    files_updated = len([f for f in uploaded_files if f['type'] == 'updated'])
+    total_skipped = sum(skipped_reasons.values())
+    total_files, total_size = DataSourceItems.get_items_summary(
+        data_source.id, exclude_mime_type=DRIVE_FOLDER_MIME_TYPE
+    )
+    
+    print(f"\nTotal: +{files_added} added, ^{files_updated} updated, -{len(deleted_files)} removed, {total_skipped} skipped")
+    print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
+    
+    sync_results = {
+        "latest_sync": {
+            "added": files_added,
+            "updated": files_updated,
+            "removed": len(deleted_files),
+            "skipped": total_skipped,
+            "runtime_ms": int((time.time() - current_sync.script_start_time) * 1000),
+            "api_calls": current_sync.total_api_calls,
+            "skip_reasons": skipped_reasons,
+            "sync_timestamp": int(time.time())
+        },
+        "overall_profile": {
+            "total_files": total_files,
+            "total_size_bytes": total_size,
+            "last_updated": int(time.time()),
+            "folders_count": len(folder_paths)
+        }
+    }
+    
+    await update_data_source_sync_status(
+        user_id, 'google', 'google_drive', 'synced',
+        files_processed=files_processed,
+        files_total=total_files,
+        mb_processed=mb_processed,
+        mb_total=total_size,
+        sync_results=sync_results
+    )
+    
+    await emit_sync_progress(user_id, 'google', 'google_drive', {
+        'phase': 'summarizing',
+        'phase_name': PHASE_4_SUMMARIZING,
+        'phase_description': 'generating sync report',
+        'files_processed': files_processed,
+        'files_total': files_total,
+        'mb_processed': mb_processed,
+        'mb_total': mb_total,
+        'sync_start_time': sync_start_time,
+        'completed': True
+    })
+
 async def sync_drive_to_storage(auth_token, user_id):
     """Main function to sync Google Drive to configured storage backend"""
-    global total_api_calls, GCS_BUCKET_NAME
     
     current_backend = get_current_backend()
     print(f'🔄 Starting recursive sync process using {current_backend} backend...')
@@ -1132,7 +1501,7 @@ async def sync_drive_to_storage(auth_token, user_id):
     print(f'----------------------------------------------------------------------')
     
     # Emit initial phase update with discovery fields
-    await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+    await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
         'phase': 'starting',
         'phase_name': PHASE_1_STARTING,
         'phase_description': 'connecting to Google Drive and preparing sync process',
@@ -1170,25 +1539,47 @@ async def sync_drive_to_storage(auth_token, user_id):
     files_found = 0
     total_size = 0
     
+    all_files = []
+    
     try:
+        # Scope control: set GOOGLE_DRIVE_SYNC_SCOPE to limit sync scope
+        sync_scope = os.environ.get('GOOGLE_DRIVE_SYNC_SCOPE', 'all').lower()
+        include_my_drive = sync_scope in ('all', 'my_drive')
+        include_shared_with_me = sync_scope in ('all', 'shared_with_me')
+        include_shared_drives = sync_scope in ('all', 'shared_drives')
+        
+        # After a first full sync, only the changes since the last one are applied
+        data_source = get_drive_data_source(user_id)
+        sync_cursor = DataSources.get_data_source_sync_cursor_by_id(data_source.id) if data_source else None
+        if sync_cursor and sync_cursor.get('page_token') and sync_cursor.get('scope') == sync_scope:
+            try:
+                await sync_drive_changes(auth_token, user_id, data_source, sync_cursor, sync_start_time, skipped_reasons)
+                return
+            except DriveFullSyncRequired as e:
+                print(f"↻ Falling back to a full sync: {e}")
+        
+        # Taken before listing, so that changes made during this sync are picked up next time
+        start_page_token = None
+        if data_source:
+            try:
+                start_page_token = get_drive_start_page_token(auth_token)
+            except Exception as e:
+                log.warning(f"Could not get a Drive changes page token, the next sync will be a full sync: {e}")
+        
         # Get user's folders (both My Drive and shared folders)
         drive_folders = get_user_drive_folders(auth_token)
         if not drive_folders:
             raise ValueError("Could not retrieve user's drive folders")
         
         # Process My Drive and shared folders in parallel
-        all_files = []
         
-        # Scope control: set GOOGLE_DRIVE_SYNC_SCOPE to limit sync scope
-        sync_scope = os.environ.get('GOOGLE_DRIVE_SYNC_SCOPE', 'all').lower()
-        include_my_drive = sync_scope in ('all', 'my_drive')
-        include_shared_with_me = sync_scope in ('all', 'shared_with_me')
-        include_shared_drives = sync_scope in ('all', 'shared_drives')
-
         folders_to_process = []
+        # Synced folders and drive roots, to place changed files on the next sync
+        folder_items = []
+        roots = {}
         
         # Emit initial discovery update
-        await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
             'phase': 'starting',
             'phase_name': PHASE_1_STARTING,
             'phase_description': 'discovering folders, files that need to be synced',
@@ -1203,6 +1594,9 @@ async def sync_drive_to_storage(auth_token, user_id):
         })
 
         if include_my_drive:
+            if drive_folders['my_drive']:
+                roots[drive_folders['my_drive']] = f"{get_drive_root_path()}My Drive/"
+            
             # Discover top-level folders under My Drive (root) and process each independently
             my_drive_top_level = get_my_drive_top_level_folders(auth_token)
             folders_to_process.extend([
@@ -1214,7 +1608,7 @@ async def sync_drive_to_storage(auth_token, user_id):
             my_drive_root_files = list_my_drive_root_files(auth_token)
             for f in my_drive_root_files:
                 safe_name = f.get('name', '').replace('/', '-')
-                f['fullPath'] = f"userResources/{USER_ID}/Google/Google Drive/My Drive/{safe_name}"
+                f['fullPath'] = f"userResources/{current_sync.user_id}/Google/Google Drive/My Drive/{safe_name}"
                 all_files.append(f)
                 files_found += 1
                 total_size += int(f.get('size', 0) or 0)
@@ -1230,7 +1624,7 @@ async def sync_drive_to_storage(auth_token, user_id):
                 else:
                     # It's a file - add directly to all_files with sanitized path
                     safe_name = item['name'].replace('/', '-')
-                    item['fullPath'] = f"userResources/{USER_ID}/Google/Google Drive/Shared with me/{safe_name}"
+                    item['fullPath'] = f"userResources/{current_sync.user_id}/Google/Google Drive/Shared with me/{safe_name}"
                     all_files.append(item)
                     files_found += 1
                     total_size += int(item.get('size', 0) or 0)
@@ -1254,16 +1648,17 @@ async def sync_drive_to_storage(auth_token, user_id):
                 drive_name = d.get('name')
                 if not drive_id or not drive_name:
                     continue
+                roots[drive_id] = f"{get_drive_root_path()}Shared drives/{drive_name}/"
                 root_files = list_shared_drive_root_files(drive_id, auth_token)
                 for f in root_files:
                     safe_name = f.get('name', '').replace('/', '-')
-                    f['fullPath'] = f"userResources/{USER_ID}/Google/Google Drive/Shared drives/{drive_name}/{safe_name}"
+                    f['fullPath'] = f"userResources/{current_sync.user_id}/Google/Google Drive/Shared drives/{drive_name}/{safe_name}"
                     all_files.append(f)
                     files_found += 1
                     total_size += int(f.get('size', 0) or 0)
 
         # Emit discovery progress update after initial collection
-        await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
             'phase': 'starting',
             'phase_name': PHASE_1_STARTING,
             'phase_description': 'reading my drive, shared with me, and shared drives',
@@ -1278,18 +1673,20 @@ async def sync_drive_to_storage(auth_token, user_id):
         })
 
         # Process folders in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             future_to_folder = {}
             for folder in folders_to_process:
                 if folder.get('type') == 'shared_drive':
                     future = executor.submit(
                         process_folder, folder['id'], folder['name'], 
-                        auth_token, [], folder.get('driveName'), 'shared_drive', skipped_reasons
+                        auth_token, [], folder.get('driveName'), 'shared_drive', skipped_reasons,
+                        folders=folder_items
                     )
                 else:
                     future = executor.submit(
                         process_folder, folder['id'], folder['name'], 
-                        auth_token, [], None, folder.get('type'), skipped_reasons
+                        auth_token, [], None, folder.get('type'), skipped_reasons,
+                        folders=folder_items
                     )
                 future_to_folder[future] = folder
             
@@ -1312,7 +1709,7 @@ async def sync_drive_to_storage(auth_token, user_id):
                         total_size += int(f.get('size', 0) or 0)
                     
                     # Emit discovery progress update
-                    await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+                    await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
                         'phase': 'starting',
                         'phase_name': PHASE_1_STARTING,
                         'phase_description': 'counting folders and files that need to be synced',
@@ -1337,14 +1734,14 @@ async def sync_drive_to_storage(auth_token, user_id):
         
         # Update progress in database
         await update_data_source_sync_status(
-            USER_ID, 'google', 'google_drive', 'syncing',
+            current_sync.user_id, 'google', 'google_drive', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
         )
         
         # Emit initial progress
-        await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
             'phase': 'starting',
             'phase_name': PHASE_1_STARTING,
             'phase_description': 'discovery phase complete, preparing sync process',
@@ -1361,7 +1758,7 @@ async def sync_drive_to_storage(auth_token, user_id):
         print(f'----------------------------------------------------------------------')
         
         # Emit phase update
-        await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
             'phase': 'discovery',
             'phase_name': PHASE_2_DISCOVERY,
             'phase_description': 'analyzing existing files and determining sync plan',
@@ -1373,13 +1770,13 @@ async def sync_drive_to_storage(auth_token, user_id):
         })
         
         # List all existing files using unified interface
-        user_prefix = f"userResources/{USER_ID}/Google/Google Drive/My Drive/"
-        existing_files = list_files_unified(prefix=user_prefix, user_id=USER_ID)
+        user_prefix = f"userResources/{current_sync.user_id}/Google/Google Drive/My Drive/"
+        existing_files = list_files_unified(prefix=user_prefix, user_id=current_sync.user_id)
         
         # Get accurate file summary for progress tracking
         print("Getting Google Drive file summary from storage...")
         from .data_ingestion import get_files_summary, generate_pai_service_token
-        auth_token = generate_pai_service_token(USER_ID)
+        auth_token = generate_pai_service_token(current_sync.user_id)
         summary = get_files_summary(prefix=user_prefix, auth_token=auth_token)
         
         # Use summary data for accurate totals
@@ -1412,7 +1809,7 @@ async def sync_drive_to_storage(auth_token, user_id):
         # Delete orphaned files using unified interface
         for file_name, file_info in existing_file_map.items():
             if file_name.startswith(user_prefix) and file_name not in drive_file_paths:
-                success = delete_file_unified(file_name, USER_ID)
+                success = delete_file_unified(file_name, current_sync.user_id)
                 if success:
                     deleted_files.append({
                         'name': file_name,
@@ -1427,7 +1824,7 @@ async def sync_drive_to_storage(auth_token, user_id):
         print(f'----------------------------------------------------------------------')
         
         # Emit phase update
-        await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
             'phase': 'processing',
             'phase_name': PHASE_3_PROCESSING,
             'phase_description': 'uploading new files and deleting orphans',
@@ -1442,8 +1839,9 @@ async def sync_drive_to_storage(auth_token, user_id):
         # Process files in parallel for upload
         files_added = 0
         files_updated = 0
+        failed_files = []
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for file in all_files:
@@ -1490,6 +1888,7 @@ async def sync_drive_to_storage(auth_token, user_id):
             # Process completed uploads
             for future, file in futures:
                 try:
+                    # None for skipped files, errors are raised
                     result = future.result()
                     if result:
                         uploaded_files.append(result)
@@ -1500,12 +1899,12 @@ async def sync_drive_to_storage(auth_token, user_id):
                         # Update database and emit progress after first file, then every 10 files or every 10MB
                         if files_processed == 1 or files_processed % 10 == 0 or mb_processed % (10 * 1024 * 1024) == 0:
                             await update_data_source_sync_status(
-                                USER_ID, 'google', 'google_drive', 'syncing',
+                                current_sync.user_id, 'google', 'google_drive', 'syncing',
                                 files_processed=files_processed,
                                 mb_processed=mb_processed
                             )
                             
-                            await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+                            await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
                                 'phase': 'processing',
                                 'phase_name': PHASE_3_PROCESSING,
                                 'phase_description': 'uploading new files and deleting orphans',
@@ -1517,16 +1916,33 @@ async def sync_drive_to_storage(auth_token, user_id):
                             })
                 except Exception as e:
                     print(f"Error uploading {file['fullPath']}: {str(e)}")
+                    failed_files.append(file)
                     # Still count as processed for progress tracking
                     files_processed += 1
         
+        if data_source and start_page_token:
+            # Record what was synced, failed files are retried by the next sync
+            failed_paths = {file['fullPath'] for file in failed_files}
+            items = {item['path']: item for item in folder_items}
+            for file in all_files:
+                if file.get('fullPath') and file['fullPath'] not in failed_paths:
+                    items[file['fullPath']] = get_drive_file_item(file)
+            
+            if DataSourceItems.replace_items(data_source.id, list(items.values())):
+                DataSources.update_data_source_sync_cursor_by_id(data_source.id, {
+                    'page_token': start_page_token,
+                    'scope': sync_scope,
+                    'roots': roots,
+                    'pending_file_ids': sorted({file['id'] for file in failed_files})
+                })
+        
         # Phase 4: Summarizing
         print(f'----------------------------------------------------------------------')
         print(f'📊 Phase 4: Summarizing - Generating sync report...')
         print(f'----------------------------------------------------------------------')
         
         # Emit phase update
-        await emit_sync_progress(USER_ID, 'google', 'google_drive', {
+        await emit_sync_progress(current_sync.user_id, 'google', 'google_drive', {
             'phase': 'summarizing',
             'phase_name': PHASE_4_SUMMARIZING,
             'phase_description': 'generating sync report',
@@ -1546,7 +1962,7 @@ async def sync_drive_to_storage(auth_token, user_id):
         for file in deleted_files:
             print(f" - {file['name']} | {format_bytes(file['size'])} | Created: {file['timeCreated']}")
         
-        total_runtime_ms = int((time.time() - script_start_time) * 1000)
+        total_runtime_ms = int((time.time() - current_sync.script_start_time) * 1000)
         total_seconds = total_runtime_ms // 1000
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
@@ -1554,7 +1970,7 @@ async def sync_drive_to_storage(auth_token, user_id):
 
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        print(f"📊 Billable API Calls: {total_api_calls}")
+        print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         print(f"📦 Files Processed: {len(all_files)}")
         print(f"➕ Files Added: {files_added}")
         print(f"🔄 Files Updated: {files_updated}")
@@ -1577,8 +1993,8 @@ async def sync_drive_to_storage(auth_token, user_id):
                 "updated": files_updated,
                 "removed": len(deleted_files),
                 "skipped": total_skipped,
-                "runtime_ms": int((time.time() - script_start_time) * 1000),
-                "api_calls": total_api_calls,
+                "runtime_ms": int((time.time() - current_sync.script_start_time) * 1000),
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": skipped_reasons,
                 "sync_timestamp": int(time.time())
             },
@@ -1627,7 +2043,7 @@ async def sync_drive_to_storage(auth_token, user_id):
         files_processed = len(uploaded_files) + len(deleted_files)
         if files_processed == 0:
             # Zero files processed → ERROR state
-            await update_data_source_sync_status(USER_ID, 'google', 'google_drive', 'error')
+            await update_data_source_sync_status(current_sync.user_id, 'google', 'google_drive', 'error')
         else:
             # Files were processed → log error and continue to embedding
             sync_results = {
@@ -1636,8 +2052,8 @@ async def sync_drive_to_storage(auth_token, user_id):
                     "updated": len([f for f in uploaded_files if f['type'] == 'updated']),
                     "removed": len(deleted_files),
                     "skipped": sum(skipped_reasons.values()),
-                    "runtime_ms": int((time.time() - script_start_time) * 1000),
-                    "api_calls": total_api_calls,
+                    "runtime_ms": int((time.time() - current_sync.script_start_time) * 1000),
+                    "api_calls": current_sync.total_api_calls,
                     "skip_reasons": skipped_reasons,
                     "sync_timestamp": int(time.time())
                 },
@@ -1653,28 +2069,28 @@ async def sync_drive_to_storage(auth_token, user_id):
                 }
             }
             # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-            await update_data_source_sync_status(USER_ID, 'google', 'google_drive', 'synced', sync_results=sync_results)
+            await update_data_source_sync_status(current_sync.user_id, 'google', 'google_drive', 'synced', sync_results=sync_results)
         
         raise error
 
 def download_and_upload_file(file, auth_token, exists, reason, skipped_reasons):
-    """Helper function to download a file and upload it using unified storage interface"""
+    """
+    Helper function to download a file and upload it using unified storage interface.
+    Returns None if the file was skipped and raises if it failed to sync.
+    """
     start_time = time.time()
     
     try:
-        # Download file from Drive
-        file_content = download_file(file['id'], auth_token, file['mimeType'])
-        
-        # Upload using unified interface
-        success = upload_file_unified(
-            file_content.getvalue(),
+        # Stream the file from Drive into storage, without holding it in memory
+        success = upload_stream_unified(
+            iter_drive_file_chunks(file['id'], auth_token, file['mimeType']),
             file['fullPath'],
             file.get('mimeType'),
-            USER_ID
+            current_sync.user_id
         )
         
         if not success:
-            return None
+            raise Exception("Upload to storage failed")
         
         upload_result = {
             'path': file['fullPath'],
@@ -1695,11 +2111,8 @@ def download_and_upload_file(file, auth_token, exists, reason, skipped_reasons):
             print(f"🔒 Skipped read-only file: {file['fullPath']} (permission denied)")
             skipped_reasons['permission'] += 1
             return None
-        else:
-            print(f"Error processing file {file['fullPath']}: {error_msg}")
         log.error(f"Error in download_and_upload_file for {file['fullPath']}:", exc_info=True)
-        skipped_reasons['other'] += 1
-        return None
+        raise
 
 # ============================================================================
 # MAIN EXECUTION FUNCTION
@@ -1739,15 +2152,12 @@ async def initiate_google_file_sync(
     current_backend = get_current_backend()
     log.info(f'Using storage backend: {current_backend}')
 
-    global USER_ID 
-    global GCS_BUCKET_NAME
-    global script_start_time
-    global total_api_calls
-
-    USER_ID = user_id
-    GCS_BUCKET_NAME = gcs_bucket_name or ''  # For backward compatibility
-    total_api_calls = 0
-    script_start_time = time.time()
+    sync = set_sync_context(SyncContext(
+        user_id=user_id,
+        provider='google',
+        token_refresher=lambda auth_token: get_valid_google_token(user_id, auth_token),
+    ))
+    sync.gcs_bucket_name = gcs_bucket_name or ''  # For backward compatibility
 
     results = {
         'drive': None,
@@ -1758,13 +2168,13 @@ async def initiate_google_file_sync(
     try:
         # Sync Google Drive if requested
         if sync_drive:
-            await update_data_source_sync_status(USER_ID, 'google', 'google_drive', 'syncing')
+            await update_data_source_sync_status(current_sync.user_id, 'google', 'google_drive', 'syncing')
             await sync_drive_to_storage(token, user_id)
             results['drive'] = 'completed'
         
         # Sync Gmail if requested
         if sync_gmail:
-            await update_data_source_sync_status(USER_ID, 'google', 'gmail', 'syncing')
+            await update_data_source_sync_status(current_sync.user_id, 'google', 'gmail', 'syncing')
             gmail_result = await sync_gmail_to_storage(token, gmail_query, max_emails, user_id)
             results['gmail'] = gmail_result
         
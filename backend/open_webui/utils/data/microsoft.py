@@ -11,14 +11,21 @@ from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.utils.data.data_ingestion import (
     # Unified storage functions
-    list_files_unified, upload_file_unified, delete_file_unified,
+    list_files_unified, upload_file_unified, upload_stream_unified, delete_file_unified,
     # Utility functions
     parse_date, format_bytes, validate_config, make_api_request, update_data_source_sync_status,
+    iter_response_chunks,
     # Backend configuration
     configure_storage_backend, get_current_backend
 )
 
 from open_webui.models.data import DataSources
+from open_webui.utils.data.sync_context import (
+    SyncContext,
+    SyncContextExecutor,
+    current_sync,
+    set_sync_context,
+)
 from open_webui.models.datatokens import OAuthTokens
 
 log = logging.getLogger(__name__)
@@ -72,11 +79,6 @@ def set_socketio_instance(socketio_instance):
     global sio
     sio = socketio_instance
 
-# Global variables
-existing_files_cache = set()
-total_api_calls = 0
-USER_ID = ""
-
 # Configuration from environment
 ALLOWED_EXTENSIONS = os.environ.get('ALLOWED_EXTENSIONS')
 MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '4'))
@@ -94,52 +96,50 @@ EXCLUDED_FILES = [
 
 GRAPH_API_BASE = 'https://graph.microsoft.com/v1.0'
 
-def initialize_globals(user_id):
-    """Initialize global variables properly"""
-    global USER_ID, existing_files_cache
-    
+def init_sync_context(user_id):
+    """Start the sync context of the current sync"""
     if not user_id:
         raise ValueError("user_id is required")
     
-    USER_ID = user_id
-    existing_files_cache = set()
+    return set_sync_context(SyncContext(
+        user_id=user_id,
+        provider='microsoft',
+        token_refresher=lambda auth_token: get_valid_microsoft_token(user_id, auth_token),
+    ))
 
 def make_request(url, method='GET', headers=None, params=None, data=None, stream=False, auth_token=None):
     """Helper function to make API requests with error handling and token auto-refresh"""
-    global total_api_calls, USER_ID
-    total_api_calls += 1
+    current_sync.count_api_call()
     # Refresh token if possible
-    if auth_token and USER_ID:
-        auth_token = get_valid_microsoft_token(USER_ID, auth_token)
+    if auth_token and current_sync.user_id:
+        auth_token = current_sync.refresh_token(auth_token)
     return make_api_request(url, method=method, headers=headers, params=params, data=data, stream=stream, auth_token=auth_token)
 
 def load_existing_files(user_id):
     """Load existing files into memory for duplicate checking using unified interface"""
-    global existing_files_cache, USER_ID
     
     try:
         current_backend = get_current_backend()
         print(f"Loading existing files from {current_backend} storage for duplicate checking...")
-        user_prefix = f"userResources/{USER_ID}/Microsoft/"
+        user_prefix = f"userResources/{current_sync.user_id}/Microsoft/"
         
         existing_files = list_files_unified(prefix=user_prefix, user_id=user_id)
         
-        existing_files_cache = set()
+        current_sync.existing_files_cache = set()
         for file in existing_files:
             file_name = file.get('name') or file.get('key', '')
             if file_name and file_name.startswith(user_prefix):
-                existing_files_cache.add(file_name)
+                current_sync.existing_files_cache.add(file_name)
         
-        print(f"Found {len(existing_files_cache)} existing files in {current_backend} storage for user {USER_ID}")
+        print(f"Found {len(current_sync.existing_files_cache)} existing files in {current_backend} storage for user {current_sync.user_id}")
     except Exception as e:
         print(f"Error loading existing files: {str(e)}")
         log.error("Error loading existing files:", exc_info=True)
-        existing_files_cache = set()
+        current_sync.existing_files_cache = set()
 
 def file_exists_in_storage(file_path):
     """Check if file already exists in storage"""
-    global existing_files_cache
-    return file_path in existing_files_cache
+    return file_path in current_sync.existing_files_cache
 
 def construct_file_path(service, *path_components):
     """Construct file path using proper path joining"""
@@ -151,7 +151,7 @@ def construct_file_path(service, *path_components):
                 sanitized = sanitized[:100]
             sanitized_components.append(sanitized)
     
-    path = os.path.join(f"userResources/{USER_ID}/Microsoft/{service}", *sanitized_components)
+    path = os.path.join(f"userResources/{current_sync.user_id}/Microsoft/{service}", *sanitized_components)
     return path.replace('\\', '/')
 
 def is_file_size_valid(size):
@@ -232,7 +232,7 @@ def download_and_upload_onenote_page(page_id, file_path, page_title, auth_token)
             page_content.getvalue(),
             file_path,
             'text/html',
-            USER_ID
+            current_sync.user_id
         )
         
         if not success:
@@ -257,7 +257,6 @@ def download_and_upload_onenote_page(page_id, file_path, page_title, auth_token)
 
 async def sync_onenote_to_storage(auth_token):
     """Sync OneNote notebooks to storage"""
-    global USER_ID
     
     print('Starting OneNote sync process...')
 
@@ -268,7 +267,7 @@ async def sync_onenote_to_storage(auth_token):
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'microsoft', 'onenote', {
+    await emit_sync_progress(current_sync.user_id, 'microsoft', 'onenote', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -289,7 +288,7 @@ async def sync_onenote_to_storage(auth_token):
         notebooks = list_onenote_notebooks(auth_token)
         print(f"Found {len(notebooks)} OneNote notebooks")
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for notebook in notebooks:
@@ -334,7 +333,7 @@ async def sync_onenote_to_storage(auth_token):
             files_total = len(futures)
             mb_total = 0
             await update_data_source_sync_status(
-                USER_ID, 'microsoft', 'onenote', 'syncing',
+                current_sync.user_id, 'microsoft', 'onenote', 'syncing',
                 files_total=files_total,
                 mb_total=mb_total,
                 sync_start_time=sync_start_time
@@ -343,7 +342,7 @@ async def sync_onenote_to_storage(auth_token):
             print("----------------------------------------------------------------------")
             print("🔎 Phase 2: Discovery - analyzing notebooks and preparing pages for sync...")
             print("----------------------------------------------------------------------")
-            await emit_sync_progress(USER_ID, 'microsoft', 'onenote', {
+            await emit_sync_progress(current_sync.user_id, 'microsoft', 'onenote', {
                 'phase': 'discovery',
                 'phase_name': 'Phase 2: Discovery',
                 'phase_description': 'analyzing notebooks and preparing pages for sync',
@@ -365,13 +364,13 @@ async def sync_onenote_to_storage(auth_token):
                     result = future.result()
                     if result:
                         uploaded_files.append(result)
-                        existing_files_cache.add(result['path'])
+                        current_sync.existing_files_cache.add(result['path'])
                         files_processed += 1
                         try:
                             mb_processed += int(result.get('size', 0))
                         except Exception:
                             pass
-                        await emit_sync_progress(USER_ID, 'microsoft', 'onenote', {
+                        await emit_sync_progress(current_sync.user_id, 'microsoft', 'onenote', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing pages to storage',
@@ -392,7 +391,7 @@ async def sync_onenote_to_storage(auth_token):
         print("----------------------------------------------------------------------")
         print("📊 Phase 4: Summarizing - finalizing OneNote sync results...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'microsoft', 'onenote', {
+        await emit_sync_progress(current_sync.user_id, 'microsoft', 'onenote', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -416,7 +415,7 @@ async def sync_onenote_to_storage(auth_token):
 
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        print(f"📊 Billable API Calls: {total_api_calls}")
+        print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         print(f"📦 Files Processed: {files_total}")
         print(f"➕ Files Added: {len(uploaded_files)}")
         print(f"🔄 Files Updated: 0")
@@ -431,7 +430,7 @@ async def sync_onenote_to_storage(auth_token):
                 "removed": 0,
                 "skipped": skipped_files,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -444,7 +443,7 @@ async def sync_onenote_to_storage(auth_token):
         }
 
         # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-        await update_data_source_sync_status(USER_ID, 'microsoft', 'onenote', 'synced', sync_results=sync_results)
+        await update_data_source_sync_status(current_sync.user_id, 'microsoft', 'onenote', 'synced', sync_results=sync_results)
         
         return {
             'uploaded': len(uploaded_files),
@@ -570,7 +569,7 @@ def download_and_upload_outlook_message(message_id, file_path, auth_token):
             message_text.encode('utf-8'),
             file_path,
             'text/plain',
-            USER_ID
+            current_sync.user_id
         )
         
         if not success:
@@ -595,7 +594,6 @@ def download_and_upload_outlook_message(message_id, file_path, auth_token):
 
 async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emails=1000):
     """Sync Outlook messages to storage"""
-    global USER_ID
     
     print(f'Starting Outlook sync process for folder: {folder}...')
 
@@ -606,7 +604,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'microsoft', 'outlook', {
+    await emit_sync_progress(current_sync.user_id, 'microsoft', 'outlook', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -632,7 +630,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
         files_total = len(messages)
         mb_total = 0
         await update_data_source_sync_status(
-            USER_ID, 'microsoft', 'outlook', 'syncing',
+            current_sync.user_id, 'microsoft', 'outlook', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
@@ -641,7 +639,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
         print("----------------------------------------------------------------------")
         print("🔎 Phase 2: Discovery - analyzing messages and preparing sync plan...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'microsoft', 'outlook', {
+        await emit_sync_progress(current_sync.user_id, 'microsoft', 'outlook', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing messages and preparing sync plan',
@@ -652,7 +650,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
             'sync_start_time': sync_start_time
         })
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             # Phase 3: Processing
@@ -694,13 +692,13 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
                     result = future.result()
                     if result:
                         uploaded_files.append(result)
-                        existing_files_cache.add(result['path'])
+                        current_sync.existing_files_cache.add(result['path'])
                         files_processed += 1
                         try:
                             mb_processed += int(result.get('size', 0))
                         except Exception:
                             pass
-                        await emit_sync_progress(USER_ID, 'microsoft', 'outlook', {
+                        await emit_sync_progress(current_sync.user_id, 'microsoft', 'outlook', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing emails to storage',
@@ -721,7 +719,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
         print("----------------------------------------------------------------------")
         print("📊 Phase 4: Summarizing - finalizing Outlook sync results...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'microsoft', 'outlook', {
+        await emit_sync_progress(current_sync.user_id, 'microsoft', 'outlook', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -745,7 +743,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
 
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        print(f"📊 Billable API Calls: {total_api_calls}")
+        print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         print(f"📦 Files Processed: {files_total}")
         print(f"➕ Files Added: {len(uploaded_files)}")
         print(f"🔄 Files Updated: 0")
@@ -760,7 +758,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
                 "removed": 0,
                 "skipped": skipped_files,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -777,7 +775,7 @@ async def sync_outlook_to_storage(auth_token, folder='inbox', query='', max_emai
         print("🧠 Phase 5: Embedding - vectorizing data for AI processing...")
         print("----------------------------------------------------------------------")
         # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-        await update_data_source_sync_status(USER_ID, 'microsoft', 'outlook', 'synced', sync_results=sync_results)
+        await update_data_source_sync_status(current_sync.user_id, 'microsoft', 'outlook', 'synced', sync_results=sync_results)
         
         return {
             'uploaded': len(uploaded_files),
@@ -862,26 +860,26 @@ def list_onedrive_files_recursively(folder_id, auth_token, current_path='', all_
     
     return all_files
 
+def iter_onedrive_file_chunks(file_id, auth_token):
+    """Stream file content from OneDrive"""
+    metadata_url = f"{GRAPH_API_BASE}/me/drive/items/{file_id}"
+    metadata = make_api_request(metadata_url, auth_token=auth_token)
+    
+    if '@microsoft.graph.downloadUrl' in metadata:
+        download_url = metadata['@microsoft.graph.downloadUrl']
+        response = make_api_request(download_url, stream=True, auth_token=None)
+    else:
+        download_url = f"{GRAPH_API_BASE}/me/drive/items/{file_id}/content"
+        response = make_api_request(download_url, auth_token=auth_token, stream=True)
+    
+    return iter_response_chunks(response)
+
 def download_onedrive_file(file_id, auth_token):
     """Download file content from OneDrive"""
     try:
-        metadata_url = f"{GRAPH_API_BASE}/me/drive/items/{file_id}"
-        metadata = make_api_request(metadata_url, auth_token=auth_token)
-        
         file_content = io.BytesIO()
-
-        if '@microsoft.graph.downloadUrl' in metadata:
-            download_url = metadata['@microsoft.graph.downloadUrl']
-            with make_api_request(download_url, stream=True, auth_token=None) as response:
-                for chunk in response.iter_content(chunk_size=1024 * 1024):
-                    if chunk:
-                        file_content.write(chunk)
-        else:
-            download_url = f"{GRAPH_API_BASE}/me/drive/items/{file_id}/content"
-            with make_api_request(download_url, auth_token=auth_token, stream=True) as response:
-                for chunk in response.iter_content(chunk_size=1024 * 1024):
-                    if chunk:
-                        file_content.write(chunk)
+        for chunk in iter_onedrive_file_chunks(file_id, auth_token):
+            file_content.write(chunk)
         
         file_content.seek(0)
         return file_content
@@ -900,14 +898,14 @@ def download_and_upload_onedrive_file(file, auth_token, exists, reason):
         return None
     
     try:
-        file_content = download_onedrive_file(file['id'], auth_token)
         content_type = file.get('file', {}).get('mimeType')
         
-        success = upload_file_unified(
-            file_content.getvalue(),
+        # Stream the file from OneDrive into storage, without holding it in memory
+        success = upload_stream_unified(
+            iter_onedrive_file_chunks(file['id'], auth_token),
             file['fullPath'],
             content_type,
-            USER_ID
+            current_sync.user_id
         )
         
         if not success:
@@ -923,7 +921,7 @@ def download_and_upload_onedrive_file(file, auth_token, exists, reason):
             'backend': get_current_backend()
         }
 
-        existing_files_cache.add(file['fullPath'])
+        current_sync.existing_files_cache.add(file['fullPath'])
         
         print(f"[{datetime.now().isoformat()}] {'Updated' if exists else 'Uploaded'} {file['fullPath']}")
         return upload_result
@@ -935,7 +933,6 @@ def download_and_upload_onedrive_file(file, auth_token, exists, reason):
 
 async def sync_onedrive_to_storage(auth_token):
     """Main function to sync OneDrive to storage"""
-    global total_api_calls, USER_ID
     
     print('Starting OneDrive sync process...')
 
@@ -946,7 +943,7 @@ async def sync_onedrive_to_storage(auth_token):
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'microsoft', 'onedrive', {
+    await emit_sync_progress(current_sync.user_id, 'microsoft', 'onedrive', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -972,7 +969,7 @@ async def sync_onedrive_to_storage(auth_token):
         files_total = len(all_files)
         mb_total = sum(int(f.get('size', 0)) for f in all_files)
         await update_data_source_sync_status(
-            USER_ID, 'microsoft', 'onedrive', 'syncing',
+            current_sync.user_id, 'microsoft', 'onedrive', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
@@ -981,7 +978,7 @@ async def sync_onedrive_to_storage(auth_token):
         print("----------------------------------------------------------------------")
         print("🔎 Phase 2: Discovery - analyzing existing files and determining sync plan...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'microsoft', 'onedrive', {
+        await emit_sync_progress(current_sync.user_id, 'microsoft', 'onedrive', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing existing files and determining sync plan',
@@ -992,8 +989,8 @@ async def sync_onedrive_to_storage(auth_token):
             'sync_start_time': sync_start_time
         })
         
-        user_prefix = f"userResources/{USER_ID}/Microsoft/OneDrive/"
-        existing_files = list_files_unified(prefix=user_prefix, user_id=USER_ID)
+        user_prefix = f"userResources/{current_sync.user_id}/Microsoft/OneDrive/"
+        existing_files = list_files_unified(prefix=user_prefix, user_id=current_sync.user_id)
         storage_file_map = {}
         for file in existing_files:
             file_name = file.get('name') or file.get('key', '')
@@ -1005,7 +1002,7 @@ async def sync_onedrive_to_storage(auth_token):
         # Delete orphaned files
         for storage_name, storage_file in storage_file_map.items():
             if storage_name.startswith(user_prefix) and storage_name not in onedrive_file_paths:
-                delete_file_unified(storage_name, USER_ID)
+                delete_file_unified(storage_name, current_sync.user_id)
                 
                 deleted_files.append({
                     'name': storage_name,
@@ -1015,7 +1012,7 @@ async def sync_onedrive_to_storage(auth_token):
                 print(f"[{datetime.now().isoformat()}] Deleted orphan: {storage_name}")
         
         # Process files for upload
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for file in all_files:
@@ -1068,7 +1065,7 @@ async def sync_onedrive_to_storage(auth_token):
                         except Exception:
                             pass
                         # Emit processing progress update
-                        await emit_sync_progress(USER_ID, 'microsoft', 'onedrive', {
+                        await emit_sync_progress(current_sync.user_id, 'microsoft', 'onedrive', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing files to storage',
@@ -1087,7 +1084,7 @@ async def sync_onedrive_to_storage(auth_token):
         print("----------------------------------------------------------------------")
         print("📊 Phase 4: Summarizing - finalizing OneDrive sync results...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'microsoft', 'onedrive', {
+        await emit_sync_progress(current_sync.user_id, 'microsoft', 'onedrive', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -1118,7 +1115,7 @@ async def sync_onedrive_to_storage(auth_token):
 
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        print(f"📊 Billable API Calls: {total_api_calls}")
+        print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         print(f"📦 Files Processed: {len(all_files)}")
         print(f"➕ Files Added: {files_added}")
         print(f"🔄 Files Updated: {files_updated}")
@@ -1134,7 +1131,7 @@ async def sync_onedrive_to_storage(auth_token):
                 "removed": len(deleted_files),
                 "skipped": skipped_files,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -1151,7 +1148,7 @@ async def sync_onedrive_to_storage(auth_token):
         print("🧠 Phase 5: Embedding - vectorizing data for AI processing...")
         print("----------------------------------------------------------------------")
         # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-        await update_data_source_sync_status(USER_ID, 'microsoft', 'onedrive', 'synced', sync_results=sync_results)
+        await update_data_source_sync_status(current_sync.user_id, 'microsoft', 'onedrive', 'synced', sync_results=sync_results)
               
         return {
             'uploaded': len(uploaded_files),
@@ -1473,26 +1470,26 @@ def list_sharepoint_files_recursively(site_id, drive_id, folder_id, auth_token,
     
     return all_files
 
+def iter_sharepoint_file_chunks(site_id, drive_id, file_id, auth_token):
+    """Stream file content from SharePoint, closing the response when done"""
+    metadata_url = f"{GRAPH_API_BASE}/sites/{site_id}/drives/{drive_id}/items/{file_id}"
+    metadata = make_api_request(metadata_url, auth_token=auth_token)
+    
+    if '@microsoft.graph.downloadUrl' in metadata:
+        download_url = metadata['@microsoft.graph.downloadUrl']
+        response = make_api_request(download_url, stream=True, auth_token=None)
+    else:
+        download_url = f"{GRAPH_API_BASE}/sites/{site_id}/drives/{drive_id}/items/{file_id}/content"
+        response = make_api_request(download_url, auth_token=auth_token, stream=True)
+    
+    return iter_response_chunks(response)
+
 def download_sharepoint_file(site_id, drive_id, file_id, auth_token):
     """Download file content from SharePoint with proper resource management"""
     try:
-        metadata_url = f"{GRAPH_API_BASE}/sites/{site_id}/drives/{drive_id}/items/{file_id}"
-        metadata = make_api_request(metadata_url, auth_token=auth_token)
-        
         file_content = io.BytesIO()
-
-        if '@microsoft.graph.downloadUrl' in metadata:
-            download_url = metadata['@microsoft.graph.downloadUrl']
-            with make_api_request(download_url, stream=True, auth_token=None) as response:
-                for chunk in response.iter_content(chunk_size=1024 * 1024):
-                    if chunk:
-                        file_content.write(chunk)
-        else:
-            download_url = f"{GRAPH_API_BASE}/sites/{site_id}/drives/{drive_id}/items/{file_id}/content"
-            with make_api_request(download_url, auth_token=auth_token, stream=True) as response:
-                for chunk in response.iter_content(chunk_size=1024 * 1024):
-                    if chunk:
-                        file_content.write(chunk)
+        for chunk in iter_sharepoint_file_chunks(site_id, drive_id, file_id, auth_token):
+            file_content.write(chunk)
         
         file_content.seek(0)
         return file_content
@@ -1522,9 +1519,9 @@ def download_and_upload_sharepoint_content(content, auth_token, exists, reason):
             if not site_id or not drive_id:
                 raise ValueError(f"Missing site_id or drive_id in file reference for {content['fullPath']}")
             
-            file_content = download_sharepoint_file(site_id, drive_id, content['id'], auth_token)
+            # Streamed into storage, without holding the file in memory
+            content_chunks = iter_sharepoint_file_chunks(site_id, drive_id, content['id'], auth_token)
             mime_type = content.get('file', {}).get('mimeType')
-            content_bytes = file_content.getvalue()
             
         elif content_type_str == 'sitePage':
             # Handle site pages as JSON
@@ -1542,12 +1539,10 @@ def download_and_upload_sharepoint_content(content, auth_token, exists, reason):
             print(f"Unknown content type: {content_type_str}")
             return None
         
-        success = upload_file_unified(
-            content_bytes,
-            content['fullPath'],
-            mime_type,
-            USER_ID
-        )
+        if content_type_str == 'file':
+            success = upload_stream_unified(content_chunks, content['fullPath'], mime_type, current_sync.user_id)
+        else:
+            success = upload_file_unified(content_bytes, content['fullPath'], mime_type, current_sync.user_id)
         
         if not success:
             return None
@@ -1563,7 +1558,7 @@ def download_and_upload_sharepoint_content(content, auth_token, exists, reason):
             'contentType': content_type_str
         }
 
-        existing_files_cache.add(content['fullPath'])
+        current_sync.existing_files_cache.add(content['fullPath'])
         
         print(f"[{datetime.now().isoformat()}] {'Updated' if exists else 'Uploaded'} [{content_type_str}] {content['fullPath']}")
         return upload_result
@@ -1580,7 +1575,6 @@ def download_and_upload_sharepoint_file(file, auth_token, exists, reason):
 
 async def sync_sharepoint_to_storage(auth_token):
     """Main function to sync SharePoint to storage"""
-    global total_api_calls, USER_ID
     
     print('Starting SharePoint sync process...')
 
@@ -1591,7 +1585,7 @@ async def sync_sharepoint_to_storage(auth_token):
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'microsoft', 'sharepoint', {
+    await emit_sync_progress(current_sync.user_id, 'microsoft', 'sharepoint', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -1661,7 +1655,7 @@ async def sync_sharepoint_to_storage(auth_token):
         files_total = len(all_content)
         mb_total = sum(int(f.get('size', 0)) for f in all_content)
         await update_data_source_sync_status(
-            USER_ID, 'microsoft', 'sharepoint', 'syncing',
+            current_sync.user_id, 'microsoft', 'sharepoint', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
@@ -1670,7 +1664,7 @@ async def sync_sharepoint_to_storage(auth_token):
         print("----------------------------------------------------------------------")
         print("🔎 Phase 2: Discovery - analyzing existing files and determining sync plan...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'microsoft', 'sharepoint', {
+        await emit_sync_progress(current_sync.user_id, 'microsoft', 'sharepoint', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing existing files and determining sync plan',
@@ -1681,8 +1675,8 @@ async def sync_sharepoint_to_storage(auth_token):
             'sync_start_time': sync_start_time
         })
         
-        user_prefix = f"userResources/{USER_ID}/Microsoft/SharePoint/"
-        existing_files = list_files_unified(prefix=user_prefix, user_id=USER_ID)
+        user_prefix = f"userResources/{current_sync.user_id}/Microsoft/SharePoint/"
+        existing_files = list_files_unified(prefix=user_prefix, user_id=current_sync.user_id)
         storage_file_map = {}
         for file in existing_files:
             file_name = file.get('name') or file.get('key', '')
@@ -1694,7 +1688,7 @@ async def sync_sharepoint_to_storage(auth_token):
         # Delete orphaned files
         for storage_name, storage_file in storage_file_map.items():
             if storage_name.startswith(user_prefix) and storage_name not in sharepoint_content_paths:
-                delete_file_unified(storage_name, USER_ID)
+                delete_file_unified(storage_name, current_sync.user_id)
                 
                 deleted_files.append({
                     'name': storage_name,
@@ -1704,7 +1698,7 @@ async def sync_sharepoint_to_storage(auth_token):
                 print(f"[{datetime.now().isoformat()}] Deleted orphan: {storage_name}")
         
         # Process content for upload
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for content in all_content:
@@ -1756,7 +1750,7 @@ async def sync_sharepoint_to_storage(auth_token):
                             mb_processed += int(result.get('size', 0))
                         except Exception:
                             pass
-                        await emit_sync_progress(USER_ID, 'microsoft', 'sharepoint', {
+                        await emit_sync_progress(current_sync.user_id, 'microsoft', 'sharepoint', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing content to storage',
@@ -1774,7 +1768,7 @@ async def sync_sharepoint_to_storage(auth_token):
         print("----------------------------------------------------------------------")
         print("📊 Phase 4: Summarizing - finalizing SharePoint sync results...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'microsoft', 'sharepoint', {
+        await emit_sync_progress(current_sync.user_id, 'microsoft', 'sharepoint', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -1806,7 +1800,7 @@ async def sync_sharepoint_to_storage(auth_token):
 
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        print(f"📊 Billable API Calls: {total_api_calls}")
+        print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         print(f"📦 Content Processed: {len(all_content)}")
         print(f"➕ Items Added: {files_added}")
         print(f"🔄 Items Updated: {files_updated}")
@@ -1822,7 +1816,7 @@ async def sync_sharepoint_to_storage(auth_token):
                 "removed": len(deleted_files),
                 "skipped": skipped_files,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -1840,7 +1834,7 @@ async def sync_sharepoint_to_storage(auth_token):
         print("----------------------------------------------------------------------")
         # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
         await update_data_source_sync_status(
-            USER_ID, 'microsoft', 'sharepoint', 'synced', 
+            current_sync.user_id, 'microsoft', 'sharepoint', 'synced', 
             files_total=sync_results['overall_profile']['total_files'],
             mb_total=sync_results['overall_profile']['total_size_bytes'],
             sync_results=sync_results
@@ -1876,8 +1870,8 @@ async def initiate_microsoft_sync(
 ):
     """Main entry point to sync Microsoft services to configured storage"""
     
-    # Initialize globals first
-    initialize_globals(user_id)
+    # Each sync gets its own context, so concurrent syncs do not share state
+    init_sync_context(user_id)
     
     # Refresh token once at entry (further requests refresh in make_request)
     auth_token = get_valid_microsoft_token(user_id, auth_token)
@@ -1900,19 +1894,19 @@ async def initiate_microsoft_sync(
     try:
         # Execute sync operations based on parameters
         if sync_onedrive:
-            await update_data_source_sync_status(USER_ID, 'microsoft', 'onedrive', 'syncing')
+            await update_data_source_sync_status(current_sync.user_id, 'microsoft', 'onedrive', 'syncing')
             results['onedrive'] = await sync_onedrive_to_storage(auth_token)
         
         if sync_sharepoint:
-            await update_data_source_sync_status(USER_ID, 'microsoft', 'sharepoint', 'syncing')
+            await update_data_source_sync_status(current_sync.user_id, 'microsoft', 'sharepoint', 'syncing')
             results['sharepoint'] = await sync_sharepoint_to_storage(auth_token)
         
         if sync_onenote:
-            await update_data_source_sync_status(USER_ID, 'microsoft', 'onenote', 'syncing')
+            await update_data_source_sync_status(current_sync.user_id, 'microsoft', 'onenote', 'syncing')
             results['onenote'] = await sync_onenote_to_storage(auth_token)
         
         if sync_outlook:
-            await update_data_source_sync_status(USER_ID, 'microsoft', 'outlook', 'syncing')
+            await update_data_source_sync_status(current_sync.user_id, 'microsoft', 'outlook', 'syncing')
             results['outlook'] = await sync_outlook_to_storage(
                 auth_token, outlook_folder, outlook_query, max_emails
             )
@@ -1,5 +1,6 @@
 import os
 import time
+import asyncio
 import concurrent.futures
 import io
 import traceback
@@ -15,13 +16,20 @@ from open_webui.utils.data.data_ingestion import (
     # Unified storage functions
     list_files_unified, upload_file_unified, delete_file_unified,
     # Utility functions
-    parse_date, format_bytes, validate_config, make_api_request, update_data_source_sync_status,
+    parse_date, format_bytes, validate_config, make_api_request, make_api_request_async, update_data_source_sync_status,
     # Backend configuration
     configure_storage_backend, get_current_backend
 )
 from open_webui.models.datatokens import OAuthTokens
 
 from open_webui.models.data import DataSources
+from open_webui.utils.data.sync_context import (
+    RateLimiter,
+    SyncContext,
+    SyncContextExecutor,
+    current_sync,
+    set_sync_context,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -71,12 +79,6 @@ async def emit_sync_progress(user_id: str, provider: str, layer: str, progress_d
     else:
         log.warning("Socket.IO instance not available for progress updates")
 
-# Global variables
-existing_files_cache = set()
-total_api_calls = 0
-script_start_time = time.time()
-USER_ID = ""
-
 # Load environment variables for Mineral OAuth
 MINERAL_CLIENT_ID = os.environ.get('MINERAL_CLIENT_ID')
 MINERAL_CLIENT_SECRET = os.environ.get('MINERAL_CLIENT_SECRET')
@@ -89,81 +91,82 @@ MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '4'))  # Parallel processing wor
 RATE_LIMIT_CALLS = int(os.environ.get('MINERAL_RATE_LIMIT_CALLS', '100'))  # Calls per hour
 RATE_LIMIT_WINDOW = int(os.environ.get('MINERAL_RATE_LIMIT_WINDOW', '3600'))  # 1 hour in seconds
 
-# Rate limiting state
-rate_limit_calls = []
+# Rate limiting state of requests made outside of a sync, each sync has its own
+rate_limiter = RateLimiter(RATE_LIMIT_CALLS, RATE_LIMIT_WINDOW)
 
-def initialize_globals(user_id):
-    """Initialize global variables properly"""
-    global USER_ID, existing_files_cache
-    
+def init_sync_context(user_id):
+    """Start the sync context of the current sync"""
     if not user_id:
         raise ValueError("user_id is required")
     
-    USER_ID = user_id
-    existing_files_cache = set()
+    return set_sync_context(SyncContext(
+        user_id=user_id,
+        provider='mineral',
+        token_refresher=lambda auth_token: get_valid_mineral_token(user_id, auth_token),
+        rate_limiter=RateLimiter(RATE_LIMIT_CALLS, RATE_LIMIT_WINDOW),
+    ))
 
 def load_existing_files(user_id):
     """Load existing files into memory for duplicate checking using unified interface"""
-    global existing_files_cache, USER_ID
     
     try:
         current_backend = get_current_backend()
         print(f"Loading existing files from {current_backend} storage for duplicate checking...")
-        user_prefix = f"userResources/{USER_ID}/Mineral/"
+        user_prefix = f"userResources/{current_sync.user_id}/Mineral/"
         
         existing_files = list_files_unified(prefix=user_prefix, user_id=user_id)
         
-        existing_files_cache = set()
+        current_sync.existing_files_cache = set()
         for file in existing_files:
             file_name = file.get('name') or file.get('key', '')
             if file_name and file_name.startswith(user_prefix):
-                existing_files_cache.add(file_name)
+                current_sync.existing_files_cache.add(file_name)
         
-        print(f"Found {len(existing_files_cache)} existing files in {current_backend} storage for user {USER_ID}")
+        print(f"Found {len(current_sync.existing_files_cache)} existing files in {current_backend} storage for user {current_sync.user_id}")
     except Exception as e:
         print(f"Error loading existing files: {str(e)}")
         log.error("Error loading existing files:", exc_info=True)
-        existing_files_cache = set()
+        current_sync.existing_files_cache = set()
 
 def file_exists_in_storage(file_path):
     """Check if file already exists in storage"""
-    global existing_files_cache
-    return file_path in existing_files_cache
+    return file_path in current_sync.existing_files_cache
 
 def check_rate_limit():
-    """Check if we're within rate limits"""
-    global rate_limit_calls
-    
-    current_time = time.time()
-    # Remove calls older than the rate limit window
-    rate_limit_calls = [call_time for call_time in rate_limit_calls if current_time - call_time < RATE_LIMIT_WINDOW]
-    
-    if len(rate_limit_calls) >= RATE_LIMIT_CALLS:
-        oldest_call = min(rate_limit_calls)
-        sleep_time = RATE_LIMIT_WINDOW - (current_time - oldest_call)
-        if sleep_time > 0:
-            print(f"Rate limit reached. Sleeping for {sleep_time:.2f} seconds...")
-            time.sleep(sleep_time)
-            # Clean up the list after sleeping
-            current_time = time.time()
-            rate_limit_calls = [call_time for call_time in rate_limit_calls if current_time - call_time < RATE_LIMIT_WINDOW]
+    """Wait until we're within rate limits, and count the call"""
+    (current_sync.rate_limiter or rate_limiter).acquire()
 
 def make_mineral_request(url, method='GET', headers=None, params=None, data=None, stream=False, auth_token=None):
     """Helper function to make Mineral API requests with error handling, rate limiting, and token auto-refresh"""
-    global total_api_calls, rate_limit_calls, USER_ID
     
     check_rate_limit()
     
-    total_api_calls += 1
-    rate_limit_calls.append(time.time())
+    current_sync.count_api_call()
     
     # Refresh token if possible
-    if auth_token and USER_ID:
-        auth_token = get_valid_mineral_token(USER_ID, auth_token)
+    if auth_token and current_sync.user_id:
+        auth_token = current_sync.refresh_token(auth_token)
     
     return make_api_request(url, method=method, headers=headers, params=params, data=data, stream=stream, auth_token=auth_token)
 
-def list_mineral_handbooks(auth_token, base_url):
+async def check_rate_limit_async():
+    """Async version of check_rate_limit, waiting without blocking the event loop"""
+    await (current_sync.rate_limiter or rate_limiter).acquire_async()
+
+async def make_mineral_request_async(url, method='GET', headers=None, params=None, data=None, auth_token=None):
+    """Async version of make_mineral_request, for requests made from the sync coroutines"""
+    
+    await check_rate_limit_async()
+    
+    current_sync.count_api_call()
+    
+    # Refresh token if possible
+    if auth_token and current_sync.user_id:
+        auth_token = current_sync.refresh_token(auth_token)
+    
+    return await make_api_request_async(url, method=method, headers=headers, params=params, data=data, auth_token=auth_token)
+
+async def list_mineral_handbooks(auth_token, base_url):
     """List all handbooks available in Mineral"""
     try:
         url = f"{base_url}/v2/handbooks"
@@ -172,7 +175,7 @@ def list_mineral_handbooks(auth_token, base_url):
             'Content-Type': 'application/json'
         }
         
-        response = make_mineral_request(url, headers=headers)
+        response = await make_mineral_request_async(url, headers=headers)
         return response.get('handbooks', []) if isinstance(response, dict) else response
         
     except Exception as error:
@@ -312,9 +315,9 @@ def download_and_upload_mineral_handbook(handbook_id, handbook_info, auth_token,
         safe_title = title.replace('/', '_').replace('\\', '_').replace(':', '_')
         
         # Check if any format already exists (DOCX, PDF, or HTML)
-        docx_path = f"userResources/{USER_ID}/Mineral/Handbooks/tokenized-documents/{safe_title}.docx"
-        pdf_path = f"userResources/{USER_ID}/Mineral/Handbooks/tokenized-documents/{safe_title}.pdf"
-        html_path = f"userResources/{USER_ID}/Mineral/Handbooks/tokenized-documents/{safe_title}.html"
+        docx_path = f"userResources/{current_sync.user_id}/Mineral/Handbooks/tokenized-documents/{safe_title}.docx"
+        pdf_path = f"userResources/{current_sync.user_id}/Mineral/Handbooks/tokenized-documents/{safe_title}.pdf"
+        html_path = f"userResources/{current_sync.user_id}/Mineral/Handbooks/tokenized-documents/{safe_title}.html"
         
         if file_exists_in_storage(docx_path) or file_exists_in_storage(pdf_path) or file_exists_in_storage(html_path):
             print(f"Skipping existing handbook: {title}")
@@ -327,21 +330,21 @@ def download_and_upload_mineral_handbook(handbook_id, handbook_info, auth_token,
             return None
         
         # Create file path with appropriate extension
-        file_path = f"userResources/{USER_ID}/Mineral/Handbooks/tokenized-documents/{safe_title}{file_ext}"
+        file_path = f"userResources/{current_sync.user_id}/Mineral/Handbooks/tokenized-documents/{safe_title}{file_ext}"
         
         # Upload using unified storage interface
         success = upload_file_unified(
             handbook_content.getvalue(),
             file_path,
             content_type,
-            USER_ID
+            current_sync.user_id
         )
         
         if not success:
             return None
         
         # Add to cache
-        existing_files_cache.add(file_path)
+        current_sync.existing_files_cache.add(file_path)
         
         upload_result = {
             'path': file_path,
@@ -364,7 +367,6 @@ def download_and_upload_mineral_handbook(handbook_id, handbook_info, auth_token,
 
 async def sync_mineral_to_storage(auth_token, base_url):
     """Sync Mineral handbooks to unified storage"""
-    global USER_ID
     
     print('🔄 Starting Mineral HR sync process...')
 
@@ -374,7 +376,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'mineral', 'handbooks', {
+    await emit_sync_progress(current_sync.user_id, 'mineral', 'handbooks', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -394,14 +396,14 @@ async def sync_mineral_to_storage(auth_token, base_url):
     
     try:
         # Get Mineral handbooks
-        handbooks = list_mineral_handbooks(auth_token, base_url)
+        handbooks = await list_mineral_handbooks(auth_token, base_url)
         print(f"Found {len(handbooks)} Mineral handbooks")
 
         # Discovery complete - set totals
         files_total = len(handbooks)
         mb_total = 0
         await update_data_source_sync_status(
-            USER_ID, 'mineral', 'handbooks', 'syncing',
+            current_sync.user_id, 'mineral', 'handbooks', 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
@@ -410,7 +412,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
         print("----------------------------------------------------------------------")
         print("🔎 Phase 2: Discovery - analyzing handbooks and preparing sync plan...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'mineral', 'handbooks', {
+        await emit_sync_progress(current_sync.user_id, 'mineral', 'handbooks', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing handbooks and preparing sync plan',
@@ -421,7 +423,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
             'sync_start_time': sync_start_time
         })
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
             futures = []
             
             for handbook in handbooks:
@@ -434,9 +436,9 @@ async def sync_mineral_to_storage(auth_token, base_url):
                 safe_title = title.replace('/', '_').replace('\\', '_').replace(':', '_')
                 
                 # Check if any format already exists
-                docx_path = f"userResources/{USER_ID}/Mineral/Handbooks/tokenized-documents/{safe_title}.docx"
-                pdf_path = f"userResources/{USER_ID}/Mineral/Handbooks/tokenized-documents/{safe_title}.pdf"
-                html_path = f"userResources/{USER_ID}/Mineral/Handbooks/tokenized-documents/{safe_title}.html"
+                docx_path = f"userResources/{current_sync.user_id}/Mineral/Handbooks/tokenized-documents/{safe_title}.docx"
+                pdf_path = f"userResources/{current_sync.user_id}/Mineral/Handbooks/tokenized-documents/{safe_title}.pdf"
+                html_path = f"userResources/{current_sync.user_id}/Mineral/Handbooks/tokenized-documents/{safe_title}.html"
                 
                 if file_exists_in_storage(docx_path) or file_exists_in_storage(pdf_path) or file_exists_in_storage(html_path):
                     print(f"⏭️  Skipping existing handbook: {title}")
@@ -466,17 +468,17 @@ async def sync_mineral_to_storage(auth_token, base_url):
             print("----------------------------------------------------------------------")
             for future, title in futures:
                 try:
-                    result = future.result()
+                    result = await asyncio.wrap_future(future)
                     if result:
                         uploaded_files.append(result)
-                        existing_files_cache.add(result['path'])  # Add to cache
+                        current_sync.existing_files_cache.add(result['path'])  # Add to cache
                         format_stats[result['format']] += 1
                         files_processed += 1
                         try:
                             mb_processed += int(result.get('size', 0))
                         except Exception:
                             pass
-                        await emit_sync_progress(USER_ID, 'mineral', 'handbooks', {
+                        await emit_sync_progress(current_sync.user_id, 'mineral', 'handbooks', {
                             'phase': 'processing',
                             'phase_name': 'Phase 3: Processing',
                             'phase_description': 'synchronizing handbooks to storage',
@@ -498,7 +500,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
         print("----------------------------------------------------------------------")
         print("📊 Phase 4: Summarizing - finalizing Mineral sync results...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'mineral', 'handbooks', {
+        await emit_sync_progress(current_sync.user_id, 'mineral', 'handbooks', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -523,14 +525,14 @@ async def sync_mineral_to_storage(auth_token, base_url):
                 print(f"   {format_type}: {count}")
 
         # Accounting Metrics (Google-style)
-        total_runtime_ms = int((time.time() - script_start_time) * 1000)
+        total_runtime_ms = int((time.time() - current_sync.script_start_time) * 1000)
         total_seconds = total_runtime_ms // 1000
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
         seconds = total_seconds % 60
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        print(f"📊 Billable API Calls: {total_api_calls}")
+        print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         print(f"📦 Handbooks Processed: {files_total}")
         print(f"➕ Handbooks Added: {len(uploaded_files)}")
         print(f"🔄 Handbooks Updated: 0")
@@ -545,7 +547,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
                 "removed": 0,
                 "skipped": skipped_files,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -564,7 +566,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
         print("----------------------------------------------------------------------")
         # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
         await update_data_source_sync_status(
-            USER_ID, 'mineral', 'handbooks', 'synced',
+            current_sync.user_id, 'mineral', 'handbooks', 'synced',
             files_total=sync_results['overall_profile']['total_files'],
             mb_total=sync_results['overall_profile']['total_size_bytes'],
             sync_results=sync_results
@@ -585,7 +587,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
         files_processed = len(uploaded_files)
         if files_processed == 0:
             # Zero files processed → ERROR state
-            await update_data_source_sync_status(USER_ID, 'mineral', 'handbooks', 'error')
+            await update_data_source_sync_status(current_sync.user_id, 'mineral', 'handbooks', 'error')
         else:
             # Files were processed → log error and continue to embedding
             sync_results = {
@@ -595,7 +597,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
                     "removed": 0,
                     "skipped": skipped_files,
                     "runtime_ms": total_runtime_ms,
-                    "api_calls": total_api_calls,
+                    "api_calls": current_sync.total_api_calls,
                     "skip_reasons": {},
                     "sync_timestamp": int(time.time())
                 },
@@ -611,7 +613,7 @@ async def sync_mineral_to_storage(auth_token, base_url):
                 }
             }
             # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-            await update_data_source_sync_status(USER_ID, 'mineral', 'handbooks', 'synced', sync_results=sync_results)
+            await update_data_source_sync_status(current_sync.user_id, 'mineral', 'handbooks', 'synced', sync_results=sync_results)
         
         raise error
 
@@ -637,11 +639,9 @@ async def initiate_mineral_sync(
     Returns:
         dict: Summary of sync operations
     """
-    global script_start_time
-    global total_api_calls
 
-    # Initialize globals first
-    initialize_globals(user_id)
+    # Each sync gets its own context, so concurrent syncs do not share state
+    init_sync_context(user_id)
 
     # Refresh token once at entry (further requests refresh in make_mineral_request)
     access_token = get_valid_mineral_token(user_id, access_token)
@@ -649,26 +649,23 @@ async def initiate_mineral_sync(
     current_backend = get_current_backend()
     log.info(f"Using storage backend: {current_backend}")
 
-    total_api_calls = 0
-    script_start_time = time.time()
-
-    log.info(f"Initiating Mineral HR sync for user {USER_ID} using {current_backend} storage")
+    log.info(f"Initiating Mineral HR sync for user {current_sync.user_id} using {current_backend} storage")
     
     # Load existing files for duplicate checking
     load_existing_files(user_id)
     
     try:
         # Update sync status
-        await update_data_source_sync_status(USER_ID, 'mineral', 'handbooks', 'syncing')
+        await update_data_source_sync_status(current_sync.user_id, 'mineral', 'handbooks', 'syncing')
         
         # Sync handbooks
         results = await sync_mineral_to_storage(access_token, base_url)
         
         # Enhanced summary
-        total_runtime = int((time.time() - script_start_time) * 1000)
+        total_runtime = int((time.time() - current_sync.script_start_time) * 1000)
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_runtime/1000):.2f} seconds")
-        print(f"📊 Total API Calls: {total_api_calls}")
+        print(f"📊 Total API Calls: {current_sync.total_api_calls}")
         print(f"📚 Handbooks Processed: {results['uploaded'] + results['skipped']}")
         print(f"💾 Storage Backend: {current_backend}")
         
@@ -680,7 +677,7 @@ async def initiate_mineral_sync(
         log.error("Mineral HR sync failed:", exc_info=True)
         # Update sync status to failed
         try:
-            await update_data_source_sync_status(USER_ID, 'mineral', 'handbooks', 'failed')
+            await update_data_source_sync_status(current_sync.user_id, 'mineral', 'handbooks', 'failed')
         except:
             pass  # Don't let status update failure mask the original error
         raise error
\ No newline at end of file
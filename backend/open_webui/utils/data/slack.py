@@ -1,5 +1,6 @@
 import os
 import time
+import asyncio
 import concurrent.futures
 import io
 import logging
@@ -9,6 +10,7 @@ from urllib.parse import urlencode
 from datetime import timezone
 import random
 import traceback
+import httpx
 
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -16,11 +18,18 @@ from open_webui.utils.data.data_ingestion import (
     # Unified storage functions
     list_files_unified, upload_file_unified, delete_file_unified, download_file_unified,
     # Utility functions
-    parse_date, format_bytes, validate_config, make_api_request, update_data_source_sync_status,
+    parse_date, format_bytes, validate_config, make_api_request, make_api_request_async, update_data_source_sync_status,
     # Backend configuration
     configure_storage_backend, get_current_backend
 )
 from open_webui.models.datatokens import OAuthTokens
+from open_webui.utils.data.sync_context import (
+    SyncContext,
+    SyncContextExecutor,
+    current_sync,
+    iter_completed,
+    set_sync_context,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -70,13 +79,7 @@ async def emit_sync_progress(user_id: str, provider: str, layer: str, progress_d
     else:
         log.warning("Socket.IO instance not available for progress updates")
 
-# Metrics tracking
-total_api_calls = 0
-script_start_time = time.time()
-existing_files_cache = set()
-
 # Load environment variables
-USER_ID = ""
 MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '4'))  # Parallel processing workers
 
 # Slack API endpoints
@@ -111,43 +114,42 @@ LAYER_CONFIG = {
     }
 }
 
-def initialize_globals(user_id):
-    """Initialize global variables properly"""
-    global USER_ID, existing_files_cache
-    
+def init_sync_context(user_id):
+    """Start the sync context of the current sync"""
     if not user_id:
         raise ValueError("user_id is required")
     
-    USER_ID = user_id
-    existing_files_cache = set()
+    return set_sync_context(SyncContext(
+        user_id=user_id,
+        provider='slack',
+        token_refresher=lambda auth_token: get_valid_slack_token(user_id, auth_token),
+    ))
 
 def load_existing_files(user_id):
     """Load existing files into memory for duplicate checking using unified interface"""
-    global existing_files_cache, USER_ID
     
     try:
         current_backend = get_current_backend()
         print(f"Loading existing files from {current_backend} storage for duplicate checking...")
-        user_prefix = f"userResources/{USER_ID}/Slack/"
+        user_prefix = f"userResources/{current_sync.user_id}/Slack/"
         
         existing_files = list_files_unified(prefix=user_prefix, user_id=user_id)
         
-        existing_files_cache = set()
+        current_sync.existing_files_cache = set()
         for file in existing_files:
             file_name = file.get('name') or file.get('key', '')
             if file_name and file_name.startswith(user_prefix):
-                existing_files_cache.add(file_name)
+                current_sync.existing_files_cache.add(file_name)
         
-        print(f"Found {len(existing_files_cache)} existing files in {current_backend} storage for user {USER_ID}")
+        print(f"Found {len(current_sync.existing_files_cache)} existing files in {current_backend} storage for user {current_sync.user_id}")
     except Exception as e:
         print(f"Error loading existing files: {str(e)}")
         log.error("Error loading existing files:", exc_info=True)
-        existing_files_cache = set()
+        current_sync.existing_files_cache = set()
 
 def file_exists_in_storage(file_path):
     """Check if file already exists in storage"""
-    global existing_files_cache
-    return file_path in existing_files_cache
+    return file_path in current_sync.existing_files_cache
 
 def safe_parse_date(timestamp):
     """Safely parse various timestamp formats from Slack"""
@@ -180,14 +182,13 @@ def safe_parse_date(timestamp):
 
 def make_request_with_retry(url, method='GET', headers=None, params=None, data=None, stream=False, auth_token=None):
     """Helper function to make API requests with retry logic for rate limiting"""
-    global total_api_calls
     
     # Track rate limit info across attempts
     last_rate_limit_reset = None
     last_remaining_requests = None
     
     for attempt in range(MAX_RETRIES):
-        total_api_calls += 1
+        current_sync.count_api_call()
         
         try:
             response = make_api_request(url, method=method, headers=headers, params=params, data=data, stream=stream, auth_token=auth_token)
@@ -316,18 +317,53 @@ def calculate_proactive_delay(remaining_requests, reset_time):
 
 def make_request(url, method='GET', headers=None, params=None, data=None, stream=False, auth_token=None):
     """Helper function to make API requests with error handling and token auto-refresh"""
-    global USER_ID
-    if auth_token and USER_ID:
-        auth_token = get_valid_slack_token(USER_ID, auth_token)
+    if auth_token and current_sync.user_id:
+        auth_token = current_sync.refresh_token(auth_token)
     return make_request_with_retry(url, method=method, headers=headers, params=params, data=data, stream=stream, auth_token=auth_token)
 
-def get_slack_user_info(auth_token):
+async def make_request_with_retry_async(url, method='GET', headers=None, params=None, data=None, auth_token=None):
+    """Async version of make_request_with_retry, waiting out rate limits without blocking the event loop"""
+    for attempt in range(MAX_RETRIES):
+        current_sync.count_api_call()
+        
+        try:
+            response = await make_api_request_async(url, method=method, headers=headers, params=params, data=data, auth_token=auth_token)
+            
+            # Slack reports some rate limits in the JSON body
+            if isinstance(response, dict) and not response.get('ok') and response.get('error') == 'ratelimited':
+                if attempt < MAX_RETRIES - 1:
+                    delay = calculate_delay(attempt)
+                    print(f"Slack API rate limited, waiting {delay:.2f}s before retry {attempt + 1}/{MAX_RETRIES}")
+                    await asyncio.sleep(delay)
+                    continue
+                else:
+                    raise Exception(f"Slack API rate limited after {MAX_RETRIES} attempts")
+            
+            return response
+            
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429 and attempt < MAX_RETRIES - 1:
+                delay = get_optimal_delay(e.response, attempt)
+                print(f"HTTP 429 rate limited, waiting {delay:.2f}s before retry {attempt + 1}/{MAX_RETRIES}")
+                await asyncio.sleep(delay)
+                continue
+            raise
+    
+    raise Exception(f"Failed after {MAX_RETRIES} attempts")
+
+async def make_request_async(url, method='GET', headers=None, params=None, data=None, auth_token=None):
+    """Async version of make_request, for requests made from the sync coroutines"""
+    if auth_token and current_sync.user_id:
+        auth_token = current_sync.refresh_token(auth_token)
+    return await make_request_with_retry_async(url, method=method, headers=headers, params=params, data=data, auth_token=auth_token)
+
+async def get_slack_user_info(auth_token):
     """Get information about the authenticated user"""
     try:
         url = f"{SLACK_API_BASE}/auth.test"
         headers = {"Authorization": f"Bearer {auth_token}"}
         
-        response = make_request(url, headers=headers, auth_token=auth_token)
+        response = await make_request_async(url, headers=headers, auth_token=auth_token)
 
         log.info(f"Slack user info response: {response}")
         
@@ -381,14 +417,14 @@ def check_user_membership(conversation_id, auth_token, target_user_id):
         print(f"Error checking membership for {conversation_id}: {str(error)}")
         return False
 
-def check_user_is_member(conversation_id, auth_token):
+async def check_user_is_member(conversation_id, auth_token):
     """Check if the authenticated user is a member of the conversation"""
     try:
         url = f"{SLACK_API_BASE}/conversations.info"
         headers = {"Authorization": f"Bearer {auth_token}"}
         params = {'channel': conversation_id}
         
-        response = make_request(url, headers=headers, params=params, auth_token=auth_token)
+        response = await make_request_async(url, headers=headers, params=params, auth_token=auth_token)
         
         if response.get('ok'):
             channel_info = response.get('channel', {})
@@ -432,7 +468,7 @@ def join_channel_if_user_is_member(conversation_id, auth_token, target_user_id,
         print(f"Error joining channel {conversation_id}: {str(error)}")
         return False
 
-def get_conversations_list(auth_token, layer=None):
+async def get_conversations_list(auth_token, layer=None):
     """Get list of conversations the user has access to and is a member of, filtered by layer"""
     try:
         all_conversations = []
@@ -472,7 +508,7 @@ def get_conversations_list(auth_token, layer=None):
             url = f"{SLACK_API_BASE}/conversations.list"
             headers = {"Authorization": f"Bearer {auth_token}"}
             
-            response = make_request(url, headers=headers, params=params, auth_token=auth_token)
+            response = await make_request_async(url, headers=headers, params=params, auth_token=auth_token)
             
             if not response.get('ok'):
                 raise Exception(f"Failed to get conversations: {response.get('error')}")
@@ -488,7 +524,7 @@ def get_conversations_list(auth_token, layer=None):
                 elif conv.get('is_member', False):
                     all_conversations.append(conv)
                 # For channels where is_member is not reliable, do an explicit check
-                elif check_user_is_member(conv['id'], auth_token):
+                elif await check_user_is_member(conv['id'], auth_token):
                     all_conversations.append(conv)
             
             # Check for pagination
@@ -619,7 +655,7 @@ def check_file_exists_in_storage(file_id, user_id):
     """Check if a file with the given Slack file ID already exists in storage using unified interface"""
     try:
         # List all files in the user's Slack files directory
-        user_prefix = f"userResources/{USER_ID}/Slack/Files/"
+        user_prefix = f"userResources/{current_sync.user_id}/Slack/Files/"
         storage_files = list_files_unified(prefix=user_prefix, user_id=user_id)
         
         # Check if any file has this file ID in its metadata or path
@@ -636,7 +672,7 @@ def check_file_exists_in_storage(file_id, user_id):
         print(f"Error checking if file exists in storage: {str(error)}")
         return None
 
-def get_user_direct_messages(auth_token, user_id):
+async def get_user_direct_messages(auth_token, user_id):
     """Get all direct message conversations for the user"""
     try:
         # Get IM conversations specifically
@@ -648,7 +684,7 @@ def get_user_direct_messages(auth_token, user_id):
             'limit': 1000
         }
         
-        response = make_request(url, headers=headers, params=params, auth_token=auth_token)
+        response = await make_request_async(url, headers=headers, params=params, auth_token=auth_token)
         
         if response.get('ok'):
             return response.get('channels', [])
@@ -727,7 +763,7 @@ def get_conversation_replies(conversation_id, thread_ts, auth_token):
         print(f"Error getting thread replies: {str(error)}")
         return []
 
-def get_user_info_batch(auth_token, user_ids):
+async def get_user_info_batch(auth_token, user_ids):
     """Get user information for multiple users"""
     try:
         user_info_map = {}
@@ -742,7 +778,7 @@ def get_user_info_batch(auth_token, user_ids):
                     headers = {"Authorization": f"Bearer {auth_token}"}
                     params = {'user': user_id}
                     
-                    response = make_request(url, headers=headers, params=params, auth_token=auth_token)
+                    response = await make_request_async(url, headers=headers, params=params, auth_token=auth_token)
                     
                     if response.get('ok'):
                         user_info = response.get('user', {})
@@ -759,7 +795,7 @@ def get_user_info_batch(auth_token, user_ids):
         print(f"Error getting user info batch: {str(error)}")
         return {}
 
-def get_user_files(auth_token, user_id):
+async def get_user_files(auth_token, user_id):
     """Get files uploaded by the user"""
     try:
         all_files = []
@@ -775,7 +811,7 @@ def get_user_files(auth_token, user_id):
             url = f"{SLACK_API_BASE}/files.list"
             headers = {"Authorization": f"Bearer {auth_token}"}
             
-            response = make_request(url, headers=headers, params=params, auth_token=auth_token)
+            response = await make_request_async(url, headers=headers, params=params, auth_token=auth_token)
             
             if not response.get('ok'):
                 print(f"Failed to get files: {response.get('error')}")
@@ -847,15 +883,15 @@ def process_conversation(conversation, auth_token, slack_user_id, user_info_map,
         if conversation.get('is_im'):
             other_user = conversation.get('user', 'unknown_user')
             other_user_name = user_info_map.get(other_user, other_user)
-            file_path = f"userResources/{USER_ID}/Slack/{folder_name}/{other_user_name}.json"
+            file_path = f"userResources/{current_sync.user_id}/Slack/{folder_name}/{other_user_name}.json"
         elif conversation.get('is_mpim'):
-            file_path = f"userResources/{USER_ID}/Slack/{folder_name}/{conversation_name}.json"
+            file_path = f"userResources/{current_sync.user_id}/Slack/{folder_name}/{conversation_name}.json"
         else:
-            file_path = f"userResources/{USER_ID}/Slack/{folder_name}/{conversation_name}.json"
+            file_path = f"userResources/{current_sync.user_id}/Slack/{folder_name}/{conversation_name}.json"
         
         # Check if conversation already exists in storage
         existing_conversation_data = download_existing_conversation_from_storage(
-            file_path, USER_ID
+            file_path, current_sync.user_id
         )
         
         existing_messages = []
@@ -938,7 +974,7 @@ def process_file(file_info, auth_token, layer=None):
         print(f"Processing file: {file_name} ({format_bytes(file_size)})")
         
         # Check if file already exists in storage
-        existing_storage_file = check_file_exists_in_storage(file_id, USER_ID)
+        existing_storage_file = check_file_exists_in_storage(file_id, current_sync.user_id)
         
         if existing_storage_file:
             print(f"⏭️  File {file_name} already exists in storage, skipping...")
@@ -961,7 +997,7 @@ def process_file(file_info, auth_token, layer=None):
         
         # Create file path with file ID to ensure uniqueness
         safe_filename = f"{file_name}_{file_id}"
-        file_path = f"userResources/{USER_ID}/Slack/{folder_name}/{safe_filename}"
+        file_path = f"userResources/{current_sync.user_id}/Slack/{folder_name}/{safe_filename}"
         
         # Use safe_parse_date for file timestamp
         file_timestamp = file_info.get('timestamp')
@@ -990,11 +1026,11 @@ def upload_conversation_to_storage(conversation_data):
             json_content.encode('utf-8'),
             conversation_data['path'],
             'application/json',
-            USER_ID
+            current_sync.user_id
         )
         
         if success:
-            existing_files_cache.add(conversation_data['path'])
+            current_sync.existing_files_cache.add(conversation_data['path'])
         
         return success
         
@@ -1009,11 +1045,11 @@ def upload_file_to_storage(file_data):
             file_data['content'].getvalue(),
             file_data['path'],
             file_data['mime_type'],
-            USER_ID
+            current_sync.user_id
         )
         
         if success:
-            existing_files_cache.add(file_data['path'])
+            current_sync.existing_files_cache.add(file_data['path'])
         
         return success
         
@@ -1023,7 +1059,6 @@ def upload_file_to_storage(file_data):
 
 async def sync_slack_to_storage(auth_token, layer=None):
     """Main function to sync Slack data to unified storage with incremental updates and layer filtering"""
-    global total_api_calls
     
     layer_display = f" ({layer})" if layer else ""
     print(f'🔄 Starting Slack sync process{layer_display}...')
@@ -1034,7 +1069,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
     print("----------------------------------------------------------------------")
     print("🚀 Phase 1: Starting - preparing sync process...")
     print("----------------------------------------------------------------------")
-    await emit_sync_progress(USER_ID, 'slack', layer or 'all', {
+    await emit_sync_progress(current_sync.user_id, 'slack', layer or 'all', {
         'phase': 'starting',
         'phase_name': 'Phase 1: Starting',
         'phase_description': 'preparing sync process',
@@ -1054,7 +1089,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
     
     try:
         # Get user info
-        user_info = get_slack_user_info(auth_token)
+        user_info = await get_slack_user_info(auth_token)
         if not user_info:
             raise ValueError("Could not retrieve user information")
         
@@ -1074,21 +1109,21 @@ async def sync_slack_to_storage(auth_token, layer=None):
             # Process conversations for this layer
             if layer_config['conversation_types']:
                 print(f"Fetching {layer} conversations...")
-                conversations = get_conversations_list(auth_token, layer)
+                conversations = await get_conversations_list(auth_token, layer)
                 unique_conversations = conversations
                 print(f"Found {len(unique_conversations)} {layer} conversations")
             
             # Process files for this layer
             if layer_config['include_files']:
                 print(f"Fetching {layer}...")
-                files = get_user_files(auth_token, slack_user_id)
+                files = await get_user_files(auth_token, slack_user_id)
                 print(f"Found {len(files)} files")
         
         else:
             # No specific layer - process all (fallback behavior)
             print("No specific layer specified, processing all Slack data...")
-            conversations = get_conversations_list(auth_token)
-            direct_messages = get_user_direct_messages(auth_token, slack_user_id)
+            conversations = await get_conversations_list(auth_token)
+            direct_messages = await get_user_direct_messages(auth_token, slack_user_id)
             
             # Combine and deduplicate conversations
             all_conversations = conversations + direct_messages
@@ -1102,7 +1137,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
             print(f"Found {len(unique_conversations)} total conversations")
             
             # Get files
-            files = get_user_files(auth_token, slack_user_id)
+            files = await get_user_files(auth_token, slack_user_id)
             print(f"Found {len(files)} files")
         
         # Discovery complete - set totals and emit
@@ -1110,7 +1145,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         # mb_total initially includes only known file sizes; conversation sizes will be accumulated during processing
         mb_total = sum(int(f.get('size') or 0) for f in files)
         await update_data_source_sync_status(
-            USER_ID, 'slack', layer, 'syncing',
+            current_sync.user_id, 'slack', layer, 'syncing',
             files_total=files_total,
             mb_total=mb_total,
             sync_start_time=sync_start_time
@@ -1119,7 +1154,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         print("----------------------------------------------------------------------")
         print("🔎 Phase 2: Discovery - analyzing conversations and files and preparing sync plan...")
         print("----------------------------------------------------------------------")
-        await emit_sync_progress(USER_ID, 'slack', layer or 'all', {
+        await emit_sync_progress(current_sync.user_id, 'slack', layer or 'all', {
             'phase': 'discovery',
             'phase_name': 'Phase 2: Discovery',
             'phase_description': 'analyzing conversations and files and preparing sync plan',
@@ -1135,7 +1170,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         if unique_conversations:
             print("Fetching user information for naming...")
             dm_user_ids = [conv.get('user') for conv in unique_conversations if conv.get('is_im') and conv.get('user')]
-            user_info_map = get_user_info_batch(auth_token, dm_user_ids) if dm_user_ids else {}
+            user_info_map = await get_user_info_batch(auth_token, dm_user_ids) if dm_user_ids else {}
         
         # Initialize processing counters
         files_processed = 0
@@ -1151,7 +1186,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
             print("----------------------------------------------------------------------")
             print(f"\nProcessing {len(unique_conversations)} conversations...")
             
-            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
                 # Submit conversation processing tasks
                 conv_futures = {
                     executor.submit(
@@ -1166,7 +1201,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
                 }
                 
                 # Process completed conversation tasks
-                for future in concurrent.futures.as_completed(conv_futures):
+                async for future in iter_completed(conv_futures):
                     try:
                         conv_data = future.result()
                         if conv_data:
@@ -1200,7 +1235,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
                                 # Grow total to include conversations processed so far so UI has a meaningful denominator
                                 dynamic_mb_total = (mb_total or 0) + conv_total_size + conv_size
                                 conv_total_size += conv_size
-                                await emit_sync_progress(USER_ID, 'slack', layer or 'all', {
+                                await emit_sync_progress(current_sync.user_id, 'slack', layer or 'all', {
                                     'phase': 'processing',
                                     'phase_name': 'Phase 3: Processing',
                                     'phase_description': 'synchronizing conversations and files to storage',
@@ -1219,7 +1254,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         if files:
             print(f"\nProcessing {len(files)} files...")
             
-            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            with SyncContextExecutor(max_workers=MAX_WORKERS) as executor:
                 # Submit file processing tasks
                 file_futures = {
                     executor.submit(
@@ -1232,7 +1267,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
                 }
                 
                 # Process completed file tasks
-                for future in concurrent.futures.as_completed(file_futures):
+                async for future in iter_completed(file_futures):
                     try:
                         file_data = future.result()
                         if file_data:
@@ -1264,7 +1299,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
                                         pass
                                     # Use dynamic total that includes conversations processed so far
                                     dynamic_mb_total = (mb_total or 0) + conv_total_size
-                                    await emit_sync_progress(USER_ID, 'slack', layer or 'all', {
+                                    await emit_sync_progress(current_sync.user_id, 'slack', layer or 'all', {
                                         'phase': 'processing',
                                         'phase_name': 'Phase 3: Processing',
                                         'phase_description': 'synchronizing conversations and files to storage',
@@ -1283,12 +1318,12 @@ async def sync_slack_to_storage(auth_token, layer=None):
         if layer and layer in LAYER_CONFIG:
             # Only clean up files in this specific layer's folder
             layer_folder = LAYER_CONFIG[layer]['folder']
-            user_prefix = f"userResources/{USER_ID}/Slack/{layer_folder}/"
+            user_prefix = f"userResources/{current_sync.user_id}/Slack/{layer_folder}/"
         else:
             # Clean up all Slack files
-            user_prefix = f"userResources/{USER_ID}/Slack/"
+            user_prefix = f"userResources/{current_sync.user_id}/Slack/"
 
-        storage_files = list_files_unified(prefix=user_prefix, user_id=USER_ID)
+        storage_files = list_files_unified(prefix=user_prefix, user_id=current_sync.user_id)
         storage_file_map = {}
         for file in storage_files:
             file_name = file.get('name') or file.get('key', '')
@@ -1299,7 +1334,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         
         for storage_name, storage_file in storage_file_map.items():
             if storage_name.startswith(user_prefix) and storage_name not in all_current_paths:
-                delete_file_unified(storage_name, USER_ID)
+                delete_file_unified(storage_name, current_sync.user_id)
                 
                 deleted_files.append({
                     'name': storage_name,
@@ -1315,7 +1350,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         print("----------------------------------------------------------------------")
         # Use final dynamic total that includes all processed conversations
         final_mb_total = (mb_total or 0) + (conv_total_size if 'conv_total_size' in locals() else 0)
-        await emit_sync_progress(USER_ID, 'slack', layer or 'all', {
+        await emit_sync_progress(current_sync.user_id, 'slack', layer or 'all', {
             'phase': 'summarizing',
             'phase_name': 'Phase 4: Summarizing',
             'phase_description': 'finalizing and updating status',
@@ -1338,7 +1373,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         for file in deleted_files:
             print(f" - {file['name']} | {format_bytes(file['size'])} | Created: {file['timeCreated']}")
         
-        total_runtime_ms = int((time.time() - script_start_time) * 1000)
+        total_runtime_ms = int((time.time() - current_sync.script_start_time) * 1000)
         total_seconds = total_runtime_ms // 1000
         hours = total_seconds // 3600
         minutes = (total_seconds % 3600) // 60
@@ -1347,7 +1382,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         # Accounting Metrics (Google-style)
         print("\nAccounting Metrics:")
         print(f"⏱️  Total Runtime: {(total_seconds/60):.1f} minutes ({hours:02d}:{minutes:02d}:{seconds:02d})")
-        print(f"📊 Billable API Calls: {total_api_calls}")
+        print(f"📊 Billable API Calls: {current_sync.total_api_calls}")
         print(f"💬 Conversations Processed: {len(unique_conversations)}")
         print(f"📁 Files Processed: {len(files)}")
         print(f"🗑️  Orphans Removed: {len(deleted_files)}")
@@ -1370,7 +1405,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
                 "removed": len(deleted_files),
                 "skipped": skipped_files,
                 "runtime_ms": total_runtime_ms,
-                "api_calls": total_api_calls,
+                "api_calls": current_sync.total_api_calls,
                 "skip_reasons": {},
                 "sync_timestamp": int(time.time())
             },
@@ -1388,7 +1423,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         print("🧠 Phase 5: Embedding - vectorizing data for AI processing...")
         print("----------------------------------------------------------------------")
         await update_data_source_sync_status(
-            USER_ID, 'slack', layer, 'synced',
+            current_sync.user_id, 'slack', layer, 'synced',
             files_total=sync_results['overall_profile']['total_files'],
             mb_total=sync_results['overall_profile']['total_size_bytes'],
             sync_results=sync_results
@@ -1403,7 +1438,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
         files_processed = len(uploaded_files) + len(deleted_files)
         if files_processed == 0:
             # Zero files processed → ERROR state
-            await update_data_source_sync_status(USER_ID, 'slack', layer, 'error')
+            await update_data_source_sync_status(current_sync.user_id, 'slack', layer, 'error')
         else:
             # Files were processed → log error and continue to embedding
             sync_results = {
@@ -1413,7 +1448,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
                     "removed": len(deleted_files),
                     "skipped": skipped_files,
                     "runtime_ms": total_runtime_ms,
-                    "api_calls": total_api_calls,
+                    "api_calls": current_sync.total_api_calls,
                     "skip_reasons": {},
                     "sync_timestamp": int(time.time())
                 },
@@ -1429,7 +1464,7 @@ async def sync_slack_to_storage(auth_token, layer=None):
                 }
             }
             # TEMPORARILY HIDING EMBEDDING PHASE - TODO: May restore in future
-            await update_data_source_sync_status(USER_ID, 'slack', layer, 'synced', sync_results=sync_results)
+            await update_data_source_sync_status(current_sync.user_id, 'slack', layer, 'synced', sync_results=sync_results)
         
         raise
 
@@ -1457,8 +1492,8 @@ async def initiate_slack_sync(
     log.info(f'User Open WebUI ID: {user_id}')
     log.info(f'Layer: {layer if layer else "All layers"}')
 
-    # Initialize globals first
-    initialize_globals(user_id)
+    # Each sync gets its own context, so concurrent syncs do not share state
+    init_sync_context(user_id)
 
     # Refresh token once at entry (further requests refresh in make_request)
     token = get_valid_slack_token(user_id, token)
@@ -1466,23 +1501,19 @@ async def initiate_slack_sync(
     current_backend = get_current_backend()
     log.info(f"Using storage backend: {current_backend}")
 
-    global script_start_time, total_api_calls
-    total_api_calls = 0
-    script_start_time = time.time()
-
     # Validate layer parameter
     if layer and layer not in LAYER_CONFIG:
         raise ValueError(f"Invalid layer '{layer}'. Valid layers are: {', '.join(LAYER_CONFIG.keys())}")
 
     # Validate token quickly before starting async process
-    user_info = get_slack_user_info(token)
+    user_info = await get_slack_user_info(token)
     if not user_info:
         raise ValueError("Invalid Slack token or could not retrieve user information")
 
     # Load existing files for duplicate checking
     load_existing_files(user_id)
 
-    await update_data_source_sync_status(USER_ID, 'slack', layer, 'syncing')
+    await update_data_source_sync_status(current_sync.user_id, 'slack', layer, 'syncing')
 
     await sync_slack_to_storage(token, layer)
     
@@ -0,0 +1,206 @@
+import os
+import time
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+import logging
+from collections import deque
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.data.data_ingestion import close_async_client
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Syncs running at once in this process, and per provider
+DATA_SYNC_MAX_CONCURRENCY = int(os.environ.get("DATA_SYNC_MAX_CONCURRENCY", "8"))
+DATA_SYNC_PROVIDER_CONCURRENCY = int(
+    os.environ.get("DATA_SYNC_PROVIDER_CONCURRENCY", "4")
+)
+
+
+class RateLimiter:
+    """Sliding window limit of `max_calls` calls every `window` seconds, shared by threads"""
+
+    def __init__(self, max_calls, window):
+        self.max_calls = max_calls
+        self.window = window
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self):
+        """Record a call and return 0 if it is allowed, else the seconds to wait"""
+        with self._lock:
+            now = time.time()
+            while self._calls and now - self._calls[0] >= self.window:
+                self._calls.popleft()
+
+            if len(self._calls) < self.max_calls:
+                self._calls.append(now)
+                return 0
+            return self.window - (now - self._calls[0])
+
+    def acquire(self):
+        """Block until a call is allowed, then record it"""
+        while sleep_time := self._try_acquire():
+            print(f"Rate limit reached. Sleeping for {sleep_time:.2f} seconds...")
+            time.sleep(sleep_time)
+
+    async def acquire_async(self):
+        """Wait until a call is allowed without blocking the event loop, then record it"""
+        while sleep_time := self._try_acquire():
+            print(f"Rate limit reached. Waiting for {sleep_time:.2f} seconds...")
+            await asyncio.sleep(sleep_time)
+
+
+class SyncContext:
+    """
+    State of one connector sync: who it runs for, the files already in
+    storage, API call counters and the rate limiter. Every sync gets its own,
+    so that syncs of several users can run in the same process.
+    """
+
+    def __init__(
+        self,
+        user_id=None,
+        provider=None,
+        layer=None,
+        user=None,
+        user_auth=None,
+        token_refresher=None,
+        rate_limiter=None,
+    ):
+        self.user_id = user_id
+        self.provider = provider
+        self.layer = layer
+        # Connector specific user object and credentials (Atlassian)
+        self.user = user
+        self.user_auth = user_auth
+        # Callable taking a token and returning a valid (refreshed) one
+        self.token_refresher = token_refresher
+        self.rate_limiter = rate_limiter
+        self.gcs_bucket_name = ""
+
+        self.existing_files_cache = set()
+        self.script_start_time = time.time()
+        self.total_api_calls = 0
+        self._lock = threading.Lock()
+
+    def count_api_call(self):
+        # Called from the worker threads of the sync
+        with self._lock:
+            self.total_api_calls += 1
+
+    def refresh_token(self, auth_token):
+        if auth_token and self.token_refresher:
+            return self.token_refresher(auth_token)
+        return auth_token
+
+
+_sync_context = contextvars.ContextVar("sync_context", default=None)
+
+
+def get_sync_context():
+    """
+    The sync context of the current task. Connector helpers called outside of
+    a sync, e.g. from the API routes, get a throwaway one that keeps no state
+    and cannot be shared with other callers.
+    """
+    return _sync_context.get() or SyncContext()
+
+
+def set_sync_context(context):
+    """
+    Make `context` the sync context of the current task. Each sync runs in
+    its own task, so this does not leak into other syncs.
+    """
+    _sync_context.set(context)
+    return context
+
+
+class _CurrentSync:
+    """Attribute access proxy to the sync context of the current task"""
+
+    def __getattr__(self, name):
+        return getattr(get_sync_context(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_sync_context(), name, value)
+
+
+current_sync = _CurrentSync()
+
+
+class SyncContextExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Thread pool whose workers see the sync context of the submitting thread"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
+
+
+async def iter_completed(futures):
+    """
+    Yield the given concurrent futures as they complete, like
+    `concurrent.futures.as_completed`, without blocking the event loop.
+    """
+    pending = {asyncio.wrap_future(future): future for future in futures}
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future)
+
+
+async def run_sync(sync_function, *args, **kwargs):
+    """Run a sync on its own event loop, closing the clients of the loop after it"""
+    try:
+        return await sync_function(*args, **kwargs)
+    finally:
+        await close_async_client()
+
+
+class SyncScheduler:
+    """
+    Runs connector syncs concurrently, each on its own event loop in a worker
+    thread, with at most `max_concurrency` syncs overall and
+    `provider_concurrency` syncs per provider.
+    """
+
+    def __init__(self, max_concurrency, provider_concurrency):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.provider_concurrency = max(provider_concurrency, 1)
+        self._executor = None
+        self._semaphores = {}
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="data-sync"
+            )
+        return self._executor
+
+    def _get_semaphore(self, provider):
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.provider_concurrency)
+            self._semaphores[provider] = semaphore
+        return semaphore
+
+    async def run(self, provider, sync_function, *args, **kwargs):
+        """Run the coroutine function `sync_function` once a slot for `provider` is free"""
+        semaphore = self._get_semaphore(provider)
+        if semaphore.locked():
+            log.info(f"Waiting for a free {provider} sync slot")
+
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(),
+                lambda: asyncio.run(run_sync(sync_function, *args, **kwargs)),
+            )
+
+
+SYNC_SCHEDULER = SyncScheduler(
+    DATA_SYNC_MAX_CONCURRENCY, DATA_SYNC_PROVIDER_CONCURRENCY
+)
@@ -0,0 +1,127 @@
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from open_webui.env import (
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import (
+    RedisInvalidationChannel,
+    get_redis_connection,
+    get_sentinels_from_env,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+_batch = contextvars.ContextVar("file_status_batch", default=None)
+
+
+class FileStatusEvents:
+    """
+    Relays changes of the processing status of files to the status streams
+    of this process, and through Redis to those of other instances and
+    ingestion workers.
+
+    Subscribers receive `{"file_id", "status", "error"}` events, or None when
+    events may have been missed and the status should be read again.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._channel = None
+
+    def _get_channel(self) -> Optional[RedisInvalidationChannel]:
+        if REDIS_URL and self._channel is None:
+            with self._lock:
+                if self._channel is None:
+                    self._channel = RedisInvalidationChannel(
+                        get_redis_connection(
+                            redis_url=REDIS_URL,
+                            redis_sentinels=get_sentinels_from_env(
+                                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                            ),
+                            redis_cluster=REDIS_CLUSTER,
+                        ),
+                        f"{REDIS_KEY_PREFIX}:files:status",
+                        self._on_message,
+                    )
+        return self._channel
+
+    def _on_message(self, message: Optional[str]):
+        event = json.loads(message) if message else None
+        with self._lock:
+            if event is None:
+                subscribers = [
+                    subscriber
+                    for subscribers in self._subscribers.values()
+                    for subscriber in subscribers
+                ]
+            else:
+                subscribers = list(self._subscribers.get(event["file_id"], ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The loop of the stream is closed
+                pass
+
+    def _send(self, event: dict):
+        channel = self._get_channel()
+        if channel:
+            channel.publish(json.dumps(event))
+        else:
+            self._on_message(json.dumps(event))
+
+    def publish(self, file_id: str, status: str, error: Optional[str] = None):
+        event = {"file_id": file_id, "status": status, "error": error}
+
+        batch = _batch.get()
+        if batch is not None:
+            batch[file_id] = event
+        else:
+            self._send(event)
+
+    @contextmanager
+    def batch(self):
+        """Only publish the last status of each file changed within the block"""
+        events = {}
+        token = _batch.set(events)
+        try:
+            yield
+        finally:
+            _batch.reset(token)
+            for event in events.values():
+                self._send(event)
+
+    @asynccontextmanager
+    async def subscribe(self, file_id: str):
+        """Queue of the status events of `file_id`, while in the block"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(file_id, set()).add(subscriber)
+        self._get_channel()
+
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(file_id, set())
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(file_id, None)
+
+
+FILE_STATUS_EVENTS = FileStatusEvents()
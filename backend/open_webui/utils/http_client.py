@@ -0,0 +1,113 @@
+import asyncio
+import http.cookiejar
+import logging
+import threading
+import weakref
+from typing import Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+# One pooled session per event loop, normally just the application's loop, and
+# the async generator that closes it with the loop
+_sessions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+_requests_session: Optional[requests.Session] = None
+_requests_session_lock = threading.Lock()
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=AIOHTTP_CLIENT_POOL_LIMIT,
+        limit_per_host=AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=AIOHTTP_CLIENT_DNS_CACHE_TTL,
+        keepalive_timeout=AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        trust_env=True,
+        # The session is shared between users, never keep upstream cookies
+        cookie_jar=aiohttp.DummyCookieJar(),
+    )
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Return the application-wide aiohttp session, whose connection pool keeps
+    connections to every upstream alive between requests.
+
+    The session must not be closed by callers, and has no default timeout:
+    pass `timeout=aiohttp.ClientTimeout(...)` with each request instead.
+    """
+    loop = asyncio.get_running_loop()
+    session, _ = _sessions.get(loop, (None, None))
+    if session is None or session.closed:
+        session = create_http_session()
+        _sessions[loop] = (session, _close_with_loop(session))
+    return session
+
+
+async def close_http_session():
+    session, _ = _sessions.pop(asyncio.get_running_loop(), (None, None))
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _close_with_loop(session: aiohttp.ClientSession):
+    """
+    Close `session` when its event loop shuts down, for loops other than the
+    application's, e.g. those of `asyncio.run` in worker threads.
+
+    The loop closes the async generators started on it before it closes, so
+    this starts one that closes the session once it is closed itself. It must
+    be kept referenced, or it would be finalized and close the session early.
+    """
+
+    async def close_session():
+        try:
+            yield
+        finally:
+            if not session.closed:
+                await session.close()
+
+    closer = close_session()
+    try:
+        # Run up to the yield, which registers the generator with the loop
+        closer.asend(None).send(None)
+    except StopIteration:
+        pass
+    return closer
+
+
+def get_requests_session() -> requests.Session:
+    """Pooled `requests` session for outbound calls made from sync code."""
+    global _requests_session
+
+    if _requests_session is None:
+        with _requests_session_lock:
+            if _requests_session is None:
+                session = requests.Session()
+                session.cookies.set_policy(
+                    http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=32,
+                    pool_maxsize=AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST or 100,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _requests_session = session
+    return _requests_session
@@ -0,0 +1,529 @@
+import heapq
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from fnmatch import fnmatch
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from pydantic import BaseModel
+
+from open_webui.config import (
+    ENABLE_INGESTION_WORKER_IN_APP,
+    INGESTION_JOB_TIMEOUT,
+    INGESTION_MAX_ATTEMPTS,
+    INGESTION_WORKER_CONCURRENCY,
+)
+from open_webui.env import (
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.files import FileModel, Files
+from open_webui.models.users import UserModel, Users
+from open_webui.routers.audio import transcribe
+from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.storage.provider import Storage
+from open_webui.utils.file_status import FILE_STATUS_EVENTS
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Jobs of a higher priority always go first, users take turns within one
+INGESTION_PRIORITIES = ("high", "normal", "low")
+
+# Seconds an idle worker waits for a job before looking again
+INGESTION_POLL_INTERVAL = 1
+
+# Seconds before a failed job is run again, doubled at every attempt
+INGESTION_RETRY_DELAY = 10
+
+
+class IngestionJob(BaseModel):
+    id: str
+    file_id: str
+    user_id: str
+    priority: str = "normal"
+    attempts: int = 0
+    created_at: int
+
+
+def process_uploaded_file(request: Request, file_item: FileModel, user: UserModel):
+    """
+    Extract and embed an uploaded file, transcribing audio first. Images and
+    videos are left alone unless an external engine extracts them. Raises
+    if processing fails.
+    """
+    content_type = file_item.meta.get("content_type")
+
+    if content_type:
+        stt_supported_content_types = getattr(
+            request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
+        )
+
+        if any(
+            fnmatch(content_type, supported_content_type)
+            for supported_content_type in (
+                stt_supported_content_types
+                if stt_supported_content_types
+                and any(t.strip() for t in stt_supported_content_types)
+                else ["audio/*", "video/webm"]
+            )
+        ):
+            file_path = Storage.get_file(file_item.path)
+            result = transcribe(request, file_path, file_item.meta.get("data") or {})
+
+            process_file(
+                request,
+                ProcessFileForm(file_id=file_item.id, content=result.get("text", "")),
+                user=user,
+            )
+        elif (not content_type.startswith(("image/", "video/"))) or (
+            request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
+        ):
+            process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+    else:
+        log.info(
+            f"File type {content_type} is not provided, but trying to process anyway"
+        )
+        process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+
+
+def mark_file_failed(file_id: str, e: Exception):
+    Files.update_file_data_by_id(
+        file_id,
+        {
+            "status": "failed",
+            "error": str(e.detail) if hasattr(e, "detail") else str(e),
+        },
+    )
+
+
+class LocalIngestionQueue:
+    """
+    Queue of a single process, used without Redis. Queued jobs are lost when
+    the process stops.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        # Users with queued jobs per priority, in the order they take turns
+        self._queues = {priority: OrderedDict() for priority in INGESTION_PRIORITIES}
+        self._delayed = []
+        self._processing = {}
+
+    def _push(self, job: IngestionJob):
+        self._queues[job.priority].setdefault(job.user_id, deque()).append(job)
+
+    def _pop(self) -> Optional[IngestionJob]:
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            self._push(heapq.heappop(self._delayed)[2])
+
+        for users in self._queues.values():
+            if not users:
+                continue
+
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            if jobs:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+
+            job.attempts += 1
+            self._processing[job.id] = job
+            return job
+        return None
+
+    def enqueue(self, job: IngestionJob):
+        with self._condition:
+            self._push(job)
+            self._condition.notify()
+
+    def dequeue(self, timeout: float) -> Optional[IngestionJob]:
+        with self._condition:
+            job = self._pop()
+            if job is None and self._condition.wait(timeout):
+                job = self._pop()
+            return job
+
+    def heartbeat(self, job_ids: list[str]):
+        # Jobs only get lost together with the process
+        pass
+
+    def complete(self, job: IngestionJob):
+        with self._condition:
+            self._processing.pop(job.id, None)
+
+    def retry(self, job: IngestionJob, delay: float):
+        with self._condition:
+            self._processing.pop(job.id, None)
+            heapq.heappush(self._delayed, (time.time() + delay, job.id, job))
+
+    def stats(self) -> dict:
+        with self._condition:
+            pending = {}
+            users = {}
+            for priority, queues in self._queues.items():
+                pending[priority] = 0
+                for user_id, jobs in queues.items():
+                    pending[priority] += len(jobs)
+                    users[user_id] = users.get(user_id, 0) + len(jobs)
+
+            return {
+                "pending": pending,
+                "users": users,
+                "delayed": len(self._delayed),
+                "processing": len(self._processing),
+            }
+
+
+# Adds the user to the turns of the priority when their queue was empty
+ENQUEUE_SCRIPT = """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+if redis.call('RPUSH', KEYS[3], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[3])
+end
+"""
+
+# Requeues due retries and jobs of lost workers, then takes the next job of
+# the user whose turn it is
+DEQUEUE_SCRIPT = """
+local prefix = ARGV[1]
+
+local function requeue(id)
+    local job = redis.call('HGET', KEYS[1], id)
+    if job then
+        job = cjson.decode(job)
+        local queue = prefix .. ':queue:' .. job.priority .. ':' .. job.user_id
+        if redis.call('RPUSH', queue, id) == 1 then
+            redis.call('RPUSH', prefix .. ':users:' .. job.priority, job.user_id)
+        end
+    end
+end
+
+for _, key in ipairs({KEYS[2], KEYS[3]}) do
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', key, '-inf', ARGV[2])) do
+        redis.call('ZREM', key, id)
+        requeue(id)
+    end
+end
+
+for i = 4, #ARGV do
+    local users = prefix .. ':users:' .. ARGV[i]
+    local user_id = redis.call('LPOP', users)
+    if user_id then
+        local queue = prefix .. ':queue:' .. ARGV[i] .. ':' .. user_id
+        local id = redis.call('LPOP', queue)
+        if redis.call('LLEN', queue) > 0 then
+            -- Back to the end of the turns
+            redis.call('RPUSH', users, user_id)
+        end
+
+        local job = id and redis.call('HGET', KEYS[1], id)
+        if job then
+            job = cjson.decode(job)
+            job.attempts = (job.attempts or 0) + 1
+            job = cjson.encode(job)
+            redis.call('HSET', KEYS[1], id, job)
+            redis.call('ZADD', KEYS[2], ARGV[3], id)
+            return job
+        end
+    end
+end
+return false
+"""
+
+
+class RedisIngestionQueue:
+    """
+    Queue shared by every instance and ingestion worker. A job a worker does
+    not send heartbeats for within INGESTION_JOB_TIMEOUT is run again.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        # A single hash slot, so that the scripts also run on Redis Cluster
+        self.prefix = f"{REDIS_KEY_PREFIX}:{{ingestion}}"
+        self.jobs_key = f"{self.prefix}:jobs"
+        self.delayed_key = f"{self.prefix}:delayed"
+        self.processing_key = f"{self.prefix}:processing"
+
+    def _users_key(self, priority: str) -> str:
+        return f"{self.prefix}:users:{priority}"
+
+    def _queue_key(self, priority: str, user_id: str) -> str:
+        return f"{self.prefix}:queue:{priority}:{user_id}"
+
+    def enqueue(self, job: IngestionJob):
+        self.redis.eval(
+            ENQUEUE_SCRIPT,
+            3,
+            self.jobs_key,
+            self._users_key(job.priority),
+            self._queue_key(job.priority, job.user_id),
+            job.id,
+            job.model_dump_json(),
+            job.user_id,
+        )
+
+    def dequeue(self, timeout: float) -> Optional[IngestionJob]:
+        now = time.time()
+        job = self.redis.eval(
+            DEQUEUE_SCRIPT,
+            3,
+            self.jobs_key,
+            self.processing_key,
+            self.delayed_key,
+            self.prefix,
+            now,
+            now + INGESTION_JOB_TIMEOUT,
+            *INGESTION_PRIORITIES,
+        )
+        if job:
+            return IngestionJob.model_validate_json(job)
+
+        time.sleep(timeout)
+        return None
+
+    def heartbeat(self, job_ids: list[str]):
+        deadline = time.time() + INGESTION_JOB_TIMEOUT
+        self.redis.zadd(
+            self.processing_key, {job_id: deadline for job_id in job_ids}, xx=True
+        )
+
+    def complete(self, job: IngestionJob):
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.processing_key, job.id)
+        pipe.hdel(self.jobs_key, job.id)
+        pipe.execute()
+
+    def retry(self, job: IngestionJob, delay: float):
+        pipe = self.redis.pipeline()
+        pipe.hset(self.jobs_key, job.id, job.model_dump_json())
+        pipe.zrem(self.processing_key, job.id)
+        pipe.zadd(self.delayed_key, {job.id: time.time() + delay})
+        pipe.execute()
+
+    def stats(self) -> dict:
+        pending = {}
+        users = {}
+        for priority in INGESTION_PRIORITIES:
+            user_ids = self.redis.lrange(self._users_key(priority), 0, -1)
+            pipe = self.redis.pipeline()
+            for user_id in user_ids:
+                pipe.llen(self._queue_key(priority, user_id))
+            lengths = pipe.execute() if user_ids else []
+
+            pending[priority] = sum(lengths)
+            for user_id, length in zip(user_ids, lengths):
+                users[user_id] = users.get(user_id, 0) + length
+
+        return {
+            "pending": pending,
+            "users": users,
+            "delayed": self.redis.zcard(self.delayed_key),
+            "processing": self.redis.zcard(self.processing_key),
+        }
+
+
+def get_ingestion_queue():
+    if REDIS_URL:
+        return RedisIngestionQueue(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+                redis_cluster=REDIS_CLUSTER,
+            )
+        )
+    return LocalIngestionQueue()
+
+
+INGESTION_QUEUE = get_ingestion_queue()
+
+
+def enqueue_file(
+    file_item: FileModel, user: UserModel, priority: str = "normal"
+) -> IngestionJob:
+    """Queue an uploaded file for extraction and embedding by a worker"""
+    if priority not in INGESTION_PRIORITIES:
+        raise ValueError(f"Unknown ingestion priority: {priority}")
+
+    job = IngestionJob(
+        id=str(uuid.uuid4()),
+        file_id=file_item.id,
+        user_id=user.id,
+        priority=priority,
+        created_at=int(time.time()),
+    )
+    INGESTION_QUEUE.enqueue(job)
+    return job
+
+
+def get_internal_request(app: FastAPI) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/internal/ingestion",
+            "headers": [],
+            "query_string": b"",
+            "app": app,
+        }
+    )
+
+
+class IngestionWorker:
+    """Threads running the jobs of the ingestion queue through `process_file`"""
+
+    def __init__(self, app: FastAPI, queue, concurrency: int):
+        self.app = app
+        self.queue = queue
+        self.concurrency = concurrency
+        self._stop = threading.Event()
+        self._running = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        self._threads = [
+            threading.Thread(
+                target=self._run, name=f"ingestion-worker-{idx}", daemon=True
+            )
+            for idx in range(self.concurrency)
+        ]
+        self._threads.append(
+            threading.Thread(
+                target=self._send_heartbeats, name="ingestion-heartbeat", daemon=True
+            )
+        )
+        for thread in self._threads:
+            thread.start()
+        log.info(f"Started {self.concurrency} ingestion workers")
+
+    def stop(self):
+        """
+        Stop taking jobs. With Redis, jobs cut short by the process exiting
+        are run again by another worker.
+        """
+        self._stop.set()
+
+    def wait(self):
+        while not self._stop.wait(INGESTION_POLL_INTERVAL):
+            pass
+
+    def _run(self):
+        request = get_internal_request(self.app)
+        while not self._stop.is_set():
+            try:
+                job = self.queue.dequeue(INGESTION_POLL_INTERVAL)
+            except Exception as e:
+                log.error(f"Error reading the ingestion queue: {e}")
+                self._stop.wait(INGESTION_POLL_INTERVAL)
+                continue
+
+            if job:
+                with self._lock:
+                    self._running[job.id] = job
+                try:
+                    self._process(request, job)
+                except Exception as e:
+                    log.exception(f"Error finishing ingestion job {job.id}: {e}")
+                finally:
+                    with self._lock:
+                        self._running.pop(job.id, None)
+
+    def _send_heartbeats(self):
+        while not self._stop.wait(INGESTION_JOB_TIMEOUT / 3):
+            with self._lock:
+                job_ids = list(self._running)
+            if job_ids:
+                try:
+                    self.queue.heartbeat(job_ids)
+                except Exception as e:
+                    log.warning(f"Failed to send ingestion heartbeats: {e}")
+
+    def _process(self, request: Request, job: IngestionJob):
+        file_item = Files.get_file_by_id(job.file_id)
+        user = Users.get_user_by_id(job.user_id)
+        if file_item is None or user is None:
+            # Deleted while queued
+            self.queue.complete(job)
+            return
+
+        if job.attempts > INGESTION_MAX_ATTEMPTS:
+            # Its workers were lost every time, e.g. running out of memory
+            log.error(
+                f"Giving up on file {job.file_id} after {job.attempts - 1} attempts"
+            )
+            mark_file_failed(job.file_id, Exception("Processing did not finish"))
+            self.queue.complete(job)
+            return
+
+        started_at = time.time()
+        # A failed attempt that is retried is not reported to status streams
+        with FILE_STATUS_EVENTS.batch():
+            try:
+                process_uploaded_file(request, file_item, user)
+                error = None
+            except Exception as e:
+                error = e
+                if job.attempts < INGESTION_MAX_ATTEMPTS:
+                    Files.update_file_data_by_id(job.file_id, {"status": "pending"})
+                else:
+                    mark_file_failed(job.file_id, e)
+
+        if error and job.attempts < INGESTION_MAX_ATTEMPTS:
+            delay = INGESTION_RETRY_DELAY * 2 ** (job.attempts - 1)
+            log.warning(
+                f"Error processing file {job.file_id} (attempt {job.attempts}), retrying in {delay}s: {error}"
+            )
+            self.queue.retry(job, delay)
+            return
+
+        if error:
+            log.error(f"Error processing file: {job.file_id}")
+        else:
+            log.info(
+                f"Processed file {job.file_id} in {time.time() - started_at:.1f}s, "
+                f"{(started_at - job.created_at):.0f}s after upload"
+            )
+        self.queue.complete(job)
+
+
+def start_ingestion_worker(app: FastAPI) -> Optional[IngestionWorker]:
+    """
+    Process the ingestion queue in this process, unless it is shared through
+    Redis and left to dedicated workers.
+    """
+    if isinstance(INGESTION_QUEUE, RedisIngestionQueue) and (
+        not ENABLE_INGESTION_WORKER_IN_APP
+    ):
+        return None
+
+    worker = IngestionWorker(app, INGESTION_QUEUE, INGESTION_WORKER_CONCURRENCY)
+    worker.start()
+    return worker
+
+
+def run_ingestion_worker(app: FastAPI):
+    """Process the ingestion queue until interrupted, without serving requests"""
+    if not isinstance(INGESTION_QUEUE, RedisIngestionQueue):
+        raise RuntimeError("Dedicated ingestion workers need REDIS_URL to be set")
+
+    worker = IngestionWorker(app, INGESTION_QUEUE, INGESTION_WORKER_CONCURRENCY)
+    worker.start()
+    try:
+        worker.wait()
+    except KeyboardInterrupt:
+        worker.stop()
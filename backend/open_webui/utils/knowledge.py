@@ -0,0 +1,381 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Optional
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from open_webui.config import KNOWLEDGE_REINDEX_CONCURRENCY
+from open_webui.env import (
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.files import Files
+from open_webui.models.knowledge import (
+    KnowledgeModel,
+    KnowledgeReindexes,
+    KnowledgeReindexModel,
+    Knowledges,
+    get_knowledge_collection_name,
+)
+from open_webui.models.users import UserModel, Users
+from open_webui.retrieval.bm25 import BM25_INDEXES
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.socket.main import send_user_notification
+from open_webui.socket.utils import RedisLock
+from open_webui.tasks import create_task
+from open_webui.utils.redis import get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+REINDEX_TASK_ID = "knowledge_reindex"
+
+# Seconds between checkpoints (and progress events) of a running reindex
+REINDEX_CHECKPOINT_INTERVAL = 2
+
+REINDEX_LOCK_TIMEOUT = 60
+
+_reindex_running = False
+
+
+def process_knowledge_file(
+    request: Request,
+    knowledge: KnowledgeModel,
+    file_id: str,
+    user: UserModel,
+    collection_name: Optional[str] = None,
+):
+    """
+    Embed a file into a knowledge base, into the collection currently serving
+    it unless `collection_name` is given.
+    """
+    collection_name = collection_name or get_knowledge_collection_name(knowledge)
+    result = process_file(
+        request,
+        ProcessFileForm(file_id=file_id, collection_name=collection_name),
+        user=user,
+    )
+
+    if collection_name != knowledge.id:
+        # File metadata points at the knowledge base, not at its collection
+        Files.update_file_metadata_by_id(file_id, {"collection_name": knowledge.id})
+    return result
+
+
+def _drop_collection(collection_name: str):
+    try:
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+        BM25_INDEXES.drop(collection_name)
+    except Exception as e:
+        log.error(f"Error deleting collection {collection_name}: {e}")
+
+
+def _get_reindex_lock() -> Optional[RedisLock]:
+    if not REDIS_URL:
+        return None
+
+    return RedisLock(
+        redis_url=REDIS_URL,
+        lock_name=f"{REDIS_KEY_PREFIX}:knowledge:reindex",
+        timeout_secs=REINDEX_LOCK_TIMEOUT,
+        redis_sentinels=get_sentinels_from_env(
+            REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+        ),
+        redis_cluster=REDIS_CLUSTER,
+    )
+
+
+async def _renew_lock_periodically(lock: RedisLock):
+    while True:
+        await asyncio.sleep(REINDEX_LOCK_TIMEOUT / 3)
+        try:
+            lock.renew_lock()
+        except Exception as e:
+            log.warning(f"Failed to renew the knowledge reindex lock: {e}")
+
+
+def _acquire_reindex() -> tuple[bool, Optional[RedisLock]]:
+    """Claim the right to run a reindex, on this instance and across replicas."""
+    global _reindex_running
+
+    if _reindex_running:
+        return False, None
+
+    lock = _get_reindex_lock()
+    if lock and not lock.aquire_lock():
+        return False, None
+
+    _reindex_running = True
+    return True, lock
+
+
+def _release_reindex(lock: Optional[RedisLock]):
+    global _reindex_running
+
+    _reindex_running = False
+    if lock:
+        try:
+            lock.release_lock()
+        except Exception as e:
+            log.warning(f"Failed to release the knowledge reindex lock: {e}")
+
+
+async def start_knowledge_reindex(request: Request, user: UserModel) -> bool:
+    """
+    Start rebuilding every knowledge base in the background. Returns False if
+    a reindex is already running.
+    """
+    acquired, lock = _acquire_reindex()
+    if not acquired:
+        return False
+
+    try:
+        # An interrupted job is started over, e.g. for a new embedding model
+        for reindex in KnowledgeReindexes.get_reindexes():
+            _drop_collection(reindex.collection_name)
+        KnowledgeReindexes.delete_all_reindexes()
+
+        job_id = str(uuid.uuid4())
+        collection_names = {}
+        deleted_knowledge_bases = []
+
+        for knowledge_base in Knowledges.get_knowledge_bases():
+            # -- Robust error handling for missing or invalid data
+            if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
+                log.warning(
+                    f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
+                )
+                try:
+                    Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
+                    deleted_knowledge_bases.append(knowledge_base.id)
+                except Exception as e:
+                    log.error(
+                        f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
+                    )
+                continue
+
+            # Built next to the live collection, which keeps serving searches
+            collection_names[knowledge_base.id] = f"{knowledge_base.id}-{job_id[:8]}"
+
+        if deleted_knowledge_bases:
+            log.info(
+                f"Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
+            )
+
+        KnowledgeReindexes.insert_new_reindexes(job_id, user.id, collection_names)
+        log.info(f"Starting reindexing for {len(collection_names)} knowledge bases")
+
+        await create_task(
+            request.app.state.redis,
+            run_knowledge_reindex(request, lock),
+            id=REINDEX_TASK_ID,
+        )
+    except Exception:
+        _release_reindex(lock)
+        raise
+
+    return True
+
+
+async def resume_knowledge_reindex(request: Request) -> bool:
+    """Resume a reindex interrupted by a restart, if there is one."""
+    if not KnowledgeReindexes.get_reindexes():
+        return False
+
+    acquired, lock = _acquire_reindex()
+    if not acquired:
+        return False
+
+    log.info("Resuming interrupted knowledge base reindexing")
+    await create_task(
+        request.app.state.redis,
+        run_knowledge_reindex(request, lock, resumed=True),
+        id=REINDEX_TASK_ID,
+    )
+    return True
+
+
+async def run_knowledge_reindex(
+    request: Request, lock: Optional[RedisLock], resumed: bool = False
+):
+    renew_task = asyncio.create_task(_renew_lock_periodically(lock)) if lock else None
+    semaphore = asyncio.Semaphore(KNOWLEDGE_REINDEX_CONCURRENCY)
+
+    try:
+        reindexes = KnowledgeReindexes.get_reindexes()
+        for idx, reindex in enumerate(reindexes):
+            try:
+                await reindex_knowledge_base(
+                    request,
+                    reindex,
+                    semaphore,
+                    resumed=resumed,
+                    position=(idx, len(reindexes)),
+                )
+            except Exception as e:
+                # The checkpoint stays, the knowledge base is retried on resume
+                log.exception(
+                    f"Error reindexing knowledge base {reindex.knowledge_id}: {e}"
+                )
+
+        log.info(f"Reindexing completed for {len(reindexes)} knowledge bases")
+    finally:
+        if renew_task:
+            renew_task.cancel()
+        _release_reindex(lock)
+
+
+def _reindex_file(
+    request: Request,
+    knowledge: KnowledgeModel,
+    file_id: str,
+    collection_name: str,
+    user: UserModel,
+    resumed: bool,
+):
+    if resumed:
+        # The file may have been partly written before the interruption
+        try:
+            VECTOR_DB_CLIENT.delete(
+                collection_name=collection_name, filter={"file_id": file_id}
+            )
+        except Exception:
+            pass
+        BM25_INDEXES.remove(collection_name, filter={"file_id": file_id})
+
+    process_knowledge_file(
+        request, knowledge, file_id, user, collection_name=collection_name
+    )
+
+
+async def reindex_knowledge_base(
+    request: Request,
+    reindex: KnowledgeReindexModel,
+    semaphore: asyncio.Semaphore,
+    resumed: bool = False,
+    position: tuple[int, int] = (0, 1),
+):
+    """
+    Rebuild a knowledge base into `reindex.collection_name`, then point the
+    knowledge base at it and delete the collection it used before.
+    """
+    collection_name = reindex.collection_name
+
+    knowledge = Knowledges.get_knowledge_by_id(reindex.knowledge_id)
+    if knowledge is None:
+        _drop_collection(collection_name)
+        KnowledgeReindexes.delete_reindex_by_knowledge_id(reindex.knowledge_id)
+        return
+
+    user = Users.get_user_by_id(reindex.user_id)
+
+    processed_file_ids = list(reindex.processed_file_ids or [])
+    failed_file_ids = list(reindex.failed_file_ids or [])
+    scheduled_file_ids = set(processed_file_ids)
+    file_ids = []
+    last_checkpoint = time.monotonic()
+
+    async def send_progress(status: str):
+        await send_user_notification(
+            reindex.user_id,
+            "knowledge_reindex_progress",
+            {
+                "job_id": reindex.job_id,
+                "knowledge_id": knowledge.id,
+                "name": knowledge.name,
+                "status": status,
+                "processed": len(processed_file_ids),
+                "failed": len(failed_file_ids),
+                "total": len(file_ids),
+                "knowledge_base": position[0] + 1,
+                "knowledge_bases": position[1],
+            },
+        )
+
+    async def reindex_file(file_id: str):
+        nonlocal last_checkpoint
+
+        async with semaphore:
+            try:
+                await run_in_threadpool(
+                    _reindex_file,
+                    request,
+                    knowledge,
+                    file_id,
+                    collection_name,
+                    user,
+                    resumed,
+                )
+            except Exception as e:
+                log.error(
+                    f"Error processing file {file_id} of knowledge base {knowledge.id}: {e}"
+                )
+                failed_file_ids.append(file_id)
+        processed_file_ids.append(file_id)
+
+        if time.monotonic() - last_checkpoint >= REINDEX_CHECKPOINT_INTERVAL:
+            last_checkpoint = time.monotonic()
+            KnowledgeReindexes.update_reindex_progress_by_knowledge_id(
+                knowledge.id, processed_file_ids, failed_file_ids
+            )
+            await send_progress("running")
+
+    while True:
+        file_ids = list(dict.fromkeys((knowledge.data or {}).get("file_ids", [])))
+        remaining_file_ids = [
+            file_id for file_id in file_ids if file_id not in scheduled_file_ids
+        ]
+        if not remaining_file_ids:
+            break
+
+        scheduled_file_ids.update(remaining_file_ids)
+        await asyncio.gather(*(reindex_file(file_id) for file_id in remaining_file_ids))
+
+        # Pick up files added to the knowledge base in the meantime
+        knowledge = Knowledges.get_knowledge_by_id(reindex.knowledge_id)
+        if knowledge is None:
+            _drop_collection(collection_name)
+            KnowledgeReindexes.delete_reindex_by_knowledge_id(reindex.knowledge_id)
+            return
+
+    # Drop files removed from the knowledge base in the meantime
+    for file_id in set(processed_file_ids).difference(file_ids):
+        try:
+            VECTOR_DB_CLIENT.delete(
+                collection_name=collection_name, filter={"file_id": file_id}
+            )
+        except Exception:
+            pass
+        BM25_INDEXES.remove(collection_name, filter={"file_id": file_id})
+
+    failed = set(failed_file_ids)
+    if file_ids and all(file_id in failed for file_id in file_ids):
+        # Keep serving the previous collection rather than an empty one
+        log.error(
+            f"Failed to reindex every file of knowledge base {knowledge.id}, keeping its previous collection"
+        )
+        _drop_collection(collection_name)
+        KnowledgeReindexes.delete_reindex_by_knowledge_id(knowledge.id)
+        await send_progress("failed")
+        return
+
+    previous_collection_name = get_knowledge_collection_name(knowledge)
+    Knowledges.update_knowledge_collection_name_by_id(knowledge.id, collection_name)
+    KnowledgeReindexes.delete_reindex_by_knowledge_id(knowledge.id)
+    _drop_collection(previous_collection_name)
+
+    if failed:
+        log.warning(
+            f"Failed to process {len(failed)} files in knowledge base {knowledge.id}: {sorted(failed)}"
+        )
+    await send_progress("completed")
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from typing import Callable, Optional
+
+from open_webui.env import (
+    MODEL_ROUTING_EJECTION_FAILURES,
+    MODEL_ROUTING_EJECTION_TIME,
+    MODEL_ROUTING_STRATEGY,
+    MODEL_ROUTING_SYNC_INTERVAL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+# Weight of the newest sample in the latency moving average
+EWMA_ALPHA = 0.3
+
+
+class BackendStats:
+    def __init__(self):
+        self.in_flight = 0
+        # Requests in flight on other instances, refreshed through Redis
+        self.remote_in_flight = 0
+        # Moving average of the time to response headers, in seconds
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def outstanding(self) -> int:
+        return self.in_flight + self.remote_in_flight
+
+
+def _pick_lowest(costs: list[float]) -> int:
+    lowest = min(costs)
+    return random.choice([i for i, cost in enumerate(costs) if cost == lowest])
+
+
+def route_random(backends: list[BackendStats]) -> int:
+    return random.randrange(len(backends))
+
+
+def route_least_outstanding(backends: list[BackendStats]) -> int:
+    return _pick_lowest([stats.outstanding for stats in backends])
+
+
+def route_ewma(backends: list[BackendStats]) -> int:
+    # Backends without a sample yet are assumed as fast as the fastest one,
+    # so that they get tried without being flooded
+    known = [stats.latency for stats in backends if stats.latency is not None]
+    default = min(known) if known else 1.0
+    return _pick_lowest(
+        [
+            (stats.latency if stats.latency is not None else default)
+            * (stats.outstanding + 1)
+            for stats in backends
+        ]
+    )
+
+
+# Strategies take the stats of the candidate backends and return the position
+# of the one to use. Register more with `register_routing_strategy`.
+ROUTING_STRATEGIES: dict[str, Callable[[list[BackendStats]], int]] = {
+    "random": route_random,
+    "least_outstanding": route_least_outstanding,
+    "ewma": route_ewma,
+}
+
+
+def register_routing_strategy(name: str, strategy: Callable[[list[BackendStats]], int]):
+    ROUTING_STRATEGIES[name] = strategy
+
+
+class BackendLease:
+    """
+    One request in flight on a backend. Call `observe` once the response
+    headers arrived (or the request failed) and `release` when the response,
+    including any stream, is finished.
+    """
+
+    def __init__(self, balancer: "LoadBalancer", backend: str):
+        self.balancer = balancer
+        self.backend = backend
+        self.started_at = time.monotonic()
+        self.observed = False
+        self.released = False
+
+    def observe(self, ok: bool):
+        if not self.observed:
+            self.observed = True
+            self.balancer._observe(self.backend, time.monotonic() - self.started_at, ok)
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.balancer._release(self.backend)
+
+
+class LoadBalancer:
+    """
+    Picks which backend serves a request when a model is available on several
+    connections, keyed by backend base URL.
+
+    Tracks in-flight requests and a moving average of the latency of every
+    backend, and stops routing to a backend for `ejection_time` seconds after
+    `ejection_failures` consecutive failures. With Redis configured, in-flight
+    counts are exchanged with the other instances every `sync_interval`
+    seconds. Meant to be used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "ewma",
+        ejection_failures: int = 3,
+        ejection_time: float = 30.0,
+        sync_interval: float = 1.0,
+    ):
+        self.strategy = strategy
+        self.ejection_failures = ejection_failures
+        self.ejection_time = ejection_time
+        self.sync_interval = sync_interval
+
+        self._stats: dict[str, BackendStats] = {}
+        self._remote_in_flight: dict[str, int] = {}
+
+        self._instance_id = uuid.uuid4().hex
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def get_stats(self, backend: str) -> BackendStats:
+        stats = self._stats.get(backend)
+        if stats is None:
+            stats = BackendStats()
+            self._stats[backend] = stats
+        return stats
+
+    def select(self, backends: list[str]) -> int:
+        """Return the position in `backends` of the backend to send a request to."""
+        if len(backends) == 1:
+            return 0
+
+        self._start_sync()
+
+        now = time.monotonic()
+        stats = [self.get_stats(backend) for backend in backends]
+        for backend, backend_stats in zip(backends, stats):
+            backend_stats.remote_in_flight = self._remote_in_flight.get(backend, 0)
+
+        # Route to ejected backends only when nothing else is left
+        candidates = [
+            i
+            for i, backend_stats in enumerate(stats)
+            if backend_stats.ejected_until <= now
+        ] or list(range(len(backends)))
+
+        strategy = ROUTING_STRATEGIES.get(self.strategy)
+        if strategy is None:
+            log.warning(f"Unknown routing strategy {self.strategy}, using random")
+            strategy = route_random
+
+        return candidates[strategy([stats[i] for i in candidates])]
+
+    def acquire(self, backend: str) -> BackendLease:
+        self._start_sync()
+        self.get_stats(backend).in_flight += 1
+        return BackendLease(self, backend)
+
+    def _release(self, backend: str):
+        stats = self.get_stats(backend)
+        stats.in_flight = max(stats.in_flight - 1, 0)
+
+    def _observe(self, backend: str, latency: float, ok: bool):
+        stats = self.get_stats(backend)
+        if ok:
+            stats.failures = 0
+            stats.latency = (
+                latency
+                if stats.latency is None
+                else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats.latency
+            )
+            return
+
+        stats.failures += 1
+        if self.ejection_failures > 0 and stats.failures >= self.ejection_failures:
+            if stats.ejected_until <= time.monotonic():
+                log.warning(
+                    f"Ejecting backend {backend} for {self.ejection_time}s "
+                    f"after {stats.failures} consecutive failures"
+                )
+            stats.ejected_until = time.monotonic() + self.ejection_time
+
+    def _start_sync(self):
+        if not REDIS_URL or self.sync_interval <= 0:
+            return
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.get_running_loop().create_task(
+                self._sync_periodically()
+            )
+
+    async def _sync_periodically(self):
+        redis = get_redis_connection(
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            REDIS_CLUSTER,
+            async_mode=True,
+        )
+
+        while True:
+            try:
+                await self._sync(redis)
+            except Exception as e:
+                log.warning(f"Failed to sync in-flight requests through Redis: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def _sync(self, redis):
+        now = time.time()
+        ttl = max(3 * self.sync_interval, 5)
+        instances_key = f"{REDIS_KEY_PREFIX}:routing:instances"
+        own_key = f"{REDIS_KEY_PREFIX}:routing:in_flight:{self._instance_id}"
+
+        in_flight = {
+            backend: stats.in_flight
+            for backend, stats in self._stats.items()
+            if stats.in_flight
+        }
+
+        pipe = redis.pipeline()
+        pipe.delete(own_key)
+        if in_flight:
+            pipe.hset(own_key, mapping=in_flight)
+            pipe.expire(own_key, math.ceil(ttl))
+        pipe.zadd(instances_key, {self._instance_id: now})
+        # Forget instances that stopped reporting, e.g. after a crash
+        pipe.zremrangebyscore(instances_key, 0, now - ttl)
+        pipe.zrange(instances_key, 0, -1)
+        instances = [
+            instance
+            for instance in (await pipe.execute())[-1]
+            if instance != self._instance_id
+        ]
+
+        remote_in_flight = {}
+        if instances:
+            pipe = redis.pipeline()
+            for instance in instances:
+                pipe.hgetall(f"{REDIS_KEY_PREFIX}:routing:in_flight:{instance}")
+            for counts in await pipe.execute():
+                for backend, count in (counts or {}).items():
+                    remote_in_flight[backend] = remote_in_flight.get(backend, 0) + int(
+                        count
+                    )
+        self._remote_in_flight = remote_in_flight
+
+
+LOAD_BALANCER = LoadBalancer(
+    MODEL_ROUTING_STRATEGY,
+    MODEL_ROUTING_EJECTION_FAILURES,
+    MODEL_ROUTING_EJECTION_TIME,
+    MODEL_ROUTING_SYNC_INTERVAL,
+)
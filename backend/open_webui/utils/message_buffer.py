@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    CHAT_SAVE_FLUSH_INTERVAL,
+    CHAT_SAVE_FLUSH_SIZE,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class PendingMessageWrites:
+    def __init__(self):
+        # Ordered (operation, value) pairs applied to the stored message on flush
+        self.operations: list[tuple[str, Any]] = []
+        self.size = 0
+        self.upsert = False
+
+        # Length of the last full content written through `update`, used to
+        # measure how much a content replacement actually grew the message
+        self.content_length = 0
+        self.timer: Optional[asyncio.Task] = None
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for chat messages, keyed by (chat_id, message_id).
+
+    Updates are coalesced in memory and written to the database in a single
+    read-modify-write of the message, either every `flush_interval` seconds or
+    once `flush_size` bytes of content are pending, whichever comes first.
+    Callers must `close` a message when its stream finishes or is cancelled so
+    the remaining updates are persisted immediately.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = CHAT_SAVE_FLUSH_INTERVAL,
+        flush_size: int = CHAT_SAVE_FLUSH_SIZE,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending: dict[tuple[str, str], PendingMessageWrites] = {}
+
+    async def update(self, chat_id: str, message_id: str, fields: dict):
+        entry = self._pending.get((chat_id, message_id))
+        size = 0
+        if isinstance(fields.get("content"), str):
+            content_length = len(fields["content"])
+            if entry is not None:
+                size = abs(content_length - entry.content_length)
+
+        entry = await self._add(chat_id, message_id, "update", fields, size, True)
+        if entry is not None and isinstance(fields.get("content"), str):
+            entry.content_length = len(fields["content"])
+
+    async def append_content(self, chat_id: str, message_id: str, content: str):
+        await self._add(
+            chat_id, message_id, "append_content", content, len(content), True
+        )
+
+    async def add_status(self, chat_id: str, message_id: str, status: dict):
+        await self._add(chat_id, message_id, "status", status, 0, False)
+
+    async def append_item(self, chat_id: str, message_id: str, key: str, item: Any):
+        await self._add(chat_id, message_id, "append", (key, item), 0, True)
+
+    async def prepend_items(self, chat_id: str, message_id: str, key: str, items: list):
+        await self._add(chat_id, message_id, "prepend", (key, items), 0, True)
+
+    async def flush(self, chat_id: str, message_id: str):
+        entry = self._pending.get((chat_id, message_id))
+        if entry is not None:
+            self._write(chat_id, message_id, entry)
+
+    async def close(self, chat_id: str, message_id: str):
+        entry = self._pending.pop((chat_id, message_id), None)
+        if entry is None:
+            return
+
+        if entry.timer is not None and entry.timer is not asyncio.current_task():
+            entry.timer.cancel()
+        self._write(chat_id, message_id, entry)
+
+    async def _add(
+        self,
+        chat_id: str,
+        message_id: str,
+        operation: str,
+        value: Any,
+        size: int,
+        upsert: bool,
+    ) -> Optional[PendingMessageWrites]:
+        key = (chat_id, message_id)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = PendingMessageWrites()
+            self._pending[key] = entry
+
+        last = entry.operations[-1] if entry.operations else None
+        if last and last[0] == operation == "update":
+            entry.operations[-1] = (operation, {**last[1], **value})
+        elif last and last[0] == operation == "append_content":
+            entry.operations[-1] = (operation, last[1] + value)
+        else:
+            entry.operations.append((operation, value))
+
+        entry.size += size
+        entry.upsert = entry.upsert or upsert
+
+        if self.flush_interval <= 0:
+            await self.close(chat_id, message_id)
+            return None
+
+        if entry.size >= self.flush_size:
+            self._write(chat_id, message_id, entry)
+
+        if entry.timer is None:
+            entry.timer = asyncio.create_task(self._flush_periodically(key))
+        return entry
+
+    async def _flush_periodically(self, key: tuple[str, str]):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+
+            entry = self._pending.get(key)
+            if entry is None:
+                return
+
+            # Forget messages that stayed idle for a whole interval
+            if not entry.operations:
+                del self._pending[key]
+                return
+
+            self._write(*key, entry)
+
+    def _write(self, chat_id: str, message_id: str, entry: PendingMessageWrites):
+        operations = entry.operations
+        upsert = entry.upsert
+
+        entry.operations = []
+        entry.size = 0
+        entry.upsert = False
+
+        if not operations:
+            return
+
+        def apply(message: dict) -> dict:
+            for operation, value in operations:
+                if operation == "update":
+                    message.update(value)
+                elif operation == "append_content":
+                    message["content"] = message.get("content", "") + value
+                elif operation == "status":
+                    message["statusHistory"] = [
+                        *message.get("statusHistory", []),
+                        value,
+                    ]
+                elif operation == "append":
+                    key, item = value
+                    message[key] = [*message.get(key, []), item]
+                elif operation == "prepend":
+                    key, items = value
+                    message[key] = [*items, *message.get(key, [])]
+
+            # Sanitize message content for null characters before saving
+            if isinstance(message.get("content"), str):
+                message["content"] = message["content"].replace("\x00", "")
+            return message
+
+        try:
+            Chats.update_message_by_id_and_message_id(
+                chat_id, message_id, apply, upsert=upsert
+            )
+        except Exception as e:
+            log.exception(f"Error saving message {chat_id}/{message_id}: {e}")
+
+
+MessageWrites = MessageWriteBuffer()
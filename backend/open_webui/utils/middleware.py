@@ -14,6 +14,7 @@ import html
 import inspect
 import re
 import ast
+import copy
 
 from uuid import uuid4
 from concurrent.futures import ThreadPoolExecutor
@@ -57,6 +58,7 @@ from open_webui.routers.pipelines import (
 from open_webui.routers.memories import query_memory, QueryMemoryForm
 
 from open_webui.utils.webhook import post_webhook
+from open_webui.utils.message_buffer import MessageWrites
 from open_webui.utils.files import (
     get_audio_url_from_base64,
     get_file_url_from_base64,
@@ -139,6 +141,37 @@ DEFAULT_SOLUTION_TAGS = [("<|begin_of_solution|>", "<|end_of_solution|>")]
 DEFAULT_CODE_INTERPRETER_TAGS = [("<code_interpreter>", "</code_interpreter>")]
 
 
+class StreamingTagScanner:
+    """
+    Resumable regex search over streamed content. As long as the content only
+    grows by appending, a pattern that did not match is only searched again from
+    where a new match could still begin instead of from the start.
+    """
+
+    def __init__(self):
+        self._content = ""
+        self._offsets: dict[str, int] = {}
+
+    def search(self, pattern: str, content: str, max_newlines: int = 1):
+        if not content.startswith(self._content):
+            self._offsets = {}
+        self._content = content
+
+        offset = self._offsets.get(pattern, 0)
+        match = re.compile(pattern).search(content, offset)
+
+        if match is None:
+            # A match spans at most `max_newlines` newlines, so it has to start
+            # on one of the last `max_newlines + 1` lines of the content
+            line_start = len(content)
+            for _ in range(max_newlines + 1):
+                line_start = content.rfind("\n", offset, line_start)
+                if line_start == -1:
+                    break
+            self._offsets[pattern] = max(offset, line_start + 1)
+        return match
+
+
 def process_tool_result(
     request,
     tool_function_name,
@@ -1886,136 +1919,170 @@ async def process_chat_response(
 
         # Handle as a background task
         async def response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        block_content = block["content"].strip()
-                        if block_content:
-                            content = f"{content}{block_content}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
+            def serialize_content_block(content, block, raw=False):
+                if block["type"] == "text":
+                    block_content = block["content"].strip()
+                    if block_content:
+                        content = f"{content}{block_content}\n"
+                elif block["type"] == "tool_calls":
+                    attributes = block.get("attributes", {})
 
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
+                    tool_calls = block.get("content", [])
+                    results = block.get("results", [])
 
-                        if content and not content.endswith("\n"):
-                            content += "\n"
+                    if content and not content.endswith("\n"):
+                        content += "\n"
 
-                        if results:
+                    if results:
 
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
+                        tool_calls_display_content = ""
+                        for tool_call in tool_calls:
 
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
+                            tool_call_id = tool_call.get("id", "")
+                            tool_name = tool_call.get("function", {}).get(
+                                "name", ""
+                            )
+                            tool_arguments = tool_call.get("function", {}).get(
+                                "arguments", ""
+                            )
 
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result is not None:
-                                    tool_result_embeds = result.get("embeds", "")
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}" embeds="{html.escape(json.dumps(tool_result_embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+                            tool_result = None
+                            tool_result_files = None
+                            for result in results:
+                                if tool_call_id == result.get("tool_call_id", ""):
+                                    tool_result = result.get("content", None)
+                                    tool_result_files = result.get("files", None)
+                                    break
+
+                            if tool_result is not None:
+                                tool_result_embeds = result.get("embeds", "")
+                                tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}" embeds="{html.escape(json.dumps(tool_result_embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
+                            else:
+                                tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
 
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
-                        else:
-                            tool_calls_display_content = ""
+                        if not raw:
+                            content = f"{content}{tool_calls_display_content}"
+                    else:
+                        tool_calls_display_content = ""
 
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
+                        for tool_call in tool_calls:
+                            tool_call_id = tool_call.get("id", "")
+                            tool_name = tool_call.get("function", {}).get(
+                                "name", ""
+                            )
+                            tool_arguments = tool_call.get("function", {}).get(
+                                "arguments", ""
+                            )
 
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+                            tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
 
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
+                        if not raw:
+                            content = f"{content}{tool_calls_display_content}"
 
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
+                elif block["type"] == "reasoning":
+                    reasoning_display_content = "\n".join(
+                        (f"> {line}" if not line.startswith(">") else line)
+                        for line in block["content"].splitlines()
+                    )
 
-                        reasoning_duration = block.get("duration", None)
+                    reasoning_duration = block.get("duration", None)
 
-                        start_tag = block.get("start_tag", "")
-                        end_tag = block.get("end_tag", "")
+                    start_tag = block.get("start_tag", "")
+                    end_tag = block.get("end_tag", "")
 
-                        if content and not content.endswith("\n"):
-                            content += "\n"
+                    if content and not content.endswith("\n"):
+                        content += "\n"
 
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+                    if reasoning_duration is not None:
+                        if raw:
+                            content = (
+                                f'{content}{start_tag}{block["content"]}{end_tag}\n'
+                            )
                         else:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
+                            content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+                    else:
+                        if raw:
                             content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
+                                f'{content}{start_tag}{block["content"]}{end_tag}\n'
                             )
                         else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
+                            content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
 
-                        if content and not content.endswith("\n"):
-                            content += "\n"
+                elif block["type"] == "code_interpreter":
+                    attributes = block.get("attributes", {})
+                    output = block.get("output", None)
+                    lang = attributes.get("lang", "")
 
-                        if output:
-                            output = html.escape(json.dumps(output))
+                    content_stripped, original_whitespace = (
+                        split_content_and_whitespace(content)
+                    )
+                    if is_opening_code_block(content_stripped):
+                        # Remove trailing backticks that would open a new block
+                        content = (
+                            content_stripped.rstrip("`").rstrip()
+                            + original_whitespace
+                        )
+                    else:
+                        # Keep content as is - either closing backticks or no backticks
+                        content = content_stripped + original_whitespace
 
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+                    if content and not content.endswith("\n"):
+                        content += "\n"
 
+                    if output:
+                        output = html.escape(json.dumps(output))
+
+                        if raw:
+                            content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+                        else:
+                            content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
                     else:
-                        block_content = str(block["content"]).strip()
-                        if block_content:
-                            content = f"{content}{block['type']}: {block_content}\n"
+                        if raw:
+                            content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+                        else:
+                            content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+                else:
+                    block_content = str(block["content"]).strip()
+                    if block_content:
+                        content = f"{content}{block['type']}: {block_content}\n"
+
+                return content
+
+            # Serialized output of all blocks but the last, per `raw` flag. Only
+            # the last block is still being streamed into, so earlier blocks are
+            # re-rendered only if they were replaced or changed since.
+            serialized_prefixes = {}
+
+            def serialize_content_blocks(content_blocks, raw=False):
+                prefix_blocks, prefix_copies, content = serialized_prefixes.get(
+                    raw, ([], [], "")
+                )
+
+                # The copies share the blocks' strings, which are immutable, so
+                # comparing a block with its copy only compares values that were
+                # replaced since, and catches changes that keep the same length
+                prefix_length = len(content_blocks) - 1
+                if len(prefix_blocks) > prefix_length or any(
+                    block is not content_blocks[idx] or prefix_copies[idx] != block
+                    for idx, block in enumerate(prefix_blocks)
+                ):
+                    prefix_blocks, prefix_copies, content = [], [], ""
+
+                # Only the blocks closed since the last call are copied
+                closed_blocks = content_blocks[len(prefix_blocks) : prefix_length]
+                for block in closed_blocks:
+                    content = serialize_content_block(content, block, raw)
+
+                if prefix_length >= 0:
+                    serialized_prefixes[raw] = (
+                        content_blocks[:prefix_length],
+                        [*prefix_copies, *map(copy.deepcopy, closed_blocks)],
+                        content,
+                    )
+
+                for block in content_blocks[max(prefix_length, 0) :]:
+                    content = serialize_content_block(content, block, raw)
 
                 return content.strip()
 
@@ -2059,6 +2126,8 @@ async def process_chat_response(
 
                 return messages
 
+            tag_scanner = StreamingTagScanner()
+
             def tag_content_handler(content_type, tags, content, content_blocks):
                 end_flag = False
 
@@ -2085,7 +2154,9 @@ async def process_chat_response(
                                 rf"<{re.escape(start_tag[1:-1])}(\s.*?)?>"
                             )
 
-                        match = re.search(start_tag_pattern, content)
+                        match = tag_scanner.search(
+                            start_tag_pattern, content, start_tag.count("\n") + 1
+                        )
                         if match:
                             try:
                                 attr_content = (
@@ -2148,7 +2219,9 @@ async def process_chat_response(
                         end_tag_pattern = rf"{re.escape(end_tag)}"
 
                     # Check if the content has the end tag
-                    if re.search(end_tag_pattern, content):
+                    if tag_scanner.search(
+                        end_tag_pattern, content, end_tag.count("\n")
+                    ):
                         end_flag = True
 
                         block_content = content_blocks[-1]["content"]
@@ -2291,7 +2364,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MessageWrites.update(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -2365,7 +2438,7 @@ async def process_chat_response(
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                                    await MessageWrites.update(
                                         metadata["chat_id"],
                                         metadata["message_id"],
                                         {
@@ -2571,23 +2644,20 @@ async def process_chat_response(
                                             if end:
                                                 break
 
+                                        data = {
+                                            "content": serialize_content_blocks(
+                                                content_blocks
+                                            ),
+                                        }
+
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            # Save message in the database, the write
+                                            # buffer coalesces these into periodic writes
+                                            await MessageWrites.update(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
-                                                {
-                                                    "content": serialize_content_blocks(
-                                                        content_blocks
-                                                    ),
-                                                },
+                                                dict(data),
                                             )
-                                        else:
-                                            data = {
-                                                "content": serialize_content_blocks(
-                                                    content_blocks
-                                                ),
-                                            }
 
                                 if delta:
                                     delta_count += 1
@@ -3019,15 +3089,15 @@ async def process_chat_response(
                     "title": title,
                 }
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
-                    # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        metadata["chat_id"],
-                        metadata["message_id"],
-                        {
-                            "content": serialize_content_blocks(content_blocks),
-                        },
-                    )
+                # Save message in the database
+                await MessageWrites.update(
+                    metadata["chat_id"],
+                    metadata["message_id"],
+                    {
+                        "content": serialize_content_blocks(content_blocks),
+                    },
+                )
+                await MessageWrites.close(metadata["chat_id"], metadata["message_id"])
 
                 # Send a webhook notification if the user is not active
                 if not get_active_status_by_user_id(user.id):
@@ -3057,15 +3127,15 @@ async def process_chat_response(
                 log.warning("Task was cancelled!")
                 await event_emitter({"type": "chat:tasks:cancel"})
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
-                    # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        metadata["chat_id"],
-                        metadata["message_id"],
-                        {
-                            "content": serialize_content_blocks(content_blocks),
-                        },
-                    )
+                # Save message in the database
+                await MessageWrites.update(
+                    metadata["chat_id"],
+                    metadata["message_id"],
+                    {
+                        "content": serialize_content_blocks(content_blocks),
+                    },
+                )
+                await MessageWrites.close(metadata["chat_id"], metadata["message_id"])
 
             if response.background is not None:
                 await response.background()
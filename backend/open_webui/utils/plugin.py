@@ -1,15 +1,32 @@
+import hashlib
 import os
 import re
 import subprocess
 import sys
+import threading
 from importlib import util
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
+from typing import Callable, Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+)
 from open_webui.models.functions import Functions
 from open_webui.models.tools import Tools
+from open_webui.utils.redis import (
+    RedisInvalidationChannel,
+    get_redis_connection,
+    get_sentinels_from_env,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -77,8 +94,10 @@ def load_tool_module_by_id(tool_id, content=None):
 
         content = tool.content
 
-        content = replace_imports(content)
-        Tools.update_tool_by_id(tool_id, {"content": content})
+        new_content = replace_imports(content)
+        if new_content != content:
+            content = new_content
+            Tools.update_tool_by_id(tool_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         # Install required packages found within the frontmatter
@@ -122,8 +141,10 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
             raise Exception(f"Function not found: {function_id}")
         content = function.content
 
-        content = replace_imports(content)
-        Functions.update_function_by_id(function_id, {"content": content})
+        new_content = replace_imports(content)
+        if new_content != content:
+            content = new_content
+            Functions.update_function_by_id(function_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         install_frontmatter_requirements(frontmatter.get("requirements", ""))
@@ -166,9 +187,127 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
         os.unlink(temp_file.name)
 
 
+class PluginModuleVersions:
+    """
+    Decides whether a cached function or tool module is still current without
+    loading its source from the database.
+
+    Cached modules are versioned by `(updated_at, content hash, generation)`.
+    With Redis configured, saves on any instance publish an invalidation and a
+    cached module is trusted until one arrives. Otherwise the `updated_at`
+    column is compared, and the content hash only when it moved, so that
+    valves updates don't reload the module.
+    """
+
+    def __init__(self):
+        self._stale: set[str] = set()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._invalidations: Optional[RedisInvalidationChannel] = None
+
+    def _get_invalidations(self) -> Optional[RedisInvalidationChannel]:
+        if not REDIS_URL:
+            return None
+
+        with self._lock:
+            if self._invalidations is None:
+                try:
+                    self._invalidations = RedisInvalidationChannel(
+                        get_redis_connection(
+                            REDIS_URL,
+                            get_sentinels_from_env(
+                                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                            ),
+                            REDIS_CLUSTER,
+                        ),
+                        f"{REDIS_KEY_PREFIX}:plugins:invalidate",
+                        self._mark_stale,
+                    )
+                except Exception as e:
+                    log.warning(f"Failed to subscribe to plugin invalidations: {e}")
+            return self._invalidations
+
+    def _mark_stale(self, key: Optional[str]):
+        with self._lock:
+            if key is None:
+                # Invalidations may have been missed, distrust every module
+                self._generation += 1
+                self._stale.clear()
+            else:
+                self._stale.add(key)
+
+    def invalidate(self, key: str):
+        """Mark a module stale here and, with Redis, on every other instance."""
+        self._mark_stale(key)
+
+        invalidations = self._get_invalidations()
+        if invalidations:
+            invalidations.publish(key)
+
+    def begin_load(self, key: str) -> int:
+        """Call before reading a module's source, returns the generation to store."""
+        self._get_invalidations()
+        with self._lock:
+            self._stale.discard(key)
+            return self._generation
+
+    def is_current(
+        self,
+        key: str,
+        version: tuple,
+        get_updated_at: Callable[[], Optional[int]],
+    ) -> Optional[bool]:
+        """
+        True if the cached module is current, False if it must be reloaded and
+        None if its `updated_at` moved and the content must be compared.
+        """
+        updated_at, _, generation = version
+        with self._lock:
+            if key in self._stale or generation != self._generation:
+                return False
+
+        if self._invalidations is not None:
+            return True
+
+        current_updated_at = get_updated_at()
+        if current_updated_at is None:
+            return False
+        return True if current_updated_at == updated_at else None
+
+
+PLUGIN_MODULE_VERSIONS = PluginModuleVersions()
+
+
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def invalidate_plugin_module(kind: str, id: str):
+    """Make every instance reload a function or tool module on next use."""
+    PLUGIN_MODULE_VERSIONS.invalidate(f"{kind}:{id}")
+
+
 def get_tool_module_from_cache(request, tool_id, load_from_db=True):
+    if not hasattr(request.app.state, "TOOLS"):
+        request.app.state.TOOLS = {}
+
+    if not hasattr(request.app.state, "TOOL_CONTENTS"):
+        request.app.state.TOOL_CONTENTS = {}
+
     if load_from_db:
-        # Always load from the database by default
+        # Make sure the latest content is used, checking only its version
+        # unless it changed
+        key = f"tool:{tool_id}"
+        version = request.app.state.TOOL_CONTENTS.get(tool_id)
+        current = None
+        if tool_id in request.app.state.TOOLS and version is not None:
+            current = PLUGIN_MODULE_VERSIONS.is_current(
+                key, version, lambda: Tools.get_tool_updated_at_by_id(tool_id)
+            )
+            if current:
+                return request.app.state.TOOLS[tool_id], None
+
+        generation = PLUGIN_MODULE_VERSIONS.begin_load(key)
         tool = Tools.get_tool_by_id(tool_id)
         if not tool:
             raise Exception(f"Tool not found: {tool_id}")
@@ -178,42 +317,58 @@ def get_tool_module_from_cache(request, tool_id, load_from_db=True):
         if new_content != content:
             content = new_content
             # Update the tool content in the database
-            Tools.update_tool_by_id(tool_id, {"content": content})
-
-        if (
-            hasattr(request.app.state, "TOOL_CONTENTS")
-            and tool_id in request.app.state.TOOL_CONTENTS
-        ) and (
-            hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS
-        ):
-            if request.app.state.TOOL_CONTENTS[tool_id] == content:
-                return request.app.state.TOOLS[tool_id], None
+            tool = Tools.update_tool_by_id(tool_id, {"content": content}) or tool
+
+        content_hash = get_content_hash(content)
+        if current is None and version is not None and version[1] == content_hash:
+            # Only the metadata changed, keep the loaded module
+            request.app.state.TOOL_CONTENTS[tool_id] = (
+                tool.updated_at,
+                content_hash,
+                generation,
+            )
+            return request.app.state.TOOLS[tool_id], None
 
         tool_module, frontmatter = load_tool_module_by_id(tool_id, content)
+        request.app.state.TOOL_CONTENTS[tool_id] = (
+            tool.updated_at,
+            content_hash,
+            generation,
+        )
     else:
-        if hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS:
+        if tool_id in request.app.state.TOOLS:
             return request.app.state.TOOLS[tool_id], None
 
         tool_module, frontmatter = load_tool_module_by_id(tool_id)
 
-    if not hasattr(request.app.state, "TOOLS"):
-        request.app.state.TOOLS = {}
-
-    if not hasattr(request.app.state, "TOOL_CONTENTS"):
-        request.app.state.TOOL_CONTENTS = {}
-
     request.app.state.TOOLS[tool_id] = tool_module
-    request.app.state.TOOL_CONTENTS[tool_id] = content
 
     return tool_module, frontmatter
 
 
 def get_function_module_from_cache(request, function_id, load_from_db=True):
+    if not hasattr(request.app.state, "FUNCTIONS"):
+        request.app.state.FUNCTIONS = {}
+
+    if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
+        request.app.state.FUNCTION_CONTENTS = {}
+
     if load_from_db:
-        # Always load from the database by default
-        # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
+        # Hooks like "inlet" or "outlet" must use the latest content, but only
+        # its version is checked unless it changed
+        key = f"function:{function_id}"
+        version = request.app.state.FUNCTION_CONTENTS.get(function_id)
+        current = None
+        if function_id in request.app.state.FUNCTIONS and version is not None:
+            current = PLUGIN_MODULE_VERSIONS.is_current(
+                key,
+                version,
+                lambda: Functions.get_function_updated_at_by_id(function_id),
+            )
+            if current:
+                return request.app.state.FUNCTIONS[function_id], None, None
 
+        generation = PLUGIN_MODULE_VERSIONS.begin_load(key)
         function = Functions.get_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
@@ -223,43 +378,41 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
         if new_content != content:
             content = new_content
             # Update the function content in the database
-            Functions.update_function_by_id(function_id, {"content": content})
+            function = (
+                Functions.update_function_by_id(function_id, {"content": content})
+                or function
+            )
 
-        if (
-            hasattr(request.app.state, "FUNCTION_CONTENTS")
-            and function_id in request.app.state.FUNCTION_CONTENTS
-        ) and (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            if request.app.state.FUNCTION_CONTENTS[function_id] == content:
-                return request.app.state.FUNCTIONS[function_id], None, None
+        content_hash = get_content_hash(content)
+        if current is None and version is not None and version[1] == content_hash:
+            # Only the metadata or valves changed, keep the loaded module
+            request.app.state.FUNCTION_CONTENTS[function_id] = (
+                function.updated_at,
+                content_hash,
+                generation,
+            )
+            return request.app.state.FUNCTIONS[function_id], None, None
 
         function_module, function_type, frontmatter = load_function_module_by_id(
             function_id, content
         )
+        request.app.state.FUNCTION_CONTENTS[function_id] = (
+            function.updated_at,
+            content_hash,
+            generation,
+        )
     else:
         # Load from cache (e.g. "stream" hook)
         # This is useful for performance reasons
 
-        if (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
+        if function_id in request.app.state.FUNCTIONS:
             return request.app.state.FUNCTIONS[function_id], None, None
 
         function_module, function_type, frontmatter = load_function_module_by_id(
             function_id
         )
 
-    if not hasattr(request.app.state, "FUNCTIONS"):
-        request.app.state.FUNCTIONS = {}
-
-    if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
-        request.app.state.FUNCTION_CONTENTS = {}
-
     request.app.state.FUNCTIONS[function_id] = function_module
-    request.app.state.FUNCTION_CONTENTS[function_id] = content
 
     return function_module, function_type, frontmatter
 
@@ -2,6 +2,9 @@ import inspect
 from urllib.parse import urlparse
 
 import logging
+import threading
+import time
+from typing import Callable, Optional
 
 import redis
 
@@ -207,3 +210,51 @@ def get_sentinel_url_from_env(redis_url, sentinel_hosts_env, sentinel_port_env):
         f"{host}:{sentinel_port_env}" for host in sentinel_hosts_env.split(",")
     )
     return f"redis+sentinel://{auth_part}{hosts_part}/{redis_config['db']}/{redis_config['service']}"
+
+
+class RedisInvalidationChannel:
+    """
+    Broadcasts cache invalidations between instances over Redis pub/sub.
+
+    `publish(key)` notifies every subscribed instance, including this one,
+    which calls `on_invalidate(key)`. Whenever the subscription is
+    (re)established `on_invalidate(None)` is called, since notifications may
+    have been missed while disconnected.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        channel: str,
+        on_invalidate: Callable[[Optional[str]], None],
+    ):
+        self._redis = redis_client
+        self._channel = channel
+        self._on_invalidate = on_invalidate
+
+        self._listener = threading.Thread(
+            target=self._listen, name=f"invalidate-{channel}", daemon=True
+        )
+        self._listener.start()
+
+    def publish(self, key: str):
+        try:
+            self._redis.publish(self._channel, key)
+        except Exception as e:
+            log.warning(f"Failed to publish invalidation on {self._channel}: {e}")
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                self._on_invalidate(None)
+
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._on_invalidate(message.get("data"))
+            except Exception as e:
+                log.warning(f"Invalidation listener on {self._channel} failed: {e}")
+                self._on_invalidate(None)
+
+            time.sleep(1)
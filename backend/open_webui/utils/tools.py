@@ -4,6 +4,8 @@ import re
 import inspect
 import aiohttp
 import asyncio
+import hashlib
+import time
 import yaml
 import json
 
@@ -36,12 +38,14 @@ from langchain_core.utils.function_calling import (
 
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
+from open_webui.utils.http_client import get_http_session
 from open_webui.utils.plugin import load_tool_module_by_id
 from open_webui.env import (
     SRC_LOG_LEVELS,
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
     AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+    TOOL_SERVER_SPEC_CACHE_TTL,
 )
 
 import copy
@@ -92,6 +96,7 @@ async def get_tools(
     request: Request, tool_ids: list[str], user: UserModel, extra_params: dict
 ) -> dict[str, dict]:
     tools_dict = {}
+    tool_servers = None
 
     for tool_id in tool_ids:
         tool = Tools.get_tool_by_id(tool_id)
@@ -114,11 +119,12 @@ async def get_tools(
 
                 if type == "openapi":
 
-                    tool_server_data = None
-                    for server in await get_tool_servers(request):
-                        if server["id"] == server_id:
-                            tool_server_data = server
-                            break
+                    if tool_servers is None:
+                        tool_servers = {
+                            server["id"]: server
+                            for server in await get_tool_servers(request)
+                        }
+                    tool_server_data = tool_servers.get(server_id)
 
                     if tool_server_data is None:
                         log.warning(f"Tool server data not found for {server_id}")
@@ -520,66 +526,76 @@ async def set_tool_servers(request: Request):
     request.app.state.TOOL_SERVERS = await get_tool_servers_data(
         request.app.state.config.TOOL_SERVER_CONNECTIONS
     )
-
-    if request.app.state.redis is not None:
-        await request.app.state.redis.set(
-            "tool_servers", json.dumps(request.app.state.TOOL_SERVERS)
-        )
-
     return request.app.state.TOOL_SERVERS
 
 
 async def get_tool_servers(request: Request):
-    tool_servers = []
-    if request.app.state.redis is not None:
-        try:
-            tool_servers = json.loads(await request.app.state.redis.get("tool_servers"))
-            request.app.state.TOOL_SERVERS = tool_servers
-        except Exception as e:
-            log.error(f"Error fetching tool_servers from Redis: {e}")
+    servers = request.app.state.config.TOOL_SERVER_CONNECTIONS
 
-    if not tool_servers:
-        tool_servers = await set_tool_servers(request)
+    tool_servers = TOOL_SERVER_SPEC_CACHE.get(servers)
+    if tool_servers is None:
+        # Nothing cached yet for this configuration, fetch the specs once
+        tool_servers = await TOOL_SERVER_SPEC_CACHE.wait_for_refresh(servers)
 
+    request.app.state.TOOL_SERVERS = tool_servers
     return tool_servers
 
 
-async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
+async def fetch_tool_server_spec(
+    token: str,
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Fetch the raw text of a tool server spec, returning it with the `ETag`
+    and `Last-Modified` response headers. The text is None if the server
+    answered that the spec did not change since `etag` / `last_modified`.
+    """
     headers = {
         "Accept": "application/json",
         "Content-Type": "application/json",
     }
     if token:
         headers["Authorization"] = f"Bearer {token}"
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
+    async with get_http_session().get(
+        url,
+        headers=headers,
+        timeout=timeout,
+        ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+    ) as response:
+        if response.status == 304:
+            return None, etag, last_modified
+
+        if response.status != 200:
+            error_body = await response.json()
+            raise Exception(error_body)
+
+        return (
+            await response.text(),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
 
-    error = None
-    try:
-        timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url, headers=headers, ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL
-            ) as response:
-                if response.status != 200:
-                    error_body = await response.json()
-                    raise Exception(error_body)
-
-                text_content = None
 
-                # Check if URL ends with .yaml or .yml to determine format
-                if url.lower().endswith((".yaml", ".yml")):
-                    text_content = await response.text()
-                    res = yaml.safe_load(text_content)
-                else:
-                    text_content = await response.text()
+def parse_tool_server_spec(text_content: str) -> Dict[str, Any]:
+    try:
+        return json.loads(text_content)
+    except json.JSONDecodeError:
+        return yaml.safe_load(text_content)
 
-                try:
-                    res = json.loads(text_content)
-                except json.JSONDecodeError:
-                    try:
-                        res = yaml.safe_load(text_content)
-                    except Exception as e:
-                        raise e
 
+async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
+    error = None
+    try:
+        text_content, _, _ = await fetch_tool_server_spec(token, url)
+        res = parse_tool_server_spec(text_content)
     except Exception as err:
         log.exception(f"Could not fetch tool server spec from {url}")
         if isinstance(err, dict) and "detail" in err:
@@ -592,98 +608,204 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
     return res
 
 
-async def get_tool_servers_data(servers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    # Prepare list of enabled servers along with their original index
-
-    tasks = []
-    server_entries = []
-    for idx, server in enumerate(servers):
-        if (
-            server.get("config", {}).get("enable")
-            and server.get("type", "openapi") == "openapi"
-        ):
-            info = server.get("info", {})
-
-            auth_type = server.get("auth_type", "bearer")
-            token = None
-
-            if auth_type == "bearer":
-                token = server.get("key", "")
-            elif auth_type == "none":
-                # No authentication
-                pass
-
-            id = info.get("id")
-            if not id:
-                id = str(idx)
-
-            server_url = server.get("url")
-            spec_type = server.get("spec_type", "url")
-
-            # Create async tasks to fetch data
-            task = None
+def get_enabled_tool_servers(
+    servers: List[Dict[str, Any]],
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """Enabled OpenAPI tool server connections, with their original index."""
+    return [
+        (idx, server)
+        for idx, server in enumerate(servers)
+        if server.get("config", {}).get("enable")
+        and server.get("type", "openapi") == "openapi"
+    ]
+
+
+def get_tool_server_result(
+    idx: int, server: Dict[str, Any], openapi_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    info = server.get("info", {})
+
+    id = info.get("id")
+    if not id:
+        id = str(idx)
+
+    specs = convert_openapi_to_tool_payload(openapi_data)
+    openapi_info = openapi_data.get("info", {})
+
+    if info and isinstance(openapi_data, dict):
+        openapi_data["info"] = openapi_data.get("info", {})
+
+        if "name" in info:
+            openapi_data["info"]["title"] = info.get("name", "Tool Server")
+
+        if "description" in info:
+            openapi_data["info"]["description"] = info.get("description", "")
+
+    return {
+        "id": str(id),
+        "idx": idx,
+        "url": server.get("url"),
+        "openapi": openapi_data,
+        "info": openapi_info,
+        "specs": specs,
+    }
+
+
+class ToolServerSpecCache:
+    """
+    Parsed specs and tool payloads of OpenAPI tool servers, keyed by the
+    connection settings so that editing a connection starts over.
+
+    Specs older than `ttl` seconds keep being served while they are
+    revalidated in the background with `If-None-Match` / `If-Modified-Since`,
+    and are only parsed again when their content changed. A server that fails
+    to answer keeps its last spec until the next revalidation.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries: dict[str, dict] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def get_key(idx: int, server: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps([idx, server], sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get(self, servers: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        The cached tool servers, or None if one of them was never fetched.
+        Schedules a background revalidation of expired entries.
+        """
+        results = []
+        expired = False
+        now = time.time()
+        for idx, server in get_enabled_tool_servers(servers):
+            entry = self._entries.get(self.get_key(idx, server))
+            if entry is None:
+                return None
+
+            if entry["result"] is not None:
+                results.append(entry["result"])
+            if entry["expires_at"] <= now:
+                expired = True
+
+        if expired:
+            self._schedule_refresh(servers)
+        return results
+
+    def _schedule_refresh(self, servers: List[Dict[str, Any]]) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(
+                self.refresh(servers, expired_only=True)
+            )
+        return self._refresh_task
+
+    async def wait_for_refresh(
+        self, servers: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        # Concurrent callers share one fetch instead of each hitting the servers
+        await asyncio.shield(self._schedule_refresh(servers))
+
+        results = self.get(servers)
+        if results is None:
+            # The fetch that was running was for a previous configuration
+            results = await self.refresh(servers)
+        return results
+
+    async def refresh(
+        self, servers: List[Dict[str, Any]], expired_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Revalidate the specs of `servers` and return the tool servers."""
+        now = time.time()
+        keys = []
+        tasks = []
+        for idx, server in get_enabled_tool_servers(servers):
+            key = self.get_key(idx, server)
+            keys.append(key)
+
+            entry = self._entries.get(key)
+            if expired_only and entry is not None and entry["expires_at"] > now:
+                continue
+            tasks.append(self._revalidate(key, idx, server, entry))
+
+        await asyncio.gather(*tasks)
+
+        # Forget connections that were removed or edited
+        for key in set(self._entries).difference(keys):
+            self._entries.pop(key, None)
+
+        return [
+            self._entries[key]["result"]
+            for key in keys
+            if key in self._entries and self._entries[key]["result"] is not None
+        ]
+
+    async def _revalidate(
+        self,
+        key: str,
+        idx: int,
+        server: Dict[str, Any],
+        entry: Optional[dict],
+    ):
+        entry = dict(entry or {"result": None, "hash": None})
+        entry.setdefault("etag", None)
+        entry.setdefault("last_modified", None)
+
+        server_url = server.get("url")
+        spec_type = server.get("spec_type", "url")
+
+        try:
             if spec_type == "url":
+                token = None
+                if server.get("auth_type", "bearer") == "bearer":
+                    token = server.get("key", "")
+
                 # Path (to OpenAPI spec URL) can be either a full URL or a path to append to the base URL
                 openapi_path = server.get("path", "openapi.json")
                 spec_url = get_tool_server_url(server_url, openapi_path)
-                # Fetch from URL
-                task = get_tool_server_data(token, spec_url)
+
+                text_content, etag, last_modified = await fetch_tool_server_spec(
+                    token, spec_url, entry["etag"], entry["last_modified"]
+                )
+                expires_at = time.time() + self.ttl
             elif spec_type == "json" and server.get("spec", ""):
-                # Use provided JSON spec
-                spec_json = None
-                try:
-                    spec_json = json.loads(server.get("spec", ""))
-                except Exception as e:
-                    log.error(f"Error parsing JSON spec for tool server {id}: {e}")
-
-                if spec_json:
-                    task = asyncio.sleep(
-                        0,
-                        result=spec_json,
-                    )
+                # Provided inline, only changes with the connection settings
+                text_content = server.get("spec", "")
+                etag, last_modified = None, None
+                expires_at = float("inf")
+            else:
+                # Nothing to fetch, so the connection serves no tools until its
+                # settings change instead of being looked up on every request
+                text_content, etag, last_modified = None, None, None
+                expires_at = float("inf")
+
+            if text_content is not None:
+                content_hash = hashlib.sha256(text_content.encode()).hexdigest()
+                if entry["result"] is None or content_hash != entry["hash"]:
+                    openapi_data = parse_tool_server_spec(text_content)
+                    entry["result"] = get_tool_server_result(idx, server, openapi_data)
+                    entry["hash"] = content_hash
+
+            # Only remember the validators of a spec that was parsed, so that a
+            # spec that failed to parse is fetched again in full
+            entry["etag"], entry["last_modified"] = etag, last_modified
+        except Exception as e:
+            log.error(f"Failed to connect to {server_url} OpenAPI tool server: {e}")
+            # Retried on the next revalidation, serving the last spec meanwhile
+            expires_at = time.time() + self.ttl
 
-            if task:
-                tasks.append(task)
-                server_entries.append((id, idx, server, server_url, info, token))
+        entry["expires_at"] = expires_at
+        self._entries[key] = entry
 
-    # Execute tasks concurrently
-    responses = await asyncio.gather(*tasks, return_exceptions=True)
 
-    # Build final results with index and server metadata
-    results = []
-    for (id, idx, server, url, info, _), response in zip(server_entries, responses):
-        if isinstance(response, Exception):
-            log.error(f"Failed to connect to {url} OpenAPI tool server")
-            continue
+TOOL_SERVER_SPEC_CACHE = ToolServerSpecCache(TOOL_SERVER_SPEC_CACHE_TTL)
 
-        response = {
-            "openapi": response,
-            "info": response.get("info", {}),
-            "specs": convert_openapi_to_tool_payload(response),
-        }
-
-        openapi_data = response.get("openapi", {})
-        if info and isinstance(openapi_data, dict):
-            openapi_data["info"] = openapi_data.get("info", {})
-
-            if "name" in info:
-                openapi_data["info"]["title"] = info.get("name", "Tool Server")
-
-            if "description" in info:
-                openapi_data["info"]["description"] = info.get("description", "")
-
-        results.append(
-            {
-                "id": str(id),
-                "idx": idx,
-                "url": server.get("url"),
-                "openapi": openapi_data,
-                "info": response.get("info"),
-                "specs": response.get("specs"),
-            }
-        )
 
-    return results
+async def get_tool_servers_data(servers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Revalidates every enabled server, parsing only the specs that changed
+    return await TOOL_SERVER_SPEC_CACHE.refresh(servers)
 
 
 async def execute_tool_server(
@@ -749,50 +871,50 @@ async def execute_tool_server(
             if params:
                 body_params = params
 
-        async with aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        ) as session:
-            request_method = getattr(session, http_method.lower())
-
-            if http_method in ["post", "put", "patch"]:
-                async with request_method(
-                    final_url,
-                    json=body_params,
-                    headers=headers,
-                    cookies=cookies,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                    allow_redirects=False,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-
-                    try:
-                        response_data = await response.json()
-                    except Exception:
-                        response_data = await response.text()
-
-                    response_headers = response.headers
-                    return (response_data, response_headers)
-            else:
-                async with request_method(
-                    final_url,
-                    headers=headers,
-                    cookies=cookies,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                    allow_redirects=False,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-
-                    try:
-                        response_data = await response.json()
-                    except Exception:
-                        response_data = await response.text()
-
-                    response_headers = response.headers
-                    return (response_data, response_headers)
+        request_method = getattr(get_http_session(), http_method.lower())
+        timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
+
+        if http_method in ["post", "put", "patch"]:
+            async with request_method(
+                final_url,
+                json=body_params,
+                headers=headers,
+                cookies=cookies,
+                timeout=timeout,
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+                allow_redirects=False,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+
+                try:
+                    response_data = await response.json()
+                except Exception:
+                    response_data = await response.text()
+
+                response_headers = response.headers
+                return (response_data, response_headers)
+        else:
+            async with request_method(
+                final_url,
+                headers=headers,
+                cookies=cookies,
+                timeout=timeout,
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+                allow_redirects=False,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+
+                try:
+                    response_data = await response.json()
+                except Exception:
+                    response_data = await response.text()
+
+                response_headers = response.headers
+                return (response_data, response_headers)
 
     except Exception as err:
         error = str(err)
@@ -1,7 +1,12 @@
 import { WEBUI_API_BASE_URL } from '$lib/constants';
 import { splitStream } from '$lib/utils';
 
-export const uploadFile = async (token: string, file: File, metadata?: object | null) => {
+export const uploadFile = async (
+	token: string,
+	file: File,
+	metadata?: object | null,
+	priority?: 'high' | 'normal' | 'low'
+) => {
 	const data = new FormData();
 	data.append('file', file);
 	if (metadata) {
@@ -10,7 +15,12 @@ export const uploadFile = async (token: string, file: File, metadata?: object |
 
 	let error = null;
 
-	const res = await fetch(`${WEBUI_API_BASE_URL}/files/`, {
+	const searchParams = new URLSearchParams();
+	if (priority) {
+		searchParams.append('priority', priority);
+	}
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/files/?${searchParams.toString()}`, {
 		method: 'POST',
 		headers: {
 			Accept: 'application/json',
@@ -59,6 +69,10 @@ export const uploadFile = async (token: string, file: File, metadata?: object |
 								let data = JSON.parse(line.replace(/^data: /, ''));
 								console.log(data);
 
+								if (data?.status) {
+									res.data = { ...(res.data ?? {}), status: data.status };
+								}
+
 								if (data?.error) {
 									console.error(data.error);
 									res.error = data.error;